@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark for grouping query captures into matches.
+
+Generates a Python file with many functions, runs the function_definition
+query on it once, and times QueryBasedPattern._process_query_results with
+the bisect-based group index against the previous linear scan over all
+groups. The matches of both are compared to check that the grouping is
+unchanged.
+
+Usage:
+    python benchmarks/capture_grouping.py [--functions 20000] [--rounds 3]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src import pattern_base
+from src.parser import CodeParser
+from src.patterns.function_patterns import FunctionDefinitionPattern
+
+class LinearGroupIndex:
+    """The previous grouping: scan every group for the closest one."""
+    
+    def __init__(self):
+        self.groups = []
+    
+    def add(self, line, key):
+        self.groups.append((line, key))
+    
+    def closest(self, line):
+        closest_key = None
+        closest_distance = float('inf')
+        for group_line, key in self.groups:
+            distance = abs(group_line - line)
+            if distance < closest_distance:
+                closest_distance = distance
+                closest_key = key
+        return closest_key, closest_distance
+
+def generate_source(functions):
+    """Generate a module with the given number of small functions."""
+    lines = []
+    for i in range(functions):
+        lines.append(f"def function_{i}(a, b=1, *args):")
+        lines.append(f"    value = a + b + {i}")
+        lines.append("    return value")
+        lines.append("")
+    return "\n".join(lines)
+
+def time_grouping(pattern, query_results, code, rounds):
+    """Time _process_query_results, returning the best time and the matches."""
+    best = float('inf')
+    matches = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        matches = pattern._process_query_results(query_results, code, 'python', 'generated.py')
+        best = min(best, time.perf_counter() - start)
+    return best, matches
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--functions", type=int, default=20000, help="Number of generated functions")
+    arg_parser.add_argument("--rounds", type=int, default=3, help="Timed rounds; the best is reported")
+    args = arg_parser.parse_args()
+    
+    parser = CodeParser()
+    if not parser.manager.ensure_language_installed('python'):
+        sys.exit("The Python grammar is not available")
+    
+    pattern = FunctionDefinitionPattern()
+    code = generate_source(args.functions)
+    tree = parser.parse_code(code, 'python')
+    query_results = parser.query(tree, pattern.get_query_string('python'), 'python')
+    print(f"{args.functions} functions, {len(query_results)} captures")
+    
+    indexed_time, indexed_matches = time_grouping(pattern, query_results, code, args.rounds)
+    print(f"bisect index: {indexed_time:8.3f}s")
+    
+    with mock.patch.object(pattern_base, '_CaptureGroupIndex', LinearGroupIndex):
+        linear_time, linear_matches = time_grouping(pattern, query_results, code, 1)
+    print(f"linear scan:  {linear_time:8.3f}s")
+    
+    if indexed_matches != linear_matches:
+        sys.exit("Grouping differs from the linear scan")
+    print(f"{len(indexed_matches)} identical matches, {linear_time / indexed_time:.1f}x faster")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark for CLI startup and import time.
+
+Runs a few short CLI invocations and module imports in fresh interpreters
+and reports the best wall-clock time of each, together with the pattern
+modules each one ended up importing. Listing patterns and printing help
+should not import any pattern module. With --budget-ms, exits with a
+non-zero status when a target is slower than the budget, so the script
+can guard startup time in CI.
+
+Usage:
+    python benchmarks/import_time.py [--rounds 5] [--budget-ms 250] [--importtime]
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Name and Python statement of each measured target
+TARGETS = (
+    ("cli --help", "import sys; sys.argv = ['code-pattern', '--help']\n"
+                   "from src.cli.main import main\n"
+                   "try:\n    main()\nexcept SystemExit:\n    pass"),
+    ("cli list", "import sys, io, contextlib\n"
+                 "from src.cli.main import main\n"
+                 "with contextlib.redirect_stdout(io.StringIO()):\n    main(['list'])"),
+    ("import src.analyzer", "import src.analyzer"),
+    ("import src.pattern_registry", "import src.pattern_registry"),
+)
+
+# Appended to each target to report the pattern modules it imported
+REPORT_MODULES = (
+    "\nimport sys as _sys, json as _json\n"
+    "print('\\n' + _json.dumps(sorted(m for m in _sys.modules if m.startswith('src.patterns.'))))"
+)
+
+def run_target(statement, rounds):
+    """Run a statement in fresh interpreters.
+    
+    Args:
+        statement: The Python code to run
+        rounds: Number of runs; the best is reported
+    
+    Returns:
+        The best wall-clock time in milliseconds and the pattern modules imported
+    """
+    best = float('inf')
+    modules = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "-c", statement + REPORT_MODULES],
+            cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        best = min(best, (time.perf_counter() - start) * 1000)
+        modules = json.loads(completed.stdout.strip().splitlines()[-1])
+    return best, modules
+
+def print_importtime(module, top):
+    """Print the slowest imports of a module, as reported by -X importtime.
+    
+    Args:
+        module: The module to import
+        top: Number of entries to print
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    
+    entries = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        entries.append((int(cumulative), name.strip()))
+    
+    print(f"\nSlowest imports of {module} (cumulative):")
+    for cumulative, name in sorted(entries, reverse=True)[:top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--rounds", type=int, default=5, help="Runs per target; the best is reported")
+    arg_parser.add_argument("--budget-ms", type=float, help="Fail if a target takes longer than this")
+    arg_parser.add_argument("--importtime", action="store_true",
+                            help="Also print the slowest imports of src.cli.main")
+    args = arg_parser.parse_args()
+    
+    # Startup of a bare interpreter, for reference
+    interpreter_ms, _ = run_target("pass", args.rounds)
+    print(f"{'python -c pass':30} {interpreter_ms:8.1f} ms")
+    
+    over_budget = []
+    for name, statement in TARGETS:
+        elapsed, modules = run_target(statement, args.rounds)
+        print(f"{name:30} {elapsed:8.1f} ms  {len(modules)} pattern modules imported")
+        if args.budget_ms is not None and elapsed > args.budget_ms:
+            over_budget.append(name)
+    
+    if args.importtime:
+        print_importtime("src.cli.main", 15)
+    
+    if over_budget:
+        sys.exit(f"Over the {args.budget_ms:.0f} ms budget: {', '.join(over_budget)}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the memory taken by pattern matches.
+
+Builds the same number of one-capture matches as dictionaries, the way
+patterns produced them before, and as Match records, and reports the
+memory allocated per match by each, as measured by tracemalloc. Matches
+are spread over a number of files whose paths are built anew for each
+match, as they are when results are loaded from the cache.
+
+Usage:
+    python benchmarks/match_memory.py [--matches 200000] [--files 1000]
+"""
+
+import argparse
+import sys
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.match import CaptureSpan, Match
+
+def as_dict(i, file_path):
+    """Build a match as a dictionary, with a dictionary for its capture."""
+    return {
+        'type': 'function_definition',
+        'name': f'function_{i % 100}',
+        'line': i,
+        'column': 4,
+        'end_line': i + 3,
+        'end_column': 20,
+        'file': file_path,
+        'function': {'text': 'def function(): ...', 'line': i, 'column': 4, 'end_line': i + 3, 'end_column': 20},
+    }
+
+def as_match(i, file_path):
+    """Build the same match as a Match record."""
+    match = Match('function_definition', f'function_{i % 100}', i, 4, i + 3, 20, file_path)
+    match['function'] = CaptureSpan('def function(): ...', i, 4, i + 3, 20)
+    return match
+
+def measure(build, matches, files):
+    """Measure the memory held by a list of matches.
+    
+    Args:
+        build: Function building one match from its index and file path
+        matches: Number of matches to build
+        files: Number of distinct file paths
+    
+    Returns:
+        The bytes allocated per match
+    """
+    tracemalloc.start()
+    held = [build(i, f"/home/user/projects/service/src/module_{i % files}.py") for i in range(matches)]
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return allocated / matches
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--matches", type=int, default=200000, help="Number of matches to build")
+    arg_parser.add_argument("--files", type=int, default=1000, help="Number of distinct file paths")
+    args = arg_parser.parse_args()
+    
+    dict_bytes = measure(as_dict, args.matches, args.files)
+    match_bytes = measure(as_match, args.matches, args.files)
+    
+    print(f"{'dict':10} {dict_bytes:8.1f} bytes per match")
+    print(f"{'Match':10} {match_bytes:8.1f} bytes per match  ({match_bytes / dict_bytes:.0%} of dict)")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Stress benchmark for concurrent parsing through the parser pool.
+
+Parses the same corpus from many threads at once and checks every tree
+against a single-threaded reference parse, then reports the throughput
+for each thread count and the parser pool statistics.
+
+Usage:
+    python benchmarks/parser_pool_stress.py [corpus_dir] [--threads 1 2 4 8]
+        [--rounds 3] [--pool-size N]
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.tree_sitter_manager import TreeSitterManager
+
+def load_corpus(directory, manager):
+    """Read every parseable file under a directory.
+    
+    Args:
+        directory: Root of the corpus
+        manager: TreeSitterManager used to detect languages
+    
+    Returns:
+        A list of (path, language, bytes) tuples
+    """
+    corpus = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [d for d in dirs if not d.startswith('.') and d not in ('node_modules', '__pycache__')]
+        for name in sorted(files):
+            path = Path(root) / name
+            language = manager.get_language_by_extension(path)
+            if language and manager.ensure_language_installed(language):
+                corpus.append((path, language, path.read_bytes()))
+    return corpus
+
+def tree_digest(tree):
+    """Fingerprint the structure of a tree."""
+    return hashlib.blake2b(tree.root_node.sexp().encode('utf-8'), digest_size=16).hexdigest()
+
+def run(manager, corpus, reference, threads, rounds):
+    """Parse the corpus `rounds` times from a pool of threads.
+    
+    Only parsing is timed; the trees are checked against the reference
+    afterwards.
+    
+    Returns:
+        (elapsed seconds, number of trees that did not match the reference)
+    """
+    jobs = [item for _ in range(rounds) for item in corpus]
+    
+    def parse(item):
+        path, language, data = item
+        return path, manager.parse_code(data, language)
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        trees = list(executor.map(parse, jobs))
+    elapsed = time.perf_counter() - start
+    
+    mismatches = sum(1 for path, tree in trees if tree_digest(tree) != reference[path])
+    return elapsed, mismatches
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('corpus', nargs='?',
+                        default=str(Path(__file__).resolve().parent.parent / 'src'),
+                        help='Directory of source files to parse (default: src/)')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8],
+                        help='Thread counts to benchmark')
+    parser.add_argument('--rounds', type=int, default=3,
+                        help='Times each file is parsed per thread count')
+    parser.add_argument('--pool-size', type=int, default=None,
+                        help='Maximum parsers per language (default: one per thread)')
+    args = parser.parse_args()
+    
+    manager = TreeSitterManager(parser_pool_size=args.pool_size)
+    corpus = load_corpus(args.corpus, manager)
+    if not corpus:
+        print(f"No parseable files found in {args.corpus}")
+        return 1
+    
+    total_bytes = sum(len(data) for _, _, data in corpus)
+    reference = {path: tree_digest(manager.parse_code(data, language)) for path, language, data in corpus}
+    print(f"Corpus: {len(corpus)} files, {total_bytes / 1024:.0f} KiB, {args.rounds} rounds")
+    
+    failed = False
+    baseline = None
+    for threads in args.threads:
+        elapsed, mismatches = run(manager, corpus, reference, threads, args.rounds)
+        rate = total_bytes * args.rounds / elapsed / (1024 * 1024)
+        baseline = baseline or rate
+        print(f"{threads:3d} threads: {elapsed:7.3f}s  {rate:7.1f} MiB/s  "
+              f"x{rate / baseline:4.2f}  mismatches: {mismatches}")
+        failed = failed or mismatches > 0
+    
+    for language, pool in sorted(manager.parser_pools.items()):
+        print(f"pool {language}: {pool.get_stats()}")
+    
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
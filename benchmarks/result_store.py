@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the columnar result store.
+
+Builds synthetic analysis results with the given number of matches,
+stores them in a ResultStore and reports the time to save and load the
+store and to summarize it, next to the time taken to summarize the same
+results from an NDJSON report and as dictionaries in memory. With --budget-ms, exits with a non-zero
+status when loading takes longer than the budget.
+
+Usage:
+    python benchmarks/result_store.py [--matches 1000000] [--files 20000] [--budget-ms 1000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from src.ndjson_report import load_ndjson_summary, write_ndjson
+from src.result_store import ResultStore, numpy_module
+from src.visualization import summarize_results
+
+PATTERNS = ('function_definition', 'class_definition', 'method_definition', 'import_statement', 'singleton')
+TYPES = ('function', 'class', 'method', 'import', 'design_pattern')
+LANGUAGES = ('python', 'javascript', 'typescript', 'java', 'go')
+
+def make_results(matches, files):
+    """Build synthetic analysis results.
+    
+    Args:
+        matches: Total number of matches
+        files: Number of files to spread them over
+    
+    Returns:
+        One analysis result per file
+    """
+    results = []
+    per_file = matches // files
+    for file_index in range(files):
+        file_path = f"/home/user/projects/service/src/package_{file_index % 50}/module_{file_index}.py"
+        patterns = {}
+        for i in range(per_file):
+            kind = (file_index + i) % len(PATTERNS)
+            patterns.setdefault(PATTERNS[kind], []).append({
+                'type': TYPES[kind],
+                'name': f'symbol_{i % 500}',
+                'line': i * 3 + 1,
+                'column': 4,
+                'end_line': i * 3 + 3,
+                'end_column': 20,
+                'file': file_path,
+            })
+        results.append({
+            'file': file_path,
+            'language': LANGUAGES[file_index % len(LANGUAGES)],
+            'patterns': patterns,
+            'summary': {
+                'total_patterns': per_file,
+                'pattern_counts': {name: len(found) for name, found in patterns.items()},
+                'type_counts': {TYPES[PATTERNS.index(name)]: len(found) for name, found in patterns.items()},
+            },
+        })
+    return results
+
+def timed(function, *args):
+    """Call a function and measure how long it takes.
+    
+    Returns:
+        The result of the call and the elapsed time in milliseconds
+    """
+    start = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    arg_parser.add_argument("--matches", type=int, default=1000000, help="Number of matches")
+    arg_parser.add_argument("--files", type=int, default=20000, help="Number of files")
+    arg_parser.add_argument("--budget-ms", type=float, help="Fail if loading takes longer than this")
+    args = arg_parser.parse_args()
+    
+    results = make_results(args.matches, args.files)
+    print(f"{args.matches} matches in {args.files} files, numpy {'enabled' if numpy_module() is not None else 'not installed'}")
+    
+    store, build_ms = timed(ResultStore.from_results, results)
+    print(f"{'build store':24} {build_ms:8.1f} ms")
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "results.cpas")
+        _, save_ms = timed(store.save, path)
+        print(f"{'save':24} {save_ms:8.1f} ms  {os.path.getsize(path) / 1e6:.1f} MB")
+        store, load_ms = timed(ResultStore.load, path)
+        print(f"{'load':24} {load_ms:8.1f} ms")
+        
+        ndjson_path = os.path.join(tmp, "results.ndjson")
+        with open(ndjson_path, "w", encoding="utf-8") as f:
+            write_ndjson(results, f)
+        _, ndjson_ms = timed(load_ndjson_summary, ndjson_path)
+        print(f"{'summarize NDJSON report':24} {ndjson_ms:8.1f} ms  {os.path.getsize(ndjson_path) / 1e6:.1f} MB")
+    
+    summary, summary_ms = timed(store.summary)
+    print(f"{'summarize store':24} {summary_ms:8.1f} ms")
+    expected, dict_ms = timed(summarize_results, results)
+    print(f"{'summarize_results':24} {dict_ms:8.1f} ms")
+    if summary != expected:
+        sys.exit("The store summary differs from summarize_results")
+    
+    if args.budget_ms is not None and load_ms > args.budget_ms:
+        sys.exit(f"Loading took {load_ms:.0f} ms, over the {args.budget_ms:.0f} ms budget")
+
+if __name__ == '__main__':
+    main()
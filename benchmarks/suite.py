@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the analysis pipeline.
+
+Generates a deterministic synthetic corpus and times discovery, parsing,
+pattern matching (in total and per pattern), architecture detection,
+complexity metrics and report generation separately. The same as
+`code-pattern bench`; see src/benchmark_suite.py.
+
+Usage:
+    python benchmarks/suite.py [--files 1000] [--seed 0] [--languages python java]
+        [--stages parse match] [--repeat 3] [--output results.json]
+        [--baseline baseline.json] [--threshold 0.25]
+"""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.cli.main import main
+
+if __name__ == '__main__':
+    sys.exit(main(["bench"] + sys.argv[1:]))
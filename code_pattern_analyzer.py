@@ -20,6 +20,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from src.cli import main as cli_main
 from src.analyzer import CodeAnalyzer
+from src.match import to_json_default
 from src.flow.control_flow import ControlFlowAnalyzer
 from src.flow.data_flow import DataFlowAnalyzer
 from src.metrics.complexity.complexity_analyzer import ComplexityAnalyzer
@@ -263,7 +264,7 @@ def generate_json_report(results: Dict[str, Any], output_path: str) -> None:
     import json
     
     with open(output_path, "w") as f:
-        json.dump(results, f, indent=2)
+        json.dump(results, f, indent=2, default=to_json_default)
 
 
 def generate_text_report(results: Dict[str, Any], output_path: str) -> None:
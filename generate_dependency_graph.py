@@ -282,22 +282,24 @@ class DependencyAnalyzer:
         project_root = os.path.abspath(directory)
         
         # Get all Python files in the directory
-        file_results = self.analyzer.analyze_directory(
+        discovered = self.analyzer.discover_files(
             directory, 
             exclude_dirs=exclude_dirs,
             file_extensions=['.py'] if not file_extensions else file_extensions
         )
+        file_paths = [os.path.join(project_root, os.path.relpath(f.path, directory)) for f in discovered]
         
         # Map file paths to module names
-        self._map_file_to_module(project_root, [r['file'] for r in file_results if 'error' not in r])
+        self._map_file_to_module(project_root, file_paths)
         
         # Analyze each file for dependencies
-        for result in file_results:
-            if 'error' in result:
+        for file_path in file_paths:
+            try:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    code = f.read()
+            except (OSError, UnicodeDecodeError) as e:
+                logger.warning(f"Could not read {file_path}: {e}")
                 continue
-                
-            file_path = result['file']
-            code = result['code']
             
             # Skip non-Python files
             if not file_path.endswith('.py'):
@@ -23,6 +23,7 @@ from src.analyzer import CodeAnalyzer
 from src.patterns.architectural_styles import ArchitecturalStyleDetector
 from src.patterns.architectural_anti_patterns import ArchitecturalAntiPatternDetector
 from src.commands.anti_patterns import generate_text_report, generate_html_report
+from src.match import to_json_default
 
 def analyze_anti_patterns(directory_path, output_format='text'):
     """Run architectural anti-pattern analysis on a directory.
@@ -66,7 +67,7 @@ def analyze_anti_patterns(directory_path, output_format='text'):
     
     # Generate output in the specified format
     if output_format == 'json':
-        return json.dumps(anti_pattern_analysis, indent=2)
+        return json.dumps(anti_pattern_analysis, indent=2, default=to_json_default)
     elif output_format == 'text':
         return generate_text_report(anti_pattern_analysis, str(directory_path))
     elif output_format == 'html':
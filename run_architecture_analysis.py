@@ -22,6 +22,7 @@ from src.analyzer import CodeAnalyzer
 from src.patterns.architectural_intents import ArchitecturalIntentDetector
 from src.patterns.architectural_intents.separation_of_concerns import SeparationOfConcernsIntent
 from src.commands.architecture import generate_text_report, generate_html_report
+from src.match import to_json_default
 
 def analyze_architecture(directory_path, output_format='text'):
     """Run architectural intent analysis on a directory.
@@ -93,7 +94,7 @@ def analyze_architecture(directory_path, output_format='text'):
     
     # Generate output in the specified format
     if output_format == 'json':
-        return json.dumps(architecture_analysis, indent=2)
+        return json.dumps(architecture_analysis, indent=2, default=to_json_default)
     elif output_format == 'text':
         return generate_text_report(architecture_analysis, str(directory_path))
     elif output_format == 'html':
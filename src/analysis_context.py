@@ -0,0 +1,160 @@
+"""
+Per-file state shared by all patterns matched against one file.
+"""
+
+from typing import Any, Callable, Dict, FrozenSet, Hashable, List, Optional, Union
+import threading
+
+import tree_sitter
+
+from .source_buffer import SourceBuffer
+
+# Parser used by patterns matched without a context, created on first use
+_default_parser = None
+_default_parser_lock = threading.Lock()
+
+def get_default_parser():
+    """Get the parser shared by pattern matches that run without a context.
+    
+    Returns:
+        A process-wide CodeParser, created on the first call
+    """
+    global _default_parser
+    
+    with _default_parser_lock:
+        if _default_parser is None:
+            from .parser import CodeParser
+            _default_parser = CodeParser()
+        return _default_parser
+
+class AnalysisContext:
+    """Everything known about one file while its patterns are matched.
+    
+    A context is created once per file and passed to every Pattern.match,
+    so patterns share the parser instead of building their own, and
+    intermediate results (such as the results of a query that several
+    patterns run) are computed once per file.
+    """
+    
+    def __init__(self,
+                 tree: tree_sitter.Tree,
+                 source: Union[str, bytes, SourceBuffer],
+                 language: str,
+                 file_path: Optional[str] = None,
+                 parser=None,
+                 profile=None,
+                 budget=None):
+        """Initialize the context of a file.
+        
+        Args:
+            tree: The AST of the file
+            source: The source code that was parsed, as text, bytes or a SourceBuffer
+            language: The language of the source code
+            file_path: Optional path to the file that was parsed
+            parser: CodeParser to run queries with. If None, uses the shared default parser.
+            profile: Optional FileProfile to record the time spent in each pattern in
+            budget: Optional FileBudget the analysis of the file must stay within
+        """
+        self.tree = tree
+        self.source = SourceBuffer.wrap(source)
+        self.language = language
+        self.file_path = file_path
+        self.parser = parser if parser is not None else get_default_parser()
+        self.profile = profile
+        self.budget = budget
+        self.memo: Dict[Hashable, Any] = {}
+    
+    @property
+    def data(self) -> bytes:
+        """The source code as UTF-8 bytes."""
+        return self.source.data
+    
+    @property
+    def text(self) -> str:
+        """The source code as text, decoded on first access."""
+        return self.source.text
+    
+    def memoize(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Get an intermediate result, computing it on first use.
+        
+        Args:
+            key: Identifies the result within this file
+            compute: Computes the result if it is not memoized yet
+        
+        Returns:
+            The memoized result
+        """
+        if key not in self.memo:
+            self.memo[key] = compute()
+        return self.memo[key]
+    
+    def query(self, query_string: str) -> List[Dict]:
+        """Run a query against the tree, once per query string.
+        
+        Args:
+            query_string: The query string in tree-sitter query language
+        
+        Returns:
+            The query results in the format of CodeParser.query
+        """
+        return self.memoize(("query", query_string), lambda: self._run_query(query_string))
+    
+    def _run_query(self, query_string: str) -> List[Dict]:
+        return self.parser.query(self.tree, query_string, self.language, budget=self.budget)
+    
+    def prefilter(self, pattern_name: str, keywords: Optional[FrozenSet[bytes]]) -> bool:
+        """Check whether a pattern's query can match in this file, judging by its keywords.
+        
+        Whether the file contains each keyword is looked up once per file.
+        
+        Args:
+            pattern_name: The name of the pattern, for the profile
+            keywords: Literals of which the file must contain one, from
+                QueryBasedPattern.get_keywords, or None
+        
+        Returns:
+            False if the file contains none of the keywords
+        """
+        if not keywords:
+            return True
+        
+        data = self.data
+        present = any(self.memoize(("keyword", keyword), lambda: keyword in data) for keyword in keywords)
+        if self.profile is not None:
+            self.profile.add_prefilter(pattern_name, not present)
+        return present
+    
+    def pattern_matches(self, pattern_name: str, compute: Callable[[], List[Dict]]) -> List[Dict]:
+        """Get the matches of a pattern in this file, matching it on first use.
+        
+        Patterns are identified by their registered name, so a composite
+        reuses the matches of a sub-pattern that was already matched on its
+        own, and vice versa. The returned list is shared: callers that
+        change the matches must copy them first.
+        
+        Args:
+            pattern_name: The name of the pattern
+            compute: Matches the pattern if it has not been matched yet
+        
+        Returns:
+            The matches of the pattern
+        """
+        return self.memoize(("matches", pattern_name), compute)
+    
+    def set_pattern_matches(self, pattern_name: str, matches: List[Dict]) -> None:
+        """Record the matches of a pattern that was matched by other means.
+        
+        Args:
+            pattern_name: The name of the pattern
+            matches: The matches of the pattern
+        """
+        self.memo[("matches", pattern_name)] = matches
+    
+    def set_query_results(self, query_string: str, results: List[Dict]) -> None:
+        """Record the results of a query that was run by other means.
+        
+        Args:
+            query_string: The query string in tree-sitter query language
+            results: The query results in the format of CodeParser.query
+        """
+        self.memo[("query", query_string)] = results
@@ -2,15 +2,29 @@
 Analyzer for detecting patterns in source code files and directories.
 """
 
-from typing import Dict, List, Optional, Set, Union
-from pathlib import Path
-import os
+from typing import IO, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Union
+from pathlib import Path, PurePosixPath
 import json
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import textwrap
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
 
 from .parser import CodeParser
 from .pattern_recognizer import PatternRecognizer
+from .source_buffer import SourceBuffer
+from .execution import IN_FLIGHT_PER_WORKER, validate_execution_mode, iter_bounded, iter_process_batches
+from .scheduling import AdaptiveConcurrency, available_cpus, iter_scheduled, plan_windows, with_sizes
+from .file_discovery import DEFAULT_MAX_FILE_SIZE, SNIFF_SIZE, DiscoveredFile, FileDiscovery, classify_contents
+from .git_source import GitBlob, GitRepository
+from .result_cache import ResultCache, content_hash, make_key, relabel_result
+from .incremental import IncrementalAnalyzer
+from .ndjson_report import to_ndjson_line
+from .result_store import ResultStore
+from .match import to_json_default
+from .profiling import Profiler, clock as profile_clock
+from .budget import BUDGET_EXCEEDED, QUARANTINED, AnalysisLimits, BudgetExceeded, Quarantine, skipped_result
 from .mock_implementation import patch_analyzer
 from .tree_sitter_impl import replace_mock_implementation
 
@@ -19,15 +33,31 @@ logger = logging.getLogger(__name__)
 class CodeAnalyzer:
     """Analyzes source code files to identify patterns."""
     
-    def __init__(self, use_mock: bool = False):
+    def __init__(self,
+                 use_mock: bool = False,
+                 cache: Optional[ResultCache] = None,
+                 profiler: Optional[Profiler] = None,
+                 limits: Optional[AnalysisLimits] = AnalysisLimits(),
+                 quarantine: Optional[Quarantine] = None):
         """Initialize the analyzer with a parser and pattern recognizer.
         
         Args:
             use_mock: If True, use the mock implementation instead of tree-sitter
+            cache: Optional persistent cache of per-file results
+            profiler: Optional Profiler to record the time spent in each stage
+                and pattern in
+            limits: Limits on the analysis of each file; a file that exceeds
+                them is skipped. None disables the limits.
+            quarantine: Optional Quarantine recording files that exceeded the
+                limits, which are skipped until they change
         """
         self.parser = CodeParser()
-        self.pattern_recognizer = PatternRecognizer()
+        self.pattern_recognizer = PatternRecognizer(parser=self.parser)
         self.use_mock = use_mock
+        self.cache = cache
+        self.profiler = profiler
+        self.limits = limits
+        self.quarantine = quarantine
         self._restore_func = None
         
         # Configure the implementation
@@ -75,6 +105,31 @@ class CodeAnalyzer:
             pattern_name: If provided, only look for this specific pattern
             category: If provided, only look for patterns in this category
             
+        Returns:
+            A dictionary with analysis results
+        """
+        if self.profiler is None:
+            return self._analyze_file(file_path, pattern_name, category)
+        
+        profile = self.profiler.start_file(str(file_path))
+        try:
+            return self._analyze_file(file_path, pattern_name, category, profile)
+        finally:
+            self.profiler.finish_file(profile)
+    
+    def _analyze_file(self,
+                      file_path: Union[str, Path],
+                      pattern_name: Optional[str] = None,
+                      category: Optional[str] = None,
+                      profile=None) -> Dict:
+        """Analyze a single file, recording the time of each stage in a profile.
+        
+        Args:
+            file_path: Path to the file to analyze
+            pattern_name: If provided, only look for this specific pattern
+            category: If provided, only look for patterns in this category
+            profile: Optional FileProfile of the file
+        
         Returns:
             A dictionary with analysis results
         """
@@ -85,33 +140,335 @@ class CodeAnalyzer:
             if not language:
                 return {"error": f"Unsupported file type: {file_path}", "file": str(file_path)}
             
-            # Read the file
-            with open(file_path, 'r', encoding='utf-8') as f:
-                code = f.read()
+            # Files that exceeded their budget before are skipped unread
+            # until they change
+            if self.quarantine is not None:
+                reason = self.quarantine.check(file_path)
+                if reason:
+                    return skipped_result(file_path, QUARANTINED, f"quarantined after an earlier run: {reason}")
+            budget = self.limits.start() if self.limits is not None else None
             
-            # Parse the file
-            ast = self.parser.parse_file(file_path)
-            if not ast:
-                return {"error": "Failed to parse file", "file": str(file_path)}
+            # Read the file once; the same bytes are parsed and handed
+            # to the patterns, which decode only what they need
+            if profile is not None:
+                profile.language = language
+                started = profile_clock()
+            source = SourceBuffer.from_file(file_path)
+            if profile is not None:
+                profile.add_stage("read", started)
             
-            # Recognize patterns
-            patterns = self.pattern_recognizer.recognize(
-                ast, code, language, pattern_name, category, str(file_path)
+            # Unchanged content analyzed with the same patterns is served
+            # from the cache without parsing
+            cache_key = None
+            if self.cache is not None:
+                if profile is not None:
+                    started = profile_clock()
+                cache_key = self.get_cache_key(
+                    source, language, self._cache_selection(str(file_path), language, pattern_name, category)
+                )
+                cached = self.cache.get(cache_key)
+                if profile is not None:
+                    profile.add_stage("cache", started)
+                if cached is not None:
+                    return relabel_result(cached, str(file_path))
+            
+            return self._analyze_source(
+                source, str(file_path), language, pattern_name, category, budget, cache_key, profile
+            )
+        
+        except BudgetExceeded as e:
+            # Skipped results are not cached: a later run with a larger
+            # budget analyzes the file again. Worker processes leave
+            # recording the file to the parent.
+            if self.quarantine is not None and not self.quarantine.read_only:
+                self.quarantine.add(file_path, str(e))
+            return skipped_result(file_path, BUDGET_EXCEEDED, str(e))
+        except Exception as e:
+            logger.error(f"Error analyzing {file_path}: {e}")
+            return {"error": str(e), "file": str(file_path)}
+    
+    def _analyze_source(self,
+                        source: SourceBuffer,
+                        file_path: str,
+                        language: str,
+                        pattern_name: Optional[str],
+                        category: Optional[str],
+                        budget=None,
+                        cache_key: Optional[str] = None,
+                        profile=None) -> Dict:
+        """Parse a file's source and recognize its patterns.
+        
+        Args:
+            source: The file's source
+            file_path: Path of the file, as recorded in the result
+            language: Language of the file
+            pattern_name: If provided, only look for this specific pattern
+            category: If provided, only look for patterns in this category
+            budget: Optional FileBudget of the file
+            cache_key: If provided, the result is stored in the cache under this key
+            profile: Optional FileProfile of the file
+        
+        Returns:
+            A dictionary with analysis results
+        
+        Raises:
+            BudgetExceeded: If the file exceeds its budget
+        """
+        # Parse the file
+        if profile is not None:
+            started = profile_clock()
+        try:
+            ast = self.parser.parse_source(
+                source, language, timeout=budget.remaining() if budget is not None else None
             )
+        except TimeoutError:
+            budget.timed_out("parsing")
+        if profile is not None:
+            profile.add_stage("parse", started)
+        if not ast:
+            return {"error": "Failed to parse file", "file": file_path}
             
-            # Get summary stats
-            summary = self._generate_summary(patterns)
+        # Recognize patterns
+        if profile is not None:
+            started = profile_clock()
+        patterns = self.pattern_recognizer.recognize(
+            ast, source, language, pattern_name, category, file_path,
+            profile=profile, budget=budget
+        )
+        if profile is not None:
+            profile.add_stage("match", started)
+            started = profile_clock()
             
-            return {
-                "file": str(file_path),
-                "language": language,
-                "patterns": patterns,
-                "summary": summary
-            }
+        # Get summary stats
+        summary = self._generate_summary(patterns)
             
+        result = {
+            "file": file_path,
+            "language": language,
+            "patterns": patterns,
+            "summary": summary
+        }
+            
+        if profile is not None:
+            profile.add_stage("summarize", started)
+            
+        if cache_key is not None:
+            if profile is not None:
+                started = profile_clock()
+            self.cache.put(cache_key, result)
+            if profile is not None:
+                profile.add_stage("cache", started)
+            
+        return result
+            
+    def analyze_blob(self,
+                     repository: GitRepository,
+                     blob: GitBlob,
+                     pattern_name: Optional[str] = None,
+                     category: Optional[str] = None,
+                     label: Optional[str] = None) -> Optional[Dict]:
+        """Analyze a file of a git revision, reading it from the repository.
+        
+        Args:
+            repository: The repository holding the blob
+            blob: The blob to analyze
+            pattern_name: If provided, only look for this specific pattern
+            category: If provided, only look for patterns in this category
+            label: Name of the file in the result; defaults to the blob's path
+        
+        Returns:
+            A dictionary with analysis results, or None if the blob looks
+            binary, generated or minified
+        """
+        label = label or blob.path
+        if self.profiler is None:
+            return self._analyze_blob(repository, blob, pattern_name, category, label)
+        
+        profile = self.profiler.start_file(label)
+        try:
+            return self._analyze_blob(repository, blob, pattern_name, category, label, profile)
+        finally:
+            self.profiler.finish_file(profile)
+    
+    def _analyze_blob(self,
+                      repository: GitRepository,
+                      blob: GitBlob,
+                      pattern_name: Optional[str],
+                      category: Optional[str],
+                      label: str,
+                      profile=None) -> Optional[Dict]:
+        """Analyze a blob, recording the time of each stage in a profile.
+        
+        Args:
+            repository: The repository holding the blob
+            blob: The blob to analyze
+            pattern_name: If provided, only look for this specific pattern
+            category: If provided, only look for patterns in this category
+            label: Name of the file in the result
+            profile: Optional FileProfile of the file
+        
+        Returns:
+            A dictionary with analysis results, or None if the blob looks
+            binary, generated or minified
+        """
+        try:
+            language = self.parser._get_language_by_extension(Path(blob.path))
+            if not language:
+                return {"error": f"Unsupported file type: {label}", "file": label}
+            budget = self.limits.start() if self.limits is not None else None
+            if profile is not None:
+                profile.language = language
+            
+            # The blob id names the contents, so a cached result is found
+            # without reading the blob. Only blobs that were read and kept
+            # have cached results.
+            cache_key = None
+            if self.cache is not None:
+                if profile is not None:
+                    started = profile_clock()
+                cache_key = self.get_blob_cache_key(
+                    blob.oid, language, self._cache_selection(label, language, pattern_name, category)
+                )
+                cached = self.cache.get(cache_key)
+                if profile is not None:
+                    profile.add_stage("cache", started)
+                if cached is not None:
+                    return relabel_result(cached, label)
+            
+            if profile is not None:
+                started = profile_clock()
+            source = SourceBuffer(repository.read_blob(blob.oid))
+            if profile is not None:
+                profile.add_stage("read", started)
+            
+            # Skipped like binary, generated or minified files in a directory
+            if classify_contents(PurePosixPath(blob.path).name, source.data[:SNIFF_SIZE]):
+                return None
+            
+            return self._analyze_source(
+                source, label, language, pattern_name, category, budget, cache_key, profile
+            )
+        
+        except BudgetExceeded as e:
+            return skipped_result(label, BUDGET_EXCEEDED, str(e))
         except Exception as e:
-            logger.error(f"Error analyzing {file_path}: {e}")
-            return {"error": str(e), "file": str(file_path)}
+            logger.error(f"Error analyzing {label}: {e}")
+            return {"error": str(e), "file": label}
+    
+    def get_cache_key(self, source: SourceBuffer, language: str, selection: str) -> str:
+        """Build the result cache key of a file.
+        
+        Args:
+            source: The file's source
+            language: The language of the file
+            selection: Description of what is computed for the file
+            
+        Returns:
+            A key covering the content, language, selection, registered
+            patterns and implementation in use
+        """
+        return make_key(content_hash(source.data), language, selection, self._cache_fingerprint())
+    
+    def get_blob_cache_key(self, oid: str, language: str, selection: str) -> str:
+        """Build the result cache key of a git blob from its object id.
+        
+        Args:
+            oid: The object id of the blob
+            language: Language the blob is analyzed as
+            selection: Description of the patterns to match
+        
+        Returns:
+            A key covering the content, language, selection, registered
+            patterns and implementation in use
+        """
+        return make_key(f"git:{oid}", language, selection, self._cache_fingerprint())
+    
+    def _cache_selection(self,
+                         file_path: str,
+                         language: str,
+                         pattern_name: Optional[str],
+                         category: Optional[str]) -> str:
+        """Describe the patterns matched in a file, for its result cache key.
+        
+        Files with the same contents share cached results, unless a selected
+        pattern derives its matches from the path of the file too.
+        
+        Args:
+            file_path: Path of the file, as recorded in its result
+            language: The language of the file
+            pattern_name: If provided, only look for this specific pattern
+            category: If provided, only look for patterns in this category
+        
+        Returns:
+            The selection part of the cache key
+        
+        Raises:
+            ValueError: If pattern_name is not a registered pattern
+        """
+        selection = f"pattern={pattern_name or ''};category={category or ''}"
+        if self.pattern_recognizer.get_plan(language, pattern_name, category).path_dependent:
+            selection += f";path={file_path}"
+        return selection
+    
+    def _cache_fingerprint(self) -> str:
+        """Fingerprint the registered patterns and the implementation in use."""
+        implementation = "mock" if self.use_mock else "tree-sitter"
+        return f"{implementation}:{self.pattern_recognizer.registry.fingerprint()}"
+    
+    def discover_files(self,
+                       directory: Union[str, Path],
+                       exclude_dirs: Optional[List[str]] = None,
+                       file_extensions: Optional[List[str]] = None,
+                       max_file_size: Optional[int] = DEFAULT_MAX_FILE_SIZE,
+                       use_ignore_files: bool = True) -> List[DiscoveredFile]:
+        """Find the files in a directory that can be analyzed, with their sizes.
+        
+        Honours .gitignore and .ignore files, and skips files that are too
+        large or look binary, generated or minified.
+        
+        Args:
+            directory: Path to the directory to search
+            exclude_dirs: List of directory names to exclude
+            file_extensions: If provided, only include files with these extensions
+            max_file_size: Skip files larger than this many bytes; None for no limit
+            use_ignore_files: Whether to honour .gitignore and .ignore files
+            
+        Returns:
+            The files in a supported language with their sizes, sorted by path
+        """
+        directory = Path(directory)
+        if not directory.is_dir():
+            raise NotADirectoryError(f"{directory} is not a directory")
+        
+        discovery = FileDiscovery(
+            exclude_dirs=exclude_dirs or None,
+            extensions=file_extensions or list(self.parser.manager.extension_map),
+            max_file_size=max_file_size,
+            use_ignore_files=use_ignore_files
+        )
+        files = discovery.discover(directory)
+        
+        if file_extensions:
+            # Skip files we can't parse
+            files = [f for f in files if self.parser._get_language_by_extension(f.path)]
+        
+        return files
+    
+    def collect_files(self,
+                      directory: Union[str, Path],
+                      exclude_dirs: Optional[List[str]] = None,
+                      file_extensions: Optional[List[str]] = None) -> List[Path]:
+        """Find the files in a directory that can be analyzed.
+        
+        Args:
+            directory: Path to the directory to search
+            exclude_dirs: List of directory names to exclude
+            file_extensions: If provided, only include files with these extensions
+            
+        Returns:
+            A list of paths of files in a supported language, sorted
+        """
+        return [f.path for f in self.discover_files(directory, exclude_dirs, file_extensions)]
     
     def analyze_directory(self, 
                          directory: Union[str, Path], 
@@ -119,7 +476,8 @@ class CodeAnalyzer:
                          category: Optional[str] = None,
                          exclude_dirs: Optional[List[str]] = None,
                          file_extensions: Optional[List[str]] = None,
-                         max_workers: int = 4) -> List[Dict]:
+                         max_workers: Optional[int] = None,
+                         execution: str = "thread") -> List[Dict]:
         """Analyze all files in a directory for patterns.
         
         Args:
@@ -128,51 +486,319 @@ class CodeAnalyzer:
             category: If provided, only look for patterns in this category
             exclude_dirs: List of directory names to exclude
             file_extensions: If provided, only analyze files with these extensions
-            max_workers: Maximum number of worker threads for parallel processing
+            max_workers: Number of parallel workers. If None, starts from the
+                available CPUs and adapts to the measured throughput.
+            execution: Execution mode, "thread" or "process". Process mode runs
+                pattern matching in worker processes to use multiple cores.
             
         Returns:
-            A list of dictionaries with analysis results for each file
+            A list of dictionaries with analysis results for each file, sorted by file
         """
-        directory = Path(directory)
-        if not directory.is_dir():
-            raise NotADirectoryError(f"{directory} is not a directory")
-            
-        exclude_dirs = exclude_dirs or ['.git', 'node_modules', 'venv', '__pycache__']
-        file_paths = []
+        return list(self.iter_analyze_directory(
+            directory, pattern_name, category, exclude_dirs, file_extensions,
+            max_workers, execution, ordered=True
+        ))
+    
+    def iter_analyze_directory(self,
+                               directory: Union[str, Path],
+                               pattern_name: Optional[str] = None,
+                               category: Optional[str] = None,
+                               exclude_dirs: Optional[List[str]] = None,
+                               file_extensions: Optional[List[str]] = None,
+                               max_workers: Optional[int] = None,
+                               execution: str = "thread",
+                               ordered: bool = False,
+                               max_in_flight: Optional[int] = None) -> Iterator[Dict]:
+        """Analyze all files in a directory, yielding results as they complete.
         
-        # Find all files to analyze
-        for root, dirs, files in os.walk(directory):
-            # Skip excluded directories
-            dirs[:] = [d for d in dirs if d not in exclude_dirs]
+        Args:
+            directory: Path to the directory to analyze
+            pattern_name: If provided, only look for this specific pattern
+            category: If provided, only look for patterns in this category
+            exclude_dirs: List of directory names to exclude
+            file_extensions: If provided, only analyze files with these extensions
+            max_workers: Number of parallel workers. If None, starts from the
+                available CPUs and adapts to the measured throughput.
+            execution: Execution mode, "thread" or "process"
+            ordered: If True, yield results sorted by file instead of in completion order
+            max_in_flight: Maximum number of batches of files analyzed at once
             
-            for file in files:
-                file_path = Path(root) / file
-                
-                # Skip files with unwanted extensions
-                if file_extensions and not any(file.endswith(ext) for ext in file_extensions):
-                    continue
-                    
-                # Skip files we can't parse
-                if not self.parser._get_language_by_extension(file_path):
+        Yields:
+            The analysis result of each file
+        """
+        validate_execution_mode(execution)
+        files = self.discover_files(directory, exclude_dirs, file_extensions)
+        if ordered:
+            files.sort(key=lambda f: str(f.path))
+        
+        yield from self.iter_analyze_files(
+            files, pattern_name, category, max_workers, execution, ordered, max_in_flight
+        )
+    
+    def iter_analyze_revisions(self,
+                               repository: Union[str, Path, GitRepository],
+                               revisions: Sequence[str],
+                               pattern_name: Optional[str] = None,
+                               category: Optional[str] = None,
+                               file_extensions: Optional[List[str]] = None,
+                               max_workers: Optional[int] = None,
+                               max_file_size: Optional[int] = DEFAULT_MAX_FILE_SIZE) -> Iterator[Dict]:
+        """Analyze the files of git revisions without checking them out.
+        
+        Files are read from the repository's object database and parsed
+        from memory. Each distinct blob is analyzed once however many
+        revisions and paths it appears at, and with a result cache, blobs
+        analyzed by earlier runs are not even read. Analysis runs in worker
+        threads, which share the repository's cat-file process.
+        
+        Args:
+            repository: The repository, or a path inside it
+            revisions: Commits, branches, tags or other tree-ishes to analyze
+            pattern_name: If provided, only look for this specific pattern
+            category: If provided, only look for patterns in this category
+            file_extensions: If provided, only analyze files with these extensions
+            max_workers: Number of parallel workers; if None, the available CPUs
+            max_file_size: Skip files larger than this many bytes; None for no limit
+        
+        Yields:
+            The analysis result of each file, labelled "<revision>:<path>",
+            in order of revision and path
+        """
+        if not isinstance(repository, GitRepository):
+            with GitRepository(repository) as repo:
+                yield from self.iter_analyze_revisions(
+                    repo, revisions, pattern_name, category, file_extensions, max_workers, max_file_size
+                )
+            return
+        
+        extensions = file_extensions or list(self.parser.manager.extension_map)
+        entries = []
+        path_dependent: Dict[str, bool] = {}
+        for revision in revisions:
+            for blob in repository.list_blobs(revision, extensions, max_file_size):
+                language = self.parser._get_language_by_extension(Path(blob.path))
+                if not language:
                     continue
-                    
-                file_paths.append(file_path)
+                label = f"{revision}:{blob.path}"
+                if language not in path_dependent:
+                    try:
+                        plan = self.pattern_recognizer.get_plan(language, pattern_name, category)
+                        path_dependent[language] = plan.path_dependent
+                    except ValueError:
+                        path_dependent[language] = False
+                # Results that depend on the path are not shared between paths
+                key = (blob.oid, language, label if path_dependent[language] else None)
+                entries.append((label, blob, key))
+        
+        # Each distinct blob is analyzed at its first occurrence; the result
+        # is kept, as JSON, until its last occurrence has been labelled
+        remaining = Counter(key for _, _, key in entries)
+        first = {}
+        for label, blob, key in entries:
+            first.setdefault(key, (label, blob))
+        logger.info(f"Analyzing {len(first)} distinct blobs for {len(entries)} files in {len(revisions)} revisions")
         
-        # Analyze files in parallel
-        results = []
+        max_workers = max_workers or available_cpus()
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            future_to_path = {
-                executor.submit(self.analyze_file, path, pattern_name, category): path
-                for path in file_paths
-            }
+            def submit(item):
+                label, blob = item
+                return executor.submit(self.analyze_blob, repository, blob, pattern_name, category, label)
             
-            for future in as_completed(future_to_path):
-                results.append(future.result())
+            results = iter_bounded(submit, first.values(), max_workers * IN_FLIGHT_PER_WORKER, ordered=True)
+            shared: Dict = {}
+            for label, blob, key in entries:
+                remaining[key] -= 1
+                if key in shared:
+                    serialized = shared[key] if remaining[key] else shared.pop(key)
+                    result = relabel_result(json.loads(serialized), label) if serialized is not None else None
+                else:
+                    result = next(results)
+                    if remaining[key]:
+                        shared[key] = json.dumps(result, default=to_json_default) if result is not None else None
                 
-        # Sort results by filename
-        results.sort(key=lambda r: r.get('file', ''))
+                if result is not None:
+                    yield result
+    
+    def analyze_files(self,
+                      file_paths: List[Union[str, Path]],
+                      pattern_name: Optional[str] = None,
+                      category: Optional[str] = None,
+                      max_workers: Optional[int] = None,
+                      execution: str = "thread") -> List[Dict]:
+        """Analyze a list of files in parallel.
         
-        return results
+        Args:
+            file_paths: Paths of the files to analyze
+            pattern_name: If provided, only look for this specific pattern
+            category: If provided, only look for patterns in this category
+            max_workers: Number of parallel workers. If None, starts from the
+                available CPUs and adapts to the measured throughput.
+            execution: Execution mode, "thread" or "process"
+            
+        Returns:
+            A list of analysis results in completion order
+        """
+        return list(self.iter_analyze_files(
+            file_paths, pattern_name, category, max_workers, execution
+        ))
+    
+    def iter_analyze_files(self,
+                           file_paths: Iterable[Union[str, Path]],
+                           pattern_name: Optional[str] = None,
+                           category: Optional[str] = None,
+                           max_workers: Optional[int] = None,
+                           execution: str = "thread",
+                           ordered: bool = False,
+                           max_in_flight: Optional[int] = None) -> Iterator[Dict]:
+        """Analyze files in parallel, yielding results as they complete.
+        
+        Files given as a list are scheduled by size: they are grouped into
+        batches, large files alone and small ones together, and the largest
+        batches run first so that no large file is left to finish last. In
+        ordered mode this is done within consecutive windows of files, so
+        results can still be yielded in order as they complete. Files given
+        as any other iterable are analyzed as they arrive, with only a
+        bounded number submitted at a time.
+        
+        Args:
+            file_paths: Paths of the files to analyze, or DiscoveredFile
+                entries whose sizes are known from discovery
+            pattern_name: If provided, only look for this specific pattern
+            category: If provided, only look for patterns in this category
+            max_workers: Number of parallel workers. If None, starts from the
+                available CPUs and adapts to the measured throughput.
+            execution: Execution mode, "thread" or "process"
+            ordered: If True, yield results in the order of file_paths
+            max_in_flight: Maximum number of batches of files analyzed at once.
+                For files analyzed as they arrive, the maximum number of
+                files submitted but not yet yielded; if None,
+                IN_FLIGHT_PER_WORKER per worker.
+            
+        Yields:
+            The analysis result of each file
+        """
+        validate_execution_mode(execution)
+        
+        if isinstance(file_paths, (list, tuple)) or execution == "process":
+            yield from self._iter_scheduled(
+                with_sizes(list(file_paths)), pattern_name, category,
+                max_workers, execution, ordered, max_in_flight
+            )
+            return
+        
+        max_workers = max_workers or available_cpus()
+        if max_in_flight is None:
+            max_in_flight = max_workers * IN_FLIGHT_PER_WORKER
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            def submit(path):
+                return executor.submit(self.analyze_file, path, pattern_name, category)
+            
+            yield from iter_bounded(submit, file_paths, max_in_flight, ordered)
+    
+    def _iter_scheduled(self,
+                        files: List[DiscoveredFile],
+                        pattern_name: Optional[str],
+                        category: Optional[str],
+                        max_workers: Optional[int],
+                        execution: str,
+                        ordered: bool,
+                        max_in_flight: Optional[int]) -> Iterator[Dict]:
+        """Analyze files in batches planned from their sizes.
+        
+        Args:
+            files: The files to analyze, with their sizes
+            pattern_name: If provided, only look for this specific pattern
+            category: If provided, only look for patterns in this category
+            max_workers: Number of parallel workers, or None to adapt
+            execution: Execution mode, "thread" or "process"
+            ordered: If True, yield results in the order of files
+            max_in_flight: Optional cap on the number of batches analyzed at once
+        
+        Yields:
+            The analysis result of each file
+        """
+        concurrency = AdaptiveConcurrency.for_workers(max_workers, execution)
+        windows = plan_windows(files, concurrency.maximum, ordered)
+        logger.debug(f"Analyzing {len(files)} files in {sum(len(w) for w in windows)} batches "
+                     f"with {concurrency.limit} to {concurrency.maximum} {execution} workers")
+        
+        if execution == "process":
+            cache_config = None
+            if self.cache is not None:
+                cache_config = (str(self.cache.cache_dir), self.cache.max_size)
+            quarantine_path = str(self.quarantine.path) if self.quarantine is not None else None
+            results = iter_process_batches(
+                windows, concurrency, pattern_name, category, self.use_mock,
+                cache_config=cache_config, ordered=ordered, max_in_flight=max_in_flight,
+                profiler=self.profiler, limits=self.limits, quarantine_path=quarantine_path
+            )
+            for result in results:
+                # Workers open the quarantine read-only; files that exceeded
+                # their budget are recorded here
+                if self.quarantine is not None and result.get("skipped") == BUDGET_EXCEEDED:
+                    self.quarantine.add(result["file"], result["reason"])
+                yield result
+            return
+        
+        with ThreadPoolExecutor(max_workers=concurrency.maximum) as executor:
+            def submit(batch):
+                return executor.submit(self._analyze_batch, batch.paths, pattern_name, category)
+            
+            yield from iter_scheduled(submit, windows, concurrency, ordered, max_in_flight)
+    
+    def _analyze_batch(self,
+                       file_paths: Iterable[str],
+                       pattern_name: Optional[str],
+                       category: Optional[str]) -> List[Dict]:
+        """Analyze the files of a batch one after the other.
+        
+        Args:
+            file_paths: Paths of the files to analyze
+            pattern_name: If provided, only look for this specific pattern
+            category: If provided, only look for patterns in this category
+        
+        Returns:
+            The analysis results, in the order of file_paths
+        """
+        return [self.analyze_file(path, pattern_name, category) for path in file_paths]
+    
+    def create_incremental_analyzer(self,
+                                    pattern_name: Optional[str] = None,
+                                    category: Optional[str] = None) -> IncrementalAnalyzer:
+        """Create an analyzer that re-analyzes edited files incrementally.
+        
+        Args:
+            pattern_name: If provided, only look for this specific pattern
+            category: If provided, only look for patterns in this category
+            
+        Returns:
+            An IncrementalAnalyzer using this analyzer's parser and patterns
+        """
+        return IncrementalAnalyzer(self, pattern_name, category)
+    
+    def watch(self,
+              paths: List[Union[str, Path]],
+              callback: Callable[[Dict, Dict], None],
+              pattern_name: Optional[str] = None,
+              category: Optional[str] = None,
+              interval: float = 0.5,
+              stop_event: Optional[threading.Event] = None) -> None:
+        """Watch files for changes and re-analyze them incrementally.
+        
+        Blocks until stop_event is set (or forever if it is None).
+        
+        Args:
+            paths: Files and directories to watch
+            callback: Called with the result and the update statistics
+                (mode, re-run and reused patterns, elapsed time) of every analysis
+            pattern_name: If provided, only look for this specific pattern
+            category: If provided, only look for patterns in this category
+            interval: Seconds between checks for changes
+            stop_event: Optional event that stops watching when set
+        """
+        incremental = self.create_incremental_analyzer(pattern_name, category)
+        incremental.watch(paths, callback, interval, stop_event)
     
     def _generate_summary(self, patterns: Dict[str, List[Dict]]) -> Dict:
         """Generate a summary of the patterns found.
@@ -189,71 +815,126 @@ class CodeAnalyzer:
         }
         
         # Count patterns by type
-        type_counts = {}
-        for matches in patterns.values():
-            for match in matches:
-                if 'type' in match:
-                    match_type = match['type']
-                    type_counts[match_type] = type_counts.get(match_type, 0) + 1
-        
-        summary["type_counts"] = type_counts
+        summary["type_counts"] = dict(Counter(
+            match['type'] for matches in patterns.values() for match in matches if 'type' in match
+        ))
         
         return summary
     
-    def generate_report(self, results: List[Dict], output_format: str = "json") -> str:
+    @staticmethod
+    def generate_report(results: List[Dict], output_format: str = "json") -> str:
         """Generate a report from analysis results.
         
         Args:
             results: List of analysis results from analyze_file or analyze_directory
-            output_format: Format for the report (json, text, html)
+            output_format: Format for the report (json, ndjson, text, html)
             
         Returns:
             The report as a string in the specified format
         """
-        if output_format == "json":
-            return json.dumps(results, indent=2)
+        if output_format == "html":
+            from .visualization import HTMLReport
+            report_generator = HTMLReport(include_charts=True)
+            return report_generator.generate(results)
+        
+        return "".join(CodeAnalyzer.iter_report(results, output_format))
+    
+    @staticmethod
+    def iter_report(results: Iterable[Dict], output_format: str = "json") -> Iterator[str]:
+        """Generate a report piece by piece while results are still arriving.
+        
+        The pieces join up to the same report as generate_report. HTML
+        reports need every result up front and are not supported.
+        
+        Args:
+            results: Analysis results, for example from iter_analyze_directory
+            output_format: Format for the report (json, ndjson, text)
+            
+        Yields:
+            Consecutive pieces of the report
+        """
+        if output_format == "ndjson":
+            for result in results:
+                yield to_ndjson_line(result)
+        
+        elif output_format == "json":
+            # Matches json.dumps(results, indent=2) one element at a time
+            separator = "[\n"
+            for result in results:
+                yield separator + textwrap.indent(json.dumps(result, indent=2, default=to_json_default), "  ")
+                separator = ",\n"
+            yield "[]" if separator == "[\n" else "\n]"
         
         elif output_format == "text":
-            report = []
+            separator = ""
             for result in results:
-                if "error" in result:
-                    report.append(f"Error analyzing {result['file']}: {result['error']}")
-                    continue
-                
-                report.append(f"File: {result['file']}")
-                report.append(f"Language: {result['language']}")
+                yield separator + "\n".join(CodeAnalyzer._format_text_result(result))
+                separator = "\n"
+            
+        else:
+            raise ValueError(f"Unsupported output format: {output_format}")
+    
+    @staticmethod
+    def write_report(results: Iterable[Dict],
+                     output: IO[str],
+                     output_format: str = "ndjson") -> None:
+        """Write a report to a file handle while results are still arriving.
+        
+        Args:
+            results: Analysis results, for example from iter_analyze_directory
+            output: A text file handle to write to
+            output_format: Format for the report (json, ndjson, text, html)
+        """
+        if output_format == "html":
+            if not isinstance(results, ResultStore):
+                results = list(results)
+            output.write(CodeAnalyzer.generate_report(results, output_format))
+            return
+        
+        for chunk in CodeAnalyzer.iter_report(results, output_format):
+            output.write(chunk)
+            output.flush()
+    
+    @staticmethod
+    def _format_text_result(result: Dict) -> List[str]:
+        """Format the analysis result of one file for a text report.
+        
+        Args:
+            result: The analysis result of a file
+            
+        Returns:
+            The lines of the report for the file
+        """
+        if "error" in result:
+            return [f"Error analyzing {result['file']}: {result['error']}"]
+        
+        report = []
+        report.append(f"File: {result['file']}")
+        report.append(f"Language: {result['language']}")
                 
-                if "summary" in result:
-                    summary = result["summary"]
-                    report.append(f"Total patterns: {summary['total_patterns']}")
+        if "summary" in result:
+            summary = result["summary"]
+            report.append(f"Total patterns: {summary['total_patterns']}")
                     
-                    if summary["pattern_counts"]:
-                        report.append("Pattern counts:")
-                        for pattern, count in summary["pattern_counts"].items():
-                            report.append(f"  {pattern}: {count}")
+            if summary["pattern_counts"]:
+                report.append("Pattern counts:")
+                for pattern, count in summary["pattern_counts"].items():
+                    report.append(f"  {pattern}: {count}")
                 
-                if "patterns" in result:
-                    for pattern_name, matches in result["patterns"].items():
-                        report.append(f"\nPattern: {pattern_name}")
-                        for match in matches:
-                            match_str = f"  {match.get('name', 'Unnamed')}"
-                            if 'type' in match:
-                                match_str += f" ({match['type']})"
-                            if 'line' in match:
-                                match_str += f" at line {match['line']}"
-                            report.append(match_str)
+        if "patterns" in result:
+            for pattern_name, matches in result["patterns"].items():
+                report.append(f"\nPattern: {pattern_name}")
+                for match in matches:
+                    match_str = f"  {match.get('name', 'Unnamed')}"
+                    if 'type' in match:
+                        match_str += f" ({match['type']})"
+                    if 'line' in match:
+                        match_str += f" at line {match['line']}"
+                    report.append(match_str)
                 
-                report.append("\n" + "-" * 80 + "\n")
-            
-            return "\n".join(report)
+        report.append("\n" + "-" * 80 + "\n")
             
-        elif output_format == "html":
-            from .visualization import HTMLReport
-            report_generator = HTMLReport(include_charts=True)
-            return report_generator.generate(results)
-            
-        else:
-            raise ValueError(f"Unsupported output format: {output_format}")
+        return report
     
     def get_available_patterns(self) -> List[str]:
         """Get a list of all available patterns.
@@ -280,4 +961,21 @@ class CodeAnalyzer:
         Returns:
             A list of pattern names in the category
         """
-        return self.pattern_recognizer.get_patterns_by_category(category)
\ No newline at end of file
+        return self.pattern_recognizer.get_patterns_by_category(category)
+    
+    def describe_plan(self,
+                      language: str,
+                      pattern_name: Optional[str] = None,
+                      category: Optional[str] = None) -> List[Dict]:
+        """Describe which patterns run on files of a language, and how.
+        
+        Args:
+            language: The language to describe the plan for
+            pattern_name: If provided, only select this specific pattern
+            category: If provided, only select patterns in this category
+            
+        Returns:
+            A list with one dictionary per pattern, holding its name, how it
+            is matched and the sub-patterns of composites
+        """
+        return self.pattern_recognizer.describe_plan(language, pattern_name, category)
\ No newline at end of file
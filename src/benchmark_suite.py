@@ -0,0 +1,328 @@
+"""
+Benchmark suite for the analysis pipeline.
+
+Runs the stages of an analysis over a synthetic corpus and times each of
+them separately: discovering files, parsing them, matching patterns
+(in total, and one pattern at a time on a sample of the files),
+detecting architectural intents, computing complexity metrics and
+writing reports. Results are plain JSON, so a run can be kept as a
+baseline and later runs compared against it, failing when a stage got
+slower by more than a threshold.
+"""
+
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+import os
+import time
+import platform
+import datetime
+
+from .synthetic_corpus import CorpusInfo
+from .source_buffer import SourceBuffer
+
+# Stages timed by the suite, in the order they run
+STAGES = ("discovery", "parse", "match", "architecture", "complexity", "report")
+
+# Stages that need the results of earlier ones
+_STAGE_DEPENDENCIES = {
+    "match": ("parse",),
+    "complexity": ("parse",),
+    "architecture": ("parse", "match"),
+    "report": ("parse", "match"),
+}
+
+# Report formats timed by the report stage
+REPORT_FORMATS = ("json", "ndjson", "text", "html")
+
+# Bump when the layout of benchmark results changes
+RESULTS_VERSION = 1
+
+# A stage regresses when it gets slower than its baseline by more than this share
+DEFAULT_THRESHOLD = 0.25
+
+# Stages faster than this in both runs are not compared, since their timings are mostly noise
+DEFAULT_MIN_SECONDS = 0.05
+
+# Number of files on which each pattern is timed on its own
+DEFAULT_PATTERN_SAMPLE = 200
+
+class StageComparison(NamedTuple):
+    """The timing of a stage in a run and in its baseline."""
+    
+    stage: str
+    baseline: float
+    current: float
+    change: float
+    regressed: bool
+
+def environment(use_mock: bool = False) -> Dict:
+    """Describe the machine and versions a benchmark runs with.
+    
+    Args:
+        use_mock: Whether the mock implementation is used
+    
+    Returns:
+        The Python version, platform, CPU count and tree-sitter version
+    """
+    try:
+        from importlib.metadata import version
+        ts_version = version("tree_sitter")
+    except Exception:
+        ts_version = "unknown"
+    
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "tree_sitter": ts_version,
+        "implementation": "mock" if use_mock else "tree-sitter",
+    }
+
+def _stages_to_run(stages: Iterable[str]) -> List[str]:
+    """Add the stages the requested ones depend on.
+    
+    Args:
+        stages: The requested stages
+    
+    Returns:
+        The stages to run, in the order they run
+    """
+    needed = set(stages)
+    for stage in list(needed):
+        needed.update(_STAGE_DEPENDENCIES.get(stage, ()))
+    return [stage for stage in STAGES if stage in needed]
+
+def _run_once(analyzer, corpus: CorpusInfo, stages: Sequence[str], pattern_sample: int) -> Dict:
+    """Run the suite once.
+    
+    Args:
+        analyzer: The CodeAnalyzer to run the stages with
+        corpus: The corpus to analyze
+        stages: The stages to run, dependencies included
+        pattern_sample: Number of files to time each pattern on
+    
+    Returns:
+        The timings of the stages and patterns
+    """
+    clock = time.perf_counter
+    timings = {stage: 0.0 for stage in stages}
+    items = {stage: 0 for stage in stages}
+    
+    start = clock()
+    files = analyzer.discover_files(corpus.path)
+    if "discovery" in timings:
+        timings["discovery"] = clock() - start
+        items["discovery"] = len(files)
+    
+    complexity_analyzer = None
+    if "complexity" in timings:
+        from .metrics.complexity.complexity_analyzer import ComplexityAnalyzer
+        complexity_analyzer = ComplexityAnalyzer()
+    
+    recognizer = analyzer.pattern_recognizer
+    sample_step = max(1, len(files) // pattern_sample) if pattern_sample else 0
+    pattern_timings: Dict[str, Dict] = {}
+    results = []
+    match_count = 0
+    
+    for index, discovered in enumerate(files if "parse" in timings else ()):
+        file_path = str(discovered.path)
+        language = analyzer.parser._get_language_by_extension(discovered.path)
+        source = SourceBuffer.from_file(discovered.path)
+        
+        start = clock()
+        tree = analyzer.parser.parse_source(source, language)
+        timings["parse"] += clock() - start
+        if tree is None:
+            continue
+        items["parse"] += 1
+        
+        if "match" in timings:
+            start = clock()
+            patterns = recognizer.recognize(tree, source, language, None, None, file_path)
+            timings["match"] += clock() - start
+            items["match"] += 1
+            match_count += sum(len(matches) for matches in patterns.values())
+            results.append({
+                "file": file_path,
+                "language": language,
+                "patterns": patterns,
+                "summary": analyzer._generate_summary(patterns),
+            })
+            
+            # Time each pattern on its own on every sample_step-th file
+            if sample_step and index % sample_step == 0:
+                for pattern in recognizer.get_plan(language).patterns:
+                    start = clock()
+                    found = recognizer.recognize(tree, source, language, pattern.name, None, file_path)
+                    elapsed = clock() - start
+                    timing = pattern_timings.setdefault(pattern.name, {"seconds": 0.0, "files": 0, "matches": 0})
+                    timing["seconds"] += elapsed
+                    timing["files"] += 1
+                    timing["matches"] += len(found.get(pattern.name, ()))
+        
+        if complexity_analyzer is not None:
+            start = clock()
+            complexity_analyzer.analyze(tree, source.text, language, file_path)
+            timings["complexity"] += clock() - start
+            items["complexity"] += 1
+    
+    if "architecture" in timings:
+        from .patterns.architectural_intents import ArchitecturalIntentDetector
+        start = clock()
+        ArchitecturalIntentDetector().analyze_codebase(results, str(corpus.path))
+        timings["architecture"] = clock() - start
+        items["architecture"] = len(results)
+    
+    report_timings = {}
+    if "report" in timings:
+        for output_format in REPORT_FORMATS:
+            start = clock()
+            analyzer.generate_report(results, output_format)
+            report_timings[output_format] = clock() - start
+        timings["report"] = sum(report_timings.values())
+        items["report"] = len(results)
+    
+    stage_results = {stage: {"seconds": timings[stage], "items": items[stage]} for stage in stages}
+    if "match" in stage_results:
+        stage_results["match"]["matches"] = match_count
+    if "report" in stage_results:
+        stage_results["report"]["formats"] = report_timings
+    
+    return {"stages": stage_results, "patterns": pattern_timings}
+
+def _keep_fastest(best: Dict, run: Dict) -> Dict:
+    """Keep the fastest timing of each stage and pattern over two runs.
+    
+    Args:
+        best: The fastest timings so far, updated in place
+        run: The timings of another run
+    
+    Returns:
+        The updated fastest timings
+    """
+    for section in ("stages", "patterns"):
+        for name, timing in run[section].items():
+            if name not in best[section] or timing["seconds"] < best[section][name]["seconds"]:
+                best[section][name] = timing
+    return best
+
+def run_benchmarks(corpus: CorpusInfo,
+                   stages: Optional[Iterable[str]] = None,
+                   repeat: int = 1,
+                   pattern_sample: int = DEFAULT_PATTERN_SAMPLE,
+                   use_mock: bool = False) -> Dict:
+    """Time the stages of an analysis of a corpus.
+    
+    Args:
+        corpus: The corpus to analyze, from generate_corpus
+        stages: Stages to report. If None, reports all stages. Stages the
+            requested ones depend on are run but not reported.
+        repeat: Number of runs; the fastest timing of each stage is kept
+        pattern_sample: Number of files to time each pattern on; 0 to skip
+        use_mock: Whether to use the mock implementation
+    
+    Returns:
+        The benchmark results, ready to be saved as JSON
+    
+    Raises:
+        ValueError: If a stage is unknown
+    """
+    from .analyzer import CodeAnalyzer
+    
+    requested = list(stages) if stages else list(STAGES)
+    unknown = [stage for stage in requested if stage not in STAGES]
+    if unknown:
+        raise ValueError(f"Unknown stages {', '.join(unknown)}; choose from {', '.join(STAGES)}")
+    
+    analyzer = CodeAnalyzer(use_mock)
+    to_run = _stages_to_run(requested)
+    best = None
+    for _ in range(max(1, repeat)):
+        run = _run_once(analyzer, corpus, to_run, pattern_sample if "match" in requested else 0)
+        best = run if best is None else _keep_fastest(best, run)
+    
+    return {
+        "version": RESULTS_VERSION,
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(use_mock),
+        "corpus": corpus.to_dict(),
+        "repeat": max(1, repeat),
+        "stages": {stage: best["stages"][stage] for stage in STAGES if stage in requested},
+        "patterns": dict(sorted(best["patterns"].items(), key=lambda item: -item[1]["seconds"])),
+    }
+
+def compare_results(current: Dict,
+                    baseline: Dict,
+                    threshold: float = DEFAULT_THRESHOLD,
+                    min_seconds: float = DEFAULT_MIN_SECONDS) -> List[StageComparison]:
+    """Compare the stage timings of a run against a baseline.
+    
+    Args:
+        current: Results of the run, from run_benchmarks
+        baseline: Results of the baseline run
+        threshold: Share by which a stage may get slower before it counts as
+            a regression (0.25 allows 25% slower)
+        min_seconds: Stages faster than this in both runs are never regressions
+    
+    Returns:
+        The comparison of each stage timed in both runs
+    
+    Raises:
+        ValueError: If the baseline has another format or was measured on
+            a different corpus
+    """
+    if baseline.get("version") != RESULTS_VERSION:
+        raise ValueError(f"Unsupported baseline version {baseline.get('version')}")
+    
+    parameters = ("files", "seed", "languages")
+    if any(current["corpus"].get(key) != baseline["corpus"].get(key) for key in parameters):
+        raise ValueError(
+            "The baseline was measured on a different corpus: "
+            + ", ".join(f"{key}={baseline['corpus'].get(key)}" for key in parameters)
+        )
+    
+    comparisons = []
+    for stage, timing in current["stages"].items():
+        if stage not in baseline["stages"]:
+            continue
+        before = baseline["stages"][stage]["seconds"]
+        after = timing["seconds"]
+        change = (after - before) / before if before > 0 else 0.0
+        regressed = change > threshold and max(before, after) >= min_seconds
+        comparisons.append(StageComparison(stage, before, after, change, regressed))
+    return comparisons
+
+def format_results(results: Dict, comparisons: Optional[List[StageComparison]] = None, top_patterns: int = 10) -> str:
+    """Format benchmark results as a table.
+    
+    Args:
+        results: Results from run_benchmarks
+        comparisons: Optional comparisons against a baseline
+        top_patterns: Number of slowest patterns to list
+    
+    Returns:
+        The table, one line per stage and pattern
+    """
+    corpus = results["corpus"]
+    lines = [
+        f"Corpus: {corpus['files']} files, {corpus['total_bytes'] / 1e6:.1f} MB, seed {corpus['seed']} ({corpus['path']})",
+        f"{'stage':14} {'seconds':>10} {'items':>8}" + (f" {'baseline':>10} {'change':>8}" if comparisons else ""),
+    ]
+    
+    by_stage = {comparison.stage: comparison for comparison in comparisons or ()}
+    for stage, timing in results["stages"].items():
+        line = f"{stage:14} {timing['seconds']:10.3f} {timing['items']:8d}"
+        comparison = by_stage.get(stage)
+        if comparison is not None:
+            line += f" {comparison.baseline:10.3f} {comparison.change:+8.1%}"
+            if comparison.regressed:
+                line += "  REGRESSION"
+        lines.append(line)
+    
+    if results["patterns"]:
+        lines.append("")
+        lines.append(f"Slowest patterns, timed alone on {max(t['files'] for t in results['patterns'].values())} files:")
+        for name, timing in list(results["patterns"].items())[:top_patterns]:
+            lines.append(f"  {name:40} {timing['seconds'] * 1000:10.1f} ms {timing['matches']:8d} matches")
+    
+    return "\n".join(lines)
@@ -0,0 +1,353 @@
+"""
+Per-file analysis budgets and the quarantine of files that exceed them.
+
+A single pathological file, such as a huge generated parser or a minified
+bundle, can keep a run busy for minutes in one query or tree walk. Each
+file is therefore analyzed under a FileBudget: a deadline, passed to
+tree-sitter as the parse timeout and checked between patterns, during
+long walks and between the ranges of source a query runs over, and a
+limit on the number of captures a query may return. In process mode the
+parent enforces the deadline too, replacing a worker that is stuck in a
+single tree-sitter call. A file that exceeds its budget gets a "skipped"
+result instead of holding up the run.
+
+Files that exceeded their budget are recorded in a Quarantine persisted
+next to the result cache, and are skipped without being read on later
+runs until they change.
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+from pathlib import Path
+import os
+import json
+import time
+import logging
+import threading
+import datetime
+
+logger = logging.getLogger(__name__)
+
+# Wall-clock seconds the analysis of one file may take by default
+DEFAULT_FILE_SECONDS = 60.0
+
+# Captures one query may return for a file by default
+DEFAULT_MAX_CAPTURES = 1000000
+
+# Nodes visited between two checks of the deadline in long tree walks
+CHECK_INTERVAL = 4096
+
+# Bytes of source a query covers between two checks of the deadline
+QUERY_RANGE_BYTES = 16 * 1024
+
+# Values of the "skipped" key of the result of a skipped file
+BUDGET_EXCEEDED = "budget_exceeded"
+QUARANTINED = "quarantined"
+
+# Name of the quarantine file in the cache directory
+QUARANTINE_NAME = "quarantine.json"
+
+# Bump when the layout of the quarantine file changes
+QUARANTINE_VERSION = 1
+
+class BudgetExceeded(Exception):
+    """Raised when the analysis of a file exceeds its budget."""
+
+class AnalysisLimits(NamedTuple):
+    """Limits on the analysis of each file. None disables a limit."""
+    
+    file_seconds: Optional[float] = DEFAULT_FILE_SECONDS
+    max_captures: Optional[int] = DEFAULT_MAX_CAPTURES
+    
+    def start(self) -> 'FileBudget':
+        """Start the budget of a file.
+        
+        Returns:
+            A budget whose deadline counts from now
+        """
+        return FileBudget(self)
+
+class FileBudget:
+    """The budget of the analysis of one file.
+    
+    Once exceeded, a budget stays exceeded, so a pattern that swallows the
+    exception does not let the analysis continue past the next check.
+    """
+    
+    __slots__ = ('limits', 'deadline', 'exceeded')
+    
+    def __init__(self, limits: AnalysisLimits):
+        """Start a budget.
+        
+        Args:
+            limits: The limits of the budget
+        """
+        self.limits = limits
+        self.deadline = time.perf_counter() + limits.file_seconds if limits.file_seconds else None
+        self.exceeded: Optional[str] = None
+    
+    def remaining(self) -> Optional[float]:
+        """Get the time left.
+        
+        Returns:
+            The seconds left before the deadline, or None without a time limit
+        """
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.perf_counter())
+    
+    def exceed(self, reason: str) -> None:
+        """Mark the budget as exceeded.
+        
+        Args:
+            reason: What exceeded the budget
+        
+        Raises:
+            BudgetExceeded: Always
+        """
+        self.exceeded = reason
+        raise BudgetExceeded(reason)
+    
+    def check(self, stage: str) -> None:
+        """Check that the deadline has not passed.
+        
+        Args:
+            stage: What the analysis is doing, for the message
+        
+        Raises:
+            BudgetExceeded: If the budget is exceeded
+        """
+        if self.exceeded is not None:
+            raise BudgetExceeded(self.exceeded)
+        if self.deadline is not None and time.perf_counter() > self.deadline:
+            self.timed_out(stage)
+    
+    def timed_out(self, stage: str) -> None:
+        """Mark the time budget as exceeded.
+        
+        Args:
+            stage: What the analysis was doing, for the message
+        
+        Raises:
+            BudgetExceeded: Always
+        """
+        self.exceed(f"time budget of {self.limits.file_seconds:g}s exceeded while {stage}")
+    
+    def check_captures(self, count: int, stage: str = "running queries") -> None:
+        """Check the number of captures a query returned, and the deadline.
+        
+        Args:
+            count: Number of captures
+            stage: What the analysis is doing, for the message
+        
+        Raises:
+            BudgetExceeded: If the budget is exceeded
+        """
+        max_captures = self.limits.max_captures
+        if max_captures is not None and count > max_captures:
+            self.exceed(f"query returned {count} captures, over the limit of {max_captures}")
+        self.check(stage)
+
+    def captures(self, query, node, stage: str = "running queries") -> List[Tuple]:
+        """Run a query, checking the budget between ranges of the source.
+        
+        The py-tree-sitter binding runs Query.captures to completion without
+        a match limit or timeout. With a time limit, the query therefore
+        runs over consecutive byte ranges of about QUERY_RANGE_BYTES, aligned
+        to the children of the node, and the budget is checked after each
+        range. A match that intersects several ranges is returned by each of
+        them, so each capture is kept as often as one range returns it. A
+        single range cannot be interrupted; process mode also enforces the
+        deadline from outside the worker.
+        
+        Args:
+            query: The tree_sitter.Query to run
+            node: The node to run it on, usually the root of the tree
+            stage: What the analysis is doing, for the message
+        
+        Returns:
+            The (node, capture name) pairs, as returned by Query.captures
+        
+        Raises:
+            BudgetExceeded: If the budget is exceeded
+        """
+        if self.deadline is None:
+            captures = query.captures(node)
+            self.check_captures(len(captures), stage)
+            return captures
+        
+        captures = []
+        counts: Dict[Tuple, int] = {}
+        for start_byte, end_byte in query_ranges(node, QUERY_RANGE_BYTES):
+            # Each match holding a node is returned by the range the node is
+            # in, so a capture occurs there as often as in a single run
+            range_counts: Dict[Tuple, int] = {}
+            for capture in query.captures(node, start_byte=start_byte, end_byte=end_byte):
+                key = (capture[0].id, capture[1])
+                range_counts[key] = range_counts.get(key, 0) + 1
+                if range_counts[key] > counts.get(key, 0):
+                    counts[key] = range_counts[key]
+                    captures.append(capture)
+            self.check_captures(len(captures), stage)
+        return captures
+
+def query_ranges(node, range_bytes: int = QUERY_RANGE_BYTES) -> List[Tuple[int, int]]:
+    """Split the source of a node into byte ranges aligned to its children.
+    
+    Consecutive children are merged until a range holds at least
+    range_bytes; a larger child gets a range of its own.
+    
+    Args:
+        node: The node to split, usually the root of a tree
+        range_bytes: Bytes of source per range
+    
+    Returns:
+        (start_byte, end_byte) pairs that cover the node without overlapping
+    """
+    ranges = []
+    start_byte = node.start_byte
+    pending = False
+    for child in node.children:
+        pending = True
+        if child.end_byte - start_byte >= range_bytes:
+            ranges.append((start_byte, child.end_byte))
+            start_byte = child.end_byte
+            pending = False
+    if pending or not ranges:
+        ranges.append((start_byte, node.end_byte))
+    else:
+        # Source after the last child, such as a trailing newline
+        ranges[-1] = (ranges[-1][0], node.end_byte)
+    return ranges
+
+def skipped_result(file_path: Union[str, Path], skipped: str, reason: str) -> Dict:
+    """Build the result of a file that was not analyzed.
+    
+    The result carries an error like other failed files, so reports and
+    summaries count it without special cases, and the reason on its own.
+    
+    Args:
+        file_path: Path of the file
+        skipped: Why the file was skipped, BUDGET_EXCEEDED or QUARANTINED
+        reason: Details for the error message
+    
+    Returns:
+        The result of the file
+    """
+    return {"error": f"Skipped: {reason}", "skipped": skipped, "reason": reason, "file": str(file_path)}
+
+class Quarantine:
+    """Files that exceeded their budget, skipped until they change.
+    
+    Entries are keyed by path and hold the size and modification time of
+    the file when it was quarantined; a file whose size or modification
+    time changed is analyzed again.
+    """
+    
+    def __init__(self, path: Optional[Union[str, Path]] = None, read_only: bool = False):
+        """Open a quarantine.
+        
+        Args:
+            path: Path of the quarantine file. If None, uses QUARANTINE_NAME
+                in the default cache directory.
+            read_only: If True, new entries are kept in memory only. Worker
+                processes open the quarantine read-only and leave recording
+                to the parent.
+        """
+        if path is None:
+            from .result_cache import default_cache_dir
+            path = default_cache_dir() / QUARANTINE_NAME
+        self.path = Path(path)
+        self.read_only = read_only
+        self._entries: Optional[Dict[str, Dict]] = None
+        self._lock = threading.Lock()
+    
+    def _load(self) -> Dict[str, Dict]:
+        """Read the entries on first use; call with the lock held."""
+        if self._entries is None:
+            self._entries = {}
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == QUARANTINE_VERSION:
+                    self._entries = data["files"]
+            except (OSError, ValueError, KeyError, AttributeError):
+                pass
+        return self._entries
+    
+    def _save(self) -> None:
+        """Write the entries atomically; call with the lock held."""
+        if self.read_only:
+            return
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": QUARANTINE_VERSION, "files": self._entries}, f, indent=2)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            logger.warning(f"Could not save the quarantine to {self.path}: {e}")
+    
+    def check(self, file_path: Union[str, Path]) -> Optional[str]:
+        """Check whether a file is quarantined.
+        
+        Args:
+            file_path: Path of the file
+        
+        Returns:
+            The reason the file was quarantined, or None if it is not, or
+            changed since
+        """
+        key = str(file_path)
+        with self._lock:
+            entry = self._load().get(key)
+        if entry is None:
+            return None
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        if stat.st_size != entry["size"] or stat.st_mtime_ns != entry["mtime_ns"]:
+            return None
+        return entry["reason"]
+    
+    def add(self, file_path: Union[str, Path], reason: str) -> None:
+        """Quarantine a file.
+        
+        Args:
+            file_path: Path of the file
+            reason: Why the file exceeded its budget
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return
+        entry = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "reason": reason,
+            "quarantined": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        }
+        with self._lock:
+            self._load()[str(file_path)] = entry
+            self._save()
+        logger.warning(f"Quarantined {file_path}: {reason}")
+    
+    def entries(self) -> Dict[str, Dict]:
+        """Get the quarantined files.
+        
+        Returns:
+            A dictionary mapping paths to their size, modification time,
+            reason and time of quarantine
+        """
+        with self._lock:
+            return dict(self._load())
+    
+    def clear(self) -> None:
+        """Release every file from the quarantine."""
+        with self._lock:
+            self._entries = {}
+            self._save()
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._load())
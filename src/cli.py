@@ -76,7 +76,7 @@ def list_categories(real):
 @click.option("--format", type=click.Choice(["json", "text", "html"]), default="json", help="Output format")
 @click.option("--extensions", "-e", help="Comma-separated list of file extensions to analyze")
 @click.option("--exclude", help="Comma-separated list of directories to exclude")
-@click.option("--workers", type=int, default=4, help="Number of worker threads for directory analysis")
+@click.option("--workers", type=int, default=None, help="Number of parallel workers for directory analysis (default: adapt to the available CPUs)")
 @click.option("--real/--mock", default=not use_mock, help="Use real or mock implementation")
 def analyze(file, directory, pattern, category, output, format, extensions, exclude, workers, real):
     """Analyze source code for patterns."""
@@ -10,7 +10,7 @@ import logging
 from typing import List, Optional
 
 from .parser import parse_args
-from .subcommands import pattern_command, list_command, architecture_command, visualize_command, anti_patterns_command, complexity_command
+from .subcommands import pattern_command, list_command, architecture_command, visualize_command, anti_patterns_command, complexity_command, watch_command, grammars_command, bench_command, merge_command
 
 # Configure logging
 logging.basicConfig(
@@ -50,8 +50,16 @@ def main(args: Optional[List[str]] = None) -> int:
         return visualize_command(parsed_args)
     elif parsed_args.command == "anti-patterns":
         return anti_patterns_command(parsed_args)
+    elif parsed_args.command == "merge":
+        return merge_command(parsed_args)
     elif parsed_args.command == "complexity":
         return complexity_command(parsed_args)
+    elif parsed_args.command == "watch":
+        return watch_command(parsed_args)
+    elif parsed_args.command == "grammars":
+        return grammars_command(parsed_args)
+    elif parsed_args.command == "bench":
+        return bench_command(parsed_args)
     else:
         logger.error("No command specified")
         return 1
@@ -9,6 +9,8 @@ import argparse
 import logging
 from typing import List, Optional
 
+from ..budget import DEFAULT_FILE_SECONDS, DEFAULT_MAX_CAPTURES
+
 logger = logging.getLogger(__name__)
 
 def setup_parser() -> argparse.ArgumentParser:
@@ -57,9 +59,9 @@ def setup_parser() -> argparse.ArgumentParser:
     )
     pattern_parser.add_argument(
         "--format", "-f",
-        choices=["json", "text", "html"],
+        choices=["json", "ndjson", "text", "html", "columnar"],
         default="text",
-        help="Output format"
+        help="Output format (columnar writes a binary result store and needs --output)"
     )
     pattern_parser.add_argument(
         "--output", "-o",
@@ -73,8 +75,103 @@ def setup_parser() -> argparse.ArgumentParser:
     pattern_parser.add_argument(
         "--workers", "-w",
         type=int,
-        default=4,
-        help="Number of worker threads for parallel processing"
+        help="Number of parallel workers (default: adapt to the available CPUs and measured throughput)"
+    )
+    pattern_parser.add_argument(
+        "--executor",
+        choices=["thread", "process"],
+        default="thread",
+        help="Run analysis in worker threads or worker processes"
+    )
+    pattern_parser.add_argument(
+        "--revision", "-r",
+        action="append",
+        metavar="REV",
+        help="Analyze the files of git revision REV of the repository at path, without checking it out (repeatable)"
+    )
+    pattern_parser.add_argument(
+        "--shard",
+        metavar="I/N",
+        help="Analyze only shard I of N of the files and write its partial results to --output; combine the shards with 'merge'"
+    )
+    pattern_parser.add_argument(
+        "--unordered",
+        action="store_true",
+        help="Output results as files complete instead of sorted by path"
+    )
+    pattern_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the persistent result cache"
+    )
+    pattern_parser.add_argument(
+        "--cache-dir",
+        help="Directory of the persistent result cache"
+    )
+    pattern_parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print the time spent in each stage and pattern, and the slowest files, to stderr"
+    )
+    pattern_parser.add_argument(
+        "--profile-output",
+        metavar="FILE",
+        help="Write the profile as JSON to FILE (implies --profile)"
+    )
+    pattern_parser.add_argument(
+        "--file-timeout",
+        type=float,
+        default=DEFAULT_FILE_SECONDS,
+        metavar="SECONDS",
+        help=f"Skip files whose analysis takes longer than SECONDS (default: {DEFAULT_FILE_SECONDS:g}, 0 disables)"
+    )
+    pattern_parser.add_argument(
+        "--max-captures",
+        type=int,
+        default=DEFAULT_MAX_CAPTURES,
+        metavar="N",
+        help=f"Skip files for which a query returns more than N captures (default: {DEFAULT_MAX_CAPTURES}, 0 disables)"
+    )
+    pattern_parser.add_argument(
+        "--no-quarantine",
+        action="store_true",
+        help="Neither skip nor record files that exceeded their budget in earlier runs"
+    )
+    pattern_parser.add_argument(
+        "--retry-quarantined",
+        action="store_true",
+        help="Release the files quarantined by earlier runs and analyze them again"
+    )
+    
+    # Watch command
+    watch_parser = subparsers.add_parser(
+        "watch",
+        help="Re-analyze files incrementally as they change"
+    )
+    watch_parser.add_argument(
+        "paths",
+        nargs="+",
+        help="Files or directories to watch"
+    )
+    watch_parser.add_argument(
+        "--pattern", "-p",
+        help="Specific pattern to look for"
+    )
+    watch_parser.add_argument(
+        "--category", "-c",
+        help="Category of patterns to look for"
+    )
+    watch_parser.add_argument(
+        "--format", "-f",
+        choices=["text", "json"],
+        default="text",
+        help="Output format (json prints one object per line)"
+    )
+    watch_parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.5,
+        help="Seconds between checks for changes"
     )
     
     # List available patterns command
@@ -86,6 +183,11 @@ def setup_parser() -> argparse.ArgumentParser:
         "--category", "-c",
         help="List patterns in a specific category"
     )
+    list_parser.add_argument(
+        "--plan",
+        metavar="LANGUAGE",
+        help="Show the execution plan for a language: which patterns run and how"
+    )
     list_parser.add_argument(
         "--mock",
         action="store_true",
@@ -119,8 +221,18 @@ def setup_parser() -> argparse.ArgumentParser:
     arch_parser.add_argument(
         "--workers", "-w",
         type=int,
-        default=4,
-        help="Number of worker threads for parallel processing"
+        help="Number of parallel workers (default: adapt to the available CPUs and measured throughput)"
+    )
+    arch_parser.add_argument(
+        "--executor",
+        choices=["thread", "process"],
+        default="thread",
+        help="Run analysis in worker threads or worker processes"
+    )
+    arch_parser.add_argument(
+        "--shard",
+        metavar="I/N",
+        help="Analyze only shard I of N of the files and write its partial results to --output; combine the shards with 'merge'"
     )
     arch_parser.add_argument(
         "--style",
@@ -137,6 +249,39 @@ def setup_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Use mock implementation instead of tree-sitter"
     )
+    arch_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the persistent result cache"
+    )
+    arch_parser.add_argument(
+        "--cache-dir",
+        help="Directory of the persistent result cache"
+    )
+    arch_parser.add_argument(
+        "--file-timeout",
+        type=float,
+        default=DEFAULT_FILE_SECONDS,
+        metavar="SECONDS",
+        help=f"Skip files whose analysis takes longer than SECONDS (default: {DEFAULT_FILE_SECONDS:g}, 0 disables)"
+    )
+    arch_parser.add_argument(
+        "--max-captures",
+        type=int,
+        default=DEFAULT_MAX_CAPTURES,
+        metavar="N",
+        help=f"Skip files for which a query returns more than N captures (default: {DEFAULT_MAX_CAPTURES}, 0 disables)"
+    )
+    arch_parser.add_argument(
+        "--no-quarantine",
+        action="store_true",
+        help="Neither skip nor record files that exceeded their budget in earlier runs"
+    )
+    arch_parser.add_argument(
+        "--retry-quarantined",
+        action="store_true",
+        help="Release the files quarantined by earlier runs and analyze them again"
+    )
     
     # Visualization command
     vis_parser = subparsers.add_parser(
@@ -166,8 +311,13 @@ def setup_parser() -> argparse.ArgumentParser:
     vis_parser.add_argument(
         "--workers", "-w",
         type=int,
-        default=4,
-        help="Number of worker threads for parallel processing"
+        help="Number of parallel workers (default: adapt to the available CPUs and measured throughput)"
+    )
+    vis_parser.add_argument(
+        "--executor",
+        choices=["thread", "process"],
+        default="thread",
+        help="Run analysis in worker threads or worker processes"
     )
     vis_parser.add_argument(
         "--open",
@@ -207,14 +357,77 @@ def setup_parser() -> argparse.ArgumentParser:
     anti_patterns_parser.add_argument(
         "--workers", "-w",
         type=int,
-        default=4,
-        help="Number of worker threads for parallel processing"
+        help="Number of parallel workers (default: adapt to the available CPUs and measured throughput)"
+    )
+    anti_patterns_parser.add_argument(
+        "--executor",
+        choices=["thread", "process"],
+        default="thread",
+        help="Run analysis in worker threads or worker processes"
+    )
+    anti_patterns_parser.add_argument(
+        "--shard",
+        metavar="I/N",
+        help="Analyze only shard I of N of the files and write its partial results to --output; combine the shards with 'merge'"
     )
     anti_patterns_parser.add_argument(
         "--mock",
         action="store_true",
         help="Use mock implementation instead of tree-sitter"
     )
+    anti_patterns_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the persistent result cache"
+    )
+    anti_patterns_parser.add_argument(
+        "--cache-dir",
+        help="Directory of the persistent result cache"
+    )
+    anti_patterns_parser.add_argument(
+        "--file-timeout",
+        type=float,
+        default=DEFAULT_FILE_SECONDS,
+        metavar="SECONDS",
+        help=f"Skip files whose analysis takes longer than SECONDS (default: {DEFAULT_FILE_SECONDS:g}, 0 disables)"
+    )
+    anti_patterns_parser.add_argument(
+        "--max-captures",
+        type=int,
+        default=DEFAULT_MAX_CAPTURES,
+        metavar="N",
+        help=f"Skip files for which a query returns more than N captures (default: {DEFAULT_MAX_CAPTURES}, 0 disables)"
+    )
+    anti_patterns_parser.add_argument(
+        "--no-quarantine",
+        action="store_true",
+        help="Neither skip nor record files that exceeded their budget in earlier runs"
+    )
+    anti_patterns_parser.add_argument(
+        "--retry-quarantined",
+        action="store_true",
+        help="Release the files quarantined by earlier runs and analyze them again"
+    )
+    
+    # Merge command
+    merge_parser = subparsers.add_parser(
+        "merge",
+        help="Merge the partial results of a sharded run"
+    )
+    merge_parser.add_argument(
+        "partials",
+        nargs="+",
+        help="Partial result files written with --shard, one for each shard"
+    )
+    merge_parser.add_argument(
+        "--format", "-f",
+        choices=["json", "ndjson", "text", "html", "columnar"],
+        help="Output format, one of those of the sharded command (default: text)"
+    )
+    merge_parser.add_argument(
+        "--output", "-o",
+        help="Output file (stdout if not specified)"
+    )
     
     # Complexity analysis command
     complexity_parser = subparsers.add_parser(
@@ -262,6 +475,132 @@ def setup_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Use mock implementation instead of tree-sitter"
     )
+    complexity_parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Do not read or write the persistent result cache"
+    )
+    complexity_parser.add_argument(
+        "--cache-dir",
+        help="Directory of the persistent result cache"
+    )
+    
+    # Grammar cache commands
+    grammars_parser = subparsers.add_parser(
+        "grammars",
+        help="Build or list the prebuilt tree-sitter grammars"
+    )
+    grammars_subparsers = grammars_parser.add_subparsers(dest="grammars_command", required=True)
+    
+    grammars_build_parser = grammars_subparsers.add_parser(
+        "build",
+        help="Compile grammars from local sources into the prebuilt cache"
+    )
+    grammars_build_parser.add_argument(
+        "languages",
+        nargs="*",
+        help="Languages to build (all default languages if not specified)"
+    )
+    grammars_build_parser.add_argument(
+        "--source-dir",
+        help="Directory with one grammar checkout per language"
+    )
+    grammars_build_parser.add_argument(
+        "--fetch",
+        action="store_true",
+        help="Clone or download grammar sources that are missing"
+    )
+    grammars_build_parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rebuild grammars whose sources are unchanged"
+    )
+    grammars_build_parser.add_argument(
+        "--timeout",
+        type=float,
+        help="Seconds to wait for a build running in another process"
+    )
+    
+    grammars_list_parser = grammars_subparsers.add_parser(
+        "list",
+        help="List the grammars in the prebuilt cache"
+    )
+    
+    for grammars_subparser in (grammars_build_parser, grammars_list_parser):
+        grammars_subparser.add_argument(
+            "--grammar-dir",
+            help="Directory of the prebuilt grammar cache"
+        )
+    
+    # Benchmark command
+    bench_parser = subparsers.add_parser(
+        "bench",
+        help="Time the analysis stages on a synthetic corpus"
+    )
+    bench_parser.add_argument(
+        "--files", "-n",
+        type=int,
+        default=1000,
+        help="Number of files in the synthetic corpus"
+    )
+    bench_parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Seed of the synthetic corpus"
+    )
+    bench_parser.add_argument(
+        "--languages",
+        nargs="+",
+        help="Languages of the synthetic corpus (a mix of all supported languages if not specified)"
+    )
+    bench_parser.add_argument(
+        "--corpus-dir",
+        help="Directory to generate the corpus in (a reused temporary directory if not specified)"
+    )
+    bench_parser.add_argument(
+        "--regenerate",
+        action="store_true",
+        help="Regenerate the corpus even if it already exists"
+    )
+    bench_parser.add_argument(
+        "--stages",
+        nargs="+",
+        choices=["discovery", "parse", "match", "architecture", "complexity", "report"],
+        help="Stages to time (all if not specified)"
+    )
+    bench_parser.add_argument(
+        "--repeat",
+        type=int,
+        default=1,
+        help="Number of runs; the fastest time of each stage is kept"
+    )
+    bench_parser.add_argument(
+        "--pattern-sample",
+        type=int,
+        default=200,
+        help="Number of files to time each pattern on alone (0 to skip)"
+    )
+    bench_parser.add_argument(
+        "--output", "-o",
+        help="Write the results as JSON to this file, e.g. to use as a baseline"
+    )
+    bench_parser.add_argument(
+        "--baseline",
+        help="Compare against results saved with --output and fail on regressions"
+    )
+    bench_parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Share by which a stage may get slower than the baseline (0.25 allows 25%%)"
+    )
+    bench_parser.add_argument(
+        "--min-seconds",
+        type=float,
+        default=0.05,
+        help="Do not fail on stages faster than this in both runs"
+    )
     
     return parser
 
@@ -9,15 +9,78 @@ import os
 import sys
 import json
 import logging
+import argparse
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Any
 
 import webbrowser
-from ..analyzer import CodeAnalyzer
-from ..commands.complexity import complexity_command
+
+from ..match import to_json_default
+
+# The analyzer and commands are imported by the subcommands that use them,
+# so that the CLI starts without loading them
+if TYPE_CHECKING:
+    from ..analyzer import CodeAnalyzer
+    from ..budget import AnalysisLimits, Quarantine
+    from ..profiling import Profiler
+    from ..result_cache import ResultCache
 
 logger = logging.getLogger(__name__)
 
+def _create_cache(args) -> Optional['ResultCache']:
+    """Open the persistent result cache selected on the command line.
+    
+    Args:
+        args: Parsed command line arguments
+        
+    Returns:
+        The result cache, or None if caching is disabled
+    """
+    from ..result_cache import ResultCache
+    
+    if getattr(args, "no_cache", False):
+        return None
+    return ResultCache(getattr(args, "cache_dir", None))
+
+def _create_limits(args) -> Optional['AnalysisLimits']:
+    """Build the per-file analysis limits selected on the command line.
+    
+    Args:
+        args: Parsed command line arguments
+    
+    Returns:
+        The limits, or None if every limit is disabled
+    """
+    from ..budget import DEFAULT_FILE_SECONDS, DEFAULT_MAX_CAPTURES, AnalysisLimits
+    
+    file_seconds = getattr(args, "file_timeout", DEFAULT_FILE_SECONDS)
+    max_captures = getattr(args, "max_captures", DEFAULT_MAX_CAPTURES)
+    if not file_seconds and not max_captures:
+        return None
+    return AnalysisLimits(file_seconds or None, max_captures or None)
+
+def _create_quarantine(args) -> Optional['Quarantine']:
+    """Open the quarantine of files that exceeded their budget.
+    
+    The quarantine is kept in the directory of the result cache.
+    
+    Args:
+        args: Parsed command line arguments
+    
+    Returns:
+        The quarantine, or None if it is disabled
+    """
+    from ..budget import QUARANTINE_NAME, Quarantine
+    from ..result_cache import default_cache_dir
+    
+    if getattr(args, "no_quarantine", False):
+        return None
+    cache_dir = getattr(args, "cache_dir", None)
+    quarantine = Quarantine(Path(cache_dir or default_cache_dir()) / QUARANTINE_NAME)
+    if getattr(args, "retry_quarantined", False):
+        quarantine.clear()
+    return quarantine
+
 def pattern_command(args) -> int:
     """Find patterns in code.
     
@@ -27,42 +90,203 @@ def pattern_command(args) -> int:
     Returns:
         Exit code
     """
+    from ..analyzer import CodeAnalyzer
+    
     logger.info(f"Looking for {args.pattern or 'all'} patterns in {args.path}")
     
+    if args.format == "columnar" and not args.output:
+        logger.error("The columnar format is binary and needs --output")
+        return 1
+    
+    profiler = None
+    if getattr(args, "profile", False) or getattr(args, "profile_output", None):
+        from ..profiling import Profiler
+        profiler = Profiler()
+    
     try:
         # Initialize the analyzer
-        analyzer = CodeAnalyzer(args.mock)
+        analyzer = CodeAnalyzer(
+            args.mock, cache=_create_cache(args), profiler=profiler,
+            limits=_create_limits(args), quarantine=_create_quarantine(args)
+        )
         
         # Analyze the path
-        if os.path.isfile(args.path):
-            results = [analyzer.analyze_file(args.path, args.pattern, args.category)]
-        else:
-            results = analyzer.analyze_directory(
-                args.path, 
-                args.pattern, 
+        if args.revision:
+            if args.shard:
+                logger.error("--revision cannot be combined with --shard")
+                return 1
+            if args.executor == "process":
+                logger.warning("Git revisions are analyzed in worker threads")
+            results = analyzer.iter_analyze_revisions(
+                args.path,
+                args.revision,
+                args.pattern,
                 args.category,
-                None,  # exclude_dirs
                 args.extensions,
                 args.workers
             )
-        
-        # Generate report
-        report = analyzer.generate_report(results, args.format)
-        
-        # Write to output file or print to console
-        if args.output:
-            with open(args.output, 'w') as f:
-                f.write(report)
-            logger.info(f"Report written to {args.output}")
+            exit_code = _write_pattern_report(args, results)
+        elif args.shard:
+            if os.path.isfile(args.path):
+                logger.error("Sharded analysis requires a directory, not a file")
+                return 1
+            options = {
+                "pattern": args.pattern,
+                "category": args.category,
+                "extensions": args.extensions,
+                "mock": args.mock,
+            }
+            exit_code = _analyze_shard(analyzer, args, "pattern", options, args.pattern, args.category)
         else:
-            print(report)
-            
-        return 0
-        
+            if os.path.isfile(args.path):
+                results = [analyzer.analyze_file(args.path, args.pattern, args.category)]
+            else:
+                results = analyzer.iter_analyze_directory(
+                    args.path, 
+                    args.pattern, 
+                    args.category,
+                    None,  # exclude_dirs
+                    args.extensions,
+                    args.workers,
+                    args.executor,
+                    ordered=not args.unordered
+                )
+        
+            # Write to output file or print to console as files complete
+            exit_code = _write_pattern_report(args, results)
+        
+        if profiler is not None:
+            write_profile(profiler, args.profile_output)
+        
+        return exit_code
+    
     except Exception as e:
         logger.error(f"Error: {str(e)}")
         return 1
 
+def _write_pattern_report(args, results: Iterable[Dict]) -> int:
+    """Write the results of the pattern command in the selected format.
+    
+    Args:
+        args: Parsed command line arguments
+        results: The analysis result of each file
+    
+    Returns:
+        Exit code
+    """
+    from ..analyzer import CodeAnalyzer
+    
+    if args.format == "columnar":
+        from ..result_store import ResultStore
+        store = ResultStore.from_results(results)
+        store.save(args.output)
+        logger.info(f"Result store with {store.match_count} matches in {len(store)} files written to {args.output}")
+    elif args.output:
+        with open(args.output, 'w') as f:
+            CodeAnalyzer.write_report(results, f, args.format)
+        logger.info(f"Report written to {args.output}")
+    else:
+        CodeAnalyzer.write_report(results, sys.stdout, args.format)
+        if args.format != "ndjson":
+            sys.stdout.write("\n")
+    return 0
+        
+def _analyze_shard(analyzer: 'CodeAnalyzer',
+                   args,
+                   command: str,
+                   options: Dict,
+                   pattern_name: Optional[str] = None,
+                   category: Optional[str] = None) -> int:
+    """Analyze one shard of a directory and write its partial result file.
+    
+    Args:
+        analyzer: The analyzer to use
+        args: Parsed command line arguments, with the shard as "i/N"
+        command: The command being run
+        options: The options of the command that every shard must share
+        pattern_name: If provided, only look for this specific pattern
+        category: If provided, only look for patterns in this category
+    
+    Returns:
+        Exit code
+    """
+    from ..result_cache import relabel_result
+    from ..sharding import Shard, relative_path, select_shard, write_partial
+    
+    shard = Shard.parse(args.shard)
+    if not args.output:
+        logger.error("--shard writes a partial result file and needs --output")
+        return 1
+    
+    # Every shard discovers the same files in the order of a single-node run
+    files = analyzer.discover_files(args.path, None, args.extensions)
+    files.sort(key=lambda f: str(f.path))
+    indices, shard_files = select_shard(files, shard, args.path)
+    logger.info(f"Shard {shard} analyzes {len(shard_files)} of {len(files)} files")
+    
+    results = analyzer.iter_analyze_files(
+        shard_files, pattern_name, category, args.workers, args.executor, ordered=True
+    )
+    
+    # Label files relative to the directory, so that shards run in
+    # different checkouts merge into the same report
+    results = (
+        relabel_result(result, relative_path(discovered.path, args.path))
+        for discovered, result in zip(shard_files, results)
+    )
+    with open(args.output, 'w', encoding='utf-8') as f:
+        write_partial(f, shard, command, options, len(files), indices, results)
+    logger.info(f"Partial results of shard {shard} written to {args.output}")
+    return 0
+
+
+def write_profile(profiler: 'Profiler', output: Optional[str] = None) -> None:
+    """Print a profile to stderr, and save it as JSON if asked to.
+    
+    Args:
+        profiler: The profile of the analysis
+        output: Optional path of the JSON file to write
+    """
+    sys.stderr.write(profiler.format_report() + "\n")
+    if output:
+        with open(output, 'w') as f:
+            json.dump(profiler.to_dict(), f, indent=2)
+        logger.info(f"Profile written to {output}")
+
+
+def print_plan(analyzer: 'CodeAnalyzer', language: str, category: Optional[str] = None) -> int:
+    """Print the execution plan for a language.
+    
+    Args:
+        analyzer: The analyzer whose plan to print
+        language: The language to print the plan for
+        category: If provided, only include patterns in this category
+        
+    Returns:
+        Exit code
+    """
+    steps = analyzer.describe_plan(language, category=category)
+    if not steps:
+        print(f"No patterns run on {language} files")
+        return 0
+    
+    fused = [step['name'] for step in steps if step['kind'] == "fused"]
+    print(f"Execution plan for {language} ({len(steps)} patterns):")
+    if fused:
+        print(f"  One fused query matches {len(fused)} patterns:")
+        for name in fused:
+            print(f"    - {name}")
+    
+    for step in steps:
+        if step['kind'] == "fused":
+            continue
+        line = f"  - {step['name']} ({step['kind']})"
+        if step['sub_patterns']:
+            line += f": {', '.join(step['sub_patterns'])}"
+        print(line)
+    
+    return 0
+
 
 def visualize_command(args) -> int:
     """Generate visualizations for architectural patterns.
@@ -73,6 +297,8 @@ def visualize_command(args) -> int:
     Returns:
         Exit code
     """
+    from ..analyzer import CodeAnalyzer
+    
     logger.info(f"Generating visualization for {args.pattern} in {args.path}")
     
     try:
@@ -91,7 +317,8 @@ def visualize_command(args) -> int:
             None,  # category
             None,  # exclude_dirs
             args.extensions,
-            args.workers
+            args.workers,
+            args.executor
         )
         
         # Analyze architectural patterns based on the requested pattern
@@ -130,6 +357,49 @@ def visualize_command(args) -> int:
         return 1
 
 
+def watch_command(args) -> int:
+    """Watch files and re-analyze them incrementally as they change.
+    
+    Args:
+        args: Parsed command line arguments
+        
+    Returns:
+        Exit code
+    """
+    from ..analyzer import CodeAnalyzer
+    
+    logger.info(f"Watching {', '.join(args.paths)}")
+    
+    def report_update(result: Dict, stats: Dict) -> None:
+        if args.format == "json":
+            print(json.dumps({"result": result, "stats": stats}, default=to_json_default), flush=True)
+            return
+        
+        if "error" in result:
+            print(f"{result['file']}: error: {result['error']}", flush=True)
+            return
+        
+        print(
+            f"{result['file']}: {result['summary']['total_patterns']} matches "
+            f"({stats['mode']}, {stats['elapsed_ms']:.1f} ms, "
+            f"{len(stats['rerun']) + len(stats['region'])} patterns re-matched, "
+            f"{len(stats['reused'])} reused)",
+            flush=True
+        )
+    
+    try:
+        analyzer = CodeAnalyzer(args.mock)
+        analyzer.watch(args.paths, report_update, args.pattern, args.category, args.interval)
+        return 0
+        
+    except KeyboardInterrupt:
+        return 0
+        
+    except Exception as e:
+        logger.error(f"Error: {str(e)}")
+        return 1
+
+
 def list_command(args) -> int:
     """List available patterns.
     
@@ -142,15 +412,20 @@ def list_command(args) -> int:
     logger.info("Listing available patterns")
     
     try:
-        # Initialize the analyzer
-        analyzer = CodeAnalyzer(args.mock)
+        if args.plan:
+            from ..analyzer import CodeAnalyzer
+            return print_plan(CodeAnalyzer(args.mock), args.plan, args.category)
+        
+        # Listing only needs the registry, so no pattern module is imported
+        from ..pattern_recognizer import PatternRecognizer
+        recognizer = PatternRecognizer()
         
         # Get available patterns
         if args.category:
-            patterns = analyzer.get_patterns_by_category(args.category)
+            patterns = recognizer.get_patterns_by_category(args.category)
             print(f"Patterns in category '{args.category}':")
         else:
-            patterns = analyzer.get_available_patterns()
+            patterns = recognizer.get_available_patterns()
             print("Available patterns:")
             
         for pattern in patterns:
@@ -158,7 +433,7 @@ def list_command(args) -> int:
             
         print()
         print("Available categories:")
-        for category in analyzer.get_available_categories():
+        for category in recognizer.get_available_categories():
             print(f"  - {category}")
             
         return 0
@@ -177,6 +452,8 @@ def visualize_command(args) -> int:
     Returns:
         Exit code
     """
+    from ..analyzer import CodeAnalyzer
+    
     logger.info(f"Generating visualization for {args.pattern} in {args.path}")
     
     try:
@@ -195,7 +472,8 @@ def visualize_command(args) -> int:
             None,  # category
             None,  # exclude_dirs
             args.extensions,
-            args.workers
+            args.workers,
+            args.executor
         )
         
         # Analyze architectural patterns based on the requested pattern
@@ -243,27 +521,60 @@ def architecture_command(args) -> int:
     Returns:
         Exit code
     """
+    from ..analyzer import CodeAnalyzer
+    
     logger.info(f"Analyzing architecture of {args.path}")
     
     try:
         # Initialize the analyzer
-        analyzer = CodeAnalyzer(args.mock)
+        analyzer = CodeAnalyzer(
+            args.mock, cache=_create_cache(args),
+            limits=_create_limits(args), quarantine=_create_quarantine(args)
+        )
         
         # Analyze the path
         if os.path.isfile(args.path):
             logger.error("Architecture analysis requires a directory, not a file")
             return 1
             
+        category = "architectural_intents" if not args.style else None
+        if args.shard:
+            options = {
+                "extensions": args.extensions,
+                "style": args.style,
+                "visualize": args.visualize,
+                "mock": args.mock,
+            }
+            return _analyze_shard(analyzer, args, "architecture", options, None, category)
+        
         # Analyze files first
         file_results = analyzer.analyze_directory(
             args.path, 
             None,  # pattern
-            "architectural_intents" if not args.style else None,  # category
+            category,
             None,  # exclude_dirs
             args.extensions,
-            args.workers
+            args.workers,
+            args.executor
         )
         
+        return _report_architecture(args, file_results)
+    
+    except Exception as e:
+        logger.error(f"Error: {str(e)}")
+        return 1
+
+def _report_architecture(args, file_results: List[Dict]) -> int:
+    """Detect the architecture of a codebase from the results of its files and report it.
+    
+    Args:
+        args: Parsed command line arguments
+        file_results: The analysis result of each file
+    
+    Returns:
+        Exit code
+    """
+    try:
         # Analyze architectural intents
         architectural_intents = {}
         if not args.style:
@@ -303,7 +614,7 @@ def architecture_command(args) -> int:
             
         # Output format
         if args.format == 'json':
-            output = json.dumps(result, indent=2)
+            output = json.dumps(result, indent=2, default=to_json_default)
         else:
             # Text format - just use the summary
             if args.style:
@@ -335,17 +646,29 @@ def anti_patterns_command(args) -> int:
     Returns:
         Exit code
     """
+    from ..analyzer import CodeAnalyzer
+    
     logger.info(f"Analyzing architectural anti-patterns in {args.path}")
     
     try:
         # Initialize the analyzer
-        analyzer = CodeAnalyzer(args.mock)
+        analyzer = CodeAnalyzer(
+            args.mock, cache=_create_cache(args),
+            limits=_create_limits(args), quarantine=_create_quarantine(args)
+        )
         
         # Analyze the path
         if os.path.isfile(args.path):
             logger.error("Anti-pattern analysis requires a directory, not a file")
             return 1
             
+        if args.shard:
+            options = {
+                "extensions": args.extensions,
+                "mock": args.mock,
+            }
+            return _analyze_shard(analyzer, args, "anti-patterns", options)
+        
         # Analyze files first
         file_results = analyzer.analyze_directory(
             args.path, 
@@ -353,9 +676,27 @@ def anti_patterns_command(args) -> int:
             None,  # category
             None,  # exclude_dirs
             args.extensions,
-            args.workers
+            args.workers,
+            args.executor
         )
         
+        return _report_anti_patterns(args, file_results)
+    
+    except Exception as e:
+        logger.error(f"Error: {str(e)}")
+        return 1
+
+def _report_anti_patterns(args, file_results: List[Dict]) -> int:
+    """Detect the anti-patterns of a codebase from the results of its files and report them.
+    
+    Args:
+        args: Parsed command line arguments
+        file_results: The analysis result of each file
+    
+    Returns:
+        Exit code
+    """
+    try:
         # First, detect architectural styles (needed for anti-pattern detection)
         from ..patterns.architectural_styles import ArchitecturalStyleDetector
         style_detector = ArchitecturalStyleDetector()
@@ -376,7 +717,7 @@ def anti_patterns_command(args) -> int:
         
         # Generate output
         if args.format == 'json':
-            output = json.dumps(anti_pattern_analysis, indent=2)
+            output = json.dumps(anti_pattern_analysis, indent=2, default=to_json_default)
         elif args.format == 'text':
             from ..commands.anti_patterns import generate_text_report
             output = generate_text_report(anti_pattern_analysis, args.path)
@@ -411,6 +752,8 @@ def visualize_command(args) -> int:
     Returns:
         Exit code
     """
+    from ..analyzer import CodeAnalyzer
+    
     logger.info(f"Generating visualization for {args.pattern} in {args.path}")
     
     try:
@@ -429,7 +772,8 @@ def visualize_command(args) -> int:
             None,  # category
             None,  # exclude_dirs
             args.extensions,
-            args.workers
+            args.workers,
+            args.executor
         )
         
         # Analyze architectural patterns based on the requested pattern
@@ -462,7 +806,195 @@ def visualize_command(args) -> int:
             return 1
             
         return 0
+    
+    except Exception as e:
+        logger.error(f"Error: {str(e)}")
+        return 1
+
+
+# Output formats of the commands whose partial results can be merged
+MERGE_FORMATS = {
+    "pattern": ["json", "ndjson", "text", "html", "columnar"],
+    "architecture": ["json", "text"],
+    "anti-patterns": ["json", "text", "html"],
+}
+
+def merge_command(args) -> int:
+    """Merge the partial results of a sharded run into the output of a single-node run.
+    
+    Args:
+        args: Parsed command line arguments
+    
+    Returns:
+        Exit code
+    """
+    from ..sharding import check_partials, iter_merged
+    
+    try:
+        header = check_partials(args.partials)
+        command = header["command"]
+        if command not in MERGE_FORMATS:
+            logger.error(f"Partial results of the {command} command cannot be merged")
+            return 1
+        
+        output_format = args.format or "text"
+        if output_format not in MERGE_FORMATS[command]:
+            logger.error(f"The {command} command has no {output_format} format")
+            return 1
+        if output_format == "columnar" and not args.output:
+            logger.error("The columnar format is binary and needs --output")
+            return 1
+        
+        # The options of the sharded run, with the output selected here; the
+        # merged files are labelled relative to the analyzed directory
+        merged_args = argparse.Namespace(
+            **header["options"], path=".", format=output_format, output=args.output
+        )
+        logger.info(f"Merging {header['total_files']} file results of the {command} command "
+                    f"from {len(args.partials)} shards")
+        
+        results = iter_merged(args.partials)
+        if command == "pattern":
+            return _write_pattern_report(merged_args, results)
+        
+        # The codebase-level analyses need the results of every file
+        file_results = list(results)
+        if command == "architecture":
+            return _report_architecture(merged_args, file_results)
+        return _report_anti_patterns(merged_args, file_results)
         
     except Exception as e:
         logger.error(f"Error: {str(e)}")
-        return 1
\ No newline at end of file
+        return 1
+
+
+def complexity_command(args) -> int:
+    """Analyze code complexity.
+    
+    Args:
+        args: Parsed command line arguments
+        
+    Returns:
+        Exit code
+    """
+    from ..commands.complexity import complexity_command as complexity_click_command
+    
+    try:
+        complexity_click_command.callback(
+            path=args.path,
+            output=args.output,
+            output_format=args.format,
+            exclude=args.exclude,
+            extensions=args.extensions,
+            metrics=args.metrics,
+            threshold=args.threshold,
+            use_real=not args.mock,
+            debug=args.debug,
+            no_cache=args.no_cache,
+            cache_dir=args.cache_dir
+        )
+        return 0
+        
+    except Exception as e:
+        logger.error(f"Error: {str(e)}")
+        return 1
+
+
+def grammars_command(args) -> int:
+    """Build or list the prebuilt tree-sitter grammars.
+    
+    Args:
+        args: Parsed command line arguments
+        
+    Returns:
+        Exit code
+    """
+    from ..grammar_cache import GrammarCache
+    from ..tree_sitter_manager import TreeSitterManager
+    
+    try:
+        grammar_cache = GrammarCache(args.grammar_dir) if args.grammar_dir else None
+        manager = TreeSitterManager(grammar_cache=grammar_cache, allow_build=True)
+        grammar_cache = manager.grammar_cache
+        
+        if args.grammars_command == "list":
+            grammars = grammar_cache.read_manifest()["grammars"]
+            print(f"Prebuilt grammars in {grammar_cache.directory}:")
+            for name, entry in sorted(grammars.items()):
+                status = "ok" if grammar_cache.library_path(name) else "missing library"
+                print(f"  - {name} ({entry['language']}, sources {entry['source_digest'][:12]}): {status}")
+            if not grammars:
+                print("  (none; run 'code-pattern grammars build')")
+            return 0
+        
+        languages = args.languages or sorted(manager.DEFAULT_LANGUAGES)
+        unknown = [language for language in languages if language not in manager.DEFAULT_LANGUAGES]
+        if unknown:
+            logger.error(f"Unknown languages: {', '.join(unknown)}")
+            return 1
+        
+        outcomes = grammar_cache.build(
+            manager, languages,
+            source_root=args.source_dir,
+            fetch=args.fetch,
+            force=args.force,
+            timeout=args.timeout
+        )
+        
+        print(f"Grammar cache: {grammar_cache.directory}")
+        for language in languages:
+            print(f"  - {language}: {outcomes[language]}")
+        
+        return 0 if all(outcome in ("built", "up-to-date") for outcome in outcomes.values()) else 1
+        
+    except Exception as e:
+        logger.error(f"Error: {str(e)}")
+        return 1
+
+def bench_command(args) -> int:
+    """Time the analysis stages on a synthetic corpus.
+    
+    Args:
+        args: Parsed command line arguments
+    
+    Returns:
+        Exit code; 1 if a stage regressed against the baseline
+    """
+    import tempfile
+    from ..synthetic_corpus import generate_corpus
+    from ..benchmark_suite import run_benchmarks, compare_results, format_results
+    
+    try:
+        corpus_dir = args.corpus_dir
+        if not corpus_dir:
+            languages = "-".join(args.languages) if args.languages else "mixed"
+            corpus_dir = os.path.join(
+                tempfile.gettempdir(), f"code-pattern-bench-{args.files}-{args.seed}-{languages}"
+            )
+        corpus = generate_corpus(corpus_dir, args.files, args.seed, args.languages, force=args.regenerate)
+        
+        results = run_benchmarks(corpus, args.stages, args.repeat, args.pattern_sample, use_mock=args.mock)
+        
+        comparisons = None
+        if args.baseline:
+            with open(args.baseline, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+            comparisons = compare_results(results, baseline, args.threshold, args.min_seconds)
+        
+        print(format_results(results, comparisons))
+        
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            logger.info(f"Benchmark results written to {args.output}")
+        
+        regressions = [comparison.stage for comparison in comparisons or () if comparison.regressed]
+        if regressions:
+            logger.error(f"Slower than the baseline by more than {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+        
+        return 0
+    
+    except Exception as e:
+        logger.error(f"Error: {str(e)}")
+        return 1
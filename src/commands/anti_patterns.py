@@ -8,9 +8,7 @@ import click
 import logging
 from pathlib import Path
 
-from ..analyzer import CodeAnalyzer
-from ..patterns.architectural_styles import ArchitecturalStyleDetector
-from ..patterns.architectural_anti_patterns import ArchitecturalAntiPatternDetector
+from ..match import to_json_default
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -29,6 +27,10 @@ def anti_patterns_command(directory, output, output_format, exclude, extensions,
     This command analyzes a codebase to identify architectural anti-patterns such as
     tight coupling, dependency cycles, and architectural erosion.
     """
+    from ..analyzer import CodeAnalyzer
+    from ..patterns.architectural_styles import ArchitecturalStyleDetector
+    from ..patterns.architectural_anti_patterns import ArchitecturalAntiPatternDetector
+    
     try:
         # Set up logging
         if debug:
@@ -70,7 +72,7 @@ def anti_patterns_command(directory, output, output_format, exclude, extensions,
         
         # Generate output
         if output_format == 'json':
-            output_content = json.dumps(anti_pattern_analysis, indent=2)
+            output_content = json.dumps(anti_pattern_analysis, indent=2, default=to_json_default)
         elif output_format == 'text':
             output_content = generate_text_report(anti_pattern_analysis, directory)
         elif output_format == 'html':
@@ -8,8 +8,7 @@ import click
 import logging
 from pathlib import Path
 
-from ..analyzer import CodeAnalyzer
-from ..patterns.architectural_intents import ArchitecturalIntentDetector
+from ..match import to_json_default
 
 # Set up logging
 logger = logging.getLogger(__name__)
@@ -28,6 +27,9 @@ def architecture_command(directory, output, output_format, exclude, extensions,
     This command analyzes a codebase to identify architectural intents such as
     separation of concerns, information hiding, and dependency inversion.
     """
+    from ..analyzer import CodeAnalyzer
+    from ..patterns.architectural_intents import ArchitecturalIntentDetector
+    
     try:
         # Set up logging
         if debug:
@@ -63,7 +65,7 @@ def architecture_command(directory, output, output_format, exclude, extensions,
         
         # Generate output
         if output_format == 'json':
-            output_content = json.dumps(architecture_analysis, indent=2)
+            output_content = json.dumps(architecture_analysis, indent=2, default=to_json_default)
         elif output_format == 'text':
             output_content = generate_text_report(architecture_analysis, directory)
         elif output_format == 'html':
@@ -8,9 +8,6 @@ import logging
 from pathlib import Path
 import sys
 
-from ..analyzer import CodeAnalyzer
-from ..utils import AnalysisComparer
-
 logger = logging.getLogger(__name__)
 
 @click.command()
@@ -25,6 +22,9 @@ def compare(files, output, format, pattern, category, open_report):
     
     FILES are two or more files to compare.
     """
+    from ..analyzer import CodeAnalyzer
+    from ..utils import AnalysisComparer
+    
     if len(files) < 2:
         click.echo("Error: At least two files must be provided for comparison.", err=True)
         sys.exit(1)
@@ -7,11 +7,15 @@ import json
 import click
 import logging
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 
-from ..analyzer import CodeAnalyzer
+from ..source_buffer import SourceBuffer
+from ..result_cache import ResultCache, module_fingerprint, relabel_result
 from ..metrics.complexity import ComplexityAnalyzer
 
+if TYPE_CHECKING:
+    from ..analyzer import CodeAnalyzer
+
 # Set up logging
 logger = logging.getLogger(__name__)
 
@@ -25,13 +29,18 @@ logger = logging.getLogger(__name__)
 @click.option('--threshold', '-t', type=int, help='Complexity threshold to highlight (values above this are flagged)')
 @click.option('--real/--mock', 'use_real', default=True, help='Use real or mock implementation')
 @click.option('--debug/--no-debug', default=False, help='Enable debug logging')
-def complexity_command(path, output, output_format, exclude, extensions, metrics, threshold, use_real, debug):
+@click.option('--no-cache', is_flag=True, help='Do not read or write the persistent result cache')
+@click.option('--cache-dir', type=click.Path(), help='Directory of the persistent result cache')
+def complexity_command(path, output, output_format, exclude, extensions, metrics, threshold, use_real, debug,
+                       no_cache=False, cache_dir=None):
     """Analyze code complexity in PATH.
     
     This command analyzes code complexity using various metrics including
     cyclomatic complexity, cognitive complexity, and maintainability index.
     It can analyze a single file or an entire directory.
     """
+    from ..analyzer import CodeAnalyzer
+    
     try:
         # Set up logging
         if debug:
@@ -54,29 +63,26 @@ def complexity_command(path, output, output_format, exclude, extensions, metrics
             include_metrics = [metric_map.get(m.strip(), m.strip()) for m in metrics.split(',')]
         
         # Initialize analyzer
-        analyzer = CodeAnalyzer(use_mock=not use_real)
+        cache = None if no_cache else ResultCache(cache_dir)
+        analyzer = CodeAnalyzer(use_mock=not use_real, cache=cache)
         
         click.echo(f"Analyzing complexity of {path}...")
         
         # Analyze the path
         complexity_results = []
+        complexity_analyzer = ComplexityAnalyzer()
         
         if os.path.isfile(path):
             # Single file analysis
-            file_results = analyzer.analyze_file(path)
-            complexity_results = [analyze_file_complexity(file_results, include_metrics)]
+            file_paths = [Path(path)]
         else:
             # Directory analysis
-            file_results = analyzer.analyze_directory(
-                path,
-                exclude_dirs=exclude_dirs,
-                file_extensions=file_extensions
-            )
+            file_paths = sorted(analyzer.collect_files(path, exclude_dirs, file_extensions))
             
-            for result in file_results:
-                complexity_result = analyze_file_complexity(result, include_metrics)
-                if complexity_result:
-                    complexity_results.append(complexity_result)
+        for file_path in file_paths:
+            complexity_result = compute_file_complexity(analyzer, file_path, include_metrics, complexity_analyzer)
+            if complexity_result:
+                complexity_results.append(complexity_result)
         
         # Generate the report
         if output_format == 'json':
@@ -98,13 +104,78 @@ def complexity_command(path, output, output_format, exclude, extensions, metrics
         click.echo(f"Error: {e}", err=True)
         raise
 
-def analyze_file_complexity(file_result: Dict, include_metrics: Optional[List[str]] = None) -> Optional[Dict]:
+def compute_file_complexity(analyzer: 'CodeAnalyzer',
+                            file_path: Path,
+                            include_metrics: Optional[List[str]] = None,
+                            complexity_analyzer: Optional[ComplexityAnalyzer] = None) -> Optional[Dict]:
+    """Parse a file and compute its complexity metrics.
+    
+    When the analyzer has a result cache, unchanged files are served from
+    it without being parsed.
+    
+    Args:
+        analyzer: The analyzer whose parser and cache to use
+        file_path: Path to the file
+        include_metrics: Optional list of metric names to include
+        complexity_analyzer: The ComplexityAnalyzer to use, shared by all
+            files of a run; created if not given
+    
+    Returns:
+        Complexity analysis result or None if analysis failed
+    """
+    if complexity_analyzer is None:
+        complexity_analyzer = ComplexityAnalyzer()
+    
+    try:
+        language = analyzer.parser._get_language_by_extension(file_path)
+        if not language:
+            return None
+        
+        source = SourceBuffer.from_file(file_path)
+        
+        cache_key = None
+        if analyzer.cache is not None:
+            metric_modules = [type(m).__module__ for m in complexity_analyzer.metrics]
+            selection = "complexity={};{}".format(
+                ",".join(sorted(include_metrics or [])),
+                module_fingerprint(metric_modules + [ComplexityAnalyzer.__module__])
+            )
+            cache_key = analyzer.get_cache_key(source, language, selection)
+            cached = analyzer.cache.get(cache_key)
+            if cached is not None:
+                return relabel_result(cached, str(file_path))
+        
+        ast = analyzer.parser.parse_source(source, language)
+        if not ast:
+            logger.warning(f"Failed to parse file: {file_path}")
+            return None
+        
+        complexity_result = analyze_file_complexity({
+            "file": str(file_path),
+            "language": language,
+            "ast": ast,
+            "code": source.text
+        }, include_metrics, complexity_analyzer)
+        
+        if cache_key is not None and complexity_result:
+            analyzer.cache.put(cache_key, complexity_result)
+        
+        return complexity_result
+        
+    except Exception as e:
+        logger.error(f"Error analyzing file complexity: {e}")
+        return None
+
+def analyze_file_complexity(file_result: Dict,
+                            include_metrics: Optional[List[str]] = None,
+                            complexity_analyzer: Optional[ComplexityAnalyzer] = None) -> Optional[Dict]:
     """Analyze the complexity of a single file.
     
     Args:
         file_result: Result from analyzing a file
         include_metrics: Optional list of metric names to include
-        
+        complexity_analyzer: The ComplexityAnalyzer to use; created if not given
+    
     Returns:
         Complexity analysis result or None if analysis failed
     """
@@ -125,7 +196,8 @@ def analyze_file_complexity(file_result: Dict, include_metrics: Optional[List[st
             return None
         
         # Create complexity analyzer
-        complexity_analyzer = ComplexityAnalyzer()
+        if complexity_analyzer is None:
+            complexity_analyzer = ComplexityAnalyzer()
         
         # Analyze complexity
         complexity_result = complexity_analyzer.analyze(
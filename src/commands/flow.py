@@ -13,10 +13,6 @@ from typing import Optional, List, Dict, Any
 
 import click
 
-from src.analyzer import CodeAnalyzer
-from src.flow.control_flow import ControlFlowAnalyzer, ControlFlowGraph
-from src.flow.data_flow import DataFlowAnalyzer, LiveVariableAnalyzer, AvailableExpressionAnalyzer
-
 logger = logging.getLogger(__name__)
 
 @click.group(name="flow")
@@ -39,6 +35,9 @@ def control_flow_command(ctx, path, function, output, output_format, visualize,
     
     PATH can be a file or directory.
     """
+    from src.analyzer import CodeAnalyzer
+    from src.flow.control_flow import ControlFlowAnalyzer
+    
     if debug:
         logging.basicConfig(level=logging.DEBUG)
     else:
@@ -140,6 +139,10 @@ def data_flow_command(ctx, path, function, output, output_format, visualize, viz
     
     PATH can be a file or directory.
     """
+    from src.analyzer import CodeAnalyzer
+    from src.flow.control_flow import ControlFlowAnalyzer
+    from src.flow.data_flow import DataFlowAnalyzer
+    
     if debug:
         logging.basicConfig(level=logging.DEBUG)
     else:
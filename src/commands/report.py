@@ -9,29 +9,30 @@ from pathlib import Path
 import datetime
 import sys
 
-from ..analyzer import CodeAnalyzer
-from ..utils import BatchAnalyzer, ReportGenerator
-
 logger = logging.getLogger(__name__)
 
 @click.command()
 @click.argument('directory', type=click.Path(exists=True))
 @click.option('--output-dir', '-o', type=click.Path(), help='Directory to save reports')
-@click.option('--format', '-f', type=click.Choice(['html', 'json', 'text']), default='html', help='Report format')
+@click.option('--format', '-f', type=click.Choice(['html', 'json', 'ndjson', 'text']), default='html', help='Report format')
 @click.option('--title', '-t', help='Report title')
 @click.option('--exclude', help='Comma-separated list of directories to exclude')
 @click.option('--extensions', '-e', help='Comma-separated list of file extensions to analyze')
 @click.option('--category', '-c', help='Specific category of patterns to look for')
 @click.option('--patterns', '-p', help='Comma-separated list of patterns to look for')
-@click.option('--workers', type=int, default=4, help='Number of worker threads')
+@click.option('--workers', type=int, default=None, help='Number of parallel workers (default: adapt to the available CPUs)')
+@click.option('--executor', type=click.Choice(['thread', 'process']), default='thread', help='Run analysis in worker threads or worker processes')
 @click.option('--report-name', help='Filename for the report')
 @click.option('--open', 'open_report', is_flag=True, help='Open the report after generation')
 def report(directory, output_dir, format, title, exclude, extensions, 
-           category, patterns, workers, report_name, open_report):
+           category, patterns, workers, executor, report_name, open_report):
     """Generate a comprehensive report on a codebase.
     
     DIRECTORY is the path to the codebase to analyze.
     """
+    from ..analyzer import CodeAnalyzer
+    from ..utils import ReportGenerator
+    
     try:
         # Process input options
         directory = Path(directory)
@@ -57,9 +58,8 @@ def report(directory, output_dir, format, title, exclude, extensions,
         if patterns:
             pattern_list = [p.strip() for p in patterns.split(",")]
         
-        # Create the analyzer and report generator
+        # Create the analyzer
         analyzer = CodeAnalyzer()
-        batch_analyzer = BatchAnalyzer(analyzer, max_workers=workers)
         
         # Generate default report name if not provided
         if not report_name:
@@ -85,39 +85,26 @@ def report(directory, output_dir, format, title, exclude, extensions,
         
         click.echo("Starting analysis...")
         
-        # Check if we should analyze multiple patterns or a single pattern
-        if pattern_list:
-            # Analyze each pattern separately and combine results
-            all_results = []
-            
-            with click.progressbar(pattern_list, label='Analyzing patterns') as patterns_bar:
-                for pattern in patterns_bar:
-                    # Analyze the directory for this pattern
-                    results = analyzer.analyze_directory(
-                        directory,
-                        pattern_name=pattern,
-                        exclude_dirs=exclude_dirs,
-                        file_extensions=file_extensions,
-                        max_workers=workers
-                    )
-                    
-                    # Add these results to the combined set
-                    all_results.extend(results)
-        else:
-            # Analyze with a category or all patterns
-            all_results = analyzer.analyze_directory(
-                directory,
-                pattern_name=None,
-                category=category,
-                exclude_dirs=exclude_dirs,
-                file_extensions=file_extensions,
-                max_workers=workers
-            )
+        # Stream results into the report as files complete
+        def iter_results():
+            # Analyze each pattern separately if patterns were given,
+            # otherwise analyze with a category or all patterns
+            for pattern in pattern_list or [None]:
+                yield from analyzer.iter_analyze_directory(
+                    directory,
+                    pattern_name=pattern,
+                    category=None if pattern else category,
+                    exclude_dirs=exclude_dirs,
+                    file_extensions=file_extensions,
+                    max_workers=workers,
+                    execution=executor,
+                    ordered=True
+                )
         
         # Generate the report
         report_generator = ReportGenerator(analyzer, output_dir=output_dir)
         output_path = report_generator.generate_report(
-            all_results,
+            iter_results(),
             output_format=format,
             title=title,
             filename=report_name
@@ -132,7 +119,7 @@ def report(directory, output_dir, format, title, exclude, extensions,
                 webbrowser.open(f"file://{os.path.abspath(output_path)}")
             elif format == 'text':
                 os.system(f"cat {output_path}")
-            elif format == 'json':
+            elif format in ('json', 'ndjson'):
                 os.system(f"cat {output_path}")
         
     except Exception as e:
@@ -0,0 +1,506 @@
+"""
+Process-pool execution engine for analyzing many files in parallel.
+
+Pattern matching is pure Python and holds the GIL, so the thread pool used
+by default keeps roughly one core busy. The process engine runs the same
+per-file analysis in worker processes instead. Each worker builds its own
+CodeAnalyzer (parser, compiled query cache and pattern registry) once, with
+the limits and quarantine of the run, then receives batches of paths and
+sends back the result of each file as it completes. The batches are
+planned by the scheduler (see scheduling.py): grouped by size and
+dispatched largest first, with the number in flight adjusted to the
+measured throughput.
+
+The parent watches the file each worker is analyzing, and replaces a
+worker that runs past the time limit of its file, so a file stuck in a
+single tree-sitter call costs its time limit rather than the run.
+"""
+
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import connection
+import multiprocessing
+import collections
+import itertools
+import threading
+import time
+import logging
+
+from .scheduling import AdaptiveConcurrency, Batch, iter_scheduled
+from .budget import BUDGET_EXCEEDED, AnalysisLimits, Quarantine, skipped_result
+
+logger = logging.getLogger(__name__)
+
+# Supported execution modes for directory and batch analysis
+EXECUTION_MODES = ("thread", "process")
+
+# Tasks kept in flight per worker when streaming results
+IN_FLIGHT_PER_WORKER = 4
+
+# Seconds past the time limit of a file after which the parent stops its
+# worker; the worker's own checks end the file first unless it is stuck
+# in a single tree-sitter call
+DEADLINE_GRACE_SECONDS = 2.0
+
+# Per-process analyzer, created once by the pool initializer
+_worker_analyzer = None
+
+def validate_execution_mode(execution: str) -> str:
+    """Check that an execution mode is supported.
+    
+    Args:
+        execution: The requested execution mode
+    
+    Returns:
+        The execution mode
+    
+    Raises:
+        ValueError: If the mode is not one of EXECUTION_MODES
+    """
+    if execution not in EXECUTION_MODES:
+        raise ValueError(
+            f"Unsupported execution mode: {execution} "
+            f"(expected one of: {', '.join(EXECUTION_MODES)})"
+        )
+    return execution
+
+def _init_worker(use_mock: bool,
+                 cache_config: Optional[Tuple[str, int]] = None,
+                 profile_top_files: Optional[int] = None,
+                 limits: Optional[AnalysisLimits] = AnalysisLimits(),
+                 quarantine_path: Optional[str] = None) -> None:
+    """Initialize the analyzer state of a worker process.
+    
+    Args:
+        use_mock: Whether the worker should use the mock implementation
+        cache_config: Optional (cache_dir, max_size) of the result cache to open
+        profile_top_files: If not None, the worker profiles its files, keeping
+            this many slowest files
+        limits: Limits on the analysis of each file, or None for no limits
+        quarantine_path: Optional path of the quarantine file. Workers only
+            read it; the parent records the files that exceed their budget.
+    """
+    global _worker_analyzer
+    from .analyzer import CodeAnalyzer
+    from .result_cache import ResultCache
+    
+    cache = ResultCache(*cache_config) if cache_config else None
+    profiler = None
+    if profile_top_files is not None:
+        from .profiling import Profiler
+        profiler = Profiler(profile_top_files)
+    quarantine = Quarantine(quarantine_path, read_only=True) if quarantine_path else None
+    _worker_analyzer = CodeAnalyzer(
+        use_mock=use_mock, cache=cache, profiler=profiler, limits=limits, quarantine=quarantine
+    )
+
+def _worker_main(conn, initargs: Tuple) -> None:
+    """Run a worker process until it is told to stop.
+    
+    The worker reports "ready" once its analyzer is built, then receives
+    tasks of (task id, paths, pattern name, category). It sends the result
+    of each file as soon as the file is analyzed, so the parent knows which
+    file is running and since when, and ends each task with its profile.
+    A None task stops the worker.
+    
+    Args:
+        conn: The worker's end of its connection to the parent
+        initargs: Arguments of _init_worker
+    """
+    _init_worker(*initargs)
+    conn.send(("ready", None, None))
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        
+        task_id, paths, pattern_name, category = task
+        for path in paths:
+            conn.send(("result", task_id, _worker_analyzer.analyze_file(path, pattern_name, category)))
+        
+        profile = None
+        profiler = _worker_analyzer.profiler
+        if profiler is not None:
+            from .profiling import Profiler
+            profile = profiler.to_dict()
+            _worker_analyzer.profiler = Profiler(profiler.top_files)
+        conn.send(("done", task_id, profile))
+
+def worker_context():
+    """Get the multiprocessing context worker processes are started with.
+    
+    Forking a process that runs other threads can leave locks held in the
+    child, so where fork is the default, workers are started from a fork
+    server instead, with the analyzer preloaded. Like spawned workers, they
+    import the main module, which must guard its entry point with
+    if __name__ == "__main__".
+    
+    Returns:
+        A multiprocessing context
+    """
+    method = multiprocessing.get_start_method()
+    if method == "fork" and "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        context.set_forkserver_preload([f"{__package__}.analyzer"])
+        return context
+    return multiprocessing.get_context(method)
+
+class _Task:
+    """A batch of files submitted to a WorkerPool."""
+    
+    __slots__ = ('id', 'future', 'paths', 'pattern_name', 'category', 'results', 'started')
+    
+    def __init__(self, task_id: int, paths: List[str], pattern_name: Optional[str], category: Optional[str]):
+        self.id = task_id
+        self.future: Future = Future()
+        self.paths = paths
+        self.pattern_name = pattern_name
+        self.category = category
+        self.results: List[Dict] = []
+        self.started = False
+    
+    def finish(self, profile: Optional[Dict]) -> None:
+        self.future.set_result((self.results, profile))
+
+class _Worker:
+    """A worker process of a WorkerPool and the task it is running."""
+    
+    __slots__ = ('process', 'conn', 'ready', 'task', 'file_started')
+    
+    def __init__(self, process, conn):
+        self.process = process
+        self.conn = conn
+        self.ready = False
+        self.task: Optional[_Task] = None
+        self.file_started = 0.0
+
+class WorkerPool:
+    """Worker processes that analyze batches of files under a per-file deadline.
+    
+    Workers check the budget of their files themselves, but cannot stop a
+    single tree-sitter call that runs for minutes. The pool therefore
+    watches the file each worker is analyzing; once a file runs
+    DEADLINE_GRACE_SECONDS past its time limit, the worker is killed, the
+    file gets a "budget_exceeded" result, and the rest of its batch goes to
+    a new worker. A worker that dies gets an error result for its file in
+    the same way.
+    
+    Replacement workers are started from the monitor thread; see
+    worker_context for how.
+    """
+    
+    def __init__(self, max_workers: int, initargs: Tuple, file_seconds: Optional[float] = None):
+        """Initialize the pool. Workers are started as tasks arrive.
+        
+        Args:
+            max_workers: Largest number of worker processes
+            initargs: Arguments of _init_worker
+            file_seconds: Time limit of each file, or None for no limit
+        """
+        self.max_workers = max(1, max_workers)
+        self.initargs = initargs
+        self.file_seconds = file_seconds
+        self._mp = worker_context()
+        self._workers: List[_Worker] = []
+        self._queue: Deque[_Task] = collections.deque()
+        self._task_ids = itertools.count()
+        self._wakeup_r, self._wakeup_w = multiprocessing.Pipe(duplex=False)
+        self._wakeup_lock = threading.Lock()
+        self._closing = False
+        self._error: Optional[BaseException] = None
+        self._monitor = threading.Thread(target=self._run, name="WorkerPool monitor", daemon=True)
+        self._monitor.start()
+    
+    def submit(self, paths: Sequence[str], pattern_name: Optional[str], category: Optional[str]) -> Future:
+        """Submit a batch of files.
+        
+        Args:
+            paths: Paths of the files to analyze
+            pattern_name: If provided, only look for this specific pattern
+            category: If provided, only look for patterns in this category
+        
+        Returns:
+            A future of the results of the files, in input order, and the
+            profile of the batch as a dictionary, or None without profiling
+        """
+        task = _Task(next(self._task_ids), list(paths), pattern_name, category)
+        if self._error is not None:
+            task.future.set_exception(self._error)
+            return task.future
+        self._queue.append(task)
+        self._wake()
+        return task.future
+    
+    def shutdown(self) -> None:
+        """Stop the workers. Batches that are still running are abandoned."""
+        self._closing = True
+        self._wake()
+        self._monitor.join()
+        for worker in self._workers:
+            if worker.task is None:
+                try:
+                    worker.conn.send(None)
+                except OSError:
+                    pass
+            else:
+                worker.process.kill()
+        for worker in self._workers:
+            worker.process.join()
+            worker.conn.close()
+        self._workers = []
+        self._wakeup_r.close()
+        self._wakeup_w.close()
+    
+    def __enter__(self) -> 'WorkerPool':
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
+    
+    def _wake(self) -> None:
+        with self._wakeup_lock:
+            self._wakeup_w.send_bytes(b"")
+    
+    def _run(self) -> None:
+        try:
+            while not self._closing:
+                self._dispatch()
+                ready = connection.wait(
+                    [self._wakeup_r] + [worker.conn for worker in self._workers], self._wait_timeout()
+                )
+                for conn in ready:
+                    if conn is self._wakeup_r:
+                        self._wakeup_r.recv_bytes()
+                        continue
+                    worker = next(worker for worker in self._workers if worker.conn is conn)
+                    self._receive(worker)
+                self._enforce_deadlines()
+        except BaseException as e:
+            logger.error(f"Worker pool failed: {e}")
+            self._fail(e)
+    
+    def _dispatch(self) -> None:
+        """Give queued tasks to idle workers, starting workers as needed."""
+        while self._queue:
+            worker = next((worker for worker in self._workers if worker.ready and worker.task is None), None)
+            if worker is None:
+                starting = sum(1 for worker in self._workers if not worker.ready)
+                if starting < len(self._queue) and len(self._workers) < self.max_workers:
+                    self._start_worker()
+                    continue
+                return
+            
+            task = self._queue.popleft()
+            if not task.started:
+                if not task.future.set_running_or_notify_cancel():
+                    continue
+                task.started = True
+            remaining = task.paths[len(task.results):]
+            try:
+                worker.conn.send((task.id, remaining, task.pattern_name, task.category))
+            except OSError:
+                # The worker died while idle; the task waits for another one
+                self._queue.appendleft(task)
+                self._replace(worker, f"worker process exited with code {worker.process.exitcode}")
+                continue
+            worker.task = task
+            worker.file_started = time.perf_counter()
+    
+    def _start_worker(self) -> None:
+        conn, child_conn = self._mp.Pipe()
+        process = self._mp.Process(target=_worker_main, args=(child_conn, self.initargs), daemon=True)
+        process.start()
+        child_conn.close()
+        self._workers.append(_Worker(process, conn))
+    
+    def _receive(self, worker: _Worker) -> None:
+        """Handle a message from a worker, or its exit."""
+        try:
+            kind, task_id, payload = worker.conn.recv()
+        except (EOFError, OSError):
+            self._replace(worker, f"worker process exited with code {worker.process.exitcode}")
+            return
+        
+        if kind == "ready":
+            worker.ready = True
+            return
+        task = worker.task
+        if kind == "result":
+            task.results.append(payload)
+            worker.file_started = time.perf_counter()
+        elif kind == "done":
+            worker.task = None
+            task.finish(payload)
+    
+    def _wait_timeout(self) -> Optional[float]:
+        """Get the time until the next deadline of a running file."""
+        if self.file_seconds is None:
+            return None
+        limit = self.file_seconds + DEADLINE_GRACE_SECONDS
+        deadlines = [worker.file_started + limit for worker in self._workers if worker.task is not None]
+        if not deadlines:
+            return None
+        return max(0.0, min(deadlines) - time.perf_counter())
+    
+    def _enforce_deadlines(self) -> None:
+        if self.file_seconds is None:
+            return
+        limit = self.file_seconds + DEADLINE_GRACE_SECONDS
+        now = time.perf_counter()
+        for worker in list(self._workers):
+            if worker.task is not None and now - worker.file_started > limit:
+                worker.process.kill()
+                self._replace(
+                    worker, f"time budget of {self.file_seconds:g}s exceeded; the worker process was stopped",
+                    BUDGET_EXCEEDED
+                )
+    
+    def _replace(self, worker: _Worker, reason: str, skipped: Optional[str] = None) -> None:
+        """Remove a stopped or dead worker, ending the file it was analyzing."""
+        worker.process.join()
+        worker.conn.close()
+        self._workers.remove(worker)
+        
+        task = worker.task
+        if task is None:
+            if not worker.ready:
+                # A worker that cannot start would be replaced forever
+                self._fail(BrokenProcessPool(f"A worker process failed to start: {reason}"))
+            return
+        
+        path = task.paths[len(task.results)]
+        logger.warning(f"Stopped analyzing {path}: {reason}")
+        if skipped is not None:
+            task.results.append(skipped_result(path, skipped, reason))
+        else:
+            task.results.append({"error": reason, "file": path})
+        if len(task.results) == len(task.paths):
+            task.finish(None)
+        else:
+            # The rest of the batch goes to the next idle worker
+            self._queue.appendleft(task)
+    
+    def _fail(self, error: BaseException) -> None:
+        """Fail every unfinished task, and stop."""
+        self._error = error
+        self._closing = True
+        tasks = [worker.task for worker in self._workers if worker.task is not None] + list(self._queue)
+        self._queue.clear()
+        for task in tasks:
+            if not task.future.done():
+                task.future.set_exception(error)
+
+def iter_bounded(submit: Callable[[Any], Future],
+                 items: Iterable[Any],
+                 max_in_flight: int,
+                 ordered: bool = False) -> Iterator[Any]:
+    """Submit tasks lazily and yield their results, bounding the work in flight.
+    
+    At most max_in_flight tasks are submitted but not yet yielded at any
+    time, so memory stays bounded however many items there are. In ordered
+    mode, results that complete early wait in a reorder buffer until every
+    earlier result has been yielded; the buffer counts towards the bound.
+    Tasks that have not started are cancelled if the caller stops early.
+    
+    Args:
+        submit: Submits the task for an item and returns its future
+        items: The items to process
+        max_in_flight: Maximum number of submitted results not yet yielded
+        ordered: If True, yield results in input order instead of completion order
+    
+    Yields:
+        The result of each task
+    """
+    max_in_flight = max(1, max_in_flight)
+    items = iter(items)
+    pending: Dict[Future, int] = {}
+    buffered: Dict[int, Any] = {}
+    submitted = 0
+    next_index = 0
+    exhausted = False
+    
+    try:
+        while True:
+            # Top up the window
+            while not exhausted and len(pending) + len(buffered) < max_in_flight:
+                try:
+                    item = next(items)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending[submit(item)] = submitted
+                submitted += 1
+            
+            if not pending:
+                break
+            
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                if ordered:
+                    buffered[index] = future.result()
+                else:
+                    yield future.result()
+            
+            # Release the results that are next in input order
+            while next_index in buffered:
+                yield buffered.pop(next_index)
+                next_index += 1
+    finally:
+        for future in pending:
+            future.cancel()
+
+def iter_process_batches(windows: Sequence[Sequence[Batch]],
+                         concurrency: AdaptiveConcurrency,
+                         pattern_name: Optional[str] = None,
+                         category: Optional[str] = None,
+                         use_mock: bool = False,
+                         cache_config: Optional[Tuple[str, int]] = None,
+                         ordered: bool = False,
+                         max_in_flight: Optional[int] = None,
+                         profiler=None,
+                         limits: Optional[AnalysisLimits] = AnalysisLimits(),
+                         quarantine_path: Optional[str] = None) -> Iterator[Dict]:
+    """Analyze batches of files planned by the scheduler in a process pool.
+    
+    The pool has as many processes as the concurrency limit can reach; the
+    limit decides how many of them are given a batch at a time. A file
+    whose worker runs past its time limit gets a "budget_exceeded" result.
+    
+    Args:
+        windows: The batches of each window, from scheduling.plan_windows
+        concurrency: Limit on the number of batches in flight
+        pattern_name: If provided, only look for this specific pattern
+        category: If provided, only look for patterns in this category
+        use_mock: Whether workers should use the mock implementation
+        cache_config: Optional (cache_dir, max_size) of a result cache for the workers
+        ordered: If True, yield results in input order
+        max_in_flight: Optional fixed cap on the number of batches in flight
+        profiler: Optional Profiler the profiles of the workers are merged into
+        limits: Limits on the analysis of each file, or None for no limits
+        quarantine_path: Optional path of a quarantine file for the workers to skip
+    
+    Yields:
+        Analysis results, one per file
+    """
+    if not windows:
+        return
+    
+    profile_top_files = profiler.top_files if profiler is not None else None
+    initargs = (use_mock, cache_config, profile_top_files, limits, quarantine_path)
+    file_seconds = limits.file_seconds if limits is not None else None
+    with WorkerPool(concurrency.maximum, initargs, file_seconds) as pool:
+        def submit(batch):
+            return pool.submit(batch.paths, pattern_name, category)
+        
+        def collect(output):
+            results, profile = output
+            if profiler is not None and profile is not None:
+                profiler.merge(profile)
+            return results
+        
+        yield from iter_scheduled(submit, windows, concurrency, ordered, max_in_flight, collect)
@@ -0,0 +1,448 @@
+"""
+Fast discovery of the source files to analyze.
+
+Directories are scanned with os.scandir by a pool of threads, so the
+stat calls needed for file sizes overlap instead of running one by one.
+Directories named in the exclude list or ignored by a .gitignore/.ignore
+file are pruned before they are entered, which keeps large dependency and
+build trees from being walked at all. Files are skipped when they exceed
+the size limit or look binary, generated or minified, and every file that
+is kept is returned together with its size.
+"""
+
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+import os
+import re
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Directory names that are never entered
+DEFAULT_EXCLUDE_DIRS = ('.git', 'node_modules', 'venv', '__pycache__')
+
+# Files that list ignore patterns for their directory
+IGNORE_FILE_NAMES = ('.gitignore', '.ignore')
+
+# Files larger than this are skipped by default
+DEFAULT_MAX_FILE_SIZE = 1024 * 1024
+
+# Number of leading bytes read to classify a file
+SNIFF_SIZE = 8192
+
+# Markers of generated code, searched for in the first lines of a file
+GENERATED_MARKERS = (b'@generated', b'DO NOT EDIT', b'Code generated by', b'Autogenerated by')
+
+# Number of leading lines searched for generated-code markers
+GENERATED_MARKER_LINES = 5
+
+# File name suffixes of minified or generated files
+GENERATED_SUFFIXES = ('.min.js', '.min.css', '-min.js', '.bundle.js', '_pb2.py', '_pb2_grpc.py', '.pb.go')
+
+# A file whose leading lines average more characters than this is minified
+MINIFIED_LINE_LENGTH = 300
+
+class DiscoveredFile(NamedTuple):
+    """A file found by discovery, with its size in bytes."""
+    
+    path: Path
+    size: int
+
+class IgnoreRule(NamedTuple):
+    """One pattern of an ignore file."""
+    
+    regex: re.Pattern
+    negated: bool
+    dir_only: bool
+
+def _translate_glob(pattern: str) -> str:
+    """Translate a gitignore glob to a regular expression.
+    
+    Args:
+        pattern: The glob, without negation, anchoring or trailing slash
+    
+    Returns:
+        A regular expression matching the same paths
+    """
+    out = []
+    i, n = 0, len(pattern)
+    
+    while i < n:
+        c = pattern[i]
+        if c == '*':
+            if pattern.startswith('**', i):
+                i += 2
+                if i < n and pattern[i] == '/':
+                    # "**/" matches zero or more directories
+                    out.append('(?:.*/)?')
+                    i += 1
+                else:
+                    out.append('.*')
+                continue
+            out.append('[^/]*')
+        elif c == '?':
+            out.append('[^/]')
+        elif c == '[':
+            end = pattern.find(']', i + 2)
+            if end == -1:
+                out.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end].replace('\\', '\\\\')
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                out.append(f'[{body}]')
+                i = end
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            out.append(re.escape(pattern[i]))
+        else:
+            out.append(re.escape(c))
+        i += 1
+    
+    return ''.join(out)
+
+def parse_ignore_rule(line: str) -> Optional[IgnoreRule]:
+    """Parse one line of a .gitignore file.
+    
+    Args:
+        line: The line, with or without its newline
+    
+    Returns:
+        The rule, or None for blank lines and comments
+    """
+    line = line.rstrip('\n').rstrip('\r')
+    if not line.endswith('\\ '):
+        line = line.rstrip(' ')
+    if not line or line.startswith('#'):
+        return None
+    
+    negated = line.startswith('!')
+    if negated:
+        line = line[1:]
+    
+    dir_only = line.endswith('/')
+    line = line.rstrip('/')
+    if not line:
+        return None
+    
+    # Patterns containing a slash are relative to the ignore file's directory
+    anchored = '/' in line
+    line = line.lstrip('/')
+    
+    prefix = '' if anchored else '(?:.*/)?'
+    regex = re.compile(f'{prefix}{_translate_glob(line)}$')
+    return IgnoreRule(regex, negated, dir_only)
+
+class IgnoreFile:
+    """The rules of one ignore file, relative to the directory holding it."""
+    
+    def __init__(self, base: str, rules: Sequence[IgnoreRule]):
+        """Initialize the ignore file.
+        
+        Args:
+            base: Path of the file's directory relative to the discovery root,
+                in POSIX form; empty for the root itself
+            rules: The parsed rules, in file order
+        """
+        self.base = base
+        self.rules = tuple(rules)
+    
+    @classmethod
+    def load(cls, path: Union[str, Path], base: str) -> 'IgnoreFile':
+        """Read an ignore file.
+        
+        Args:
+            path: Path to the ignore file
+            base: Path of the file's directory relative to the discovery root
+        
+        Returns:
+            The parsed ignore file; empty if it cannot be read
+        """
+        rules = []
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                for line in f:
+                    rule = parse_ignore_rule(line)
+                    if rule is not None:
+                        rules.append(rule)
+        except OSError as e:
+            logger.debug(f"Could not read ignore file {path}: {e}")
+        
+        return cls(base, rules)
+    
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """Find the last rule matching a path.
+        
+        Args:
+            rel_path: Path relative to the discovery root, in POSIX form
+            is_dir: Whether the path is a directory
+        
+        Returns:
+            True if the path is ignored, False if it is re-included by a
+            negated rule, or None if no rule matches
+        """
+        if self.base:
+            if not rel_path.startswith(self.base + '/'):
+                return None
+            rel_path = rel_path[len(self.base) + 1:]
+        
+        for rule in reversed(self.rules):
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.regex.match(rel_path):
+                return not rule.negated
+        
+        return None
+
+def is_ignored(ignore_files: Sequence[IgnoreFile], rel_path: str, is_dir: bool) -> bool:
+    """Check a path against a stack of ignore files.
+    
+    Rules of deeper ignore files take precedence over those of their parents.
+    
+    Args:
+        ignore_files: The ignore files that apply, from the root down
+        rel_path: Path relative to the discovery root, in POSIX form
+        is_dir: Whether the path is a directory
+    
+    Returns:
+        True if the path is ignored
+    """
+    for ignore_file in reversed(ignore_files):
+        result = ignore_file.match(rel_path, is_dir)
+        if result is not None:
+            return result
+    return False
+
+def classify_contents(name: str, head: bytes) -> Optional[str]:
+    """Classify a file by its name and leading bytes.
+    
+    Args:
+        name: The file name
+        head: The first bytes of the file
+    
+    Returns:
+        "binary", "generated" or "minified" for files that should not be
+        analyzed, or None
+    """
+    if b'\0' in head:
+        return "binary"
+    
+    lower_name = name.lower()
+    if lower_name.endswith(GENERATED_SUFFIXES):
+        return "generated"
+    
+    lines = head.split(b'\n')
+    for line in lines[:GENERATED_MARKER_LINES]:
+        if any(marker in line for marker in GENERATED_MARKERS):
+            return "generated"
+    
+    # A full block with hardly any line breaks is minified code
+    if len(head) >= SNIFF_SIZE and len(head) / len(lines) > MINIFIED_LINE_LENGTH:
+        return "minified"
+    
+    return None
+
+# Result of scanning one directory: files kept, subdirectories to scan and skip reasons
+_ScanResult = Tuple[List[DiscoveredFile], List[Tuple[str, str, Tuple[IgnoreFile, ...]]], Counter]
+
+class FileDiscovery:
+    """Finds the files under a directory that should be analyzed."""
+    
+    def __init__(self,
+                 exclude_dirs: Optional[Iterable[str]] = None,
+                 extensions: Optional[Iterable[str]] = None,
+                 max_file_size: Optional[int] = DEFAULT_MAX_FILE_SIZE,
+                 use_ignore_files: bool = True,
+                 skip_binary: bool = True,
+                 skip_generated: bool = True,
+                 max_workers: Optional[int] = None):
+        """Initialize the discovery options.
+        
+        Args:
+            exclude_dirs: Directory names never entered. If None, uses DEFAULT_EXCLUDE_DIRS.
+            extensions: If provided, only keep files whose name ends with one
+                of these suffixes (compared case-insensitively)
+            max_file_size: Skip files larger than this many bytes; None for no limit
+            use_ignore_files: Whether to honour .gitignore and .ignore files
+            skip_binary: Whether to skip files containing NUL bytes
+            skip_generated: Whether to skip generated and minified files
+            max_workers: Number of threads scanning directories. If None,
+                uses the ThreadPoolExecutor default.
+        """
+        self.exclude_dirs = frozenset(DEFAULT_EXCLUDE_DIRS if exclude_dirs is None else exclude_dirs)
+        self.extensions = tuple(ext.lower() for ext in extensions) if extensions else None
+        self.max_file_size = max_file_size
+        self.use_ignore_files = use_ignore_files
+        self.skip_binary = skip_binary
+        self.skip_generated = skip_generated
+        self.max_workers = max_workers
+        self.skipped: Counter = Counter()
+    
+    def _root_ignore_files(self, root: str) -> Tuple[IgnoreFile, ...]:
+        """Load the repository-wide ignore file of a git checkout.
+        
+        Args:
+            root: The discovery root
+        
+        Returns:
+            The ignore files applying to the root before its own .gitignore
+        """
+        exclude_file = os.path.join(root, '.git', 'info', 'exclude')
+        if self.use_ignore_files and os.path.isfile(exclude_file):
+            return (IgnoreFile.load(exclude_file, ''),)
+        return ()
+    
+    def _sniff(self, path: str, name: str) -> Optional[str]:
+        """Classify a file by reading its first block.
+        
+        Args:
+            path: Path to the file
+            name: The file name
+        
+        Returns:
+            The reason to skip the file, or None to keep it
+        """
+        try:
+            with open(path, 'rb') as f:
+                head = f.read(SNIFF_SIZE)
+        except OSError:
+            return "unreadable"
+        
+        reason = classify_contents(name, head)
+        if reason == "binary" and not self.skip_binary:
+            return None
+        if reason in ("generated", "minified") and not self.skip_generated:
+            return None
+        return reason
+    
+    def _scan_directory(self,
+                        path: str,
+                        rel: str,
+                        ignore_files: Tuple[IgnoreFile, ...]) -> _ScanResult:
+        """Scan one directory.
+        
+        Args:
+            path: Path to the directory
+            rel: Path of the directory relative to the root, in POSIX form
+            ignore_files: Ignore files of the directory's ancestors
+        
+        Returns:
+            The files kept, the subdirectories to scan with their ignore
+            files, and a count of skipped entries by reason
+        """
+        files: List[DiscoveredFile] = []
+        subdirs = []
+        skipped: Counter = Counter()
+        
+        try:
+            with os.scandir(path) as it:
+                entries = list(it)
+        except OSError as e:
+            logger.warning(f"Could not scan {path}: {e}")
+            skipped["unreadable"] += 1
+            return files, subdirs, skipped
+        
+        if self.use_ignore_files:
+            for entry in entries:
+                if entry.name in IGNORE_FILE_NAMES and entry.is_file():
+                    ignore_files = ignore_files + (IgnoreFile.load(entry.path, rel),)
+        
+        for entry in entries:
+            name = entry.name
+            rel_path = f"{rel}/{name}" if rel else name
+            
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if name in self.exclude_dirs:
+                        skipped["excluded"] += 1
+                    elif ignore_files and is_ignored(ignore_files, rel_path, True):
+                        skipped["ignored"] += 1
+                    else:
+                        subdirs.append((entry.path, rel_path, ignore_files))
+                    continue
+                
+                if not entry.is_file():
+                    continue
+                
+                if self.extensions and not name.lower().endswith(self.extensions):
+                    continue
+                
+                if ignore_files and is_ignored(ignore_files, rel_path, False):
+                    skipped["ignored"] += 1
+                    continue
+                
+                size = entry.stat().st_size
+            except OSError:
+                skipped["unreadable"] += 1
+                continue
+            
+            if self.max_file_size is not None and size > self.max_file_size:
+                skipped["too_large"] += 1
+                continue
+            
+            if self.skip_binary or self.skip_generated:
+                reason = self._sniff(entry.path, name)
+                if reason:
+                    skipped[reason] += 1
+                    continue
+            
+            files.append(DiscoveredFile(Path(entry.path), size))
+        
+        return files, subdirs, skipped
+    
+    def iter_files(self, root: Union[str, Path]) -> Iterator[DiscoveredFile]:
+        """Find the files under a directory, yielding them as they are found.
+        
+        Directories are scanned in parallel, so the order of the files is
+        not deterministic. Counts of the skipped entries are added to
+        self.skipped.
+        
+        Args:
+            root: The directory to search
+        
+        Yields:
+            Each file to analyze, with its size
+        """
+        root = os.fspath(root)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            pending = {executor.submit(self._scan_directory, root, '', self._root_ignore_files(root))}
+            
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    files, subdirs, skipped = future.result()
+                    self.skipped.update(skipped)
+                    for subdir in subdirs:
+                        pending.add(executor.submit(self._scan_directory, *subdir))
+                    yield from files
+    
+    def discover(self, root: Union[str, Path]) -> List[DiscoveredFile]:
+        """Find the files under a directory.
+        
+        Args:
+            root: The directory to search
+        
+        Returns:
+            The files to analyze with their sizes, sorted by path
+        """
+        files = list(self.iter_files(root))
+        files.sort(key=lambda f: str(f.path))
+        
+        if self.skipped:
+            logger.debug(f"Discovery in {root} skipped: {dict(self.skipped)}")
+        
+        return files
+
+def discover_files(root: Union[str, Path], **options) -> List[DiscoveredFile]:
+    """Find the files under a directory that should be analyzed.
+    
+    Args:
+        root: The directory to search
+        **options: Options passed to FileDiscovery
+    
+    Returns:
+        The files to analyze with their sizes, sorted by path
+    """
+    return FileDiscovery(**options).discover(root)
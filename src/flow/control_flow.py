@@ -475,12 +475,9 @@ class ControlFlowAnalyzer:
             return {}
             
         try:
-            from tree_sitter import Query, Language, Parser
-            
-            # Get the language module
-            from src.tree_sitter_manager import LanguageManager
-            manager = LanguageManager()
-            lang_module = manager.get_language(language)
+            # Compiled queries come from the shared manager's cache
+            from src.tree_sitter_manager import get_default_manager
+            manager = get_default_manager()
             
             # Get queries for this language
             lang_config = self.language_config[language]
@@ -488,7 +485,7 @@ class ControlFlowAnalyzer:
             statements_query = lang_config["queries"]["statements"]
             
             # Query for functions/methods
-            function_query = Query(lang_module, functions_query)
+            function_query = manager.get_query(language, functions_query)
             function_matches = function_query.captures(tree.root_node)
             
             # Extract functions and methods
@@ -523,7 +520,9 @@ class ControlFlowAnalyzer:
                 
                 if body:
                     # Create CFG for this function
-                    cfg = self._build_cfg_for_function(name, body, code, language, lang_module, statements_query)
+                    cfg = self._build_cfg_for_function(
+                        name, body, code, language, manager.get_query(language, statements_query)
+                    )
                     cfgs[name] = cfg
             
             return cfgs
@@ -537,8 +536,7 @@ class ControlFlowAnalyzer:
                               body_node: tree_sitter.Node, 
                               code: str, 
                               language: str,
-                              lang_module,
-                              statements_query: str) -> ControlFlowGraph:
+                              statements_query: tree_sitter.Query) -> ControlFlowGraph:
         """Build a control flow graph for a single function.
         
         Args:
@@ -546,8 +544,7 @@ class ControlFlowAnalyzer:
             body_node: The AST node representing the function body
             code: The source code
             language: The language of the source code
-            lang_module: The tree-sitter language module
-            statements_query: Query for statements
+            statements_query: Compiled query for statements
             
         Returns:
             A ControlFlowGraph for the function
@@ -560,8 +557,7 @@ class ControlFlowAnalyzer:
         exit_node = cfg.add_node(NodeType.EXIT, "EXIT")
         
         # Query for statements in the function body
-        query = Query(lang_module, statements_query)
-        statement_matches = query.captures(body_node)
+        statement_matches = statements_query.captures(body_node)
         
         # Build the CFG
         current_node = entry_node
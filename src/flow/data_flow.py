@@ -158,12 +158,9 @@ class DataFlowAnalyzer:
             Dictionary containing variable information
         """
         try:
-            from tree_sitter import Query, Language, Parser
-            
-            # Get the language module
-            from src.tree_sitter_manager import LanguageManager
-            manager = LanguageManager()
-            lang_module = manager.get_language(language)
+            # Compiled queries come from the shared manager's cache
+            from src.tree_sitter_manager import get_default_manager
+            manager = get_default_manager()
             
             # Get queries for this language
             lang_config = self.language_config[language]
@@ -171,10 +168,10 @@ class DataFlowAnalyzer:
             uses_query = lang_config["queries"]["variable_uses"]
             
             # Run the queries
-            def_query = Query(lang_module, defines_query)
+            def_query = manager.get_query(language, defines_query)
             def_matches = def_query.captures(tree.root_node)
             
-            use_query = Query(lang_module, uses_query)
+            use_query = manager.get_query(language, uses_query)
             use_matches = use_query.captures(tree.root_node)
             
             # Track variable information
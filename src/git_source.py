@@ -0,0 +1,200 @@
+"""
+Reading the files of a git revision straight from the object database.
+
+A GitRepository lists the blobs of a revision with git ls-tree and reads
+them through one long-running git cat-file --batch process, so branches
+and historic commits can be analyzed without checking them out. A blob id
+names the contents of a file, so it doubles as a key of the result cache:
+a blob analyzed before, in any revision and under any path, is served
+from the cache without being read.
+"""
+
+from typing import Iterable, List, NamedTuple, Optional, Union
+from pathlib import Path
+import subprocess
+import threading
+import logging
+
+from .file_discovery import DEFAULT_MAX_FILE_SIZE, GENERATED_SUFFIXES
+
+logger = logging.getLogger(__name__)
+
+# Tree entry mode of symbolic links, which are not analyzed
+SYMLINK_MODE = b"120000"
+
+class GitError(Exception):
+    """Raised when a git command fails."""
+
+class GitBlob(NamedTuple):
+    """A file of a git revision."""
+    
+    path: str
+    oid: str
+    size: int
+
+class GitRepository:
+    """Reads revisions and blobs of a local git repository.
+    
+    Blobs are read through a single git cat-file --batch process started
+    on first use; reads from several threads are serialized. Close the
+    repository, or use it as a context manager, to stop the process.
+    """
+    
+    def __init__(self, path: Union[str, Path] = ".", git: str = "git"):
+        """Open a repository.
+        
+        Args:
+            path: The repository, or any directory inside its working tree
+            git: The git executable
+        
+        Raises:
+            GitError: If path is not in a git repository
+        """
+        self.path = Path(path)
+        self.git = git
+        self._batch: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+        self._run("rev-parse", "--git-dir")
+    
+    def _run(self, *args: str) -> bytes:
+        """Run a git command in the repository and return its output."""
+        try:
+            completed = subprocess.run(
+                [self.git, "-C", str(self.path), *args],
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE
+            )
+        except OSError as e:
+            raise GitError(f"Could not run {self.git}: {e}") from e
+        if completed.returncode != 0:
+            message = completed.stderr.decode("utf-8", "replace").strip()
+            raise GitError(f"git {args[0]} failed in {self.path}: {message}")
+        return completed.stdout
+    
+    def resolve_tree(self, revision: str) -> str:
+        """Find the tree of a revision.
+        
+        Args:
+            revision: A commit, branch, tag or any other tree-ish
+        
+        Returns:
+            The object id of the tree
+        
+        Raises:
+            GitError: If the revision does not exist
+        """
+        if revision.startswith("-"):
+            raise GitError(f"Invalid revision {revision!r}")
+        return self._run("rev-parse", "--verify", f"{revision}^{{tree}}").decode("ascii").strip()
+    
+    def list_blobs(self,
+                   revision: str,
+                   extensions: Optional[Iterable[str]] = None,
+                   max_file_size: Optional[int] = DEFAULT_MAX_FILE_SIZE) -> List[GitBlob]:
+        """List the files of a revision that can be analyzed.
+        
+        Like discovery in a directory, files that are too large or named
+        like generated or minified files are left out. Symbolic links and
+        submodules are never listed.
+        
+        Args:
+            revision: A commit, branch, tag or any other tree-ish
+            extensions: If provided, only list files whose name ends with one
+                of these suffixes (compared case-insensitively)
+            max_file_size: Leave out files larger than this many bytes; None for no limit
+        
+        Returns:
+            The blobs of the revision, sorted by path
+        
+        Raises:
+            GitError: If the revision does not exist
+        """
+        tree = self.resolve_tree(revision)
+        suffixes = tuple(ext.lower() for ext in extensions) if extensions else None
+        
+        blobs = []
+        for entry in self._run("ls-tree", "-r", "-z", "--long", "--full-tree", tree).split(b"\0"):
+            if not entry:
+                continue
+            
+            info, _, raw_path = entry.partition(b"\t")
+            mode, kind, oid, size = info.split()
+            if kind != b"blob" or mode == SYMLINK_MODE:
+                continue
+            
+            path = raw_path.decode("utf-8", "surrogateescape")
+            lower_path = path.lower()
+            if suffixes is not None and not lower_path.endswith(suffixes):
+                continue
+            if lower_path.endswith(GENERATED_SUFFIXES):
+                continue
+            if max_file_size is not None and int(size) > max_file_size:
+                continue
+            blobs.append(GitBlob(path, oid.decode("ascii"), int(size)))
+        
+        blobs.sort(key=lambda blob: blob.path)
+        return blobs
+    
+    def read_blob(self, oid: str) -> bytes:
+        """Read the contents of a blob.
+        
+        Args:
+            oid: The object id of the blob
+        
+        Returns:
+            The raw contents
+        
+        Raises:
+            GitError: If the blob does not exist or cannot be read
+        """
+        with self._lock:
+            if self._batch is None:
+                self._batch = subprocess.Popen(
+                    [self.git, "-C", str(self.path), "cat-file", "--batch"],
+                    stdin=subprocess.PIPE, stdout=subprocess.PIPE
+                )
+            
+            try:
+                self._batch.stdin.write(oid.encode("ascii") + b"\n")
+                self._batch.stdin.flush()
+                header = self._batch.stdout.readline().split()
+            except OSError as e:
+                self._stop()
+                raise GitError(f"git cat-file stopped: {e}") from e
+            
+            if not header:
+                self._stop()
+                raise GitError("git cat-file stopped unexpectedly")
+            if len(header) != 3:
+                raise GitError(f"Object {oid} is {header[-1].decode('ascii', 'replace')}")
+            
+            size = int(header[2])
+            data = self._batch.stdout.read(size)
+            self._batch.stdout.read(1)  # The newline after the contents
+            if len(data) != size:
+                self._stop()
+                raise GitError(f"git cat-file returned {len(data)} of {size} bytes of {oid}")
+            if header[1] != b"blob":
+                raise GitError(f"Object {oid} is a {header[1].decode('ascii', 'replace')}, not a blob")
+            return data
+    
+    def _stop(self) -> None:
+        """Stop the cat-file process; a later read starts a new one."""
+        if self._batch is not None:
+            try:
+                self._batch.stdin.close()
+            except OSError:
+                pass
+            self._batch.wait()
+            self._batch.stdout.close()
+            self._batch = None
+    
+    def close(self) -> None:
+        """Stop the cat-file process."""
+        with self._lock:
+            self._stop()
+    
+    def __enter__(self) -> 'GitRepository':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
@@ -0,0 +1,362 @@
+"""
+Versioned cache of prebuilt tree-sitter grammars.
+
+Compiling a grammar needs its sources, a C compiler and possibly network
+access to fetch them, so it should happen once in an explicit build step
+(`code-pattern grammars build`) rather than in whichever worker first
+meets a language. Compiled libraries are stored in a directory named
+after the platform, Python and tree-sitter versions they were built for,
+together with a manifest recording each grammar's library and a digest of
+its sources. Managers load libraries listed in the manifest directly.
+
+Builds, whether explicit or on demand, take a file lock so that parallel
+processes wait for the one building instead of compiling the same grammar
+at the same time.
+"""
+
+from typing import Dict, Iterable, Optional, Union
+from pathlib import Path
+import os
+import sys
+import json
+import time
+import errno
+import hashlib
+import logging
+import sysconfig
+import threading
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# Environment variable overriding the directory of prebuilt grammars
+GRAMMAR_DIR_ENV = "CODE_PATTERN_ANALYZER_GRAMMAR_DIR"
+
+# Environment variable that, when set, forbids fetching or compiling grammars
+OFFLINE_ENV = "CODE_PATTERN_ANALYZER_OFFLINE"
+
+# Name of the manifest file inside a versioned cache directory
+MANIFEST_NAME = "manifest.json"
+
+# Bump when the layout of the manifest changes
+MANIFEST_VERSION = 1
+
+# Name of the lock file taken while building
+LOCK_NAME = ".build.lock"
+
+# Source files of a grammar that determine the compiled library
+_SOURCE_SUFFIXES = ('.c', '.cc', '.h')
+
+class LockTimeout(Exception):
+    """Raised when a file lock cannot be acquired in time."""
+
+class FileLock:
+    """An exclusive lock on a file, held across processes.
+    
+    Uses flock on POSIX systems and msvcrt.locking on Windows. The lock
+    is also exclusive between threads, since each acquisition opens the
+    file anew.
+    """
+    
+    def __init__(self, path: Union[str, Path], timeout: Optional[float] = None, poll_interval: float = 0.1):
+        """Initialize the lock.
+        
+        Args:
+            path: Path of the lock file, created if missing
+            timeout: Seconds to wait for the lock. If None, waits forever.
+            poll_interval: Seconds between attempts while waiting
+        """
+        self.path = Path(path)
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self._local = threading.local()
+    
+    def _try_lock(self, f) -> bool:
+        """Try to lock an open file without blocking.
+        
+        Args:
+            f: The open lock file
+        
+        Returns:
+            True if the lock was acquired
+        """
+        try:
+            if sys.platform == "win32":
+                import msvcrt
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError as e:
+            if e.errno in (errno.EAGAIN, errno.EACCES, errno.EWOULDBLOCK, errno.EDEADLK):
+                return False
+            raise
+    
+    def acquire(self) -> None:
+        """Acquire the lock, waiting for other holders to release it.
+        
+        Raises:
+            LockTimeout: If the lock was not acquired within the timeout
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        f = open(self.path, "a+")
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        waited = False
+        
+        while not self._try_lock(f):
+            if deadline is not None and time.monotonic() >= deadline:
+                f.close()
+                raise LockTimeout(f"Timed out after {self.timeout}s waiting for {self.path}")
+            if not waited:
+                logger.info(f"Waiting for lock {self.path}")
+                waited = True
+            time.sleep(self.poll_interval)
+        
+        self._local.file = f
+    
+    def release(self) -> None:
+        """Release the lock held by the calling thread."""
+        f = getattr(self._local, "file", None)
+        if f is None:
+            return
+        self._local.file = None
+        
+        try:
+            if sys.platform == "win32":
+                import msvcrt
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        finally:
+            f.close()
+    
+    def __enter__(self) -> 'FileLock':
+        self.acquire()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.release()
+
+@lru_cache(maxsize=None)
+def cache_tag() -> str:
+    """Get the name of the cache directory for the running interpreter.
+    
+    Compiled grammars are only reused by the platform, Python version and
+    tree-sitter binding they were built for.
+    
+    Returns:
+        A tag such as "linux_x86_64-py3.11-ts0.20.4"
+    """
+    try:
+        from importlib.metadata import version
+        ts_version = version("tree_sitter")
+    except Exception:
+        ts_version = "unknown"
+    
+    platform = sysconfig.get_platform().replace("-", "_").replace(".", "_")
+    return f"{platform}-py{sys.version_info[0]}.{sys.version_info[1]}-ts{ts_version}"
+
+def source_digest(grammar_dirs: Iterable[Union[str, Path]]) -> str:
+    """Hash the C sources of one or more grammars.
+    
+    Args:
+        grammar_dirs: Grammar directories, each holding a src/ directory
+    
+    Returns:
+        A hex digest of the source files' names and contents
+    """
+    digest = hashlib.sha256()
+    for grammar_dir in grammar_dirs:
+        src_dir = Path(grammar_dir) / "src"
+        for path in sorted(src_dir.rglob("*")):
+            if path.suffix in _SOURCE_SUFFIXES and path.is_file():
+                digest.update(path.relative_to(src_dir).as_posix().encode("utf-8") + b"\0")
+                digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+def is_offline() -> bool:
+    """Check whether fetching and compiling grammars is disabled.
+    
+    Returns:
+        True if CODE_PATTERN_ANALYZER_OFFLINE is set to a non-empty value other than "0"
+    """
+    return os.environ.get(OFFLINE_ENV, "") not in ("", "0")
+
+class GrammarCache:
+    """Prebuilt grammar libraries for one platform and tree-sitter version.
+    
+    The manifest maps each grammar name (e.g. "python", "tsx") to its
+    library file, the language it belongs to and the digest of the sources
+    it was built from.
+    """
+    
+    def __init__(self, root: Optional[Union[str, Path]] = None, tag: Optional[str] = None):
+        """Initialize the cache. Nothing is read or created until needed.
+        
+        Args:
+            root: Directory holding the versioned cache directories. If None,
+                uses CODE_PATTERN_ANALYZER_GRAMMAR_DIR or the 'prebuilt'
+                directory next to the grammar sources.
+            tag: Name of the versioned directory. If None, uses cache_tag().
+        """
+        if root is None:
+            root = os.environ.get(GRAMMAR_DIR_ENV) or os.path.join(
+                os.path.dirname(os.path.abspath(__file__)), 'tree_sitter_languages', 'prebuilt'
+            )
+        self.root = Path(root).expanduser()
+        self.tag = tag or cache_tag()
+        self.directory = self.root / self.tag
+        self.manifest_path = self.directory / MANIFEST_NAME
+        self._manifest: Optional[Dict] = None
+        self._manifest_mtime: Optional[int] = None
+    
+    def lock(self, timeout: Optional[float] = None) -> FileLock:
+        """Get the lock serializing builds into this cache.
+        
+        Args:
+            timeout: Seconds to wait for the lock. If None, waits forever.
+        
+        Returns:
+            The (not yet acquired) lock
+        """
+        return FileLock(self.directory / LOCK_NAME, timeout)
+    
+    def read_manifest(self) -> Dict:
+        """Read the manifest, reusing the parsed copy while the file is unchanged.
+        
+        Returns:
+            The manifest; empty if it does not exist or cannot be read
+        """
+        try:
+            mtime = os.stat(self.manifest_path).st_mtime_ns
+        except OSError:
+            return {"version": MANIFEST_VERSION, "tag": self.tag, "grammars": {}}
+        
+        if self._manifest is not None and mtime == self._manifest_mtime:
+            return self._manifest
+        
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable grammar manifest {self.manifest_path}: {e}")
+            return {"version": MANIFEST_VERSION, "tag": self.tag, "grammars": {}}
+        
+        if manifest.get("version") != MANIFEST_VERSION:
+            logger.warning(f"Ignoring grammar manifest {self.manifest_path} of version {manifest.get('version')}")
+            manifest = {"version": MANIFEST_VERSION, "tag": self.tag, "grammars": {}}
+        
+        self._manifest = manifest
+        self._manifest_mtime = mtime
+        return manifest
+    
+    def _write_manifest(self, manifest: Dict) -> None:
+        """Replace the manifest atomically.
+        
+        Args:
+            manifest: The new manifest
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_name(f"{MANIFEST_NAME}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+        self._manifest = None
+    
+    def library_path(self, grammar_name: str) -> Optional[str]:
+        """Get the prebuilt library of a grammar.
+        
+        Args:
+            grammar_name: Name of the grammar (e.g., 'python' or 'tsx')
+        
+        Returns:
+            The path of the library, or None if it has not been built
+        """
+        entry = self.read_manifest()["grammars"].get(grammar_name)
+        if entry is None:
+            return None
+        
+        path = self.directory / entry["library"]
+        return str(path) if path.exists() else None
+    
+    def build(self,
+              manager,
+              languages: Optional[Iterable[str]] = None,
+              source_root: Optional[Union[str, Path]] = None,
+              fetch: bool = False,
+              force: bool = False,
+              timeout: Optional[float] = None) -> Dict[str, str]:
+        """Compile grammars from local sources into the cache.
+        
+        Grammars whose sources are unchanged since they were last built are
+        skipped. Libraries are written under a temporary name and renamed
+        into place, so processes that already loaded a library keep using it.
+        
+        Args:
+            manager: The TreeSitterManager that locates grammar sources
+            languages: Languages to build. If None, builds all default languages.
+            source_root: Directory holding one checkout per language. If None,
+                uses the manager's languages directory.
+            fetch: Whether to clone or download missing sources
+            force: Whether to rebuild grammars that are up to date
+            timeout: Seconds to wait for a concurrent build to finish
+        
+        Returns:
+            The outcome per language: "built", "up-to-date", "missing-source" or "failed"
+        
+        Raises:
+            LockTimeout: If another build held the lock for longer than the timeout
+        """
+        from tree_sitter import Language
+        
+        if languages is None:
+            languages = sorted(manager.DEFAULT_LANGUAGES)
+        
+        outcomes: Dict[str, str] = {}
+        with self.lock(timeout):
+            manifest = self.read_manifest()
+            grammars = dict(manifest["grammars"])
+            
+            for language in languages:
+                sources = manager.grammar_sources(language, source_root)
+                if not sources and fetch and manager.fetch_grammar(language, source_root):
+                    sources = manager.grammar_sources(language, source_root)
+                if not sources:
+                    logger.warning(f"No local sources for the {language} grammar")
+                    outcomes[language] = "missing-source"
+                    continue
+                
+                digest = source_digest(sources.values())
+                up_to_date = all(
+                    grammars.get(name, {}).get("source_digest") == digest and self.library_path(name)
+                    for name in sources
+                )
+                if up_to_date and not force:
+                    outcomes[language] = "up-to-date"
+                    continue
+                
+                try:
+                    self.directory.mkdir(parents=True, exist_ok=True)
+                    for name, grammar_dir in sources.items():
+                        library = f"{name}.so"
+                        tmp_path = self.directory / f"{name}.{os.getpid()}.tmp.so"
+                        logger.info(f"Building the {name} grammar from {grammar_dir}")
+                        Language.build_library(str(tmp_path), [str(grammar_dir)])
+                        os.replace(tmp_path, self.directory / library)
+                        grammars[name] = {
+                            "language": language,
+                            "library": library,
+                            "source_digest": digest,
+                            "built_at": time.time(),
+                        }
+                    outcomes[language] = "built"
+                except Exception as e:
+                    logger.error(f"Failed to build the {language} grammar: {e}")
+                    outcomes[language] = "failed"
+            
+            self._write_manifest({"version": MANIFEST_VERSION, "tag": self.tag, "grammars": grammars})
+        
+        return outcomes
@@ -0,0 +1,634 @@
+"""
+Incremental re-analysis of edited files.
+
+An IncrementalAnalyzer keeps the last source, tree and pattern matches of
+every file it has seen. When a file changes, the difference between the old
+and new bytes is turned into a tree-sitter edit, the old tree is adjusted
+with Tree.edit() and the file is re-parsed from it, so that unchanged
+subtrees are reused. Only the patterns with captures in the changed byte
+ranges are matched again; the matches of the other patterns are carried
+over, shifted to their new positions.
+"""
+
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple, Union
+from pathlib import Path
+from collections.abc import Mapping
+import os
+import time
+import logging
+import threading
+
+import tree_sitter
+
+from .pattern_base import Pattern, QueryBasedPattern, CompositePattern
+from .source_buffer import SourceBuffer
+from .query_plan import is_query_pattern
+from .analysis_context import AnalysisContext
+from .match import Match
+
+logger = logging.getLogger(__name__)
+
+# Matches group captures that are up to this many lines apart, so a pattern
+# whose matches span an edit that adds or removes lines is matched again
+GROUPING_DISTANCE = 10
+
+class SourceEdit(NamedTuple):
+    """A single contiguous edit between two versions of a file."""
+    start_byte: int
+    old_end_byte: int
+    new_end_byte: int
+    start_point: Tuple[int, int]
+    old_end_point: Tuple[int, int]
+    new_end_point: Tuple[int, int]
+
+class _Change(NamedTuple):
+    """An edit together with the trees and region it affects."""
+    edit: SourceEdit
+    old_tree: tree_sitter.Tree
+    new_tree: tree_sitter.Tree
+    source: SourceBuffer
+    byte_range: Tuple[int, int]
+    region_rows: Tuple[int, int]
+    context: AnalysisContext
+
+class FileState(NamedTuple):
+    """The last analyzed version of a file."""
+    language: str
+    data: bytes
+    tree: tree_sitter.Tree
+    patterns: Dict[str, List[Dict]]
+
+def _point_at(data: bytes, offset: int) -> Tuple[int, int]:
+    """Get the (row, column) point of a byte offset.
+    
+    Args:
+        data: The source bytes
+        offset: A byte offset into data
+    
+    Returns:
+        The zero-based row and byte column of the offset
+    """
+    row = data.count(b'\n', 0, offset)
+    line_start = data.rfind(b'\n', 0, offset) + 1
+    return (row, offset - line_start)
+
+def _common_prefix_length(old: bytes, new: bytes, limit: int) -> int:
+    """Length of the common prefix of two buffers, by binary search.
+    
+    startswith() compares against a memoryview slice without copying it.
+    """
+    new_view = memoryview(new)
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old.startswith(new_view[:mid]):
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+def _common_suffix_length(old: bytes, new: bytes, limit: int) -> int:
+    """Length of the common suffix of two buffers, by binary search."""
+    new_view = memoryview(new)
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if old.endswith(new_view[len(new) - mid:]):
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+def compute_edit(old: bytes, new: bytes) -> Optional[SourceEdit]:
+    """Compute the edit that turns one version of a file into another.
+    
+    The edit covers everything between the common prefix and the common
+    suffix of the two versions.
+    
+    Args:
+        old: The previous contents
+        new: The new contents
+    
+    Returns:
+        The edit, or None if the contents are identical
+    """
+    if old == new:
+        return None
+    
+    limit = min(len(old), len(new))
+    start = _common_prefix_length(old, new, limit)
+    suffix = _common_suffix_length(old, new, limit - start)
+    old_end = len(old) - suffix
+    new_end = len(new) - suffix
+    
+    return SourceEdit(
+        start_byte=start,
+        old_end_byte=old_end,
+        new_end_byte=new_end,
+        start_point=_point_at(old, start),
+        old_end_point=_point_at(old, old_end),
+        new_end_point=_point_at(new, new_end)
+    )
+
+def _shift_position(line: int, column: Optional[int], edit: SourceEdit) -> Tuple[int, Optional[int]]:
+    """Move a 1-based line and column that lies outside an edit to its new position."""
+    row = line - 1
+    old_end_row, old_end_column = edit.old_end_point
+    new_end_row, new_end_column = edit.new_end_point
+    
+    if row > old_end_row:
+        return (row + new_end_row - old_end_row + 1, column)
+    
+    if row == old_end_row:
+        # Without a column, a position on the edit's last line is after the
+        # edit only if the edit started on an earlier line
+        after = column >= old_end_column if column is not None else edit.start_point[0] < row
+        if after:
+            if column is not None:
+                column = column - old_end_column + new_end_column
+            return (new_end_row + 1, column)
+    
+    return (line, column)
+
+def _shift_value(value, edit: SourceEdit):
+    """Copy a value nested in a match, moving the positions it records."""
+    if isinstance(value, list):
+        return [_shift_value(item, edit) for item in value]
+    if not isinstance(value, Mapping):
+        return value
+    
+    shifted = {key: _shift_value(item, edit) for key, item in value.items()}
+    
+    for line_key, column_key in (('line', 'column'), ('end_line', 'end_column')):
+        if isinstance(shifted.get(line_key), int):
+            line, column = _shift_position(shifted[line_key], shifted.get(column_key), edit)
+            shifted[line_key] = line
+            if column_key in shifted:
+                shifted[column_key] = column
+    
+    return Match.from_dict(shifted) if isinstance(value, Match) else shifted
+
+def shift_matches(matches: List[Dict], edit: SourceEdit) -> List[Dict]:
+    """Move matches that lie outside an edit to their new positions.
+    
+    Every dictionary in a match with a 'line' (and optionally 'column',
+    'end_line' and 'end_column') is treated as a position in the old file.
+    Matches whose positions do not change are returned as they are; the
+    others are copied.
+    
+    Args:
+        matches: Matches in the old version of the file
+        edit: The edit applied to the file
+    
+    Returns:
+        The matches with positions in the new version of the file
+    """
+    row_delta = edit.new_end_point[0] - edit.old_end_point[0]
+    shifted = []
+    
+    for match in matches:
+        span = _line_span(match)
+        unchanged = span is None or span[1] - 1 < edit.start_point[0] or (
+            row_delta == 0 and span[0] - 1 > edit.old_end_point[0]
+        )
+        shifted.append(match if unchanged else _shift_value(match, edit))
+    
+    return shifted
+
+def _line_span(match: Dict) -> Optional[Tuple[int, int]]:
+    """Get the range of lines recorded anywhere in a match."""
+    first = last = None
+    stack = [match]
+    
+    while stack:
+        item = stack.pop()
+        if isinstance(item, Mapping):
+            for key, value in item.items():
+                if key == 'line' or key == 'end_line':
+                    if isinstance(value, int):
+                        first = value if first is None or value < first else first
+                        last = value if last is None or value > last else last
+                elif isinstance(value, (Mapping, list)):
+                    stack.append(value)
+        else:
+            stack.extend(value for value in item if isinstance(value, (Mapping, list)))
+    
+    return (first, last) if first is not None else None
+
+class IncrementalAnalyzer:
+    """Re-analyzes files incrementally as they are edited.
+    
+    Instances are created with CodeAnalyzer.create_incremental_analyzer()
+    and are not thread-safe.
+    """
+    
+    def __init__(self,
+                 analyzer,
+                 pattern_name: Optional[str] = None,
+                 category: Optional[str] = None):
+        """Initialize the incremental analyzer.
+        
+        Args:
+            analyzer: The CodeAnalyzer whose parser and recognizer to use
+            pattern_name: If provided, only look for this specific pattern
+            category: If provided, only look for patterns in this category
+        """
+        self.analyzer = analyzer
+        self.pattern_name = pattern_name
+        self.category = category
+        self.last_stats: Dict = {}
+        self._states: Dict[str, FileState] = {}
+    
+    def forget(self, file_path: Union[str, Path]) -> None:
+        """Drop the saved state of a file.
+        
+        Args:
+            file_path: Path of the file
+        """
+        self._states.pop(str(file_path), None)
+    
+    def update(self, file_path: Union[str, Path], data: Optional[bytes] = None) -> Dict:
+        """Analyze the current version of a file.
+        
+        The first update of a file analyzes it in full. Later updates
+        re-parse from the previous tree and re-run only the patterns
+        affected by the edit. Statistics of the update are stored in
+        last_stats.
+        
+        Args:
+            file_path: Path of the file
+            data: The new contents. If None, the file is read from disk.
+        
+        Returns:
+            A dictionary with analysis results, as returned by CodeAnalyzer.analyze_file
+        """
+        start_time = time.perf_counter()
+        file_path = str(file_path)
+        self.last_stats = {"file": file_path, "mode": "full", "rerun": [], "region": [], "reused": []}
+        
+        try:
+            language = self.analyzer.parser._get_language_by_extension(file_path)
+            if not language:
+                return {"error": f"Unsupported file type: {file_path}", "file": file_path}
+            
+            if data is None:
+                with open(file_path, 'rb') as f:
+                    data = f.read()
+            
+            state = self._states.get(file_path)
+            if state is not None and state.language == language and not self.analyzer.use_mock:
+                edit = compute_edit(state.data, data)
+                if edit is None:
+                    self.last_stats["mode"] = "unchanged"
+                    patterns = state.patterns
+                else:
+                    patterns = self._update_incrementally(file_path, language, state, data, edit)
+            else:
+                patterns = self._analyze_fully(file_path, language, data)
+            
+            return {
+                "file": file_path,
+                "language": language,
+                "patterns": patterns,
+                "summary": self.analyzer._generate_summary(patterns)
+            }
+        
+        except Exception as e:
+            logger.error(f"Error analyzing {file_path}: {e}")
+            self.forget(file_path)
+            return {"error": str(e), "file": file_path}
+        
+        finally:
+            self.last_stats["elapsed_ms"] = (time.perf_counter() - start_time) * 1000
+    
+    def _analyze_fully(self, file_path: str, language: str, data: bytes) -> Dict[str, List[Dict]]:
+        """Parse a file from scratch and match all selected patterns."""
+        source = SourceBuffer(data)
+        tree = self.analyzer.parser.parse_source(source, language)
+        if not tree:
+            raise ValueError("Failed to parse file")
+        
+        recognizer = self.analyzer.pattern_recognizer
+        plan = recognizer.get_plan(language, self.pattern_name, self.category)
+        patterns = recognizer.match_patterns(tree, source, language, list(plan.patterns), file_path, plan=plan)
+        self.last_stats["rerun"] = [p.name for p in plan.patterns]
+        
+        self._states[file_path] = FileState(language, data, tree, patterns)
+        return patterns
+    
+    def _update_incrementally(self,
+                              file_path: str,
+                              language: str,
+                              state: FileState,
+                              data: bytes,
+                              edit: SourceEdit) -> Dict[str, List[Dict]]:
+        """Re-parse an edited file from its old tree and update the matches."""
+        self.last_stats["mode"] = "incremental"
+        
+        old_tree = state.tree
+        old_tree.edit(
+            start_byte=edit.start_byte,
+            old_end_byte=edit.old_end_byte,
+            new_end_byte=edit.new_end_byte,
+            start_point=edit.start_point,
+            old_end_point=edit.old_end_point,
+            new_end_point=edit.new_end_point
+        )
+        
+        source = SourceBuffer(data)
+        new_tree = self.analyzer.parser.parse_source(source, language, old_tree)
+        if not new_tree:
+            raise ValueError("Failed to parse file")
+        
+        # The changed region covers the edit and every range whose syntax
+        # changed, in new coordinates; the edited old tree uses the same ones
+        start = edit.start_byte
+        end = edit.new_end_byte
+        for changed in old_tree.changed_ranges(new_tree):
+            start = min(start, changed.start_byte)
+            end = max(end, changed.end_byte)
+        
+        # Matches are re-computed for the rows around the change. The padding
+        # keeps every capture that can be grouped with a capture in the
+        # changed rows inside the region
+        padding = 2 * GROUPING_DISTANCE + 1
+        change = _Change(
+            edit=edit,
+            old_tree=old_tree,
+            new_tree=new_tree,
+            source=source,
+            byte_range=(max(0, start - 1), end + 1),
+            region_rows=(
+                max(0, _point_at(data, start)[0] - padding),
+                _point_at(data, end)[0] + padding
+            ),
+            context=AnalysisContext(
+                new_tree, source, language, file_path, self.analyzer.parser
+            )
+        )
+        
+        recognizer = self.analyzer.pattern_recognizer
+        selected = recognizer.select_patterns(language, self.pattern_name, self.category)
+        
+        patterns: Dict[str, List[Dict]] = {}
+        region_memo: Dict[Tuple[str, int], List[Dict]] = {}
+        for pattern in selected:
+            old_matches = state.patterns.get(pattern.name, [])
+            matches, how = self._update_pattern(pattern, old_matches, language, file_path, change, region_memo)
+            if matches:
+                patterns[pattern.name] = matches
+            self.last_stats[how].append(pattern.name)
+        
+        self._states[file_path] = FileState(language, data, new_tree, patterns)
+        return patterns
+    
+    def _update_pattern(self,
+                        pattern: Pattern,
+                        old_matches: List[Dict],
+                        language: str,
+                        file_path: str,
+                        change: '_Change',
+                        region_memo: Dict[Tuple[str, int], List[Dict]]) -> Tuple[List[Dict], str]:
+        """Update the matches of one pattern after an edit.
+        
+        Returns:
+            The new matches, and whether they were "reused", re-matched
+            around the change ("region") or re-matched in full ("rerun")
+        """
+        if is_query_pattern(pattern):
+            return self._update_query_pattern(pattern, old_matches, language, file_path, change, region_memo)
+        
+        if isinstance(pattern, CompositePattern):
+            try:
+                return self._update_composite(pattern, old_matches, language, file_path, change, region_memo)
+            except Exception as e:
+                logger.debug(f"Re-matching composite {pattern.name} in full: {e}")
+        
+        results = self.analyzer.pattern_recognizer.match_patterns(
+            change.new_tree, change.source, language, [pattern], file_path, change.context
+        )
+        return results.get(pattern.name, []), "rerun"
+    
+    def _update_composite(self,
+                          pattern: CompositePattern,
+                          old_matches: List[Dict],
+                          language: str,
+                          file_path: str,
+                          change: '_Change',
+                          region_memo: Dict[Tuple[str, int], List[Dict]]) -> Tuple[List[Dict], str]:
+        """Update the matches of a composite pattern after an edit.
+        
+        A composite lists the matches of its sub-patterns in order, so each
+        query-driven sub-pattern is updated incrementally and the others are
+        matched again in full.
+        """
+        matches = []
+        hows = set()
+        
+        for sub in pattern.patterns:
+            if not sub.supports_language(language):
+                continue
+            
+            if is_query_pattern(sub):
+                sub_old = [m for m in old_matches if m.get('sub_pattern') == sub.name]
+                sub_matches, how = self._update_query_pattern(
+                    sub, sub_old, language, file_path, change, region_memo, pattern.name
+                )
+            else:
+                code = change.source.data if getattr(sub, 'accepts_bytes', False) else change.source.text
+                sub_matches = sub.match(change.new_tree, code, language, file_path, context=change.context)
+                for match in sub_matches:
+                    match['composite_type'] = pattern.name
+                    match['sub_pattern'] = sub.name
+                how = "rerun"
+            
+            matches.extend(sub_matches)
+            hows.add(how)
+        
+        if hows <= {"reused"}:
+            return matches, "reused"
+        return matches, "rerun" if hows == {"rerun"} else "region"
+    
+    def _update_query_pattern(self,
+                              pattern: QueryBasedPattern,
+                              old_matches: List[Dict],
+                              language: str,
+                              file_path: str,
+                              change: '_Change',
+                              region_memo: Dict[Tuple[str, int], List[Dict]],
+                              composite: Optional[str] = None) -> Tuple[List[Dict], str]:
+        """Update the matches of a query-driven pattern after an edit.
+        
+        If the pattern's query captures nothing in the changed region of
+        either tree, its old matches are shifted past the edit. Otherwise
+        the query is run over the rows around the change only, and the new
+        matches there replace the old ones. The rows are widened to the
+        start of any old match that reaches into them, since a match that
+        spans the edit cannot simply be kept or shifted.
+        """
+        if not self._captures_changed(pattern, language, change, old_matches):
+            return shift_matches(old_matches, change.edit), "reused"
+        
+        first_row, last_row = change.region_rows
+        widened = True
+        while widened:
+            widened = False
+            for match in old_matches:
+                span = _line_span(match)
+                if span and span[0] - 1 < first_row <= span[1] - 1:
+                    first_row = span[0] - 1
+                    widened = True
+        
+        key = (pattern.name, first_row)
+        if key not in region_memo:
+            region_memo[key] = self._match_region(pattern, language, file_path, change, first_row)
+        
+        region_matches = region_memo[key]
+        if composite:
+            region_matches = [
+                dict(match, composite_type=composite, sub_pattern=pattern.name)
+                for match in region_matches
+            ]
+        
+        old_last_row = last_row - (change.edit.new_end_point[0] - change.edit.old_end_point[0])
+        before = [m for m in old_matches if m['line'] - 1 < first_row]
+        after = [m for m in old_matches if m['line'] - 1 > old_last_row]
+        
+        return before + region_matches + shift_matches(after, change.edit), "region"
+    
+    def _captures_changed(self,
+                          pattern: QueryBasedPattern,
+                          language: str,
+                          change: '_Change',
+                          old_matches: List[Dict]) -> bool:
+        """Check whether an edit can affect the matches of a query-driven pattern.
+        
+        That is the case if the query captures a node in the changed region
+        of the old or new tree, or if the edit moves lines inside one of the
+        old matches, which can change how its captures are grouped.
+        """
+        try:
+            query = self.analyzer.parser.manager.get_query(language, pattern.get_query_string(language))
+        except Exception as e:
+            logger.debug(f"Cannot compile query of pattern {pattern.name}: {e}")
+            return True
+        
+        start_byte, end_byte = change.byte_range
+        for tree in (change.new_tree, change.old_tree):
+            if query.captures(tree.root_node, start_byte=start_byte, end_byte=end_byte):
+                return True
+        
+        return self._spans_moved_lines(old_matches, change.edit)
+    
+    def _match_region(self,
+                      pattern: QueryBasedPattern,
+                      language: str,
+                      file_path: str,
+                      change: '_Change',
+                      first_row: Optional[int] = None) -> List[Dict]:
+        """Match a query-driven pattern in the rows around a change.
+        
+        The query runs over the region plus a margin, so captures near the
+        region's edges are grouped as they would be in a full match, and
+        only the matches that start inside the region are kept. If
+        first_row is given, the region starts there instead.
+        """
+        region_first_row, last_row = change.region_rows
+        if first_row is None:
+            first_row = region_first_row
+        margin = 2 * GROUPING_DISTANCE + 1
+        
+        try:
+            query = self.analyzer.parser.manager.get_query(language, pattern.get_query_string(language))
+            captures = query.captures(
+                change.new_tree.root_node,
+                start_point=(max(0, first_row - margin), 0),
+                end_point=(last_row + margin + 1, 0)
+            )
+        except Exception as e:
+            logger.error(f"Error running query for pattern {pattern.name}: {e}")
+            return []
+        
+        query_results = [
+            {
+                'capture': capture_name,
+                'node': node,
+                'start_point': (node.start_point[0], node.start_point[1]),
+                'end_point': (node.end_point[0], node.end_point[1]),
+            }
+            for node, capture_name in captures
+        ]
+        
+        matches = pattern._process_query_results(
+            query_results, change.source.data, language, file_path, self.analyzer.parser
+        )
+        return [m for m in matches if first_row <= m['line'] - 1 <= last_row]
+    
+    def _spans_moved_lines(self, matches: List[Dict], edit: SourceEdit) -> bool:
+        """Check whether an edit that moves lines falls inside or near a match."""
+        if edit.old_end_point[0] == edit.new_end_point[0]:
+            return False
+        
+        edit_line = edit.start_point[0] + 1
+        for match in matches:
+            span = _line_span(match)
+            if span and span[0] - GROUPING_DISTANCE <= edit_line <= span[1] + GROUPING_DISTANCE:
+                return True
+        return False
+    
+    def watch(self,
+              paths: Iterable[Union[str, Path]],
+              callback: Callable[[Dict, Dict], None],
+              interval: float = 0.5,
+              stop_event: Optional[threading.Event] = None) -> None:
+        """Poll files for changes and re-analyze them as they change.
+        
+        Every file is analyzed once at start, then again whenever its size
+        or modification time changes. Directories are rescanned on every
+        poll, so new files are picked up.
+        
+        Args:
+            paths: Files and directories to watch
+            callback: Called with the result and last_stats of every analysis
+            interval: Seconds between polls
+            stop_event: Optional event that stops watching when set
+        """
+        paths = [Path(path) for path in paths]
+        signatures: Dict[str, Tuple[int, int]] = {}
+        
+        while stop_event is None or not stop_event.is_set():
+            seen: Set[str] = set()
+            
+            for file_path in self._watched_files(paths):
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    continue
+                
+                seen.add(file_path)
+                signature = (stat.st_mtime_ns, stat.st_size)
+                if signatures.get(file_path) == signature:
+                    continue
+                
+                signatures[file_path] = signature
+                result = self.update(file_path)
+                callback(result, dict(self.last_stats))
+            
+            for file_path in set(signatures) - seen:
+                del signatures[file_path]
+                self.forget(file_path)
+            
+            if stop_event is not None:
+                stop_event.wait(interval)
+            else:
+                time.sleep(interval)
+    
+    def _watched_files(self, paths: List[Path]) -> List[str]:
+        """List the analyzable files under the watched paths."""
+        files = []
+        for path in paths:
+            if path.is_dir():
+                files.extend(str(p) for p in self.analyzer.collect_files(path))
+            elif path.is_file():
+                files.append(str(path))
+        return sorted(files)
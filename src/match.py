@@ -0,0 +1,269 @@
+"""
+Compact records for pattern matches.
+
+A run over a large codebase produces millions of matches, and storing
+each as a dictionary (plus one dictionary per capture) costs far more
+memory than the handful of values they hold. Match and CaptureSpan keep
+those values in slots instead, and intern the strings repeated across
+matches: the file path, the pattern name and the capture names.
+
+Both behave as mappings with the same keys, in the same order, as the
+dictionaries they replace, so code reading match['line'] or
+match.get('file') works unchanged. Matches can also be modified like
+dictionaries, which pattern subclasses do to add details. Use to_dict()
+or pass to_json_default to json.dumps to serialize them.
+"""
+
+from typing import Any, Dict, Iterator, Mapping, MutableMapping, Optional, Tuple
+import sys
+
+class CaptureSpan(Mapping):
+    """The text and position of one captured node, as an immutable mapping."""
+    
+    __slots__ = ('text', 'line', 'column', 'end_line', 'end_column')
+    
+    def __init__(self, text: str, line: int, column: int, end_line: int, end_column: int):
+        """Initialize the span.
+        
+        Args:
+            text: The text of the captured node
+            line: The 1-indexed line the node starts on
+            column: The column the node starts at
+            end_line: The 1-indexed line the node ends on
+            end_column: The column the node ends at
+        """
+        self.text = text
+        self.line = line
+        self.column = column
+        self.end_line = end_line
+        self.end_column = end_column
+    
+    def __getitem__(self, key: str) -> Any:
+        if key in _SPAN_KEYS:
+            return getattr(self, key)
+        raise KeyError(key)
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.__slots__)
+    
+    def __len__(self) -> int:
+        return len(self.__slots__)
+    
+    def __contains__(self, key) -> bool:
+        return key in _SPAN_KEYS
+    
+    def __reduce__(self):
+        return (CaptureSpan, (self.text, self.line, self.column, self.end_line, self.end_column))
+    
+    def __repr__(self) -> str:
+        return f"CaptureSpan({self.to_dict()!r})"
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the span to a dictionary.
+        
+        Returns:
+            A dictionary with the text and position of the node
+        """
+        return {
+            'text': self.text,
+            'line': self.line,
+            'column': self.column,
+            'end_line': self.end_line,
+            'end_column': self.end_column,
+        }
+
+_SPAN_KEYS = frozenset(CaptureSpan.__slots__)
+
+# Keys stored in slots, in the order they are listed
+_MATCH_FIELDS = ('type', 'name', 'line', 'column', 'end_line', 'end_column', 'file')
+_MATCH_FIELD_SET = frozenset(_MATCH_FIELDS)
+
+# Strings shared by many matches
+_INTERNED_FIELDS = frozenset(('type', 'file'))
+
+class Match(MutableMapping):
+    """A pattern match, as a mutable mapping.
+    
+    The pattern name, name, position and file of the match are stored in
+    slots; a slot that was never set is a missing key. Captures
+    (CaptureSpan values) and any details added by patterns follow them in
+    insertion order, stored as one flat tuple of keys and values: matches
+    rarely have more than a few, and a tuple takes a fraction of the
+    memory of a dictionary.
+    """
+    
+    __slots__ = _MATCH_FIELDS + ('_extra',)
+    
+    def __init__(self,
+                 type: str,
+                 name: str,
+                 line: int,
+                 column: int,
+                 end_line: int,
+                 end_column: int,
+                 file: Optional[str] = None):
+        """Initialize a match.
+        
+        Args:
+            type: The match type, usually the name of the pattern
+            name: The text of the primary capture
+            line: The 1-indexed line the match starts on
+            column: The column the match starts at
+            end_line: The 1-indexed line the match ends on
+            end_column: The column the match ends at
+            file: Optional path of the matched file
+        """
+        self.type = sys.intern(type) if isinstance(type, str) else type
+        self.name = name
+        self.line = line
+        self.column = column
+        self.end_line = end_line
+        self.end_column = end_column
+        if file is not None:
+            self.file = sys.intern(file) if isinstance(file, str) else file
+        self._extra: Tuple = ()
+    
+    @classmethod
+    def from_dict(cls, data: Mapping) -> 'Match':
+        """Build a match from a dictionary, such as a deserialized one.
+        
+        Dictionaries holding exactly the keys of a capture become CaptureSpans.
+        
+        Args:
+            data: The keys and values of the match
+        
+        Returns:
+            A new match with the same items
+        """
+        match = cls.__new__(cls)
+        match._extra = ()
+        for key, value in data.items():
+            if isinstance(value, dict) and value.keys() == _SPAN_KEYS:
+                value = CaptureSpan(**value)
+            match[key] = value
+        return match
+    
+    def __getitem__(self, key: str) -> Any:
+        if key in _MATCH_FIELD_SET:
+            try:
+                return getattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+        extra = self._extra
+        for i in range(0, len(extra), 2):
+            if extra[i] == key:
+                return extra[i + 1]
+        raise KeyError(key)
+    
+    def __setitem__(self, key: str, value: Any) -> None:
+        if key in _MATCH_FIELD_SET:
+            if key in _INTERNED_FIELDS and isinstance(value, str):
+                value = sys.intern(value)
+            setattr(self, key, value)
+            return
+        extra = self._extra
+        for i in range(0, len(extra), 2):
+            if extra[i] == key:
+                self._extra = extra[:i + 1] + (value,) + extra[i + 2:]
+                return
+        self._extra = extra + (sys.intern(key), value)
+    
+    def __delitem__(self, key: str) -> None:
+        if key in _MATCH_FIELD_SET:
+            try:
+                delattr(self, key)
+            except AttributeError:
+                raise KeyError(key) from None
+            return
+        extra = self._extra
+        for i in range(0, len(extra), 2):
+            if extra[i] == key:
+                self._extra = extra[:i] + extra[i + 2:]
+                return
+        raise KeyError(key)
+    
+    def __iter__(self) -> Iterator[str]:
+        for key in _MATCH_FIELDS:
+            if hasattr(self, key):
+                yield key
+        yield from self._extra[::2]
+    
+    def __len__(self) -> int:
+        count = sum(1 for key in _MATCH_FIELDS if hasattr(self, key))
+        return count + len(self._extra) // 2
+    
+    def __contains__(self, key) -> bool:
+        if key in _MATCH_FIELD_SET:
+            return hasattr(self, key)
+        return key in self._extra[::2]
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        if key in _MATCH_FIELD_SET:
+            return getattr(self, key, default)
+        extra = self._extra
+        for i in range(0, len(extra), 2):
+            if extra[i] == key:
+                return extra[i + 1]
+        return default
+    
+    def __reduce__(self):
+        return (_rebuild_match, (list(self.items()),))
+    
+    def __repr__(self) -> str:
+        return f"Match({self.to_dict()!r})"
+    
+    def copy(self) -> 'Match':
+        """Make a shallow copy of the match.
+        
+        Returns:
+            A new match with the same items
+        """
+        match = Match.__new__(Match)
+        for key in _MATCH_FIELDS:
+            if hasattr(self, key):
+                setattr(match, key, getattr(self, key))
+        match._extra = self._extra
+        return match
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the match to a dictionary.
+        
+        Returns:
+            A dictionary with the items of the match, and captures converted
+            to dictionaries
+        """
+        result = {}
+        for key in _MATCH_FIELDS:
+            if hasattr(self, key):
+                result[key] = getattr(self, key)
+        extra = self._extra
+        for i in range(0, len(extra), 2):
+            value = extra[i + 1]
+            result[extra[i]] = value.to_dict() if isinstance(value, CaptureSpan) else value
+        return result
+
+def _rebuild_match(items) -> Match:
+    """Rebuild a pickled match, interning its strings again."""
+    match = Match.__new__(Match)
+    match._extra = ()
+    for key, value in items:
+        match[key] = value
+    return match
+
+def to_json_default(obj: Any) -> Any:
+    """Serialize matches for json.dump and json.dumps.
+    
+    Pass as the default argument, e.g. json.dumps(result, default=to_json_default).
+    
+    Args:
+        obj: An object the JSON encoder cannot serialize by itself
+    
+    Returns:
+        A dictionary for Match and CaptureSpan objects
+    
+    Raises:
+        TypeError: For any other object
+    """
+    if isinstance(obj, (Match, CaptureSpan)):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -175,15 +175,12 @@ class CognitiveComplexityMetric(ComplexityMetric):
         
         # Run the queries
         try:
-            from tree_sitter import Query, Language, Parser
-            
-            # Get the language module
-            from src.tree_sitter_manager import LanguageManager
-            manager = LanguageManager()
-            lang_module = manager.get_language(language)
+            # Compiled queries come from the shared manager's cache
+            from src.tree_sitter_manager import get_default_manager
+            manager = get_default_manager()
             
             # Query for functions/methods
-            function_query = Query(lang_module, functions_query)
+            function_query = manager.get_query(language, functions_query)
             function_matches = function_query.captures(tree.root_node)
             
             # Extract functions and methods
@@ -211,7 +208,9 @@ class CognitiveComplexityMetric(ComplexityMetric):
                 
                 if body:
                     # Compute cognitive complexity for this function
-                    complexity, details = self._compute_node_complexity(body, lang_module, structures_query, code)
+                    complexity, details = self._compute_node_complexity(
+                        body, manager.get_query(language, structures_query), code
+                    )
                     
                     # Function info
                     function_info = {
@@ -252,23 +251,20 @@ class CognitiveComplexityMetric(ComplexityMetric):
     
     def _compute_node_complexity(self, 
                                node: tree_sitter.Node,
-                               lang_module,
-                               structures_query: str,
+                               structures_query: tree_sitter.Query,
                                code: str) -> tuple:
         """Compute cognitive complexity for a single node (function body).
         
         Args:
             node: The node to compute complexity for
-            lang_module: The tree-sitter language module
-            structures_query: Query for control flow structures
+            structures_query: Compiled query for control flow structures
             code: The source code
             
         Returns:
             Tuple of (complexity value, details dictionary)
         """
         # Run the structures query
-        query = Query(lang_module, structures_query)
-        matches = query.captures(node)
+        matches = structures_query.captures(node)
         
         complexity = 0
         nesting_level = 0
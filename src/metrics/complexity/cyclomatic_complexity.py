@@ -173,15 +173,12 @@ class CyclomaticComplexityMetric(ComplexityMetric):
         
         # Run the queries
         try:
-            from tree_sitter import Query, Language, Parser
-            
-            # Get the language module
-            from src.tree_sitter_manager import LanguageManager
-            manager = LanguageManager()
-            lang_module = manager.get_language(language)
+            # Compiled queries come from the shared manager's cache
+            from src.tree_sitter_manager import get_default_manager
+            manager = get_default_manager()
             
             # Query for functions/methods
-            function_query = Query(lang_module, functions_query)
+            function_query = manager.get_query(language, functions_query)
             function_matches = function_query.captures(tree.root_node)
             
             # Extract functions and methods
@@ -209,7 +206,7 @@ class CyclomaticComplexityMetric(ComplexityMetric):
                 
                 if body:
                     # Run the branches query on the function body
-                    branch_query = Query(lang_module, branches_query)
+                    branch_query = manager.get_query(language, branches_query)
                     branch_matches = branch_query.captures(body)
                     
                     # Count branches
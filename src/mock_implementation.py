@@ -234,20 +234,29 @@ def patch_analyzer():
         return parser.parse_file(file_path)
     CodeParser.parse_file = mock_parse_file
     
+    # Override the parse_source method used by the analyzer's single-read pipeline
+    original_parse_source = CodeParser.parse_source
+    def mock_parse_source(self, source, language, old_tree=None, timeout=None):
+        logger.debug(f"Using mock parser for {language} source")
+        return MockTreeSitterTree(source.text, language)
+    CodeParser.parse_source = mock_parse_source
+    
     # We need to patch the pattern.match methods
     # Get all patterns from the registry
     original_pattern_match = {}
-    for pattern_name, pattern in registry.patterns.items():
+    def patch_pattern(pattern_name, pattern):
         if hasattr(pattern, 'match'):
             original_pattern_match[pattern_name] = pattern.match
             
             # Define a closure to capture the pattern name
             def make_mock_match(pattern_name):
-                def mock_match(self, tree, code, language, file_path=None):
+                def mock_match(tree, code, language, file_path=None, parser=None, context=None):
                     logger.debug(f"Using mock match for {pattern_name}")
                     
-                    # Create a mock tree if we got a string instead
-                    if isinstance(tree, str):
+                    # Create a mock tree if we got anything else
+                    if not isinstance(tree, MockTreeSitterTree):
+                        if isinstance(code, bytes):
+                            code = code.decode('utf-8', errors='replace')
                         tree = MockTreeSitterTree(code, language)
                     
                     # Match using the appropriate mock pattern
@@ -519,14 +528,22 @@ def patch_analyzer():
             # Patch the method
             pattern.match = make_mock_match(pattern_name)
     
+    # Patterns that are loaded later are patched as they load
+    for pattern_name, pattern in registry.patterns.loaded().items():
+        patch_pattern(pattern_name, pattern)
+    registry.add_load_hook(patch_pattern)
+    
     # Return a function to restore the original methods
     def restore():
         logger.info("Restoring original analyzer implementation")
+        registry.remove_load_hook(patch_pattern)
         CodeParser.parse_file = original_parse_file
+        CodeParser.parse_source = original_parse_source
         
         # Restore pattern.match methods
+        loaded = registry.patterns.loaded()
         for pattern_name, match_method in original_pattern_match.items():
-            if pattern_name in registry.patterns:
-                registry.patterns[pattern_name].match = match_method
+            if pattern_name in loaded:
+                loaded[pattern_name].match = match_method
     
     return restore
\ No newline at end of file
@@ -0,0 +1,75 @@
+"""
+NDJSON (JSON Lines) output for analysis results.
+
+Each line holds the compact JSON result of one file, so a report can be
+written while analysis is still running and read back one file at a time.
+"""
+
+from typing import Dict, IO, Iterable, Iterator, Union
+from pathlib import Path
+import json
+
+from .visualization.html_report import new_summary, fold_summary
+from .match import to_json_default
+
+def to_ndjson_line(result: Dict) -> str:
+    """Serialize the analysis result of one file as an NDJSON line.
+    
+    Args:
+        result: The analysis result of a file
+    
+    Returns:
+        The compact JSON of the result, terminated by a newline
+    """
+    return json.dumps(result, separators=(",", ":"), default=to_json_default) + "\n"
+
+def write_ndjson(results: Iterable[Dict], output: IO[str]) -> int:
+    """Write analysis results to a file handle as they arrive.
+    
+    Args:
+        results: Analysis results, for example from iter_analyze_directory
+        output: A text file handle to write to
+    
+    Returns:
+        The number of results written
+    """
+    count = 0
+    for result in results:
+        output.write(to_ndjson_line(result))
+        count += 1
+    return count
+
+def iter_ndjson(source: Union[str, Path, IO[str]]) -> Iterator[Dict]:
+    """Read analysis results back from an NDJSON report one at a time.
+    
+    Args:
+        source: Path of the report or an open text file handle
+    
+    Yields:
+        The analysis result of each file
+    """
+    if isinstance(source, (str, Path)):
+        with open(source, 'r', encoding='utf-8') as f:
+            yield from iter_ndjson(f)
+        return
+    
+    for line in source:
+        if line.strip():
+            yield json.loads(line)
+
+def load_ndjson_summary(source: Union[str, Path, IO[str]]) -> Dict:
+    """Fold an NDJSON report into summary aggregates.
+    
+    Only the result of the current line is held in memory, so this works
+    on reports far larger than the memory needed to load all matches.
+    
+    Args:
+        source: Path of the report or an open text file handle
+    
+    Returns:
+        The aggregates used by HTMLReport.render_summary_section
+    """
+    summary = new_summary()
+    for result in iter_ndjson(source):
+        fold_summary(summary, result)
+    return summary
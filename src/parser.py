@@ -10,20 +10,23 @@ from pathlib import Path
 import tree_sitter
 
 from .tree_sitter_manager import TreeSitterManager
+from .source_buffer import SourceBuffer
 
 logger = logging.getLogger(__name__)
 
 class CodeParser:
     """A parser for source code that uses tree-sitter to create ASTs."""
     
-    def __init__(self, languages_dir: Optional[str] = None):
+    def __init__(self, languages_dir: Optional[str] = None, parser_pool_size: Optional[int] = None):
         """Initialize the parser with tree-sitter support.
         
         Args:
             languages_dir: Optional directory to store language definitions.
                 If None, uses the default directory.
+            parser_pool_size: Optional maximum number of tree-sitter parsers
+                per language used at once by concurrent threads
         """
-        self.manager = TreeSitterManager(languages_dir)
+        self.manager = TreeSitterManager(languages_dir, parser_pool_size)
     
     def _get_language_by_extension(self, file_path: Union[str, Path]) -> Optional[str]:
         """Determine the language based on file extension.
@@ -59,38 +62,80 @@ class CodeParser:
             logger.error(f"Failed to parse {file_path}: {e}")
             return None
     
-    def parse_code(self, code: str, language: str) -> Optional[tree_sitter.Tree]:
+    def parse_code(self,
+                   code: Union[str, bytes],
+                   language: str,
+                   old_tree: Optional[tree_sitter.Tree] = None,
+                   timeout: Optional[float] = None) -> Optional[tree_sitter.Tree]:
         """Parse a string of source code and return its AST.
         
         Args:
-            code: The source code to parse
+            code: The source code to parse, as a string or UTF-8 bytes
             language: The language of the source code
+            old_tree: Optional edited previous tree to parse incrementally from
+            timeout: Optional number of seconds after which parsing stops
             
         Returns:
             A tree-sitter Tree or None if parsing failed
+        
+        Raises:
+            TimeoutError: If parsing took longer than the timeout
         """
         if not self.manager.ensure_language_installed(language):
             raise ValueError(f"Unsupported language: {language}")
             
         try:
-            return self.manager.parse_code(code, language)
+            return self.manager.parse_code(code, language, old_tree, timeout)
+        except TimeoutError:
+            raise
         except Exception as e:
             logger.error(f"Failed to parse code: {e}")
             return None
             
-    def query(self, tree: tree_sitter.Tree, query_string: str, language: str) -> List[Dict]:
+    def parse_source(self,
+                     source: SourceBuffer,
+                     language: str,
+                     old_tree: Optional[tree_sitter.Tree] = None,
+                     timeout: Optional[float] = None) -> Optional[tree_sitter.Tree]:
+        """Parse an in-memory source buffer and return its AST.
+        
+        The buffer's bytes are handed to tree-sitter directly, so the file
+        is neither re-read nor re-encoded.
+        
+        Args:
+            source: The source buffer to parse
+            language: The language of the source code
+            old_tree: Optional edited previous tree to parse incrementally from
+            timeout: Optional number of seconds after which parsing stops
+            
+        Returns:
+            A tree-sitter Tree or None if parsing failed
+        
+        Raises:
+            TimeoutError: If parsing took longer than the timeout
+        """
+        return self.parse_code(source.data, language, old_tree, timeout)
+            
+    def query(self, tree: tree_sitter.Tree, query_string: str, language: str, budget=None) -> List[Dict]:
         """Run a query against a parse tree.
         
         Args:
             tree: The tree-sitter parse tree
             query_string: The query string in tree-sitter query language
             language: The language of the source code
+            budget: Optional FileBudget to check while the query runs
             
         Returns:
             A list of matches, where each match is a dictionary with node details
+        
+        Raises:
+            BudgetExceeded: If the budget is exceeded
         """
-        query = self.manager.query(tree, query_string, language)
-        captures = query.captures(tree.root_node)
+        query = self.manager.get_query(language, query_string)
+        if budget is not None:
+            captures = budget.captures(query, tree.root_node)
+        else:
+            captures = query.captures(tree.root_node)
         
         results = []
         for node, capture_name in captures:
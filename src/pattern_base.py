@@ -2,13 +2,19 @@
 Base classes for pattern definitions.
 """
 
-from typing import Dict, List, Optional, Set, Tuple, Union
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple, Union
 from pathlib import Path
 import os
+import sys
+import bisect
 import logging
 
 import tree_sitter
 
+from .analysis_context import AnalysisContext, get_default_parser
+from .match import CaptureSpan, Match
+from .prefilter import query_keywords
+
 logger = logging.getLogger(__name__)
 
 class Pattern:
@@ -19,6 +25,14 @@ class Pattern:
     for each supported language.
     """
     
+    # Whether match() works from the raw source bytes. Patterns that only
+    # read node spans set this so the recognizer can skip decoding the file.
+    accepts_bytes = False
+    
+    # Whether matches depend on the path of the file as well as its
+    # contents. Results of such patterns are cached per path.
+    path_dependent = False
+    
     def __init__(self, 
                  name: str, 
                  description: str,
@@ -57,7 +71,8 @@ class Pattern:
               tree: tree_sitter.Tree, 
               code: str, 
               language: str,
-              file_path: Optional[str] = None) -> List[Dict]:
+              file_path: Optional[str] = None,
+              context: Optional[AnalysisContext] = None) -> List[Dict]:
         """Match this pattern against an AST.
         
         Args:
@@ -65,6 +80,8 @@ class Pattern:
             code: The source code that was parsed
             language: The language of the source code
             file_path: Optional path to the file that was parsed
+            context: Optional per-file context shared by all patterns matched
+                against the file, holding its parser and memoized results
             
         Returns:
             A list of matches, where each match is a dictionary with details
@@ -83,6 +100,57 @@ class Pattern:
         return self.queries.get(language)
 
 
+class _CaptureGroupIndex:
+    """Index of capture groups by the line of their first capture.
+    
+    Finds the group closest to a line with a binary search over the
+    distinct lines instead of scanning every group. Only the earliest
+    group created on each line is kept, since it wins every tie with the
+    later ones; ties between the lines above and below go to whichever
+    group was created first.
+    """
+    
+    def __init__(self):
+        self.lines: List[int] = []
+        self.first_group: Dict[int, Tuple[int, str]] = {}
+    
+    def add(self, line: int, key: str) -> None:
+        """Record a new group whose first capture starts on a line.
+        
+        Args:
+            line: The line of the group's first capture
+            key: The key of the group
+        """
+        if line not in self.first_group:
+            self.first_group[line] = (len(self.first_group), key)
+            bisect.insort(self.lines, line)
+    
+    def closest(self, line: int) -> Tuple[Optional[str], float]:
+        """Find the group closest to a line.
+        
+        Args:
+            line: The line of the capture being grouped
+            
+        Returns:
+            The key of the closest group and its distance in lines, or
+            (None, inf) if there are no groups
+        """
+        position = bisect.bisect_left(self.lines, line)
+        best = None
+        best_distance = float('inf')
+        
+        for candidate in self.lines[max(position - 1, 0):position + 1]:
+            distance = abs(candidate - line)
+            if (distance < best_distance or
+                    (distance == best_distance and self.first_group[candidate] < self.first_group[best])):
+                best = candidate
+                best_distance = distance
+        
+        if best is None:
+            return None, best_distance
+        return self.first_group[best][1], best_distance
+
+
 class QueryBasedPattern(Pattern):
     """A pattern that uses tree-sitter queries for matching.
     
@@ -91,11 +159,16 @@ class QueryBasedPattern(Pattern):
     can customize the processing of query results.
     """
     
+    # Query results carry their own node text, so the source is only
+    # needed as bytes
+    accepts_bytes = True
+    
     def __init__(self, 
                  name: str, 
                  description: str,
                  languages: Optional[List[str]] = None,
-                 queries: Optional[Dict[str, str]] = None):
+                 queries: Optional[Dict[str, str]] = None,
+                 keywords: Optional[Dict[str, List[str]]] = None):
         """Initialize a query-based pattern.
         
         Args:
@@ -103,25 +176,32 @@ class QueryBasedPattern(Pattern):
             description: Human-readable description of the pattern
             languages: List of supported languages. If None, supports all languages.
             queries: Dictionary mapping language names to query strings
+            keywords: Optional dictionary mapping language names to literals
+                of which every file the query matches in contains one. If
+                not given, they are derived from the query's predicates.
         """
         super().__init__(name, description, languages)
         if queries:
             self.queries = queries
+        self.keywords: Dict[str, List[str]] = keywords or {}
     
     def match(self, 
               tree: tree_sitter.Tree, 
               code: str, 
               language: str,
               file_path: Optional[str] = None,
-              parser=None) -> List[Dict]:
+              parser=None,
+              context: Optional[AnalysisContext] = None) -> List[Dict]:
         """Match this pattern against an AST using tree-sitter queries.
         
         Args:
             tree: The tree-sitter AST
-            code: The source code that was parsed
+            code: The source code that was parsed, as text or UTF-8 bytes
             language: The language of the source code
             file_path: Optional path to the file that was parsed
-            parser: Optional CodeParser instance
+            parser: Optional CodeParser instance. If None, uses the context's parser.
+            context: Optional per-file context; query results are shared
+                through it with other patterns running the same query
             
         Returns:
             A list of matches, where each match is a dictionary with details
@@ -134,17 +214,11 @@ class QueryBasedPattern(Pattern):
             return []
             
         if parser is None:
-            from .parser import CodeParser
-            parser = CodeParser()
+            parser = context.parser if context is not None else get_default_parser()
         
         try:
             # Run the query
-            if hasattr(parser, 'query'):
-                # Use the parser's query method
-                query_results = parser.query(tree, query_string, language)
-            else:
-                # Direct tree-sitter query if parser doesn't provide query method
-                query_results = self._direct_tree_sitter_query(tree, query_string, language, code, parser)
+            query_results = self._run_query(tree, query_string, language, code, parser, context)
             
             # Process the results
             matches = self._process_query_results(query_results, code, language, file_path, parser)
@@ -154,6 +228,57 @@ class QueryBasedPattern(Pattern):
             logger.error(f"Error running query for pattern {self.name}: {e}")
             return []
             
+    def get_keywords(self, language: str, query_string: Optional[str] = None) -> Optional[FrozenSet[bytes]]:
+        """Get the literals of which a file contains one wherever a query of the pattern matches.
+        
+        Args:
+            language: The language of the query
+            query_string: The query; defaults to the pattern's query for the
+                language. Declared keywords only apply to that query.
+        
+        Returns:
+            The keywords as UTF-8 bytes, or None if the query may match in any file
+        """
+        own_query = self.get_query_string(language)
+        if query_string is None or query_string == own_query:
+            declared = getattr(self, 'keywords', {}).get(language)
+            if declared:
+                return frozenset(keyword.encode('utf-8') for keyword in declared)
+            query_string = own_query
+        return query_keywords(query_string) if query_string else None
+    
+    def _run_query(self,
+                   tree: tree_sitter.Tree,
+                   query_string: str,
+                   language: str,
+                   code: str,
+                   parser,
+                   context: Optional[AnalysisContext] = None) -> List[Dict]:
+        """Run a query, reusing the results of the same query on the same file.
+        
+        Args:
+            tree: The tree-sitter AST
+            query_string: The query string to run
+            language: The language of the source code
+            code: The source code that was parsed
+            parser: CodeParser instance
+            context: Optional per-file context memoizing query results
+            
+        Returns:
+            A list of dictionaries with query results
+        """
+        if not hasattr(parser, 'query'):
+            # Direct tree-sitter query if parser doesn't provide query method
+            return self._direct_tree_sitter_query(tree, query_string, language, code, parser)
+        
+        if context is not None and context.tree is tree and context.parser is parser:
+            # A query none of whose keywords occurs in the file cannot match
+            if not context.prefilter(self.name, self.get_keywords(language, query_string)):
+                return []
+            return context.query(query_string)
+        
+        return parser.query(tree, query_string, language)
+            
     def _direct_tree_sitter_query(self, 
                                 tree: tree_sitter.Tree, 
                                 query_string: str, 
@@ -174,18 +299,9 @@ class QueryBasedPattern(Pattern):
         Returns:
             A list of dictionaries with query results
         """
-        from tree_sitter import Query
-        
-        # Get the language object
-        if parser and hasattr(parser, 'manager') and hasattr(parser.manager, 'language_cache'):
-            if language in parser.manager.language_cache:
-                lang_obj = parser.manager.language_cache[language]
-            else:
-                # Try to load the language
-                if parser.manager.ensure_language_installed(language):
-                    lang_obj = parser.manager.language_cache[language]
-                else:
-                    raise ValueError(f"Language {language} not available")
+        # Get the compiled query from the manager's cache
+        if parser and hasattr(parser, 'manager') and hasattr(parser.manager, 'get_query'):
+            query = parser.manager.get_query(language, query_string)
         else:
             # If we can't get the language object, use the mock implementation fallback
             from .mock_implementation import MockTreeSitterTree
@@ -195,9 +311,6 @@ class QueryBasedPattern(Pattern):
             else:
                 raise ValueError(f"Cannot get language object for {language}")
         
-        # Create the query
-        query = Query(lang_obj, query_string)
-        
         # Run the query
         captures = query.captures(tree.root_node)
         
@@ -229,15 +342,19 @@ class QueryBasedPattern(Pattern):
             parser: Optional CodeParser instance
             
         Returns:
-            A list of matches, where each match is a dictionary with details
+            A list of Match objects with details
         """
         # This is a generic implementation that can be overridden by subclasses
         matches = []
-        current_match = {}
+        
+        # Every match of the file shares one copy of the path
+        if file_path:
+            file_path = sys.intern(file_path)
         
         # Group captures by their primary identifier
         # This helps handle cases where captures may come in any order
         capture_groups = {}
+        group_index = _CaptureGroupIndex()
         primary_captures = ['name', 'identifier', 'function_name', 'class_name', 'method_name']
         
         for result in query_results:
@@ -290,24 +407,11 @@ class QueryBasedPattern(Pattern):
                 key = f"{capture}_{node.start_point[0]}_{node.start_point[1]}"
                 if key not in capture_groups:
                     capture_groups[key] = []
+                    group_index.add(node.start_point[0], key)
                 capture_groups[key].append(result_with_text)
             else:
-                # Find the closest primary capture to associate with
-                closest_key = None
-                closest_distance = float('inf')
-                
-                for key in capture_groups:
-                    # Get the primary capture's node
-                    primary_result = capture_groups[key][0]
-                    primary_node = primary_result['node']
-                    
-                    # Calculate distance between nodes (using line numbers for simplicity)
-                    distance = abs(primary_node.start_point[0] - node.start_point[0])
-                    
-                    # Update if this is closer
-                    if distance < closest_distance:
-                        closest_distance = distance
-                        closest_key = key
+                # Find the closest group to associate with
+                closest_key, closest_distance = group_index.closest(node.start_point[0])
                 
                 # If we found a group and it's reasonably close (within 10 lines)
                 if closest_key is not None and closest_distance <= 10:
@@ -317,6 +421,7 @@ class QueryBasedPattern(Pattern):
                     key = f"unknown_{node.start_point[0]}_{node.start_point[1]}"
                     if key not in capture_groups:
                         capture_groups[key] = []
+                        group_index.add(node.start_point[0], key)
                     capture_groups[key].append(result_with_text)
         
         # Process each capture group into a match
@@ -333,29 +438,27 @@ class QueryBasedPattern(Pattern):
                 continue
             
             # Create the match with the primary identifier
-            match = {
-                'type': self.name,
-                'name': primary_result['text'],
-                'line': primary_result['start_point'][0] + 1,  # 1-indexed line numbers
-                'column': primary_result['start_point'][1],
-                'end_line': primary_result['end_point'][0] + 1,
-                'end_column': primary_result['end_point'][1],
-            }
-            
-            if file_path:
-                match['file'] = file_path
+            match = Match(
+                self.name,
+                primary_result['text'],
+                primary_result['start_point'][0] + 1,  # 1-indexed line numbers
+                primary_result['start_point'][1],
+                primary_result['end_point'][0] + 1,
+                primary_result['end_point'][1],
+                file_path or None,
+            )
             
             # Add other captures to the match
             for result in group:
                 if result is not primary_result:  # Skip the primary result we already processed
                     capture = result['capture']
-                    match[capture] = {
-                        'text': result['text'],
-                        'line': result['start_point'][0] + 1,
-                        'column': result['start_point'][1],
-                        'end_line': result['end_point'][0] + 1,
-                        'end_column': result['end_point'][1],
-                    }
+                    match[capture] = CaptureSpan(
+                        result['text'],
+                        result['start_point'][0] + 1,
+                        result['start_point'][1],
+                        result['end_point'][0] + 1,
+                        result['end_point'][1],
+                    )
             
             matches.append(match)
             
@@ -385,6 +488,16 @@ class CompositePattern(Pattern):
         super().__init__(name, description, languages)
         self.patterns = patterns
     
+    @property
+    def accepts_bytes(self) -> bool:
+        """A composite can take raw bytes only if all of its sub-patterns can."""
+        return all(getattr(pattern, 'accepts_bytes', False) for pattern in self.patterns)
+    
+    @property
+    def path_dependent(self) -> bool:
+        """A composite depends on the path of the file if any of its sub-patterns does."""
+        return any(getattr(pattern, 'path_dependent', False) for pattern in self.patterns)
+    
     def supports_language(self, language: str) -> bool:
         """Check if this pattern supports a specific language.
         
@@ -405,7 +518,8 @@ class CompositePattern(Pattern):
               tree: tree_sitter.Tree, 
               code: str, 
               language: str,
-              file_path: Optional[str] = None) -> List[Dict]:
+              file_path: Optional[str] = None,
+              context: Optional[AnalysisContext] = None) -> List[Dict]:
         """Match this pattern against an AST using all sub-patterns.
         
         Args:
@@ -413,6 +527,7 @@ class CompositePattern(Pattern):
             code: The source code that was parsed
             language: The language of the source code
             file_path: Optional path to the file that was parsed
+            context: Optional per-file context, passed on to the sub-patterns
             
         Returns:
             A list of matches, where each match is a dictionary with details
@@ -420,17 +535,27 @@ class CompositePattern(Pattern):
         if not self.supports_language(language):
             return []
             
+        # Sub-patterns already matched on this file are not matched again
+        shared = context is not None and context.tree is tree and context.language == language
+        
         # Run all sub-patterns
         matches = []
         for pattern in self.patterns:
             if pattern.supports_language(language):
-                pattern_matches = pattern.match(tree, code, language, file_path)
+                if shared:
+                    pattern_matches = context.pattern_matches(
+                        pattern.name,
+                        lambda: pattern.match(tree, code, language, file_path, context=context)
+                    )
+                else:
+                    pattern_matches = pattern.match(tree, code, language, file_path, context=context)
                 
-                # Add pattern matches to the result
+                # Add pattern matches to the result, labelled with the composite
+                # pattern info; the sub-pattern's own matches are left untouched
                 for match in pattern_matches:
-                    # Add composite pattern info
-                    match['composite_type'] = self.name
-                    match['sub_pattern'] = pattern.name
-                    matches.append(match)
+                    labelled = match.copy() if isinstance(match, Match) else dict(match)
+                    labelled['composite_type'] = self.name
+                    labelled['sub_pattern'] = pattern.name
+                    matches.append(labelled)
                     
         return matches
\ No newline at end of file
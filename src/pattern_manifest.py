@@ -0,0 +1,100 @@
+"""
+Static manifest of the built-in patterns.
+
+The registry is populated from this manifest without importing any
+pattern module: listing patterns, categories and languages only needs the
+entries below, and a pattern's module is imported the first time the
+pattern itself is used. Keep the entries in sync with the pattern
+classes; the test suite checks that every entry loads and matches the
+name and languages of the class it points to.
+"""
+
+from typing import NamedTuple, Tuple
+
+class PatternSpec(NamedTuple):
+    """Where to find a pattern, and what the registry needs to know about it."""
+
+    name: str
+    module: str
+    class_name: str
+    categories: Tuple[str, ...]
+    languages: Tuple[str, ...] = ()
+
+_WEB_LANGUAGES = ('python', 'javascript', 'typescript', 'java')
+_ANTI_PATTERN_LANGUAGES = ('python', 'javascript', 'typescript', 'java', 'c#', 'go')
+
+# Built-in patterns, in registration order
+PATTERN_MANIFEST: Tuple[PatternSpec, ...] = (
+    PatternSpec('all_functions', 'src.patterns.function_patterns', 'AllFunctionsPattern',
+                ('function_patterns', 'functions', 'composite')),
+    PatternSpec('all_classes', 'src.patterns.class_patterns', 'AllClassPatternsPattern',
+                ('class_patterns', 'classes', 'composite')),
+    PatternSpec('design_patterns', 'src.patterns.design_patterns', 'DesignPatternsPattern',
+                ('design_patterns', 'composite')),
+    PatternSpec('code_smells', 'src.patterns.code_smells', 'CodeSmellsPattern',
+                ('code_smells', 'composite')),
+
+    # Architectural intents
+    PatternSpec('separation_of_concerns', 'src.patterns.architectural_intents.separation_of_concerns',
+                'SeparationOfConcernsIntent', ('architectural_intents',), _WEB_LANGUAGES),
+    PatternSpec('information_hiding', 'src.patterns.architectural_intents.information_hiding',
+                'InformationHidingIntent', ('architectural_intents',), _WEB_LANGUAGES),
+    PatternSpec('dependency_inversion', 'src.patterns.architectural_intents.dependency_inversion',
+                'DependencyInversionIntent', ('architectural_intents',), _WEB_LANGUAGES),
+    PatternSpec('architectural_intent', 'src.patterns.architectural_intents.architectural_intent_detector',
+                'ArchitecturalIntentDetector', ('architectural_intents',)),
+
+    # Architectural styles
+    PatternSpec('hexagonal_architecture', 'src.patterns.architectural_styles.hexagonal',
+                'HexagonalArchitecturePattern', ('architectural_styles',), _WEB_LANGUAGES),
+    PatternSpec('clean_architecture', 'src.patterns.architectural_styles.clean_architecture',
+                'CleanArchitecturePattern', ('architectural_styles',), _WEB_LANGUAGES),
+    PatternSpec('microservices_architecture', 'src.patterns.architectural_styles.microservices',
+                'MicroservicesPattern', ('architectural_styles',), _WEB_LANGUAGES + ('go',)),
+    PatternSpec('event_driven_architecture', 'src.patterns.architectural_styles.event_driven',
+                'EventDrivenPattern', ('architectural_styles',), _WEB_LANGUAGES + ('go',)),
+    PatternSpec('layered_architecture', 'src.patterns.architectural_styles.layered',
+                'LayeredArchitecturePattern', ('architectural_styles',), _ANTI_PATTERN_LANGUAGES),
+    PatternSpec('architectural_style', 'src.patterns.architectural_styles.architectural_style_detector',
+                'ArchitecturalStyleDetector', ('architectural_styles',)),
+
+    # Architectural anti-patterns
+    PatternSpec('tight_coupling', 'src.patterns.architectural_anti_patterns.tight_coupling',
+                'TightCouplingAntiPattern', ('architectural_anti_patterns',), _ANTI_PATTERN_LANGUAGES),
+    PatternSpec('dependency_cycle', 'src.patterns.architectural_anti_patterns.dependency_cycle',
+                'DependencyCycleAntiPattern', ('architectural_anti_patterns',), _ANTI_PATTERN_LANGUAGES),
+    PatternSpec('architectural_erosion', 'src.patterns.architectural_anti_patterns.architectural_erosion',
+                'ArchitecturalErosionAntiPattern', ('architectural_anti_patterns',), _ANTI_PATTERN_LANGUAGES),
+    PatternSpec('god_component', 'src.patterns.architectural_anti_patterns.god_component',
+                'GodComponentAntiPattern', ('architectural_anti_patterns',), _ANTI_PATTERN_LANGUAGES),
+    PatternSpec('architectural_anti_pattern',
+                'src.patterns.architectural_anti_patterns.architectural_anti_pattern_detector',
+                'ArchitecturalAntiPatternDetector', ('architectural_anti_patterns',)),
+
+    # Basic patterns
+    PatternSpec('function_definition', 'src.patterns.function_patterns', 'FunctionDefinitionPattern',
+                ('functions', 'basic'),
+                ('python', 'javascript', 'typescript', 'ruby', 'go', 'java', 'c', 'cpp', 'rust')),
+    PatternSpec('method_definition', 'src.patterns.function_patterns', 'MethodDefinitionPattern',
+                ('functions', 'basic'), ('python', 'javascript', 'typescript', 'ruby', 'java', 'cpp')),
+    PatternSpec('constructor', 'src.patterns.function_patterns', 'ConstructorPattern',
+                ('functions', 'basic'), ('python', 'javascript', 'typescript', 'java', 'cpp')),
+    PatternSpec('class_definition', 'src.patterns.class_patterns', 'ClassDefinitionPattern',
+                ('classes', 'basic'), ('python', 'javascript', 'typescript', 'ruby', 'java', 'cpp', 'rust')),
+    PatternSpec('interface_definition', 'src.patterns.class_patterns', 'InterfaceDefinitionPattern',
+                ('classes', 'basic'), ('typescript', 'java')),
+    PatternSpec('class_inheritance', 'src.patterns.class_patterns', 'ClassWithInheritancePattern',
+                ('classes', 'basic'), ('python', 'javascript', 'typescript', 'ruby', 'java', 'cpp')),
+
+    # Design patterns
+    PatternSpec('singleton', 'src.patterns.design_patterns', 'SingletonPattern', ('design_patterns',)),
+    PatternSpec('factory_method', 'src.patterns.design_patterns', 'FactoryMethodPattern',
+                ('design_patterns',), _WEB_LANGUAGES),
+
+    # Code smells
+    PatternSpec('long_method', 'src.patterns.code_smells', 'LongMethodPattern', ('code_smells',)),
+    PatternSpec('deep_nesting', 'src.patterns.code_smells', 'DeepNestingPattern',
+                ('code_smells',), ('python', 'javascript', 'typescript', 'java', 'c', 'cpp')),
+    PatternSpec('complex_condition', 'src.patterns.code_smells', 'ComplexConditionPattern',
+                ('code_smells',), ('python', 'javascript', 'typescript', 'java', 'c', 'cpp')),
+)
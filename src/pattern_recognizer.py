@@ -10,20 +10,32 @@ import tree_sitter
 
 from .pattern_base import Pattern
 from .pattern_registry import registry, PatternRegistry
+from .source_buffer import SourceBuffer
+from .query_plan import ExecutionPlan, FusedQuery
+from .analysis_context import AnalysisContext, get_default_parser
+from .profiling import clock as profile_clock
+from .budget import BudgetExceeded
 
 logger = logging.getLogger(__name__)
 
 class PatternRecognizer:
     """Recognizes patterns in source code ASTs."""
     
-    def __init__(self, registry: Optional[PatternRegistry] = None):
+    def __init__(self, registry: Optional[PatternRegistry] = None, parser=None):
         """Initialize the pattern recognizer with a pattern registry.
         
         Args:
             registry: Optional pattern registry. If None, uses the global registry.
+            parser: Optional CodeParser shared by the patterns. If None, uses the
+                process-wide default parser.
         """
         self.registry = registry or globals().get('registry')
-        self.parser = None
+        self.parser = parser
+        
+        # Execution plans and their fused queries, valid for one registry generation
+        self._plans: Dict[Tuple, ExecutionPlan] = {}
+        self._fused_queries: Dict[Tuple, Tuple[ExecutionPlan, FusedQuery]] = {}
+        self._plan_generation: Optional[int] = None
     
     def get_available_patterns(self) -> List[str]:
         """Get the names of all available patterns.
@@ -31,7 +43,7 @@ class PatternRecognizer:
         Returns:
             A list of pattern names
         """
-        return sorted([pattern.name for pattern in self.registry.get_all_patterns()])
+        return sorted(self.registry.patterns)
     
     def get_available_categories(self) -> List[str]:
         """Get the names of all available pattern categories.
@@ -50,7 +62,7 @@ class PatternRecognizer:
         Returns:
             A list of pattern names in the category
         """
-        return sorted([pattern.name for pattern in self.registry.get_patterns_by_category(category)])
+        return sorted(self.registry.categories.get(category, ()))
     
     def get_patterns_by_language(self, language: str) -> List[str]:
         """Get the names of all patterns that support a language.
@@ -61,33 +73,159 @@ class PatternRecognizer:
         Returns:
             A list of pattern names that support the language
         """
-        return sorted([pattern.name for pattern in self.registry.get_patterns_by_language(language)])
+        return sorted(self.registry.languages.get(language, ()))
     
     def recognize(self, 
                   tree: tree_sitter.Tree, 
-                  code: str,
+                  code: Union[str, bytes, SourceBuffer],
                   language: str,
                   pattern_name: Optional[str] = None,
                   category: Optional[str] = None,
-                  file_path: Optional[str] = None) -> Dict[str, List[Dict]]:
+                  file_path: Optional[str] = None,
+                  context: Optional[AnalysisContext] = None,
+                  profile=None,
+                  budget=None) -> Dict[str, List[Dict]]:
         """Recognize patterns in an AST.
         
         Args:
             tree: The AST to analyze
-            code: The source code that was parsed
+            code: The source code that was parsed, as text, bytes or a SourceBuffer
             language: The language of the source code
             pattern_name: If provided, only match this specific pattern
             category: If provided, only match patterns in this category
             file_path: Optional path to the file that was parsed
+            context: Optional context of the file. If None, one is created.
+            profile: Optional FileProfile to record the time spent in each
+                pattern in. Ignored if a context is given; the context's is used.
+            budget: Optional FileBudget to check between patterns. Ignored if
+                a context is given; the context's is used.
             
         Returns:
             A dictionary mapping pattern names to lists of matches
+        
+        Raises:
+            BudgetExceeded: If the analysis of the file exceeds its budget
+        """
+        plan = self.get_plan(language, pattern_name, category)
+        
+        logger.debug(f"Matching {len(plan.patterns)} patterns for {file_path}")
+        
+        return self.match_patterns(
+            tree, code, language, list(plan.patterns), file_path, context, plan, profile, budget
+        )
+    
+    def get_plan(self,
+                 language: str,
+                 pattern_name: Optional[str] = None,
+                 category: Optional[str] = None) -> ExecutionPlan:
+        """Get the execution plan for a language and pattern selection.
+        
+        Plans are compiled on first use and cached until the registry is
+        changed.
+        
+        Args:
+            language: The language of the source code
+            pattern_name: If provided, only select this specific pattern
+            category: If provided, only select patterns in this category
+            
+        Returns:
+            The execution plan
+            
+        Raises:
+            ValueError: If pattern_name is not a registered pattern
+        """
+        if self._plan_generation != self.registry.generation:
+            self._plans = {}
+            self._fused_queries = {}
+            self._plan_generation = self.registry.generation
+        
+        key = (language, pattern_name, category)
+        plan = self._plans.get(key)
+        if plan is None:
+            patterns = self._compile_selection(language, pattern_name, category)
+            plan = ExecutionPlan(language, pattern_name, category, tuple(patterns))
+            self._plans[key] = plan
+        
+        return plan
+    
+    def get_fused_query(self, plan: ExecutionPlan, manager) -> FusedQuery:
+        """Get the fused query of an execution plan, building it on first use.
+        
+        Args:
+            plan: The execution plan
+            manager: TreeSitterManager used to compile the query
+            
+        Returns:
+            The fused query of the plan's fusable patterns
         """
+        key = (plan.language, plan.pattern_name, plan.category, manager)
+        cached = self._fused_queries.get(key)
+        if cached is not None and cached[0] is plan:
+            return cached[1]
+        
+        fused = FusedQuery(plan.language, list(plan.patterns), manager)
+        self._fused_queries[key] = (plan, fused)
+        return fused
+    
+    def describe_plan(self,
+                      language: str,
+                      pattern_name: Optional[str] = None,
+                      category: Optional[str] = None) -> List[Dict]:
+        """Describe what runs on the files of a language.
+        
+        Args:
+            language: The language to describe the plan for
+            pattern_name: If provided, only select this specific pattern
+            category: If provided, only select patterns in this category
+            
+        Returns:
+            A list with one dictionary per pattern, as returned by ExecutionPlan.describe
+        """
+        plan = self.get_plan(language, pattern_name, category)
+        
         if self.parser is None:
-            from .parser import CodeParser
-            self.parser = CodeParser()
+            self.parser = get_default_parser()
+        manager = getattr(self.parser, 'manager', None)
+        fused = self.get_fused_query(plan, manager) if manager is not None else None
+        
+        return plan.describe(fused)
+    
+    def select_patterns(self,
+                        language: str,
+                        pattern_name: Optional[str] = None,
+                        category: Optional[str] = None) -> List[Pattern]:
+        """Determine which patterns to match for a language.
         
-        # Determine which patterns to match
+        Args:
+            language: The language of the source code
+            pattern_name: If provided, only select this specific pattern
+            category: If provided, only select patterns in this category
+            
+        Returns:
+            The selected patterns that support the language
+            
+        Raises:
+            ValueError: If pattern_name is not a registered pattern
+        """
+        return list(self.get_plan(language, pattern_name, category).patterns)
+    
+    def _compile_selection(self,
+                           language: str,
+                           pattern_name: Optional[str] = None,
+                           category: Optional[str] = None) -> List[Pattern]:
+        """Select the patterns of an execution plan from the registry.
+        
+        Args:
+            language: The language of the source code
+            pattern_name: If provided, only select this specific pattern
+            category: If provided, only select patterns in this category
+            
+        Returns:
+            The selected patterns that support the language
+            
+        Raises:
+            ValueError: If pattern_name is not a registered pattern
+        """
         patterns_to_match = []
         
         if pattern_name:
@@ -104,22 +242,84 @@ class PatternRecognizer:
             patterns_to_match = self.registry.get_all_patterns()
         
         # Filter patterns by language support
-        patterns_to_match = [p for p in patterns_to_match if self._supports_language(p, language)]
+        return [p for p in patterns_to_match if self._supports_language(p, language)]
         
-        logger.debug(f"Matching {len(patterns_to_match)} patterns for {file_path}")
+    def match_patterns(self,
+                       tree: tree_sitter.Tree,
+                       code: Union[str, bytes, SourceBuffer],
+                       language: str,
+                       patterns: List[Pattern],
+                       file_path: Optional[str] = None,
+                       context: Optional[AnalysisContext] = None,
+                       plan: Optional[ExecutionPlan] = None,
+                       profile=None,
+                       budget=None) -> Dict[str, List[Dict]]:
+        """Match a list of patterns against an AST.
         
-        # Apply each pattern
+        Args:
+            tree: The AST to analyze
+            code: The source code that was parsed, as text, bytes or a SourceBuffer
+            language: The language of the source code
+            patterns: The patterns to match
+            file_path: Optional path to the file that was parsed
+            context: Optional context of the file. If None, one is created and
+                shared by all the patterns.
+            plan: Optional execution plan the patterns were selected by, whose
+                cached fused query is reused
+            profile: Optional FileProfile to record the time spent in each
+                pattern in. Ignored if a context is given; the context's is used.
+            budget: Optional FileBudget to check between patterns. Ignored if
+                a context is given; the context's is used.
+            
+        Returns:
+            A dictionary mapping pattern names to lists of matches
+        
+        Raises:
+            BudgetExceeded: If the analysis of the file exceeds its budget
+        """
+        if self.parser is None:
+            self.parser = get_default_parser()
+        
+        # Patterns that work from node spans get the raw bytes; the full
+        # text is decoded at most once, and only if some pattern needs it
+        source = SourceBuffer.wrap(code)
+        if context is None:
+            context = AnalysisContext(tree, source, language, file_path, self.parser, profile, budget)
+        profile = context.profile
+        budget = context.budget
+        
+        # Run the queries of plain query-based patterns in one traversal, and
+        # record their matches so composites containing them reuse them
+        for pattern_name, matches in self._match_fused(context, patterns, plan).items():
+            context.set_pattern_matches(pattern_name, matches)
+        
+        # Apply each pattern; patterns already matched as part of a composite
+        # are not matched again
         results: Dict[str, List[Dict]] = {}
         
-        for pattern in patterns_to_match:
+        for pattern in patterns:
+            if budget is not None:
+                budget.check(f"matching {pattern.name}")
             try:
                 logger.debug(f"Attempting to match pattern {pattern.name} for {file_path}")
-                matches = pattern.match(tree, code, language, file_path)
+                if profile is not None:
+                    started = profile_clock()
+                pattern_code = source.data if getattr(pattern, 'accepts_bytes', False) else source.text
+                matches = context.pattern_matches(
+                    pattern.name,
+                    lambda: pattern.match(tree, pattern_code, language, file_path, context=context)
+                )
+                if profile is not None:
+                    # The time of composites includes that of sub-patterns
+                    # they match first
+                    profile.add_pattern(pattern.name, started, len(matches))
                 if matches:
                     results[pattern.name] = matches
                     logger.debug(f"Found {len(matches)} matches for pattern {pattern.name}")
                 else:
                     logger.debug(f"No matches found for pattern {pattern.name}")
+            except BudgetExceeded:
+                raise
             except Exception as e:
                 logger.error(f"Error matching pattern '{pattern.name}': {e}")
                 import traceback
@@ -127,6 +327,35 @@ class PatternRecognizer:
         
         return results
     
+    def _match_fused(self,
+                     context: AnalysisContext,
+                     patterns: List[Pattern],
+                     plan: Optional[ExecutionPlan] = None) -> Dict[str, List[Dict]]:
+        """Match the plain query-based patterns with a single fused query.
+        
+        Args:
+            context: The context of the file being analyzed
+            patterns: The patterns to match
+            plan: Optional execution plan whose fused query is reused
+            
+        Returns:
+            A dictionary mapping the names of the fused patterns to their matches.
+            Patterns that could not be fused are left out.
+        """
+        manager = getattr(context.parser, 'manager', None)
+        if not isinstance(context.tree, tree_sitter.Tree) or manager is None:
+            return {}
+        
+        if plan is not None and plan.language == context.language:
+            fused = self.get_fused_query(plan, manager)
+        else:
+            fused = FusedQuery(context.language, patterns, manager)
+        if not fused.patterns:
+            return {}
+        
+        logger.debug(f"Matching {len(fused.patterns)} patterns with one fused query for {context.file_path}")
+        return fused.match(context)
+    
     def _supports_language(self, pattern: Pattern, language: str) -> bool:
         """Check if a pattern supports a language.
         
@@ -29,6 +29,7 @@ from src.analyzer import analyze_file, analyze_directory
 from src.pattern_base import PatternMatch
 from src.pattern_registry import get_registered_patterns
 from src.parser import parse_file
+from src.file_discovery import discover_files
 
 # Pattern recommendation signatures and templates
 class PatternOpportunity:
@@ -909,18 +910,13 @@ def analyze_directory_for_opportunities(directory_path: str) -> Dict[str, List[P
     """Analyze a directory for pattern opportunities."""
     results = {}
     
-    # Walk through directory
-    for root, dirs, files in os.walk(directory_path):
-        for file in files:
-            # Skip non-source files
-            if not file.endswith(('.py', '.js', '.ts', '.java')):
-                continue
-                
-            file_path = os.path.join(root, file)
-            opportunities = detect_opportunities(file_path)
+    # Find the source files, skipping ignored, generated and oversized ones
+    for discovered in discover_files(directory_path, extensions=('.py', '.js', '.ts', '.java')):
+        file_path = str(discovered.path)
+        opportunities = detect_opportunities(file_path)
             
-            if opportunities:
-                results[file_path] = opportunities
+        if opportunities:
+            results[file_path] = opportunities
     
     return results
 
@@ -1,14 +1,150 @@
 """
 Registry of all available patterns.
+
+The built-in patterns are declared from a static manifest and their
+modules are imported only when a pattern is first used, so that listing
+patterns or starting the CLI does not import every pattern module.
 """
 
-from typing import Dict, List, Optional, Set, Type, Union
+from typing import TYPE_CHECKING, Callable, Dict, Iterator, List, MutableMapping, NamedTuple, Optional, Set, Type, Union
+import hashlib
+import importlib
 import logging
+import threading
+
+from .pattern_manifest import PATTERN_MANIFEST, PatternSpec
 
-from .pattern_base import Pattern
+if TYPE_CHECKING:
+    from .pattern_base import Pattern
 
 logger = logging.getLogger(__name__)
 
+class LazyPatterns(MutableMapping):
+    """Patterns by name, where declared patterns are imported on first access.
+    
+    Iterating over the names or checking membership never imports a
+    pattern module; looking up a declared pattern imports its module and
+    instantiates it once.
+    """
+    
+    def __init__(self, on_load: Optional[Callable[[str, 'Pattern'], None]] = None):
+        """Initialize an empty mapping.
+        
+        Args:
+            on_load: Optional callback invoked with each declared pattern
+                when it is instantiated
+        """
+        self._names: Dict[str, None] = {}
+        self._specs: Dict[str, PatternSpec] = {}
+        self._loaded: Dict[str, 'Pattern'] = {}
+        self._on_load = on_load
+        self._lock = threading.RLock()
+    
+    def declare(self, spec: PatternSpec) -> None:
+        """Add a pattern that is loaded on first access.
+        
+        Args:
+            spec: Where to find the pattern
+        """
+        with self._lock:
+            self._names[spec.name] = None
+            self._specs[spec.name] = spec
+            self._loaded.pop(spec.name, None)
+    
+    def spec(self, name: str) -> Optional[PatternSpec]:
+        """Get the manifest entry a pattern is loaded from.
+        
+        Args:
+            name: The name of the pattern
+            
+        Returns:
+            The manifest entry, or None if the pattern was registered as an instance
+        """
+        return self._specs.get(name)
+    
+    def is_loaded(self, name: str) -> bool:
+        """Check whether a pattern has been instantiated.
+        
+        Args:
+            name: The name of the pattern
+            
+        Returns:
+            True if the pattern is registered and instantiated
+        """
+        return name in self._loaded
+    
+    def loaded(self) -> Dict[str, 'Pattern']:
+        """Get the patterns that have been instantiated so far.
+        
+        Returns:
+            A dictionary mapping pattern names to instances
+        """
+        with self._lock:
+            return dict(self._loaded)
+    
+    def __getitem__(self, name: str) -> 'Pattern':
+        pattern = self._loaded.get(name)
+        if pattern is not None:
+            return pattern
+        
+        with self._lock:
+            if name in self._loaded:
+                return self._loaded[name]
+            
+            spec = self._specs.get(name)
+            if spec is None:
+                raise KeyError(name)
+            
+            module = importlib.import_module(spec.module)
+            pattern = getattr(module, spec.class_name)()
+            self._loaded[name] = pattern
+            logger.debug(f"Loaded pattern '{name}' from {spec.module}")
+            
+            if self._on_load is not None:
+                self._on_load(name, pattern)
+            return pattern
+    
+    def __setitem__(self, name: str, pattern: 'Pattern') -> None:
+        with self._lock:
+            self._names[name] = None
+            self._specs.pop(name, None)
+            self._loaded[name] = pattern
+    
+    def __delitem__(self, name: str) -> None:
+        with self._lock:
+            del self._names[name]
+            self._specs.pop(name, None)
+            self._loaded.pop(name, None)
+    
+    def copy(self) -> 'LazyPatterns':
+        """Copy the mapping, keeping declared patterns that are not loaded yet lazy.
+        
+        Returns:
+            A new mapping with the same patterns and load callback
+        """
+        with self._lock:
+            patterns = LazyPatterns(self._on_load)
+            patterns._names = dict(self._names)
+            patterns._specs = dict(self._specs)
+            patterns._loaded = dict(self._loaded)
+        return patterns
+    
+    def __contains__(self, name) -> bool:
+        return name in self._names
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self._names))
+    
+    def __len__(self) -> int:
+        return len(self._names)
+
+class RegistrySnapshot(NamedTuple):
+    """The contents of a PatternRegistry, from PatternRegistry.snapshot."""
+    
+    patterns: LazyPatterns
+    categories: Dict[str, Set[str]]
+    languages: Dict[str, Set[str]]
+
 class PatternRegistry:
     """Registry for pattern definitions.
     
@@ -18,17 +154,107 @@ class PatternRegistry:
     
     def __init__(self):
         """Initialize an empty pattern registry."""
-        self.patterns: Dict[str, Pattern] = {}
+        self.patterns = LazyPatterns(on_load=self._run_load_hooks)
         self.categories: Dict[str, Set[str]] = {}
         self.languages: Dict[str, Set[str]] = {}
+        self._fingerprint: Optional[str] = None
+        self._load_hooks: List[Callable[[str, 'Pattern'], None]] = []
+    
+        # Bumped on every change, so that cached execution plans are rebuilt
+        self.generation = 0
+    
+    def declare(self, spec: PatternSpec) -> None:
+        """Declare a pattern that is imported and instantiated on first use.
+        
+        Args:
+            spec: The manifest entry of the pattern
+        """
+        self._fingerprint = None
+        self.generation += 1
+        
+        self.patterns.declare(spec)
+        self._add_memberships(spec.name, spec.categories, spec.languages)
+        
+        logger.debug(f"Declared pattern '{spec.name}'")
+    
+    def snapshot(self) -> RegistrySnapshot:
+        """Record the registered patterns, to put them back with restore.
+        
+        Returns:
+            A copy of the patterns, categories and languages
+        """
+        return RegistrySnapshot(
+            self.patterns.copy(),
+            {category: set(names) for category, names in self.categories.items()},
+            {language: set(names) for language, names in self.languages.items()},
+        )
+    
+    def restore(self, snapshot: RegistrySnapshot) -> None:
+        """Put back the patterns recorded by snapshot.
+        
+        Args:
+            snapshot: A snapshot of this registry
+        """
+        self._fingerprint = None
+        self.generation += 1
+        
+        self.patterns = snapshot.patterns.copy()
+        self.categories = {category: set(names) for category, names in snapshot.categories.items()}
+        self.languages = {language: set(names) for language, names in snapshot.languages.items()}
+    
+    def add_load_hook(self, hook: Callable[[str, 'Pattern'], None]) -> None:
+        """Call a function with every declared pattern when it is loaded.
+        
+        Patterns loaded before the hook was added are not passed to it;
+        use patterns.loaded() to visit them.
+        
+        Args:
+            hook: Called with the name and instance of each loaded pattern
+        """
+        self._load_hooks.append(hook)
     
-    def register(self, pattern: Pattern, categories: Optional[List[str]] = None):
+    def remove_load_hook(self, hook: Callable[[str, 'Pattern'], None]) -> None:
+        """Stop calling a function added with add_load_hook.
+        
+        Args:
+            hook: The hook to remove
+        """
+        if hook in self._load_hooks:
+            self._load_hooks.remove(hook)
+    
+    def _run_load_hooks(self, name: str, pattern: 'Pattern') -> None:
+        """Pass a freshly loaded pattern to the load hooks."""
+        for hook in list(self._load_hooks):
+            hook(name, pattern)
+    
+    def _add_memberships(self, name: str, categories, languages) -> None:
+        """Record the categories and languages of a pattern.
+        
+        Args:
+            name: The name of the pattern
+            categories: Categories to add the pattern to
+            languages: Languages the pattern supports
+        """
+        for category in categories or ():
+            if category not in self.categories:
+                self.categories[category] = set()
+            self.categories[category].add(name)
+        
+        for language in languages or ():
+            if language not in self.languages:
+                self.languages[language] = set()
+            self.languages[language].add(name)
+    
+    def register(self, pattern: 'Pattern', categories: Optional[List[str]] = None):
         """Register a pattern with the registry.
         
         Args:
             pattern: The pattern to register
             categories: Optional list of categories to assign to the pattern
         """
+        self._fingerprint = None
+        self.generation += 1
+        
         # Check if the pattern already exists
         if pattern.name in self.patterns:
             logger.warning(f"Pattern '{pattern.name}' already registered. Overwriting.")
@@ -36,13 +262,6 @@ class PatternRegistry:
         # Register the pattern
         self.patterns[pattern.name] = pattern
         
-        # Register categories
-        if categories:
-            for category in categories:
-                if category not in self.categories:
-                    self.categories[category] = set()
-                self.categories[category].add(pattern.name)
-        
         # Register languages
         languages = []
         if hasattr(pattern, 'languages') and pattern.languages:
@@ -50,14 +269,11 @@ class PatternRegistry:
         elif hasattr(pattern, 'queries') and pattern.queries:
             languages = list(pattern.queries.keys())
             
-        for language in languages:
-            if language not in self.languages:
-                self.languages[language] = set()
-            self.languages[language].add(pattern.name)
+        self._add_memberships(pattern.name, categories, languages)
             
         logger.debug(f"Registered pattern '{pattern.name}'")
     
-    def bulk_register(self, patterns: List[Pattern], category: Optional[str] = None):
+    def bulk_register(self, patterns: List['Pattern'], category: Optional[str] = None):
         """Register multiple patterns at once.
         
         Args:
@@ -75,6 +291,8 @@ class PatternRegistry:
             module: A Python module containing pattern classes
             category: Optional category to assign to all patterns from this module
         """
+        from .pattern_base import Pattern
+        
         # Find all Pattern classes in the module
         patterns = []
         for attr_name in dir(module):
@@ -91,7 +309,7 @@ class PatternRegistry:
         self.bulk_register(patterns, category)
         logger.info(f"Registered {len(patterns)} patterns from module {module.__name__}")
     
-    def get_pattern(self, name: str) -> Optional[Pattern]:
+    def get_pattern(self, name: str) -> Optional['Pattern']:
         """Get a pattern by name.
         
         Args:
@@ -102,7 +320,7 @@ class PatternRegistry:
         """
         return self.patterns.get(name)
     
-    def get_patterns_by_category(self, category: str) -> List[Pattern]:
+    def get_patterns_by_category(self, category: str) -> List['Pattern']:
         """Get all patterns in a category.
         
         Args:
@@ -116,7 +334,7 @@ class PatternRegistry:
             
         return [self.patterns[name] for name in self.categories[category]]
     
-    def get_patterns_by_language(self, language: str) -> List[Pattern]:
+    def get_patterns_by_language(self, language: str) -> List['Pattern']:
         """Get all patterns that support a language.
         
         Args:
@@ -130,7 +348,7 @@ class PatternRegistry:
             
         return [self.patterns[name] for name in self.languages[language]]
     
-    def get_all_patterns(self) -> List[Pattern]:
+    def get_all_patterns(self) -> List['Pattern']:
         """Get all registered patterns.
         
         Returns:
@@ -154,45 +372,56 @@ class PatternRegistry:
         """
         return list(self.languages.keys())
 
+    def fingerprint(self) -> str:
+        """Get a fingerprint of the registered patterns.
+        
+        The fingerprint covers each pattern's name, class, categories and
+        queries, plus the size and modification time of the modules that
+        define them, so it changes whenever a pattern is added or edited.
+        It is used to key persisted results. Patterns declared from the
+        manifest are covered by their manifest entry and module, so the
+        fingerprint does not load them.
+        
+        Returns:
+            A hex digest identifying the registry contents
+        """
+        if self._fingerprint is not None:
+            return self._fingerprint
+        
+        from .result_cache import module_fingerprint
+        
+        digest = hashlib.sha256()
+        modules = set()
+        
+        for name in sorted(self.patterns):
+            spec = self.patterns.spec(name)
+            if spec is not None:
+                modules.add(spec.module)
+                categories = sorted(c for c, names in self.categories.items() if name in names)
+                digest.update(f"{name}\0{spec.module}.{spec.class_name}\0".encode('utf-8'))
+                digest.update(",".join(categories).encode('utf-8'))
+                continue
+            
+            pattern = self.patterns[name]
+            cls = type(pattern)
+            modules.add(cls.__module__)
+            categories = sorted(c for c, names in self.categories.items() if name in names)
+            queries = getattr(pattern, 'queries', None) or {}
+            
+            digest.update(f"{name}\0{cls.__module__}.{cls.__qualname__}\0".encode('utf-8'))
+            digest.update(",".join(categories).encode('utf-8'))
+            for language in sorted(queries):
+                digest.update(f"\0{language}\0{queries[language]}".encode('utf-8'))
+        
+        digest.update(module_fingerprint(modules).encode('utf-8'))
+        
+        self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
 
 # Create a global registry instance
 registry = PatternRegistry()
 
-# Import all patterns
-from .patterns.function_patterns import (
-    FunctionDefinitionPattern, MethodDefinitionPattern, 
-    ConstructorPattern, AllFunctionsPattern
-)
-from .patterns.class_patterns import (
-    ClassDefinitionPattern, InterfaceDefinitionPattern,
-    ClassWithInheritancePattern, AllClassPatternsPattern
-)
-from .patterns.design_patterns import (
-    SingletonPattern, FactoryMethodPattern, DesignPatternsPattern
-)
-from .patterns.code_smells import (
-    LongMethodPattern, DeepNestingPattern, 
-    ComplexConditionPattern, CodeSmellsPattern
-)
-
-# Register basic patterns
-registry.register(FunctionDefinitionPattern(), ["functions", "basic"])
-registry.register(MethodDefinitionPattern(), ["functions", "basic"])
-registry.register(ConstructorPattern(), ["functions", "basic"])
-registry.register(AllFunctionsPattern(), ["functions", "composite"])
-
-registry.register(ClassDefinitionPattern(), ["classes", "basic"])
-registry.register(InterfaceDefinitionPattern(), ["classes", "basic"])
-registry.register(ClassWithInheritancePattern(), ["classes", "basic"])
-registry.register(AllClassPatternsPattern(), ["classes", "composite"])
-
-# Register design patterns
-registry.register(SingletonPattern(), ["design_patterns"])
-registry.register(FactoryMethodPattern(), ["design_patterns"])
-registry.register(DesignPatternsPattern(), ["design_patterns", "composite"])
-
-# Register code smells
-registry.register(LongMethodPattern(), ["code_smells"])
-registry.register(DeepNestingPattern(), ["code_smells"])
-registry.register(ComplexConditionPattern(), ["code_smells"])
-registry.register(CodeSmellsPattern(), ["code_smells", "composite"])
\ No newline at end of file
+# Declare the built-in patterns; each is imported on first use
+for pattern_spec in PATTERN_MANIFEST:
+    registry.declare(pattern_spec)
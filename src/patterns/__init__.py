@@ -3,52 +3,41 @@ Pattern implementations for code pattern analyzer.
 
 This module contains implementations of various code patterns
 that can be detected by the pattern analyzer.
-"""
-
-from ..pattern_registry import registry
-from .function_patterns import AllFunctionsPattern
-from .class_patterns import AllClassPatternsPattern 
-from .design_patterns import DesignPatternsPattern
-from .code_smells import CodeSmellsPattern
-from .architectural_intents import ArchitecturalIntentDetector
-from .architectural_styles import ArchitecturalStyleDetector
-from .architectural_anti_patterns import ArchitecturalAntiPatternDetector
-
-# Register all patterns with the pattern registry
-registry.register(AllFunctionsPattern(), ["function_patterns"])
-registry.register(AllClassPatternsPattern(), ["class_patterns"])
-registry.register(DesignPatternsPattern(), ["design_patterns"])
-registry.register(CodeSmellsPattern(), ["code_smells"])
-
-# Register architectural intent patterns
-from .architectural_intents import SeparationOfConcernsIntent, InformationHidingIntent, DependencyInversionIntent
-registry.register(SeparationOfConcernsIntent(), ["architectural_intents"])
-registry.register(InformationHidingIntent(), ["architectural_intents"])
-registry.register(DependencyInversionIntent(), ["architectural_intents"])
-registry.register(ArchitecturalIntentDetector(), ["architectural_intents"])
 
-# Register architectural style patterns
-from .architectural_styles import HexagonalArchitecturePattern, CleanArchitecturePattern, MicroservicesPattern, EventDrivenPattern, LayeredArchitecturePattern
-registry.register(HexagonalArchitecturePattern(), ["architectural_styles"])
-registry.register(CleanArchitecturePattern(), ["architectural_styles"])
-registry.register(MicroservicesPattern(), ["architectural_styles"])
-registry.register(EventDrivenPattern(), ["architectural_styles"])
-registry.register(LayeredArchitecturePattern(), ["architectural_styles"])
-registry.register(ArchitecturalStyleDetector(), ["architectural_styles"])
-
-# Register architectural anti-pattern detectors
-from .architectural_anti_patterns import TightCouplingAntiPattern, DependencyCycleAntiPattern, ArchitecturalErosionAntiPattern, GodComponentAntiPattern
-registry.register(TightCouplingAntiPattern(), ["architectural_anti_patterns"])
-registry.register(DependencyCycleAntiPattern(), ["architectural_anti_patterns"])
-registry.register(ArchitecturalErosionAntiPattern(), ["architectural_anti_patterns"])
-registry.register(GodComponentAntiPattern(), ["architectural_anti_patterns"])
-registry.register(ArchitecturalAntiPatternDetector(), ["architectural_anti_patterns"])
-
-# Import additional pattern modules to ensure they're registered
-from .python_patterns import *
+The built-in patterns are registered from the manifest in
+src/pattern_manifest.py, and each pattern module is imported only when
+one of its patterns is first used. The classes below can still be
+imported from this package; they are loaded on first access.
+"""
 
-# If enhanced patterns exist, import them too
-try:
-    from .enhanced import *
-except ImportError:
-    pass
\ No newline at end of file
+import importlib
+
+# Classes re-exported by this package, and the submodules defining them
+_EXPORTS = {
+    'AllFunctionsPattern': '.function_patterns',
+    'AllClassPatternsPattern': '.class_patterns',
+    'DesignPatternsPattern': '.design_patterns',
+    'CodeSmellsPattern': '.code_smells',
+    'ArchitecturalIntentDetector': '.architectural_intents',
+    'SeparationOfConcernsIntent': '.architectural_intents',
+    'InformationHidingIntent': '.architectural_intents',
+    'DependencyInversionIntent': '.architectural_intents',
+    'ArchitecturalStyleDetector': '.architectural_styles',
+    'HexagonalArchitecturePattern': '.architectural_styles',
+    'CleanArchitecturePattern': '.architectural_styles',
+    'MicroservicesPattern': '.architectural_styles',
+    'EventDrivenPattern': '.architectural_styles',
+    'LayeredArchitecturePattern': '.architectural_styles',
+    'ArchitecturalAntiPatternDetector': '.architectural_anti_patterns',
+    'TightCouplingAntiPattern': '.architectural_anti_patterns',
+    'DependencyCycleAntiPattern': '.architectural_anti_patterns',
+    'ArchitecturalErosionAntiPattern': '.architectural_anti_patterns',
+    'GodComponentAntiPattern': '.architectural_anti_patterns',
+    'match_function_definitions': '.python_patterns',
+}
+
+def __getattr__(name):
+    """Import re-exported classes from their submodule on first access."""
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
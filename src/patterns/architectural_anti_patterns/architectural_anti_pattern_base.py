@@ -41,7 +41,8 @@ class ArchitecturalAntiPattern(Pattern):
               tree, 
               code: str, 
               language: str,
-              file_path: Optional[str] = None) -> List[Dict]:
+              file_path: Optional[str] = None,
+              context=None) -> List[Dict]:
         """Match this pattern against an AST.
         
         For architectural anti-patterns, individual file analysis is minimal,
@@ -52,6 +53,7 @@ class ArchitecturalAntiPattern(Pattern):
             code: The source code that was parsed
             language: The language of the source code
             file_path: Optional path to the file that was parsed
+            context: Optional per-file analysis context (unused)
             
         Returns:
             A list of component information dictionaries
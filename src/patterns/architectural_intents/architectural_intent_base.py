@@ -23,6 +23,10 @@ class ArchitecturalIntentPattern(Pattern):
     files and components.
     """
     
+    # Components are named after the file and placed in layers and domains
+    # by its path
+    path_dependent = True
+    
     def __init__(self, 
                  name: str, 
                  description: str,
@@ -41,7 +45,8 @@ class ArchitecturalIntentPattern(Pattern):
               tree, 
               code: str, 
               language: str,
-              file_path: Optional[str] = None) -> List[Dict]:
+              file_path: Optional[str] = None,
+              context=None) -> List[Dict]:
         """Match this pattern against an AST.
         
         For architectural intent patterns, this is just the first step.
@@ -53,6 +58,7 @@ class ArchitecturalIntentPattern(Pattern):
             code: The source code that was parsed
             language: The language of the source code
             file_path: Optional path to the file that was parsed
+            context: Optional per-file analysis context
             
         Returns:
             A list of component information dictionaries
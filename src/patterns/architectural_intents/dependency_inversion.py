@@ -145,7 +145,8 @@ class DependencyInversionIntent(ArchitecturalIntentPattern):
               tree, 
               code: str, 
               language: str,
-              file_path: Optional[str] = None) -> List[Dict]:
+              file_path: Optional[str] = None,
+              context=None) -> List[Dict]:
         """Match this pattern against an AST.
         
         For Dependency Inversion, we analyze:
@@ -158,6 +159,7 @@ class DependencyInversionIntent(ArchitecturalIntentPattern):
             code: The source code that was parsed
             language: The language of the source code
             file_path: Optional path to the file that was parsed
+            context: Optional per-file analysis context (unused)
             
         Returns:
             A list of component information dictionaries
@@ -117,7 +117,8 @@ class InformationHidingIntent(ArchitecturalIntentPattern):
               tree, 
               code: str, 
               language: str,
-              file_path: Optional[str] = None) -> List[Dict]:
+              file_path: Optional[str] = None,
+              context=None) -> List[Dict]:
         """Match this pattern against an AST.
         
         For Information Hiding, we analyze:
@@ -130,6 +131,7 @@ class InformationHidingIntent(ArchitecturalIntentPattern):
             code: The source code that was parsed
             language: The language of the source code
             file_path: Optional path to the file that was parsed
+            context: Optional per-file analysis context (unused)
             
         Returns:
             A list of component information dictionaries
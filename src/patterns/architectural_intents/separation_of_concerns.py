@@ -66,7 +66,8 @@ class SeparationOfConcernsIntent(ArchitecturalIntentPattern):
               tree, 
               code: str, 
               language: str,
-              file_path: Optional[str] = None) -> List[Dict]:
+              file_path: Optional[str] = None,
+              context=None) -> List[Dict]:
         """Match this pattern against an AST.
         
         For the Separation of Concerns detector, we extract information about:
@@ -79,6 +80,7 @@ class SeparationOfConcernsIntent(ArchitecturalIntentPattern):
             code: The source code that was parsed
             language: The language of the source code
             file_path: Optional path to the file that was parsed
+            context: Optional per-file analysis context (unused)
             
         Returns:
             A list of component information dictionaries
@@ -42,7 +42,8 @@ class ArchitecturalStylePattern(Pattern):
               tree, 
               code: str, 
               language: str,
-              file_path: Optional[str] = None) -> List[Dict]:
+              file_path: Optional[str] = None,
+              context=None) -> List[Dict]:
         """Match this pattern against an AST.
         
         For architectural style patterns, individual file analysis is minimal,
@@ -53,6 +54,7 @@ class ArchitecturalStylePattern(Pattern):
             code: The source code that was parsed
             language: The language of the source code
             file_path: Optional path to the file that was parsed
+            context: Optional per-file analysis context (unused)
             
         Returns:
             A list of component information dictionaries
@@ -729,7 +729,8 @@ class LayeredArchitecturePattern(ArchitecturalStylePattern):
             has_directory_structure = False
             for node, data in self.component_graph.nodes(data=True):
                 file_path = data.get('file', '')
-                if file_path and data.get('layer') in self._categorize_component_by_path(file_path):
+                layer = data.get('layer')
+                if file_path and layer and layer == self._categorize_component_by_path(file_path):
                     has_directory_structure = True
                     break
             
@@ -9,6 +9,9 @@ import logging
 import tree_sitter
 
 from ..pattern_base import QueryBasedPattern, CompositePattern, Pattern
+from ..analysis_context import AnalysisContext, get_default_parser
+from ..budget import CHECK_INTERVAL
+from .function_patterns import FunctionDefinitionPattern, MethodDefinitionPattern
 
 
 class LongMethodPattern(Pattern):
@@ -26,11 +29,16 @@ class LongMethodPattern(Pattern):
         )
         self.max_lines = max_lines
     
+        # Patterns finding the functions and methods to measure
+        self.function_pattern = FunctionDefinitionPattern()
+        self.method_pattern = MethodDefinitionPattern()
+    
     def match(self, 
               tree: tree_sitter.Tree, 
               code: str, 
               language: str,
-              file_path: Optional[str] = None) -> List[Dict]:
+              file_path: Optional[str] = None,
+              context: Optional[AnalysisContext] = None) -> List[Dict]:
         """Match long methods in the AST.
         
         Args:
@@ -38,22 +46,14 @@ class LongMethodPattern(Pattern):
             code: The source code that was parsed
             language: The language of the source code
             file_path: Optional path to the file that was parsed
+            context: Optional per-file context shared with the other patterns
             
         Returns:
             A list of matches, where each match is a dictionary with details
         """
-        # First, find all methods in the code
-        from ..pattern_recognizer import PatternRecognizer
-        recognizer = PatternRecognizer()
-        
-        # Get all method patterns
-        from .function_patterns import FunctionDefinitionPattern, MethodDefinitionPattern
-        function_pattern = FunctionDefinitionPattern()
-        method_pattern = MethodDefinitionPattern()
-        
         # Match all functions and methods
-        functions = function_pattern.match(tree, code, language, file_path)
-        methods = method_pattern.match(tree, code, language, file_path)
+        functions = self.function_pattern.match(tree, code, language, file_path, context=context)
+        methods = self.method_pattern.match(tree, code, language, file_path, context=context)
         
         # Combine the results
         all_methods = functions + methods
@@ -209,32 +209,45 @@ class DeepNestingPattern(QueryBasedPattern):
             """,
         }
     
-    def _calculate_nesting_depth(self, node) -> int:
+    def _calculate_nesting_depth(self, node, budget=None) -> int:
         """Calculate the maximum nesting depth of a node.
         
+        The tree is walked with an explicit stack, so deeply nested code
+        cannot exceed the recursion limit.
+        
         Args:
             node: A tree-sitter node
+            budget: Optional FileBudget to check during long walks
             
         Returns:
-            The maximum nesting depth
+            The maximum nesting depth, counting a node without children as 1
+        
+        Raises:
+            BudgetExceeded: If the analysis of the file exceeds its budget
         """
-        # Base case: if the node has no children, return 1
-        if not hasattr(node, 'children') or not node.children:
-            return 1
+        max_depth = 0
+        visited = 0
+        stack = [(node, 1)]
+        while stack:
+            current, depth = stack.pop()
+            children = getattr(current, 'children', None)
+            if children:
+                stack.extend((child, depth + 1) for child in children)
+            elif depth > max_depth:
+                max_depth = depth
             
-        # Recursive case: return 1 + the maximum depth of any child
-        max_child_depth = 0
-        for child in node.children:
-            child_depth = self._calculate_nesting_depth(child)
-            max_child_depth = max(max_child_depth, child_depth)
+            visited += 1
+            if budget is not None and visited % CHECK_INTERVAL == 0:
+                budget.check("measuring nesting depth")
             
-        return 1 + max_child_depth
+        return max_depth
     
     def match(self, 
               tree: tree_sitter.Tree, 
               code: str, 
               language: str,
-              file_path: Optional[str] = None) -> List[Dict]:
+              file_path: Optional[str] = None,
+              context: Optional[AnalysisContext] = None) -> List[Dict]:
         """Match deeply nested code in the AST.
         
         Args:
@@ -242,6 +255,7 @@ class DeepNestingPattern(QueryBasedPattern):
             code: The source code that was parsed
             language: The language of the source code
             file_path: Optional path to the file that was parsed
+            context: Optional per-file context providing the parser
             
         Returns:
             A list of matches, where each match is a dictionary with details
@@ -257,9 +271,8 @@ class DeepNestingPattern(QueryBasedPattern):
         if not query_string:
             return []
             
-        from ..parser import CodeParser
-        parser = CodeParser()
-        query_results = parser.query(tree, query_string, language)
+        parser = context.parser if context is not None else get_default_parser()
+        query_results = self._run_query(tree, query_string, language, code, parser, context)
         
         # Process the query results to find deep nesting
         for result in query_results:
@@ -267,7 +280,7 @@ class DeepNestingPattern(QueryBasedPattern):
             node = result['node']
             
             # Calculate the nesting depth
-            depth = self._calculate_nesting_depth(node)
+            depth = self._calculate_nesting_depth(node, context.budget if context is not None else None)
             
             if depth > self.max_depth:
                 match = {
@@ -0,0 +1,251 @@
+"""
+Keyword prefilter for pattern queries.
+
+Many pattern queries only match nodes whose text passes an #eq? or #match?
+predicate, such as class names ending in "Adapter" or methods named
+"__init__". A query cannot match in a file that contains none of the
+literals such a predicate requires, so running it there is wasted work.
+The required literals of each query are derived from its predicates once,
+and before a query runs on a file they are looked up in the file's bytes;
+a query none of whose keywords occurs is skipped and matches nothing.
+
+Only predicates that every match of a query has to satisfy are used. A
+predicate on a capture that is inside an optional node, a repetition or
+an alternation is true when the capture is absent from a match, so it
+requires nothing, and neither do predicates placed outside of a pattern.
+A query with several top-level patterns requires a keyword only if each
+of its patterns does.
+"""
+
+from typing import FrozenSet, Iterable, List, Optional, Tuple
+import re
+import logging
+import functools
+
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_constants
+    import sre_parse
+
+logger = logging.getLogger(__name__)
+
+# Text predicates whose string argument the captured text has to contain
+_EQ_PREDICATE = "#eq?"
+_MATCH_PREDICATE = "#match?"
+
+# Tokens of the tree-sitter query language, in order of precedence
+_QUERY_TOKEN = re.compile(r'''
+    (?P<string>"(?:[^"\\]|\\.)*")
+  | (?P<comment>;[^\n]*)
+  | (?P<predicate>\#[\w\-]+[?!]?)
+  | (?P<capture>@[\w.\-]+)
+  | (?P<field>[\w\-]+\s*:)
+  | (?P<open>[(\[])
+  | (?P<close>[)\]])
+  | (?P<quantifier>[?*+])
+  | (?P<name>[^\s()\[\]"@;?*+]+)
+''', re.VERBOSE | re.DOTALL)
+
+# Escape sequences of tree-sitter query strings; any other escaped
+# character stands for itself
+_STRING_ESCAPES = {"n": "\n", "r": "\r", "t": "\t", "0": "\0"}
+
+_REPEATS = tuple(
+    getattr(sre_constants, name)
+    for name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT")
+    if hasattr(sre_constants, name)
+)
+
+class _Element:
+    """A node, group, alternation or predicate of a parsed query."""
+    
+    __slots__ = ('kind', 'children', 'quantifier', 'captures')
+    
+    def __init__(self, kind: str, children: Optional[List] = None):
+        self.kind = kind
+        self.children = children if children is not None else []
+        self.quantifier = None
+        self.captures: List[str] = []
+
+def _unescape(token: str) -> str:
+    """Get the value of a quoted query string."""
+    return re.sub(r'\\(.)', lambda m: _STRING_ESCAPES.get(m.group(1), m.group(1)), token[1:-1], flags=re.DOTALL)
+
+def _tokenize(query_string: str) -> List[Tuple[str, str]]:
+    return [
+        (match.lastgroup, match.group())
+        for match in _QUERY_TOKEN.finditer(query_string)
+        if match.lastgroup not in ("comment", "field")
+    ]
+
+def _parse(tokens: List[Tuple[str, str]], position: int = 0, closing: Optional[str] = None) -> Tuple[List[_Element], int]:
+    """Parse a sequence of query elements up to a closing bracket.
+    
+    Args:
+        tokens: The tokens of the query
+        position: Index of the first token of the sequence
+        closing: The bracket ending the sequence, or None for the whole query
+    
+    Returns:
+        The elements of the sequence and the index of the token after it
+    
+    Raises:
+        ValueError: If the brackets of the query do not balance
+    """
+    elements: List[_Element] = []
+    while position < len(tokens):
+        kind, value = tokens[position]
+        position += 1
+        
+        if kind == "close":
+            if value != closing:
+                raise ValueError(f"Unexpected {value}")
+            return elements, position
+        
+        if kind == "open" and position < len(tokens) and tokens[position][0] == "predicate":
+            element = _Element("predicate", [tokens[position]])
+            position += 1
+            while position < len(tokens) and tokens[position][0] != "close":
+                element.children.append(tokens[position])
+                position += 1
+            position += 1
+        elif kind == "open":
+            children, position = _parse(tokens, position, ")" if value == "(" else "]")
+            element = _Element("group" if value == "(" else "alternation", children)
+        elif kind in ("quantifier", "capture") and elements:
+            # Postfix of the previous element
+            if kind == "quantifier":
+                elements[-1].quantifier = value
+            else:
+                elements[-1].captures.append(value)
+            continue
+        else:
+            element = _Element("leaf")
+        elements.append(element)
+    
+    if closing is not None:
+        raise ValueError(f"Missing {closing}")
+    return elements, position
+
+def regex_keywords(regex: str) -> Optional[FrozenSet[str]]:
+    """Derive literals of which any text a regular expression finds contains one.
+    
+    Args:
+        regex: A Python regular expression, as used by #match? predicates
+    
+    Returns:
+        The literals, or None if no literal is required
+    """
+    try:
+        parsed = sre_parse.parse(regex)
+    except (re.error, RecursionError):
+        return None
+    state = getattr(parsed, "state", None) or parsed.pattern
+    if state.flags & re.IGNORECASE:
+        return None
+    return _sequence_keywords(parsed)
+
+def _sequence_keywords(items: Iterable) -> Optional[FrozenSet[str]]:
+    """Derive the required literals of a sequence of parsed regex items."""
+    candidates = []
+    run: List[str] = []
+    for op, argument in items:
+        if op is sre_constants.LITERAL:
+            run.append(chr(argument))
+            continue
+        
+        if run:
+            candidates.append(frozenset(["".join(run)]))
+            run = []
+        
+        required = None
+        if op is sre_constants.SUBPATTERN:
+            _, add_flags, _, sub_items = argument
+            if not add_flags & re.IGNORECASE:
+                required = _sequence_keywords(sub_items)
+        elif op is sre_constants.BRANCH:
+            branches = [_sequence_keywords(branch) for branch in argument[1]]
+            if all(branches):
+                required = frozenset().union(*branches)
+        elif op in _REPEATS:
+            minimum, _, sub_items = argument
+            if minimum >= 1:
+                required = _sequence_keywords(sub_items)
+        elif op is getattr(sre_constants, "ATOMIC_GROUP", None):
+            required = _sequence_keywords(argument)
+        if required:
+            candidates.append(required)
+    
+    if run:
+        candidates.append(frozenset(["".join(run)]))
+    return _most_selective(candidates)
+
+def _most_selective(candidates: List[FrozenSet[str]]) -> Optional[FrozenSet[str]]:
+    """Pick the requirement least likely to be met by chance: the one with the longest shortest literal."""
+    candidates = [keywords for keywords in candidates if keywords and all(keywords)]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda keywords: min(len(keyword) for keyword in keywords))
+
+def _pattern_keywords(pattern: _Element) -> Optional[FrozenSet[str]]:
+    """Derive the literals of which every match of a top-level pattern contains one."""
+    mandatory = set()
+    predicates = []
+    
+    def visit(element: _Element, optional: bool) -> None:
+        optional = optional or element.quantifier in ("?", "*")
+        if not optional:
+            mandatory.update(element.captures)
+        if element.kind == "predicate":
+            if not optional:
+                predicates.append(element.children)
+            return
+        branches = [child for child in element.children if child.kind != "predicate"]
+        for child in element.children:
+            visit(child, optional or (element.kind == "alternation" and len(branches) > 1))
+    
+    visit(pattern, False)
+    
+    candidates = []
+    for predicate in predicates:
+        name = predicate[0][1]
+        arguments = predicate[1:]
+        if name not in (_EQ_PREDICATE, _MATCH_PREDICATE) or len(arguments) != 2:
+            continue
+        (capture_kind, capture), (value_kind, value) = arguments
+        if capture_kind != "capture" or capture not in mandatory or value_kind != "string":
+            continue
+        value = _unescape(value)
+        required = frozenset([value]) if name == _EQ_PREDICATE else regex_keywords(value)
+        if required:
+            candidates.append(required)
+    return _most_selective(candidates)
+
+@functools.lru_cache(maxsize=1024)
+def query_keywords(query_string: str) -> Optional[FrozenSet[bytes]]:
+    """Derive the keywords of a query: literals of which a file contains one wherever the query matches.
+    
+    Args:
+        query_string: The query string in tree-sitter query language
+    
+    Returns:
+        The keywords as UTF-8 bytes, or None if the query may match in any file
+    """
+    try:
+        patterns, _ = _parse(_tokenize(query_string))
+    except ValueError as e:
+        logger.debug(f"Not prefiltering a query that does not parse: {e}")
+        return None
+    
+    patterns = [pattern for pattern in patterns if pattern.kind != "predicate"]
+    if not patterns:
+        return None
+    
+    keywords = set()
+    for pattern in patterns:
+        required = _pattern_keywords(pattern)
+        if required is None:
+            return None
+        keywords.update(required)
+    return frozenset(keyword.encode("utf-8") for keyword in keywords)
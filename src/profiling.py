@@ -0,0 +1,393 @@
+"""
+Timing instrumentation for the analysis pipeline.
+
+A Profiler records the wall and CPU time spent in each stage of the
+analysis of a file (reading, cache lookups, parsing, pattern matching and
+summarizing) and in each pattern, per language, together with the number
+of matches each pattern found and how often the keyword prefilter let a
+pattern skip its query. It also keeps the slowest files with a
+per-pattern breakdown of their time.
+
+Profiling is off unless a Profiler is given to the CodeAnalyzer; the
+instrumented code then only checks that no profile is attached. Each file
+is timed into its own FileProfile, which is merged into the Profiler when
+the file is done, so files analyzed in parallel threads do not contend.
+Worker processes profile into a Profiler of their own and send it back as
+a dictionary to merge.
+"""
+
+from typing import Dict, List, Optional, Tuple
+import heapq
+import threading
+import time
+
+# Name under which the shared traversal of a fused query is recorded.
+# The time each fused pattern takes to process its captures is recorded
+# under the pattern itself.
+FUSED_QUERY = "(fused query)"
+
+# Stages of the analysis of a file, in the order they first run; "cache"
+# covers both the lookup and the storing of results
+STAGES = ("read", "cache", "parse", "match", "summarize", "total")
+
+# Number of slowest files kept with their per-pattern breakdown
+DEFAULT_TOP_FILES = 20
+
+# Bump when the layout of profile dictionaries changes
+PROFILE_VERSION = 2
+
+def clock() -> Tuple[float, float]:
+    """Read the wall and CPU clocks.
+    
+    CPU time is measured for the calling thread, so the time of files
+    analyzed in parallel threads is not mixed up.
+    
+    Returns:
+        The wall time and the CPU time of the current thread, in seconds
+    """
+    return time.perf_counter(), time.thread_time()
+
+class FileProfile:
+    """Timings of the analysis of one file."""
+    
+    __slots__ = ('file', 'language', 'started', 'stages', 'patterns', 'prefilter')
+    
+    def __init__(self, file_path: str):
+        """Start timing a file.
+        
+        Args:
+            file_path: Path of the file
+        """
+        self.file = file_path
+        self.language = ""
+        self.started = clock()
+        # name -> [wall, cpu]
+        self.stages: Dict[str, List[float]] = {}
+        # name -> [wall, cpu, matches]
+        self.patterns: Dict[str, List[float]] = {}
+        # name -> [checked, skipped]
+        self.prefilter: Dict[str, List[int]] = {}
+    
+    def add_stage(self, stage: str, started: Tuple[float, float]) -> None:
+        """Record the time spent in a stage since a clock reading.
+        
+        Args:
+            stage: Name of the stage
+            started: The clock() reading taken when the stage started
+        """
+        wall, cpu = clock()
+        timing = self.stages.get(stage)
+        if timing is None:
+            self.stages[stage] = [wall - started[0], cpu - started[1]]
+        else:
+            timing[0] += wall - started[0]
+            timing[1] += cpu - started[1]
+    
+    def add_pattern(self, name: str, started: Tuple[float, float], matches: int = 0) -> None:
+        """Record the time spent matching a pattern since a clock reading.
+        
+        Args:
+            name: Name of the pattern
+            started: The clock() reading taken when matching started
+            matches: Number of matches found
+        """
+        wall, cpu = clock()
+        timing = self.patterns.get(name)
+        if timing is None:
+            self.patterns[name] = [wall - started[0], cpu - started[1], matches]
+        else:
+            timing[0] += wall - started[0]
+            timing[1] += cpu - started[1]
+            timing[2] += matches
+    
+    def add_prefilter(self, name: str, skipped: bool) -> None:
+        """Record a check of the keywords of a pattern.
+        
+        Args:
+            name: Name of the pattern
+            skipped: Whether the file contained none of the keywords
+        """
+        counts = self.prefilter.get(name)
+        if counts is None:
+            self.prefilter[name] = [1, int(skipped)]
+        else:
+            counts[0] += 1
+            counts[1] += skipped
+    
+    @property
+    def wall(self) -> float:
+        """Total wall time of the file, once it is finished."""
+        return self.stages.get("total", (0.0, 0.0))[0]
+    
+    def finish(self) -> None:
+        """Record the total time of the file."""
+        self.add_stage("total", self.started)
+    
+    def to_dict(self) -> Dict:
+        """Convert the timings of the file to a dictionary.
+        
+        Returns:
+            The file, language, wall and CPU time, and the time and
+            matches of each pattern, slowest first
+        """
+        total = self.stages.get("total", (0.0, 0.0))
+        patterns = sorted(self.patterns.items(), key=lambda item: -item[1][0])
+        return {
+            "file": self.file,
+            "language": self.language,
+            "wall": total[0],
+            "cpu": total[1],
+            "stages": {stage: {"wall": wall, "cpu": cpu} for stage, (wall, cpu) in self.stages.items()},
+            "patterns": {
+                name: {"wall": wall, "cpu": cpu, "matches": int(matches)}
+                for name, (wall, cpu, matches) in patterns
+            },
+        }
+
+class Profiler:
+    """Aggregates the timings of the files of an analysis."""
+    
+    def __init__(self, top_files: int = DEFAULT_TOP_FILES):
+        """Initialize an empty profile.
+        
+        Args:
+            top_files: Number of slowest files to keep
+        """
+        self.top_files = top_files
+        self.files = 0
+        # (stage, language) -> [calls, wall, cpu]
+        self.stages: Dict[Tuple[str, str], List[float]] = {}
+        # (pattern, language) -> [calls, wall, cpu, matches]
+        self.patterns: Dict[Tuple[str, str], List[float]] = {}
+        # (pattern, language) -> [checked, skipped]
+        self.prefilter: Dict[Tuple[str, str], List[int]] = {}
+        # Min-heap of (wall, sequence, file dictionary) of the slowest files
+        self._slowest: List[Tuple[float, int, Dict]] = []
+        self._sequence = 0
+        self._lock = threading.Lock()
+    
+    def start_file(self, file_path: str) -> FileProfile:
+        """Start timing a file.
+        
+        Args:
+            file_path: Path of the file
+        
+        Returns:
+            The profile to record the file's timings in
+        """
+        return FileProfile(file_path)
+    
+    def finish_file(self, profile: FileProfile) -> None:
+        """Add the timings of a finished file to the profile.
+        
+        Args:
+            profile: The timings of the file
+        """
+        profile.finish()
+        language = profile.language
+        with self._lock:
+            self.files += 1
+            for stage, (wall, cpu) in profile.stages.items():
+                self._add(self.stages, (stage, language), (1, wall, cpu))
+            for name, (wall, cpu, matches) in profile.patterns.items():
+                self._add(self.patterns, (name, language), (1, wall, cpu, matches))
+            for name, counts in profile.prefilter.items():
+                self._add(self.prefilter, (name, language), counts)
+            self._keep_slowest(profile.wall, profile)
+    
+    def _add(self, table: Dict[Tuple[str, str], List[float]], key: Tuple[str, str], values) -> None:
+        totals = table.get(key)
+        if totals is None:
+            table[key] = list(values)
+        else:
+            for index, value in enumerate(values):
+                totals[index] += value
+    
+    def _keep_slowest(self, wall: float, profile) -> None:
+        """Keep a file if it is among the slowest; call with the lock held.
+        
+        Args:
+            wall: Total wall time of the file
+            profile: A FileProfile, or its dictionary form
+        """
+        if self.top_files <= 0:
+            return
+        if len(self._slowest) >= self.top_files and wall <= self._slowest[0][0]:
+            return
+        
+        entry = profile.to_dict() if isinstance(profile, FileProfile) else profile
+        self._sequence += 1
+        if len(self._slowest) < self.top_files:
+            heapq.heappush(self._slowest, (wall, self._sequence, entry))
+        else:
+            heapq.heapreplace(self._slowest, (wall, self._sequence, entry))
+    
+    def slowest_files(self) -> List[Dict]:
+        """Get the slowest files, slowest first.
+        
+        Returns:
+            The dictionary form of each file's profile
+        """
+        with self._lock:
+            return [entry for _, _, entry in sorted(self._slowest, key=lambda item: (-item[0], item[1]))]
+    
+    def pattern_totals(self) -> Dict[str, Dict]:
+        """Get the timings of each pattern over all languages, slowest first.
+        
+        Returns:
+            A dictionary mapping pattern names to their calls, wall and CPU
+            time and matches
+        """
+        totals: Dict[str, List[float]] = {}
+        with self._lock:
+            for (name, _), values in self.patterns.items():
+                self._add(totals, name, values)
+        return {
+            name: {"calls": int(calls), "wall": wall, "cpu": cpu, "matches": int(matches)}
+            for name, (calls, wall, cpu, matches) in sorted(totals.items(), key=lambda item: -item[1][1])
+        }
+    
+    def prefilter_totals(self) -> Dict[str, Dict]:
+        """Get the keyword prefilter counts of each pattern over all languages.
+        
+        Returns:
+            A dictionary mapping pattern names to the number of files their
+            keywords were checked in and skipped in, and the hit rate
+        """
+        totals: Dict[str, List[int]] = {}
+        with self._lock:
+            for (name, _), counts in self.prefilter.items():
+                self._add(totals, name, counts)
+        return {
+            name: {"checked": checked, "skipped": skipped, "hit_rate": skipped / checked}
+            for name, (checked, skipped) in sorted(totals.items(), key=lambda item: -item[1][1])
+        }
+    
+    def to_dict(self) -> Dict:
+        """Convert the profile to a dictionary that can be saved as JSON.
+        
+        Returns:
+            The stage and pattern timings and prefilter counts per language,
+            and the slowest files
+        """
+        with self._lock:
+            stages = [
+                {"stage": stage, "language": language, "calls": int(calls), "wall": wall, "cpu": cpu}
+                for (stage, language), (calls, wall, cpu) in self.stages.items()
+            ]
+            patterns = [
+                {"pattern": name, "language": language, "calls": int(calls),
+                 "wall": wall, "cpu": cpu, "matches": int(matches)}
+                for (name, language), (calls, wall, cpu, matches) in self.patterns.items()
+            ]
+            prefilter = [
+                {"pattern": name, "language": language, "checked": checked, "skipped": skipped}
+                for (name, language), (checked, skipped) in self.prefilter.items()
+            ]
+            files = self.files
+        
+        stages.sort(key=lambda row: (STAGES.index(row["stage"]) if row["stage"] in STAGES else len(STAGES),
+                                     row["language"]))
+        patterns.sort(key=lambda row: -row["wall"])
+        prefilter.sort(key=lambda row: (-row["skipped"], row["pattern"], row["language"]))
+        return {
+            "version": PROFILE_VERSION,
+            "files": files,
+            "stages": stages,
+            "patterns": patterns,
+            "prefilter": prefilter,
+            "slowest_files": self.slowest_files(),
+        }
+    
+    def merge(self, data: Dict) -> None:
+        """Add a profile in dictionary form, such as one sent back by a worker process.
+        
+        Args:
+            data: A dictionary from to_dict
+        """
+        with self._lock:
+            self.files += data["files"]
+            for row in data["stages"]:
+                self._add(self.stages, (row["stage"], row["language"]), (row["calls"], row["wall"], row["cpu"]))
+            for row in data["patterns"]:
+                self._add(self.patterns, (row["pattern"], row["language"]),
+                          (row["calls"], row["wall"], row["cpu"], row["matches"]))
+            for row in data["prefilter"]:
+                self._add(self.prefilter, (row["pattern"], row["language"]), (row["checked"], row["skipped"]))
+            for entry in data["slowest_files"]:
+                self._keep_slowest(entry["wall"], entry)
+    
+    @classmethod
+    def from_dict(cls, data: Dict, top_files: int = DEFAULT_TOP_FILES) -> 'Profiler':
+        """Rebuild a profile from its dictionary form.
+        
+        Args:
+            data: A dictionary from to_dict
+            top_files: Number of slowest files to keep
+        
+        Returns:
+            The profile
+        
+        Raises:
+            ValueError: If the dictionary has another format
+        """
+        if data.get("version") != PROFILE_VERSION:
+            raise ValueError(f"Unsupported profile version {data.get('version')}")
+        profiler = cls(top_files)
+        profiler.merge(data)
+        return profiler
+    
+    def format_report(self, top_patterns: int = 20, top_files: Optional[int] = None, breakdown: int = 5) -> str:
+        """Format the profile as tables of the stages, slowest patterns, prefilter hit rates and slowest files.
+        
+        Args:
+            top_patterns: Number of slowest patterns to list
+            top_files: Number of slowest files to list. If None, lists all kept files.
+            breakdown: Number of slowest patterns listed under each file
+        
+        Returns:
+            The report
+        """
+        data = self.to_dict()
+        lines = [f"Profile of {data['files']} files", ""]
+        
+        stage_totals: Dict[str, List[float]] = {}
+        for row in data["stages"]:
+            self._add(stage_totals, row["stage"], (row["calls"], row["wall"], row["cpu"]))
+        lines.append(f"{'stage':12} {'files':>8} {'wall s':>10} {'cpu s':>10}")
+        for stage, (calls, wall, cpu) in stage_totals.items():
+            lines.append(f"{stage:12} {int(calls):8d} {wall:10.3f} {cpu:10.3f}")
+        
+        lines.append("")
+        lines.append("Slowest patterns:")
+        lines.append(f"{'pattern':40} {'language':12} {'files':>7} {'wall ms':>10} {'cpu ms':>10} {'matches':>8}")
+        for row in data["patterns"][:top_patterns]:
+            lines.append(
+                f"{row['pattern']:40} {row['language']:12} {row['calls']:7d} "
+                f"{row['wall'] * 1000:10.1f} {row['cpu'] * 1000:10.1f} {row['matches']:8d}"
+            )
+        
+        if data["prefilter"]:
+            checked = sum(row["checked"] for row in data["prefilter"])
+            skipped = sum(row["skipped"] for row in data["prefilter"])
+            lines.append("")
+            lines.append(f"Keyword prefilter: skipped {skipped} of {checked} queries ({skipped / checked:.1%})")
+            lines.append(f"{'pattern':40} {'language':12} {'checked':>7} {'skipped':>7} {'hit rate':>8}")
+            for row in data["prefilter"][:top_patterns]:
+                lines.append(
+                    f"{row['pattern']:40} {row['language']:12} {row['checked']:7d} "
+                    f"{row['skipped']:7d} {row['skipped'] / row['checked']:8.1%}"
+                )
+        
+        files = data["slowest_files"]
+        if top_files is not None:
+            files = files[:top_files]
+        if files:
+            lines.append("")
+            lines.append(f"Top {len(files)} slowest files:")
+            for entry in files:
+                lines.append(f"{entry['wall'] * 1000:10.1f} ms  {entry['file']} ({entry['language'] or 'unknown'})")
+                for name, timing in list(entry["patterns"].items())[:breakdown]:
+                    lines.append(f"{'':14}{timing['wall'] * 1000:8.1f} ms  {name} ({timing['matches']} matches)")
+        
+        return "\n".join(lines)
@@ -0,0 +1,278 @@
+"""
+Execution plans and fused execution of query-based patterns.
+
+Every QueryBasedPattern runs its own query, so matching N patterns walks
+each tree N times. A FusedQuery combines the queries of all selected
+patterns for a language into one, with every capture name prefixed by the
+name of the pattern it belongs to. A single captures() pass then yields the
+captures of all patterns, which are split by prefix and handed to each
+pattern's own _process_query_results. Patterns whose keywords do not occur
+in a file are left out of the pass over that file.
+
+An ExecutionPlan records which patterns run on the files of one language
+for one pattern selection, so the selection is computed once instead of
+for every file.
+"""
+
+from typing import Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+import re
+import logging
+import functools
+
+import tree_sitter
+
+from .pattern_base import CompositePattern, Pattern, QueryBasedPattern
+from .analysis_context import AnalysisContext
+from .profiling import FUSED_QUERY, clock as profile_clock
+
+logger = logging.getLogger(__name__)
+
+# Separates the pattern name from the original capture name
+NAMESPACE_SEPARATOR = "."
+
+# String literals, comments and capture names in a query, in that order of precedence
+_QUERY_TOKEN = re.compile(r'"(?:[^"\\]|\\.)*"|;[^\n]*|@([A-Za-z_][\w.\-]*)')
+
+def is_query_pattern(pattern: Pattern) -> bool:
+    """Check whether a pattern's matches come from its query alone.
+    
+    Such patterns use QueryBasedPattern.match unchanged and only customize
+    _process_query_results, so their query can run as part of a fused query.
+    
+    Args:
+        pattern: The pattern to check
+    
+    Returns:
+        True if the pattern is a plain query-based pattern
+    """
+    return isinstance(pattern, QueryBasedPattern) and type(pattern).match is QueryBasedPattern.match
+
+@functools.lru_cache(maxsize=1024)
+def namespace_query(query_string: str, namespace: str) -> str:
+    """Prefix every capture name in a query with a namespace.
+    
+    Captures referenced by predicates are renamed too; string literals and
+    comments are left untouched.
+    
+    Args:
+        query_string: The query string in tree-sitter query language
+        namespace: The prefix to add
+    
+    Returns:
+        The rewritten query string
+    """
+    def rename(match):
+        if match.group(1) is None:
+            return match.group(0)
+        return f"@{namespace}{NAMESPACE_SEPARATOR}{match.group(1)}"
+    
+    return _QUERY_TOKEN.sub(rename, query_string)
+
+class FusedQuery:
+    """One combined query running the queries of several patterns at once."""
+    
+    def __init__(self, language: str, patterns: List[Pattern], manager):
+        """Build the combined query for the fusable patterns of a language.
+        
+        Patterns whose query does not compile on its own are left out, so
+        that they keep failing (and reporting the error) individually
+        instead of breaking the whole fused query.
+        
+        Args:
+            language: The language the query is for
+            patterns: Candidate patterns; those that cannot be fused are ignored
+            manager: TreeSitterManager used to compile the queries
+        """
+        self.language = language
+        self.manager = manager
+        self.patterns: List[Pattern] = []
+        self.query_strings: Dict[str, str] = {}
+        self.keywords: Dict[str, Optional[FrozenSet[bytes]]] = {}
+        self.query: Optional[tree_sitter.Query] = None
+        
+        pieces = []
+        for pattern in patterns:
+            if not is_query_pattern(pattern) or not pattern.name.isidentifier():
+                continue
+            
+            query_string = pattern.get_query_string(language)
+            if not query_string:
+                continue
+            
+            try:
+                manager.get_query(language, query_string)
+            except Exception as e:
+                logger.debug(f"Not fusing pattern {pattern.name}: {e}")
+                continue
+            
+            self.patterns.append(pattern)
+            self.query_strings[pattern.name] = query_string
+            self.keywords[pattern.name] = pattern.get_keywords(language)
+            pieces.append(namespace_query(query_string, pattern.name))
+        
+        if len(self.patterns) > 1:
+            try:
+                self.query = manager.get_query(language, "\n".join(pieces))
+            except Exception as e:
+                logger.debug(f"Could not build fused query for {language}: {e}")
+                self.patterns = []
+        else:
+            self.patterns = []
+    
+    def subset_query(self, patterns: List[Pattern]) -> Optional[tree_sitter.Query]:
+        """Get the fused query of some of the patterns.
+        
+        Args:
+            patterns: Fused patterns, in their order in self.patterns
+        
+        Returns:
+            The compiled query, or None if no pattern is given
+        """
+        if len(patterns) == len(self.patterns):
+            return self.query
+        if not patterns:
+            return None
+        
+        pieces = [namespace_query(self.query_strings[pattern.name], pattern.name) for pattern in patterns]
+        try:
+            return self.manager.get_query(self.language, "\n".join(pieces))
+        except Exception as e:
+            logger.debug(f"Could not build a partial fused query for {self.language}: {e}")
+            return self.query
+    
+    def captures(self,
+                 tree: tree_sitter.Tree,
+                 query: Optional[tree_sitter.Query] = None,
+                 budget=None) -> Dict[str, List[Dict]]:
+        """Run the fused query once and split the captures by pattern.
+        
+        Args:
+            tree: The tree-sitter AST
+            query: Optional fused query of some of the patterns, from
+                subset_query; the others get no captures
+            budget: Optional FileBudget to check while the query runs
+        
+        Returns:
+            A dictionary mapping pattern names to query results in the
+            format of CodeParser.query, with the original capture names
+        
+        Raises:
+            BudgetExceeded: If the budget is exceeded
+        """
+        results: Dict[str, List[Dict]] = {pattern.name: [] for pattern in self.patterns}
+        if query is None:
+            query = self.query
+        
+        if budget is not None:
+            captures = budget.captures(query, tree.root_node)
+        else:
+            captures = query.captures(tree.root_node)
+        for node, capture_name in captures:
+            pattern_name, _, capture = capture_name.partition(NAMESPACE_SEPARATOR)
+            results[pattern_name].append({
+                'capture': capture,
+                'node': node,
+                'start_point': (node.start_point[0], node.start_point[1]),
+                'end_point': (node.end_point[0], node.end_point[1]),
+            })
+        
+        return results
+    
+    def match(self, context: AnalysisContext) -> Dict[str, List[Dict]]:
+        """Match all fused patterns with a single traversal of the tree.
+        
+        The query results of each pattern are recorded in the context, so
+        other patterns running the same query on the file reuse them.
+        
+        Args:
+            context: The context of the file being analyzed
+        
+        Returns:
+            A dictionary mapping pattern names to lists of matches
+        """
+        profile = context.profile
+        budget = context.budget
+        
+        # Patterns whose keywords do not occur in the file cannot match, and
+        # are left out of the traversal
+        candidates = [
+            pattern for pattern in self.patterns
+            if context.prefilter(pattern.name, self.keywords[pattern.name])
+        ]
+        query = self.subset_query(candidates)
+        if query is None:
+            captures: Dict[str, List[Dict]] = {pattern.name: [] for pattern in self.patterns}
+        else:
+            if profile is not None:
+                started = profile_clock()
+            captures = self.captures(context.tree, query, budget)
+            if profile is not None:
+                profile.add_pattern(FUSED_QUERY, started)
+        
+        results: Dict[str, List[Dict]] = {}
+        for pattern in self.patterns:
+            if budget is not None:
+                budget.check(f"matching {pattern.name}")
+            if profile is not None:
+                started = profile_clock()
+            query_results = captures[pattern.name]
+            context.set_query_results(self.query_strings[pattern.name], query_results)
+            try:
+                results[pattern.name] = pattern._process_query_results(
+                    query_results, context.data, self.language, context.file_path, context.parser
+                )
+            except Exception as e:
+                logger.error(f"Error running query for pattern {pattern.name}: {e}")
+                results[pattern.name] = []
+            if profile is not None:
+                profile.add_pattern(pattern.name, started)
+        
+        return results
+
+class ExecutionPlan(NamedTuple):
+    """The patterns that run on the files of one language for one selection.
+    
+    Plans are compiled by the PatternRecognizer and cached until the
+    registry is changed.
+    """
+    
+    language: str
+    pattern_name: Optional[str]
+    category: Optional[str]
+    patterns: Tuple[Pattern, ...]
+    
+    @property
+    def path_dependent(self) -> bool:
+        """Whether the results of the plan depend on the path of the file."""
+        return any(getattr(pattern, 'path_dependent', False) for pattern in self.patterns)
+    
+    def describe(self, fused: Optional[FusedQuery] = None) -> List[Dict]:
+        """Describe how each pattern of the plan is matched.
+        
+        Args:
+            fused: The fused query of the plan, if any
+        
+        Returns:
+            A list with one dictionary per pattern, holding its name, how
+            it is matched ("fused", "query", "composite" or "custom") and,
+            for composites, the sub-patterns that support the language
+        """
+        fused_names = {pattern.name for pattern in fused.patterns} if fused else set()
+        
+        steps = []
+        for pattern in self.patterns:
+            step = {'name': pattern.name, 'sub_patterns': []}
+            if pattern.name in fused_names:
+                step['kind'] = "fused"
+            elif isinstance(pattern, CompositePattern):
+                step['kind'] = "composite"
+                step['sub_patterns'] = [
+                    p.name for p in pattern.patterns if p.supports_language(self.language)
+                ]
+            elif isinstance(pattern, QueryBasedPattern):
+                step['kind'] = "query"
+            else:
+                step['kind'] = "custom"
+            steps.append(step)
+        
+        return steps
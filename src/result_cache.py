@@ -0,0 +1,310 @@
+"""
+Persistent, content-addressed cache of per-file analysis results.
+
+Results are stored in a SQLite database under a cache directory. An entry
+is keyed by the hash of the file's bytes, its language, the pattern
+selection and a fingerprint of the registered patterns, so a result is
+reused only when re-running the analysis would produce the same output.
+Entries carry their size and last access time; once the database grows
+past its size limit the least recently used entries are evicted.
+"""
+
+from typing import Any, Dict, MutableMapping, Optional, Union
+from pathlib import Path
+import os
+import json
+import time
+import sys
+import sqlite3
+import hashlib
+import logging
+import threading
+
+from .match import to_json_default
+
+logger = logging.getLogger(__name__)
+
+# Environment variable overriding the default cache directory
+CACHE_DIR_ENV = "CODE_PATTERN_ANALYZER_CACHE_DIR"
+
+# Name of the database file inside the cache directory
+CACHE_DB_NAME = "results.sqlite3"
+
+# Default upper bound on the total size of cached results
+DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+
+# Bump when the layout of cached values changes
+CACHE_FORMAT_VERSION = 1
+
+def default_cache_dir() -> Path:
+    """Get the default cache directory.
+    
+    Returns:
+        The directory named by CODE_PATTERN_ANALYZER_CACHE_DIR, or
+        code-pattern-analyzer under the user cache directory
+    """
+    if os.environ.get(CACHE_DIR_ENV):
+        return Path(os.environ[CACHE_DIR_ENV]).expanduser()
+    
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(Path.home(), ".cache")
+    return Path(base) / "code-pattern-analyzer"
+
+def content_hash(data: bytes) -> str:
+    """Hash the contents of a file.
+    
+    Args:
+        data: The raw file contents
+    
+    Returns:
+        A hex digest identifying the contents
+    """
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+def _module_file(module_name: str) -> Optional[str]:
+    """Find the source file of a module without importing it.
+    
+    Args:
+        module_name: Dotted name of the module
+    
+    Returns:
+        The path of the module's file, or None if it cannot be found
+    """
+    module = sys.modules.get(module_name)
+    if module is not None:
+        return getattr(module, "__file__", None)
+    
+    # Resolve submodules of an imported package from the package's directory,
+    # since importing them (or their parents) may be expensive
+    top_name, _, rest = module_name.partition(".")
+    top_file = getattr(sys.modules.get(top_name), "__file__", None)
+    if not top_file or not rest:
+        return None
+    
+    base = os.path.join(os.path.dirname(top_file), *rest.split("."))
+    for candidate in (base + ".py", os.path.join(base, "__init__.py")):
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+def module_fingerprint(module_names) -> str:
+    """Fingerprint the source files of a set of modules.
+    
+    Uses the size and modification time of each module's file, so that
+    editing the code that produced a result invalidates it. Modules that
+    have not been imported are located without importing them.
+    
+    Args:
+        module_names: Dotted names of the modules
+    
+    Returns:
+        A hex digest identifying the module files
+    """
+    digest = hashlib.sha256()
+    for module_name in sorted(set(module_names)):
+        module_file = _module_file(module_name)
+        if module_file and os.path.exists(module_file):
+            stat = os.stat(module_file)
+            digest.update(f"{module_name}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+def make_key(digest: str, language: str, selection: str, fingerprint: str) -> str:
+    """Build the cache key of an analysis result.
+    
+    Args:
+        digest: Content hash of the analyzed file
+        language: Language the file was analyzed as
+        selection: Description of the patterns that were matched
+        fingerprint: Fingerprint of the pattern registry and implementation
+    
+    Returns:
+        The cache key
+    """
+    raw = "\0".join((str(CACHE_FORMAT_VERSION), digest, language, selection, fingerprint))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def relabel_result(result: Any, file_path: str) -> Any:
+    """Point a cached result at the file it is being served for.
+    
+    Results are keyed by content, so an entry may have been stored for
+    another file with the same contents. The file path recorded in the
+    result and in its matches is replaced in place. Results of patterns
+    that derive other values from the path are keyed by path as well
+    (see Pattern.path_dependent), so they are never relabelled.
+    
+    Args:
+        result: A cached result
+        file_path: Path of the file the result is returned for
+    
+    Returns:
+        The relabelled result
+    """
+    if isinstance(result, MutableMapping):
+        for key, value in result.items():
+            if key in ("file", "file_path") and isinstance(value, str):
+                result[key] = file_path
+            elif isinstance(value, (MutableMapping, list)):
+                relabel_result(value, file_path)
+    elif isinstance(result, list):
+        for item in result:
+            relabel_result(item, file_path)
+    
+    return result
+
+class ResultCache:
+    """SQLite-backed cache of analysis results with size-based eviction.
+    
+    The cache is safe to share between threads, and several processes can
+    use the same directory at once.
+    """
+    
+    def __init__(self,
+                 cache_dir: Optional[Union[str, Path]] = None,
+                 max_size: int = DEFAULT_MAX_SIZE):
+        """Initialize the cache, creating the database if needed.
+        
+        Args:
+            cache_dir: Directory holding the database. If None, uses default_cache_dir().
+            max_size: Maximum total size in bytes of the cached results
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.max_size = max_size
+        self.db_path = self.cache_dir / CACHE_DB_NAME
+        self.hits = 0
+        self.misses = 0
+        
+        self._lock = threading.Lock()
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, "
+                "value BLOB NOT NULL, "
+                "size INTEGER NOT NULL, "
+                "last_access REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)"
+            )
+            self._conn.commit()
+            self._total_size = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM results"
+            ).fetchone()[0]
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up a cached result.
+        
+        Args:
+            key: The cache key
+        
+        Returns:
+            The cached result, or None on a miss
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            
+            if row is None:
+                self.misses += 1
+                return None
+            
+            self.hits += 1
+            self._conn.execute(
+                "UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._conn.commit()
+        
+        return json.loads(row[0])
+    
+    def put(self, key: str, value: Dict[str, Any]) -> bool:
+        """Store a result in the cache.
+        
+        Args:
+            key: The cache key
+            value: The result to store; it must be JSON serializable
+        
+        Returns:
+            True if the result was stored
+        """
+        try:
+            data = json.dumps(value, separators=(",", ":"), default=to_json_default).encode("utf-8")
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Not caching unserializable result: {e}")
+            return False
+        
+        if len(data) > self.max_size:
+            return False
+        
+        with self._lock:
+            previous = self._conn.execute(
+                "SELECT size FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, value, size, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, data, len(data), time.time())
+            )
+            self._total_size += len(data) - (previous[0] if previous else 0)
+            if self._total_size > self.max_size:
+                self._evict()
+            self._conn.commit()
+        
+        return True
+    
+    def _evict(self) -> None:
+        """Evict least recently used entries while over the size limit.
+        
+        Evicts down to 90% of the limit, so that a full cache does not
+        evict on every insert. The running total is recomputed first, since
+        other processes may have written to the same database. Must be
+        called with the lock held.
+        """
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_size:
+            self._total_size = total
+            return
+        
+        target = int(self.max_size * 0.9)
+        evicted = 0
+        rows = self._conn.execute(
+            "SELECT key, size FROM results ORDER BY last_access"
+        ).fetchall()
+        
+        for key, size in rows:
+            if total <= target:
+                break
+            self._conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            total -= size
+            evicted += 1
+        
+        self._total_size = total
+        logger.debug(f"Evicted {evicted} cached results")
+    
+    def clear(self) -> None:
+        """Remove all cached results."""
+        with self._lock:
+            self._conn.execute("DELETE FROM results")
+            self._conn.commit()
+            self._total_size = 0
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Get statistics about the cache.
+        
+        Returns:
+            A dictionary with hits, misses, the number of entries and their total size
+        """
+        with self._lock:
+            entries, size = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results"
+            ).fetchone()
+        
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "size": size}
+    
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,416 @@
+"""
+Columnar storage for analysis results.
+
+Results of a repository-scale analysis hold millions of matches, and
+walking the nested per-file dictionaries to count them is slow. A
+ResultStore keeps the matches of many files as parallel integer columns
+(file, pattern, type, name, line, column, end line and end column), with
+the strings they refer to kept once in string tables. The file column
+of a match is the index of its file in the per-file columns. Summaries
+become counts over whole columns, computed with numpy when it is
+installed and with Counter over the arrays otherwise.
+
+Stores are saved to a compact binary file: a JSON header holding the
+string tables, followed by the raw columns, which load with a single
+read per column.
+
+Only the name, type and position of each match are stored; captures and
+details added by patterns are dropped.
+"""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+from pathlib import Path
+from array import array
+from collections import Counter
+from itertools import accumulate
+import sys
+import json
+import struct
+
+from functools import lru_cache
+
+from .match import Match
+
+# First bytes of a saved store
+MAGIC = b"CPASTORE"
+
+# Bump when the layout of saved stores changes
+FORMAT_VERSION = 1
+
+# Array type code of 32-bit signed integers, which numpy reads as int32 and
+# saved stores hold; C int is 32 bits almost everywhere, long where it is not
+_TYPECODE = next(code for code in ('i', 'l') if array(code).itemsize == 4)
+
+# Value stored for a missing string or position
+MISSING = -1
+
+# Columns with one entry per match, in the order they are saved
+MATCH_COLUMNS = ('file', 'pattern', 'type', 'name', 'line', 'column', 'end_line', 'end_column')
+
+# Columns with one entry per file, in the order they are saved
+FILE_COLUMNS = ('path', 'language', 'error')
+
+# String tables, in the order they are saved
+TABLES = ('files', 'patterns', 'types', 'names', 'languages', 'errors')
+
+# Position keys of a match and the columns they are stored in
+_POSITIONS = ('line', 'column', 'end_line', 'end_column')
+
+@lru_cache(maxsize=None)
+def numpy_module():
+    """Import numpy on first use, since importing it slows down startup.
+    
+    Returns:
+        The numpy module, or None if it is not installed
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+class StringTable:
+    """Strings numbered in the order they were first added."""
+    
+    __slots__ = ('strings', '_ids')
+    
+    def __init__(self, strings: Iterable[str] = ()):
+        """Initialize the table.
+        
+        Args:
+            strings: Initial strings, numbered from 0
+        """
+        self.strings: List[str] = list(strings)
+        self._ids: Dict[str, int] = {string: i for i, string in enumerate(self.strings)}
+    
+    def add(self, string: Optional[str]) -> int:
+        """Get the number of a string, adding it if it is new.
+        
+        Args:
+            string: The string, or None
+        
+        Returns:
+            The number of the string, or MISSING for None
+        """
+        if string is None:
+            return MISSING
+        string_id = self._ids.get(string)
+        if string_id is None:
+            string_id = self._ids[string] = len(self.strings)
+            self.strings.append(string)
+        return string_id
+    
+    def __getitem__(self, string_id: int) -> Optional[str]:
+        return None if string_id == MISSING else self.strings[string_id]
+    
+    def __len__(self) -> int:
+        return len(self.strings)
+
+class ResultStore:
+    """The results of many analyzed files, stored column by column.
+    
+    Matches are stored grouped by file, in the order the files were added.
+    Summaries are computed over the columns and have the same keys and
+    ordering as those of summarize_results.
+    """
+    
+    def __init__(self):
+        """Initialize an empty store."""
+        self.tables: Dict[str, StringTable] = {name: StringTable() for name in TABLES}
+        self.columns: Dict[str, array] = {name: array(_TYPECODE) for name in MATCH_COLUMNS + FILE_COLUMNS}
+        self._offsets: Optional[array] = None
+    
+    @classmethod
+    def from_results(cls, results: Iterable[Dict]) -> 'ResultStore':
+        """Build a store from analysis results.
+        
+        Args:
+            results: Analysis results, for example from iter_analyze_directory
+        
+        Returns:
+            A store holding the results
+        """
+        store = cls()
+        for result in results:
+            store.append(result)
+        return store
+    
+    def append(self, result: Dict) -> None:
+        """Add the analysis result of one file.
+        
+        Args:
+            result: The analysis result of a file
+        """
+        tables = self.tables
+        columns = self.columns
+        self._offsets = None
+        
+        file_id = len(columns['path'])
+        columns['path'].append(tables['files'].add(result.get('file', '')))
+        columns['language'].append(tables['languages'].add(result.get('language')))
+        error = result.get('error')
+        columns['error'].append(tables['errors'].add(None if error is None else str(error)))
+        
+        add_type = tables['types'].add
+        add_name = tables['names'].add
+        file_column = columns['file']
+        pattern_column = columns['pattern']
+        type_column = columns['type']
+        name_column = columns['name']
+        position_columns = [columns[key] for key in _POSITIONS]
+        
+        # Number strings in the order of the file's summary, as summarize_results orders them
+        file_summary = result.get('summary', {})
+        for pattern_name in file_summary.get('pattern_counts', ()):
+            tables['patterns'].add(pattern_name)
+        for type_name in file_summary.get('type_counts', ()):
+            add_type(type_name)
+        
+        for pattern_name, matches in result.get('patterns', {}).items():
+            pattern_id = tables['patterns'].add(pattern_name)
+            for match in matches:
+                file_column.append(file_id)
+                pattern_column.append(pattern_id)
+                type_column.append(add_type(match.get('type')))
+                name = match.get('name')
+                name_column.append(add_name(None if name is None else str(name)))
+                for key, column in zip(_POSITIONS, position_columns):
+                    value = match.get(key)
+                    column.append(value if isinstance(value, int) else MISSING)
+    
+    def __len__(self) -> int:
+        """Get the number of files in the store."""
+        return len(self.columns['path'])
+    
+    def __iter__(self) -> Iterator[Dict]:
+        """Iterate over the rebuilt analysis result of each file."""
+        return self.iter_results()
+    
+    @property
+    def match_count(self) -> int:
+        """The number of matches in the store."""
+        return len(self.columns['file'])
+    
+    def _counts(self, column: str, size: int, mask=None) -> List[int]:
+        """Count the occurrences of each value of a column.
+        
+        Args:
+            column: Name of the column
+            size: Number of possible values, numbered from 0
+            mask: Optional booleans selecting the entries to count
+        
+        Returns:
+            The count of each value; MISSING entries are not counted
+        """
+        values = self.columns[column]
+        np = numpy_module()
+        if np is not None:
+            values = np.frombuffer(values, dtype=np.int32) if len(values) else np.zeros(0, dtype=np.int32)
+            selected = values >= 0
+            if mask is not None:
+                selected &= mask
+            return np.bincount(values[selected], minlength=size).tolist()
+        
+        if mask is None:
+            counter = Counter(values)
+        else:
+            counter = Counter(value for value, keep in zip(values, mask) if keep)
+        return [counter.get(value, 0) for value in range(size)]
+    
+    def _analyzed_files(self):
+        """Get which files were analyzed without error.
+        
+        Returns:
+            One boolean per file, as a numpy array when numpy is installed
+        """
+        errors = self.columns['error']
+        np = numpy_module()
+        if np is not None:
+            return np.frombuffer(errors, dtype=np.int32) == MISSING if len(errors) else np.zeros(0, dtype=bool)
+        return [error == MISSING for error in errors]
+    
+    def _table_counts(self, column: str, table: str, mask=None) -> Dict[str, int]:
+        """Count the strings referred to by a column.
+        
+        Args:
+            column: Name of the column
+            table: Name of the string table the column refers to
+            mask: Optional booleans selecting the entries to count
+        
+        Returns:
+            The count of each string, in the order of the table. With a mask,
+            strings not referred to by any selected entry are left out.
+        """
+        strings = self.tables[table].strings
+        counts = self._counts(column, len(strings), mask)
+        return {string: count for string, count in zip(strings, counts) if count or mask is None}
+    
+    def pattern_counts(self) -> Dict[str, int]:
+        """Count the matches of each pattern.
+        
+        Returns:
+            The number of matches per pattern name
+        """
+        return self._table_counts('pattern', 'patterns')
+    
+    def type_counts(self) -> Dict[str, int]:
+        """Count the matches of each match type.
+        
+        Returns:
+            The number of matches per type, leaving out matches without one
+        """
+        return self._table_counts('type', 'types')
+    
+    def language_counts(self) -> Dict[str, int]:
+        """Count the files analyzed without error per language.
+        
+        Returns:
+            The number of files per language
+        """
+        return self._table_counts('language', 'languages', self._analyzed_files())
+    
+    def file_match_counts(self) -> List[int]:
+        """Count the matches of each file.
+        
+        Returns:
+            The number of matches of each file, in the order they were added
+        """
+        return self._counts('file', len(self))
+    
+    def summary(self) -> Dict:
+        """Compute the summary aggregates of the stored results.
+        
+        Returns:
+            The aggregates used by HTMLReport.render_summary_section
+        """
+        files_count = self.columns['error'].count(MISSING)
+        return {
+            "files_count": files_count,
+            "error_count": len(self) - files_count,
+            "total_patterns": self.match_count,
+            "pattern_counts": self.pattern_counts(),
+            "type_counts": self.type_counts(),
+            "language_counts": self.language_counts(),
+        }
+    
+    def _file_offsets(self) -> array:
+        """Get where the matches of each file start in the match columns.
+        
+        Returns:
+            One offset per file, followed by the number of matches
+        """
+        if self._offsets is None:
+            self._offsets = array(_TYPECODE, accumulate(self.file_match_counts(), initial=0))
+        return self._offsets
+    
+    def iter_results(self) -> Iterator[Dict]:
+        """Rebuild the analysis result of each file.
+        
+        Matches hold their file, pattern type, name and position only.
+        
+        Yields:
+            The analysis result of each file, in the order they were added
+        """
+        tables = self.tables
+        columns = self.columns
+        offsets = self._file_offsets()
+        files = tables['files']
+        patterns = tables['patterns']
+        types = tables['types']
+        names = tables['names']
+        
+        for file_id in range(len(self)):
+            file_path = files[columns['path'][file_id]]
+            error_id = columns['error'][file_id]
+            if error_id != MISSING:
+                yield {"file": file_path, "error": tables['errors'][error_id]}
+                continue
+            
+            grouped: Dict[str, List[Match]] = {}
+            for i in range(offsets[file_id], offsets[file_id + 1]):
+                match = Match(types[columns['type'][i]], names[columns['name'][i]],
+                              *(columns[key][i] for key in _POSITIONS), file_path)
+                for key in _POSITIONS:
+                    if match[key] == MISSING:
+                        del match[key]
+                for key in ('type', 'name'):
+                    if match[key] is None:
+                        del match[key]
+                grouped.setdefault(patterns[columns['pattern'][i]], []).append(match)
+            
+            result = {"file": file_path}
+            language = tables['languages'][columns['language'][file_id]]
+            if language is not None:
+                result["language"] = language
+            result["patterns"] = grouped
+            
+            pattern_counts = {name: len(matches) for name, matches in grouped.items()}
+            type_counts = dict(Counter(
+                match['type'] for matches in grouped.values() for match in matches if 'type' in match
+            ))
+            result["summary"] = {
+                "total_patterns": offsets[file_id + 1] - offsets[file_id],
+                "pattern_counts": pattern_counts,
+                "type_counts": type_counts,
+            }
+            yield result
+    
+    def save(self, path: Union[str, Path]) -> None:
+        """Save the store to a file.
+        
+        Args:
+            path: Path of the file to write
+        """
+        header = {
+            "version": FORMAT_VERSION,
+            "files": len(self),
+            "matches": self.match_count,
+            "tables": {name: self.tables[name].strings for name in TABLES},
+        }
+        header_bytes = json.dumps(header, separators=(",", ":")).encode("utf-8")
+        # Pad the header so that the columns start on an 8-byte boundary
+        header_bytes += b" " * (-(len(MAGIC) + 8 + len(header_bytes)) % 8)
+        
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<Q", len(header_bytes)))
+            f.write(header_bytes)
+            for name in MATCH_COLUMNS + FILE_COLUMNS:
+                column = self.columns[name]
+                if sys.byteorder == "big":
+                    column = array(_TYPECODE, column)
+                    column.byteswap()
+                column.tofile(f)
+    
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> 'ResultStore':
+        """Load a store saved with save.
+        
+        Args:
+            path: Path of the saved store
+        
+        Returns:
+            The loaded store
+        
+        Raises:
+            ValueError: If the file is not a saved store of a supported version
+        """
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a saved result store")
+            header_length, = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(header_length))
+            if header.get("version") != FORMAT_VERSION:
+                raise ValueError(f"Unsupported result store version {header.get('version')} in {path}")
+            
+            store = cls()
+            store.tables = {name: StringTable(header["tables"][name]) for name in TABLES}
+            for name in MATCH_COLUMNS + FILE_COLUMNS:
+                count = header["matches"] if name in MATCH_COLUMNS else header["files"]
+                column = array(_TYPECODE)
+                column.fromfile(f, count)
+                if sys.byteorder == "big":
+                    column.byteswap()
+                store.columns[name] = column
+        
+        return store
@@ -0,0 +1,327 @@
+"""
+Size-aware scheduling of the files of an analysis.
+
+Analyzing files in the order they are found lets a few large files that
+happen to come last set the wall-clock time of the whole run, while every
+small file pays the overhead of a task of its own. The scheduler uses the
+file sizes known from discovery instead: files are grouped into batches of
+roughly equal size, large files alone and small files together, and the
+batches are dispatched largest first (longest processing time first), so
+the run ends on small batches that keep every worker busy.
+
+The number of batches running at once is not fixed either. It starts from
+the number of available CPUs and is adjusted by hill climbing on the
+measured throughput, so thread pools that are held back by the GIL shrink
+while pools that gain from more workers grow, within an upper bound.
+"""
+
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Sequence
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from pathlib import Path
+import os
+import time
+import logging
+
+from .file_discovery import DiscoveredFile
+
+logger = logging.getLogger(__name__)
+
+# Batches planned per worker, so that the last ones are small enough to balance the load
+BATCHES_PER_WORKER = 4
+
+# Bounds on the number of bytes of source per batch
+MIN_BATCH_BYTES = 16 * 1024
+MAX_BATCH_BYTES = 1024 * 1024
+
+# Upper bound on the number of files per batch
+MAX_BATCH_FILES = 64
+
+# Files of an ordered stream scheduled together; bounds the results waiting to be yielded
+ORDERED_WINDOW = 256
+
+# Throughput must change by more than this share for the concurrency to follow it
+THROUGHPUT_TOLERANCE = 0.05
+
+# Minimum duration of a throughput measurement
+MIN_SAMPLE_SECONDS = 0.2
+
+class Batch(NamedTuple):
+    """Files analyzed together by one task."""
+    
+    indices: Sequence[int]
+    paths: Sequence[str]
+    size: int
+
+def available_cpus() -> int:
+    """Count the CPUs this process may run on.
+    
+    Returns:
+        The number of usable CPUs, at least 1
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return os.cpu_count() or 1
+
+def worker_limit(execution: str) -> int:
+    """Get the largest number of workers worth running.
+    
+    Processes beyond the CPU count only compete for the same cores. Threads
+    may overlap file reads with matching, so a few more are allowed.
+    
+    Args:
+        execution: Execution mode, "thread" or "process"
+    
+    Returns:
+        The upper bound on concurrent workers
+    """
+    cpus = available_cpus()
+    return cpus if execution == "process" else min(32, cpus + 4)
+
+def with_sizes(file_paths: Sequence) -> List[DiscoveredFile]:
+    """Get the sizes of files that were not found by discovery.
+    
+    Args:
+        file_paths: Paths or DiscoveredFile entries
+    
+    Returns:
+        A DiscoveredFile for each entry. Files that cannot be read get a size
+        of 0; analyzing them reports the error.
+    """
+    files = []
+    for entry in file_paths:
+        if isinstance(entry, DiscoveredFile):
+            files.append(entry)
+            continue
+        try:
+            size = os.stat(entry).st_size
+        except OSError:
+            size = 0
+        files.append(DiscoveredFile(Path(entry), size))
+    return files
+
+def batch_bytes(total_bytes: int, workers: int) -> int:
+    """Pick the size of a batch.
+    
+    Args:
+        total_bytes: Size of all the files to schedule
+        workers: Number of workers
+    
+    Returns:
+        The number of bytes of source per batch
+    """
+    target = total_bytes // (max(1, workers) * BATCHES_PER_WORKER)
+    return max(MIN_BATCH_BYTES, min(MAX_BATCH_BYTES, target))
+
+def plan_batches(files: Sequence[DiscoveredFile],
+                 workers: int,
+                 start: int = 0,
+                 target_bytes: Optional[int] = None) -> List[Batch]:
+    """Group files into batches, largest first.
+    
+    Files of at least target_bytes are batched alone. Smaller files are
+    taken in decreasing size and packed into batches of up to target_bytes
+    and MAX_BATCH_FILES files.
+    
+    Args:
+        files: The files to schedule
+        workers: Number of workers the batches are shared among
+        start: Index of the first file in the whole input
+        target_bytes: Bytes of source per batch. If None, derived from the
+            total size and the number of workers.
+    
+    Returns:
+        The batches, in decreasing size
+    """
+    if target_bytes is None:
+        target_bytes = batch_bytes(sum(f.size for f in files), workers)
+    
+    order = sorted(range(len(files)), key=lambda i: -files[i].size)
+    batches = []
+    indices: List[int] = []
+    size = 0
+    for i in order:
+        file_size = files[i].size
+        if indices and (size + file_size > target_bytes or len(indices) >= MAX_BATCH_FILES):
+            batches.append(_make_batch(files, indices, size, start))
+            indices, size = [], 0
+        indices.append(i)
+        size += file_size
+    if indices:
+        batches.append(_make_batch(files, indices, size, start))
+    
+    batches.sort(key=lambda batch: -batch.size)
+    return batches
+
+def _make_batch(files: Sequence[DiscoveredFile], indices: List[int], size: int, start: int) -> Batch:
+    return Batch(
+        tuple(start + i for i in indices),
+        tuple(str(files[i].path) for i in indices),
+        size,
+    )
+
+def plan_windows(files: Sequence[DiscoveredFile], workers: int, ordered: bool) -> List[List[Batch]]:
+    """Plan the batches of a run.
+    
+    Unordered runs schedule all files at once. Ordered runs schedule
+    consecutive windows of ORDERED_WINDOW files one after the other, so
+    that results can be yielded in input order without holding more than
+    about two windows of them.
+    
+    Args:
+        files: The files to schedule
+        workers: Number of workers
+        ordered: Whether results are yielded in input order
+    
+    Returns:
+        The batches of each window
+    """
+    if not ordered:
+        return [plan_batches(files, workers)] if files else []
+    
+    target_bytes = batch_bytes(sum(f.size for f in files), workers)
+    return [
+        plan_batches(files[start:start + ORDERED_WINDOW], workers, start, target_bytes)
+        for start in range(0, len(files), ORDERED_WINDOW)
+    ]
+
+class AdaptiveConcurrency:
+    """Adjusts the number of concurrent tasks to the measured throughput.
+    
+    Throughput is measured in bytes of source analyzed per second over a
+    sample of completed tasks. After each sample the limit moves one step;
+    it keeps its direction while throughput improves, turns around when it
+    drops, and holds while throughput stays within THROUGHPUT_TOLERANCE.
+    """
+    
+    def __init__(self, initial: int, maximum: int, minimum: int = 1):
+        """Initialize the concurrency limit.
+        
+        Args:
+            initial: Number of concurrent tasks to start with
+            maximum: Largest number of concurrent tasks
+            minimum: Smallest number of concurrent tasks
+        """
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = max(self.minimum, min(self.maximum, initial))
+        self._direction = 1
+        self._last_throughput: Optional[float] = None
+        self._sample_start = time.perf_counter()
+        self._sample_bytes = 0
+        self._sample_tasks = 0
+    
+    @classmethod
+    def for_workers(cls, max_workers: Optional[int], execution: str) -> 'AdaptiveConcurrency':
+        """Create the concurrency limit of a run.
+        
+        Args:
+            max_workers: A fixed number of workers, or None to adapt
+            execution: Execution mode, "thread" or "process"
+        
+        Returns:
+            A fixed limit of max_workers, or an adaptive limit starting from
+            the available CPUs
+        """
+        if max_workers is not None:
+            return cls(max_workers, max_workers, max_workers)
+        return cls(available_cpus(), worker_limit(execution))
+    
+    @property
+    def adaptive(self) -> bool:
+        """Whether the limit can change."""
+        return self.minimum < self.maximum
+    
+    def record(self, size: int) -> None:
+        """Record a completed task, and adjust the limit at the end of a sample.
+        
+        Args:
+            size: Bytes of source analyzed by the task
+        """
+        if not self.adaptive:
+            return
+        
+        self._sample_bytes += size
+        self._sample_tasks += 1
+        elapsed = time.perf_counter() - self._sample_start
+        if self._sample_tasks < 2 * self.limit or elapsed < MIN_SAMPLE_SECONDS:
+            return
+        
+        throughput = self._sample_bytes / elapsed
+        last = self._last_throughput
+        if last is None or throughput > last * (1 + THROUGHPUT_TOLERANCE):
+            step = self._direction
+        elif throughput < last * (1 - THROUGHPUT_TOLERANCE):
+            self._direction = -self._direction
+            step = self._direction
+        else:
+            step = 0
+        
+        new_limit = max(self.minimum, min(self.maximum, self.limit + step))
+        if new_limit != self.limit:
+            logger.debug(f"Concurrency {self.limit} -> {new_limit} at {throughput / 1e6:.2f} MB/s")
+        self.limit = new_limit
+        self._last_throughput = throughput
+        self._sample_start = time.perf_counter()
+        self._sample_bytes = 0
+        self._sample_tasks = 0
+
+def iter_scheduled(submit: Callable[[Batch], Future],
+                   windows: Sequence[Sequence[Batch]],
+                   concurrency: AdaptiveConcurrency,
+                   ordered: bool = False,
+                   max_in_flight: Optional[int] = None,
+                   collect: Optional[Callable[[object], List[Dict]]] = None) -> Iterator[Dict]:
+    """Run batches with a varying number in flight and yield the result of each file.
+    
+    Args:
+        submit: Submits the task of a batch and returns its future, whose
+            result has one entry per path of the batch
+        windows: The batches of each window, from plan_windows
+        concurrency: Limit on the number of batches in flight
+        ordered: If True, yield results in input order instead of completion order
+        max_in_flight: Optional fixed cap on the number of batches in flight
+        collect: Optional function turning the result of a task into the
+            list of results of its files
+    
+    Yields:
+        The result of each file
+    """
+    queue = [(number, batch) for number, window in enumerate(windows) for batch in window]
+    window_size = ORDERED_WINDOW
+    pending: Dict[Future, Batch] = {}
+    buffered: Dict[int, Dict] = {}
+    next_index = 0
+    position = 0
+    
+    try:
+        while True:
+            limit = concurrency.limit if max_in_flight is None else min(concurrency.limit, max(1, max_in_flight))
+            while position < len(queue) and len(pending) < limit:
+                number, batch = queue[position]
+                # Ordered runs look at most one window ahead of the results yielded
+                if ordered and number > next_index // window_size + 1:
+                    break
+                pending[submit(batch)] = batch
+                position += 1
+            
+            if not pending:
+                break
+            
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                batch = pending.pop(future)
+                results = future.result()
+                if collect is not None:
+                    results = collect(results)
+                concurrency.record(batch.size)
+                if ordered:
+                    buffered.update(zip(batch.indices, results))
+                else:
+                    yield from results
+            
+            while next_index in buffered:
+                yield buffered.pop(next_index)
+                next_index += 1
+    finally:
+        for future in pending:
+            future.cancel()
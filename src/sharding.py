@@ -0,0 +1,266 @@
+"""
+Sharded analysis of one repository across several machines.
+
+A run with --shard i/N analyzes only its share of the discovered files and
+writes a partial result file. Every shard discovers the same files in the
+same order, and the files are assigned to shards deterministically by
+size (largest first, each to the shard with the least work so far), so
+the shards finish at about the same time without coordinating.
+
+A partial result file is NDJSON. Its first line is a header recording
+the shard, the command and options of the run, and the number of files
+discovered; every other line holds the result of one file with its index
+in the discovered file list. Files are labelled by their path relative to
+the analyzed directory, so shards run in different checkouts of the
+repository produce the same results. Merging the partial files of all N shards
+restores the results of a single-node run in their original order, and
+the merged per-file results feed the codebase-level analyses that need
+every file.
+"""
+
+from typing import IO, Dict, Iterable, Iterator, List, NamedTuple, Sequence, Tuple, Union
+from pathlib import Path
+import json
+import heapq
+import logging
+
+from .file_discovery import DiscoveredFile
+from .ndjson_report import to_ndjson_line
+
+logger = logging.getLogger(__name__)
+
+# Identifies partial result files
+PARTIAL_FORMAT = "code-pattern-analyzer/shard"
+
+# Bump when the layout of partial result files changes
+PARTIAL_VERSION = 2
+
+# Fixed cost of analyzing a file, counted as this many bytes of source
+FILE_WEIGHT_BYTES = 512
+
+class Shard(NamedTuple):
+    """One of the shards of a run, numbered from 1."""
+    
+    index: int
+    count: int
+    
+    @classmethod
+    def parse(cls, spec: str) -> 'Shard':
+        """Parse a shard given as "i/N".
+        
+        Args:
+            spec: The shard number and the number of shards, e.g. "2/4"
+        
+        Returns:
+            The shard
+        
+        Raises:
+            ValueError: If the specification is malformed or out of range
+        """
+        index, separator, count = spec.partition("/")
+        try:
+            shard = cls(int(index), int(count))
+        except ValueError:
+            shard = None
+        if not separator or shard is None or not 1 <= shard.index <= shard.count:
+            raise ValueError(f"Invalid shard {spec!r}: expected i/N with 1 <= i <= N")
+        return shard
+    
+    def __str__(self) -> str:
+        return f"{self.index}/{self.count}"
+
+def relative_path(path: Union[str, Path], root: Union[str, Path, None] = None) -> str:
+    """Get the path of a file relative to the analyzed directory, with forward slashes.
+    
+    Args:
+        path: Path of the file
+        root: Directory the file was discovered in
+    
+    Returns:
+        The relative path, or path itself if it is not inside root
+    """
+    path = Path(path)
+    if root is not None:
+        try:
+            return path.relative_to(root).as_posix()
+        except ValueError:
+            pass
+    return path.as_posix()
+
+def assign_shards(files: Sequence[DiscoveredFile], count: int, root: Union[str, Path, None] = None) -> List[int]:
+    """Assign files to shards, balancing the bytes of source per shard.
+    
+    Files are taken largest first and each goes to the shard with the
+    least work so far. Ties are broken by path relative to root, so every
+    machine computes the same assignment wherever the repository is
+    checked out.
+    
+    Args:
+        files: The discovered files, with their sizes
+        count: Number of shards
+        root: Directory the files were discovered in
+    
+    Returns:
+        The shard of each file, numbered from 1
+    """
+    order = sorted(range(len(files)), key=lambda i: (-files[i].size, relative_path(files[i].path, root)))
+    loads = [(0, shard) for shard in range(1, count + 1)]
+    assignment = [0] * len(files)
+    for i in order:
+        load, shard = heapq.heappop(loads)
+        assignment[i] = shard
+        heapq.heappush(loads, (load + files[i].size + FILE_WEIGHT_BYTES, shard))
+    return assignment
+
+def select_shard(files: Sequence[DiscoveredFile],
+                 shard: Shard,
+                 root: Union[str, Path, None] = None) -> Tuple[List[int], List[DiscoveredFile]]:
+    """Select the files of one shard.
+    
+    Args:
+        files: The discovered files, in the order of a single-node run
+        shard: The shard to select
+        root: Directory the files were discovered in
+    
+    Returns:
+        The indices of the shard's files in files, and the files, in order
+    """
+    assignment = assign_shards(files, shard.count, root)
+    indices = [i for i, assigned in enumerate(assignment) if assigned == shard.index]
+    return indices, [files[i] for i in indices]
+
+def write_partial(output: IO[str],
+                  shard: Shard,
+                  command: str,
+                  options: Dict,
+                  total_files: int,
+                  indices: Sequence[int],
+                  results: Iterable[Dict]) -> int:
+    """Write the partial result file of a shard.
+    
+    Args:
+        output: A text file handle to write to
+        shard: The shard that was analyzed
+        command: The command that produced the results
+        options: The options of the command that every shard must share,
+            which must not depend on where the repository is checked out
+        total_files: Number of files discovered by the run, in all shards
+        indices: Index of each file of the shard in the discovered files
+        results: The result of each file of the shard, in the order of indices
+    
+    Returns:
+        The number of results written
+    """
+    header = {
+        "format": PARTIAL_FORMAT,
+        "version": PARTIAL_VERSION,
+        "shard": str(shard),
+        "command": command,
+        "options": options,
+        "total_files": total_files,
+        "shard_files": len(indices),
+    }
+    output.write(json.dumps(header) + "\n")
+    
+    count = 0
+    for index, result in zip(indices, results):
+        output.write(to_ndjson_line({"index": index, "result": result}))
+        count += 1
+    return count
+
+def read_partial_header(path: Union[str, Path]) -> Dict:
+    """Read the header of a partial result file.
+    
+    Args:
+        path: Path of the file
+    
+    Returns:
+        The header
+    
+    Raises:
+        ValueError: If the file is not a partial result file of this version
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        line = f.readline()
+    try:
+        header = json.loads(line)
+    except ValueError:
+        header = None
+    if not isinstance(header, dict) or header.get("format") != PARTIAL_FORMAT:
+        raise ValueError(f"{path} is not a partial result file")
+    if header.get("version") != PARTIAL_VERSION:
+        raise ValueError(f"{path} has unsupported partial result version {header.get('version')}")
+    return header
+
+def _iter_partial(path: Union[str, Path]) -> Iterator[Tuple[int, Dict]]:
+    with open(path, 'r', encoding='utf-8') as f:
+        f.readline()
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                yield entry["index"], entry["result"]
+
+def check_partials(paths: Sequence[Union[str, Path]]) -> Dict:
+    """Check that partial result files make up one complete run.
+    
+    Args:
+        paths: Paths of the partial result files
+    
+    Returns:
+        The header of the first file
+    
+    Raises:
+        ValueError: If the files come from different runs, or shards are
+            missing or given twice
+    """
+    if not paths:
+        raise ValueError("No partial result files given")
+    
+    headers = [read_partial_header(path) for path in paths]
+    first = headers[0]
+    count = Shard.parse(first["shard"]).count
+    seen: Dict[int, Union[str, Path]] = {}
+    for path, header in zip(paths, headers):
+        for key in ("command", "options", "total_files"):
+            if header[key] != first[key]:
+                raise ValueError(f"{path} comes from a different run than {paths[0]}: {key} differs")
+        shard = Shard.parse(header["shard"])
+        if shard.count != count:
+            raise ValueError(f"{path} is shard {shard}, but {paths[0]} is one of {count} shards")
+        if shard.index in seen:
+            raise ValueError(f"Shard {shard} is given twice: {seen[shard.index]} and {path}")
+        seen[shard.index] = path
+    
+    missing = [str(index) for index in range(1, count + 1) if index not in seen]
+    if missing:
+        raise ValueError(f"Missing shards {', '.join(missing)} of {count}")
+    if sum(header["shard_files"] for header in headers) != first["total_files"]:
+        raise ValueError("The shards do not add up to the files of the run")
+    return first
+
+def iter_merged(paths: Sequence[Union[str, Path]]) -> Iterator[Dict]:
+    """Merge the results of partial result files into the order of a single-node run.
+    
+    The files are read in parallel streams, so the results are not all
+    held in memory.
+    
+    Args:
+        paths: Paths of the partial result files of every shard, checked
+            with check_partials
+    
+    Yields:
+        The result of each file
+    
+    Raises:
+        ValueError: If a file is truncated or holds a result twice
+    """
+    expected = 0
+    for index, result in heapq.merge(*(_iter_partial(path) for path in paths), key=lambda entry: entry[0]):
+        if index != expected:
+            raise ValueError(f"Partial results are inconsistent: expected file {expected}, found {index}")
+        expected += 1
+        yield result
+    
+    total_files = read_partial_header(paths[0])["total_files"]
+    if expected != total_files:
+        raise ValueError(f"Partial results are incomplete: {expected} of {total_files} files")
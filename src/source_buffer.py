@@ -0,0 +1,121 @@
+"""
+In-memory source buffer shared by the parser and the patterns.
+
+A file is read once as bytes. The bytes are handed to tree-sitter as-is and
+to every pattern that only needs node spans, so text is decoded lazily: a
+span at a time for query results, or the whole file only when a pattern
+actually needs the source as a string.
+"""
+
+from typing import Optional, Union
+from pathlib import Path
+import logging
+
+import tree_sitter
+
+logger = logging.getLogger(__name__)
+
+class SourceBuffer:
+    """The source of a single file, held as bytes with lazy decoding."""
+    
+    __slots__ = ('_data', '_text', 'encoding')
+    
+    def __init__(self,
+                 data: Optional[bytes] = None,
+                 text: Optional[str] = None,
+                 encoding: str = 'utf-8'):
+        """Initialize a source buffer.
+        
+        At least one of data or text must be provided; the other
+        representation is derived on first use.
+        
+        Args:
+            data: The raw source bytes
+            text: The decoded source text
+            encoding: Encoding used to convert between bytes and text
+        """
+        if data is None and text is None:
+            raise ValueError("SourceBuffer needs either data or text")
+        
+        self._data = data
+        self._text = text
+        self.encoding = encoding
+    
+    @classmethod
+    def from_file(cls, file_path: Union[str, Path], encoding: str = 'utf-8') -> 'SourceBuffer':
+        """Read a file into a buffer with a single read.
+        
+        Args:
+            file_path: Path to the file
+            encoding: Encoding of the file
+        
+        Returns:
+            A SourceBuffer holding the file's bytes
+        """
+        with open(file_path, 'rb') as f:
+            return cls(f.read(), encoding=encoding)
+    
+    @classmethod
+    def wrap(cls, code: Union[str, bytes, 'SourceBuffer']) -> 'SourceBuffer':
+        """Wrap source code of any supported type in a buffer.
+        
+        Args:
+            code: Source code as a string, bytes or an existing buffer
+        
+        Returns:
+            A SourceBuffer (the same object if one was passed)
+        """
+        if isinstance(code, SourceBuffer):
+            return code
+        if isinstance(code, (bytes, bytearray, memoryview)):
+            return cls(bytes(code))
+        return cls(text=code)
+    
+    @property
+    def data(self) -> bytes:
+        """The source as bytes, encoded on first access if needed."""
+        if self._data is None:
+            self._data = self._text.encode(self.encoding)
+        return self._data
+    
+    @property
+    def text(self) -> str:
+        """The whole source as a string, decoded on first access.
+        
+        Invalid byte sequences are replaced rather than raising, so one
+        undecodable character does not lose the whole file.
+        """
+        if self._text is None:
+            self._text = self._data.decode(self.encoding, errors='replace')
+        return self._text
+    
+    @property
+    def is_decoded(self) -> bool:
+        """Whether the full text has been materialized."""
+        return self._text is not None
+    
+    def span(self, start_byte: int, end_byte: int) -> str:
+        """Decode a byte range of the source.
+        
+        Args:
+            start_byte: Start offset in bytes
+            end_byte: End offset in bytes (exclusive)
+        
+        Returns:
+            The decoded text of the range
+        """
+        return self.data[start_byte:end_byte].decode(self.encoding, errors='replace')
+    
+    def node_text(self, node: tree_sitter.Node) -> str:
+        """Decode the text covered by a tree-sitter node.
+        
+        Args:
+            node: A tree-sitter node from a tree parsed from this buffer
+        
+        Returns:
+            The text corresponding to the node
+        """
+        return self.span(node.start_byte, node.end_byte)
+    
+    def __len__(self) -> int:
+        return len(self.data)
@@ -0,0 +1,403 @@
+"""
+Deterministic synthetic codebases for benchmarking.
+
+Generates a tree of source files in a mix of languages, laid out in
+layers (controllers, services, repositories, models and utils) that
+import one another, with classes, methods and functions whose bodies
+nest conditionals and loops to varying depth. File sizes vary the way
+they do in real projects, with a few files much larger than the rest.
+
+The same size, seed and languages always produce the same files, so
+timings measured on corpora generated on different machines or at
+different times can be compared. Generating a corpus records its
+parameters in a manifest, and asking for the same corpus again reuses it.
+"""
+
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+from pathlib import Path
+import json
+import random
+import shutil
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Name of the manifest written at the root of a generated corpus
+MANIFEST_NAME = ".synthetic-corpus.json"
+
+# Bump when generated files change, so older corpora are regenerated
+GENERATOR_VERSION = 1
+
+# Languages and their relative share of the files of a mixed corpus
+DEFAULT_LANGUAGE_MIX = (
+    ("python", 30),
+    ("javascript", 20),
+    ("typescript", 15),
+    ("java", 15),
+    ("go", 10),
+    ("ruby", 4),
+    ("rust", 3),
+    ("c", 2),
+    ("cpp", 1),
+)
+
+# Directories files are spread over, in dependency order
+LAYERS = ("controllers", "services", "repositories", "models", "utils")
+
+# Files per package directory
+FILES_PER_PACKAGE = 50
+
+# Share of files that are much larger than the rest
+LARGE_FILE_SHARE = 0.03
+
+class Syntax(NamedTuple):
+    """How the constructs of generated files are written in a language.
+    
+    Templates are str.format strings. A None block end means blocks are
+    closed by indentation alone.
+    """
+    
+    extension: str
+    header: str
+    import_line: str
+    class_open: Optional[str]
+    class_close: Optional[str]
+    method_open: str
+    function_open: str
+    block_close: Optional[str]
+    if_open: str
+    else_open: str
+    loop_open: str
+    assign: str
+    call: str
+    return_line: str
+    param: str
+    indent: str = "    "
+    module_separator: str = "/"
+
+SYNTAX: Dict[str, Syntax] = {
+    "python": Syntax(
+        ".py", "", "from {module} import {name}",
+        "class {name}:", None,
+        "def {name}(self, {params}):", "def {name}({params}):", None,
+        "if {cond}:", "else:", "for {var} in {items}:",
+        "{var} = {expr}", "{target}.{method}({args})", "return {expr}",
+        "{name}", module_separator=".",
+    ),
+    "javascript": Syntax(
+        ".js", "", "import {{ {name} }} from './{module}';",
+        "class {name} {{", "}}",
+        "{name}({params}) {{", "function {name}({params}) {{", "}}",
+        "if ({cond}) {{", "}} else {{", "for (const {var} of {items}) {{",
+        "let {var} = {expr};", "{target}.{method}({args});", "return {expr};",
+        "{name}",
+    ),
+    "typescript": Syntax(
+        ".ts", "", "import {{ {name} }} from './{module}';",
+        "export class {name} {{", "}}",
+        "public {name}({params}): number {{", "export function {name}({params}): number {{", "}}",
+        "if ({cond}) {{", "}} else {{", "for (const {var} of {items}) {{",
+        "let {var} = {expr};", "{target}.{method}({args});", "return {expr};",
+        "{name}: number",
+    ),
+    "java": Syntax(
+        ".java", "package com.example.{package};\n", "import com.example.{module}.{name};",
+        "public class {name} {{", "}}",
+        "public int {name}({params}) {{", "public static int {name}({params}) {{", "}}",
+        "if ({cond}) {{", "}} else {{", "for (int {var} : {items}) {{",
+        "int {var} = {expr};", "{target}.{method}({args});", "return {expr};",
+        "int {name}", module_separator=".",
+    ),
+    "go": Syntax(
+        ".go", "package {package}\n", "import \"example.com/{module}\"",
+        "type {name} struct {{\n\tvalue int\n}}", None,
+        "func (r *{cls}) {name}({params}) int {{", "func {name}({params}) int {{", "}}",
+        "if {cond} {{", "}} else {{", "for _, {var} := range {items} {{",
+        "{var} := {expr}", "{target}.{method}({args})", "return {expr}",
+        "{name} int", indent="\t",
+    ),
+    "ruby": Syntax(
+        ".rb", "", "require_relative '{module}'",
+        "class {name}", "end",
+        "def {name}({params})", "def {name}({params})", "end",
+        "if {cond}", "else", "{items}.each do |{var}|",
+        "{var} = {expr}", "{target}.{method}({args})", "return {expr}",
+        "{name}", indent="  ",
+    ),
+    "rust": Syntax(
+        ".rs", "", "use crate::{module}::{name};",
+        "pub struct {name} {{\n    value: i64,\n}}\n\nimpl {name} {{", "}}",
+        "pub fn {name}(&self, {params}) -> i64 {{", "pub fn {name}({params}) -> i64 {{", "}}",
+        "if {cond} {{", "}} else {{", "for {var} in {items}.iter() {{",
+        "let {var} = {expr};", "{target}.{method}({args});", "return {expr};",
+        "{name}: i64", module_separator="::",
+    ),
+    "c": Syntax(
+        ".c", "", "#include \"{module}.h\"",
+        None, None,
+        "", "int {name}({params}) {{", "}}",
+        "if ({cond}) {{", "}} else {{", "for (int {var} = 0; {var} < {items}_count; {var}++) {{",
+        "int {var} = {expr};", "{method}({target}, {args});", "return {expr};",
+        "int {name}",
+    ),
+    "cpp": Syntax(
+        ".cpp", "", "#include \"{module}.hpp\"",
+        "class {name} {{\npublic:", "}};",
+        "int {name}({params}) {{", "int {name}({params}) {{", "}}",
+        "if ({cond}) {{", "}} else {{", "for (int {var} : {items}) {{",
+        "int {var} = {expr};", "{target}.{method}({args});", "return {expr};",
+        "int {name}",
+    ),
+}
+
+# Words names are built from
+_VERBS = ("get", "load", "save", "update", "build", "find", "check", "apply", "parse", "render")
+_NOUNS = ("user", "order", "product", "account", "invoice", "session", "report", "item", "event", "config")
+_ROLES = ("Service", "Manager", "Handler", "Store", "Builder", "Client", "Validator", "Mapper")
+
+class CorpusInfo(NamedTuple):
+    """A generated corpus and the parameters it was generated with."""
+    
+    path: Path
+    files: int
+    seed: int
+    languages: Tuple[str, ...]
+    total_bytes: int
+    language_counts: Dict[str, int]
+    
+    def parameters(self) -> Dict:
+        """Get the parameters that determine the corpus content.
+        
+        Returns:
+            The number of files, seed and languages of the corpus
+        """
+        return {"files": self.files, "seed": self.seed, "languages": list(self.languages)}
+    
+    def to_dict(self) -> Dict:
+        """Convert the corpus description to a dictionary.
+        
+        Returns:
+            The parameters, path and totals of the corpus
+        """
+        return dict(
+            self.parameters(),
+            path=str(self.path),
+            total_bytes=self.total_bytes,
+            language_counts=self.language_counts,
+        )
+
+class _FileWriter:
+    """Builds the lines of one generated file."""
+    
+    def __init__(self, syntax: Syntax, rng: random.Random):
+        self.syntax = syntax
+        self.rng = rng
+        self.lines: List[str] = []
+        self.depth = 0
+    
+    def line(self, text: str) -> None:
+        for part in text.split("\n"):
+            self.lines.append(self.syntax.indent * self.depth + part if part else "")
+    
+    def open(self, text: str) -> None:
+        self.line(text)
+        self.depth += 1
+    
+    def close(self) -> None:
+        self.depth -= 1
+        if self.syntax.block_close is not None:
+            self.line(self.syntax.block_close.format())
+    
+    def name(self, capitalize: bool = False) -> str:
+        verb = self.rng.choice(_VERBS)
+        noun = self.rng.choice(_NOUNS)
+        if capitalize:
+            return f"{noun.capitalize()}{self.rng.choice(_ROLES)}"
+        return f"{verb}_{noun}_{self.rng.randrange(1000)}"
+    
+    def body(self, params: Sequence[str], depth: int, is_method: bool, cls: str) -> None:
+        """Write a function body nesting conditionals and loops up to a depth."""
+        syntax = self.syntax
+        rng = self.rng
+        local = f"v{self.depth}"
+        self.line(syntax.assign.format(var=local, expr=f"{params[0]} + {rng.randrange(100)}"))
+        
+        for _ in range(rng.randint(1, 3)):
+            kind = rng.random()
+            if depth > 0 and kind < 0.4:
+                self.open(syntax.if_open.format(cond=f"{local} > {params[-1]}"))
+                self.body(params, depth - 1, is_method, cls)
+                if rng.random() < 0.5:
+                    self.depth -= 1
+                    self.open(syntax.else_open.format())
+                    self.line(syntax.return_line.format(expr=f"{local} - 1"))
+                self.close()
+            elif depth > 0 and kind < 0.7:
+                var = f"x{self.depth}"
+                self.open(syntax.loop_open.format(var=var, items="items"))
+                self.line(syntax.assign.format(var=local, expr=f"{local} + {var}"))
+                if depth > 1:
+                    self.body(params, depth - 2, is_method, cls)
+                self.close()
+            else:
+                self.line(syntax.call.format(target="helper", method=self.name(), args=local))
+        
+        self.line(syntax.return_line.format(expr=local))
+    
+    def function(self, is_method: bool, cls: str = "") -> None:
+        syntax = self.syntax
+        params = ["a", "b"][:self.rng.randint(1, 2)]
+        rendered = ", ".join(syntax.param.format(name=p) for p in params)
+        template = syntax.method_open if is_method else syntax.function_open
+        self.open(template.format(name=self.name(), params=rendered, cls=cls))
+        self.body(params, self.rng.choice((0, 1, 1, 2, 2, 3, 4)), is_method, cls)
+        self.close()
+        self.line("")
+
+def _choose_languages(files: int, languages: Sequence[str], rng: random.Random) -> List[str]:
+    """Assign a language to each file, following the default mix.
+    
+    Args:
+        files: Number of files
+        languages: Languages to use
+        rng: Random generator of the corpus
+    
+    Returns:
+        The language of each file
+    """
+    weights = dict(DEFAULT_LANGUAGE_MIX)
+    chosen = [language for language in languages]
+    return rng.choices(chosen, weights=[weights.get(language, 1) for language in chosen], k=files)
+
+def render_file(language: str, index: int, layer: str, package: str, seed: int) -> str:
+    """Generate the content of one file.
+    
+    Args:
+        language: Language of the file
+        index: Number of the file in the corpus
+        layer: Layer directory the file is in
+        package: Package directory the file is in
+        seed: Seed of the corpus
+    
+    Returns:
+        The source code of the file
+    """
+    syntax = SYNTAX[language]
+    rng = random.Random(f"{seed}:{index}")
+    writer = _FileWriter(syntax, rng)
+    
+    if syntax.header:
+        writer.line(syntax.header.format(package=package))
+    
+    # Depend on the layers below this one
+    lower_layers = LAYERS[LAYERS.index(layer) + 1:]
+    for _ in range(rng.randint(0, 4) if lower_layers else 0):
+        writer.line(syntax.import_line.format(
+            module=f"{rng.choice(lower_layers)}{syntax.module_separator}pkg{rng.randrange(4):03d}",
+            name=writer.name(capitalize=True),
+        ))
+    writer.line("")
+    
+    large = rng.random() < LARGE_FILE_SHARE
+    classes = rng.randint(0, 2) * (4 if large else 1) if syntax.class_open else 0
+    functions = rng.randint(1, 4) * (10 if large else 1)
+    
+    for _ in range(classes):
+        cls = writer.name(capitalize=True)
+        methods = rng.randint(1, 5)
+        if syntax.class_close is None:
+            # Methods are declared after the type, outside of it
+            writer.line(syntax.class_open.format(name=cls))
+            writer.line("")
+            for _ in range(methods):
+                writer.function(True, cls)
+        else:
+            writer.open(syntax.class_open.format(name=cls))
+            for _ in range(methods):
+                writer.function(True, cls)
+            writer.depth -= 1
+            writer.line(syntax.class_close.format())
+            writer.line("")
+    
+    if language == "java":
+        # Java has no free functions; keep them in a class of their own
+        writer.open(syntax.class_open.format(name=f"{layer.capitalize()}Functions{index}"))
+        for _ in range(functions):
+            writer.function(False)
+        writer.depth -= 1
+        writer.line(syntax.class_close.format())
+    else:
+        for _ in range(functions):
+            writer.function(False)
+    
+    return "\n".join(writer.lines).rstrip() + "\n"
+
+def _read_manifest(root: Path) -> Optional[Dict]:
+    """Read the manifest of a generated corpus, if there is one."""
+    try:
+        with open(root / MANIFEST_NAME, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def generate_corpus(root: Union[str, Path],
+                    files: int = 1000,
+                    seed: int = 0,
+                    languages: Optional[Iterable[str]] = None,
+                    force: bool = False) -> CorpusInfo:
+    """Generate a synthetic codebase, or reuse one generated with the same parameters.
+    
+    Args:
+        root: Directory to generate the corpus in. Its previous content is
+            removed when the corpus is regenerated.
+        files: Number of files
+        seed: Seed of the random choices; the same seed gives the same files
+        languages: Languages to generate. If None, uses all languages in
+            DEFAULT_LANGUAGE_MIX.
+        force: Whether to regenerate an existing corpus with the same parameters
+    
+    Returns:
+        A description of the corpus
+    
+    Raises:
+        ValueError: If a language has no generator
+    """
+    root = Path(root)
+    languages = tuple(languages) if languages else tuple(language for language, _ in DEFAULT_LANGUAGE_MIX)
+    unknown = [language for language in languages if language not in SYNTAX]
+    if unknown:
+        raise ValueError(f"No generator for {', '.join(unknown)}; choose from {', '.join(SYNTAX)}")
+    
+    parameters = {"version": GENERATOR_VERSION, "files": files, "seed": seed, "languages": list(languages)}
+    manifest = _read_manifest(root)
+    if manifest is not None and not force and manifest.get("parameters") == parameters:
+        logger.info(f"Reusing the synthetic corpus in {root}")
+        return CorpusInfo(root, files, seed, languages, manifest["total_bytes"], manifest["language_counts"])
+    
+    if root.exists():
+        if manifest is None and any(root.iterdir()):
+            raise ValueError(f"{root} is not empty and is not a generated corpus")
+        shutil.rmtree(root)
+    root.mkdir(parents=True)
+    
+    logger.info(f"Generating {files} files in {root}")
+    rng = random.Random(seed)
+    file_languages = _choose_languages(files, languages, rng)
+    total_bytes = 0
+    language_counts: Dict[str, int] = {}
+    
+    for index, language in enumerate(file_languages):
+        layer = LAYERS[index % len(LAYERS)]
+        package = f"pkg{index // (FILES_PER_PACKAGE * len(LAYERS)):03d}"
+        directory = root / layer / package
+        directory.mkdir(parents=True, exist_ok=True)
+        
+        content = render_file(language, index, layer, package, seed).encode("utf-8")
+        (directory / f"{layer[:-1]}_{index:06d}{SYNTAX[language].extension}").write_bytes(content)
+        total_bytes += len(content)
+        language_counts[language] = language_counts.get(language, 0) + 1
+    
+    with open(root / MANIFEST_NAME, "w", encoding="utf-8") as f:
+        json.dump({"parameters": parameters, "total_bytes": total_bytes, "language_counts": language_counts}, f, indent=2)
+    
+    return CorpusInfo(root, files, seed, languages, total_bytes, language_counts)
@@ -27,17 +27,21 @@ class TreeSitterWrapper:
         """
         self.manager = TreeSitterManager(languages_dir)
     
-    def parse_code(self, code: str, language: str) -> Optional[Tree]:
+    def parse_code(self,
+                   code: Union[str, bytes],
+                   language: str,
+                   old_tree: Optional[Tree] = None) -> Optional[Tree]:
         """Parse code using tree-sitter.
         
         Args:
-            code: The source code to parse
+            code: The source code to parse, as a string or UTF-8 bytes
             language: The language of the source code
+            old_tree: Optional edited previous tree to parse incrementally from
             
         Returns:
             The tree-sitter parse tree
         """
-        return self.manager.parse_code(code, language)
+        return self.manager.parse_code(code, language, old_tree)
     
     def parse_file(self, file_path: Union[str, Path]) -> Optional[Tree]:
         """Parse a file using tree-sitter.
@@ -50,19 +54,23 @@ class TreeSitterWrapper:
         """
         return self.manager.parse_file(file_path)
     
-    def query(self, tree: Tree, query_string: str, language: str) -> List[Dict]:
+    def query(self, tree: Tree, query_string: str, language: str, budget=None) -> List[Dict]:
         """Run a query against a parse tree.
         
         Args:
             tree: The tree-sitter parse tree
             query_string: The query string in tree-sitter query language
             language: The language of the source code
+            budget: Optional FileBudget to check while the query runs
             
         Returns:
             A list of dictionaries with query results
         """
-        query = self.manager.query(tree, query_string, language)
-        captures = query.captures(tree.root_node)
+        query = self.manager.get_query(language, query_string)
+        if budget is not None:
+            captures = budget.captures(query, tree.root_node)
+        else:
+            captures = query.captures(tree.root_node)
         
         results = []
         for node, capture_name in captures:
@@ -115,17 +123,10 @@ def replace_mock_implementation() -> callable:
     """
     from .parser import CodeParser
     from .pattern_registry import registry
-    from .mock_implementation import patch_analyzer, MockTreeSitterTree
+    from .mock_implementation import MockTreeSitterTree
     
     logger.info("Replacing mock implementation with real tree-sitter implementation")
     
-    # Get the mock implementation's restore function in case it's already patched
-    restore_mock = None
-    try:
-        restore_mock = patch_analyzer()
-    except Exception as e:
-        logger.debug(f"No need to restore mock implementation: {e}")
-    
     # Create a tree-sitter wrapper
     wrapper = create_wrapper()
     
@@ -135,6 +136,7 @@ def replace_mock_implementation() -> callable:
     # Replace methods in the CodeParser class
     original_methods['CodeParser_parse_file'] = CodeParser.parse_file
     original_methods['CodeParser_parse_code'] = CodeParser.parse_code
+    original_methods['CodeParser_parse_source'] = CodeParser.parse_source
     original_methods['CodeParser_query'] = CodeParser.query
     original_methods['CodeParser_get_node_text'] = CodeParser.get_node_text
     
@@ -144,16 +146,23 @@ def replace_mock_implementation() -> callable:
         return wrapper.parse_file(file_path)
     CodeParser.parse_file = real_parse_file
     
-    # Replace the parse_code method
-    def real_parse_code(self, code, language):
+    # Replace the parse_code method; parsing goes through the parser's own
+    # manager so that its parser pool settings apply
+    def real_parse_code(self, code, language, old_tree=None, timeout=None):
         logger.debug(f"Using real tree-sitter parser for {language} code")
-        return wrapper.parse_code(code, language)
+        return self.manager.parse_code(code, language, old_tree, timeout)
     CodeParser.parse_code = real_parse_code
     
+    # Replace the parse_source method, parsing the buffer's bytes directly
+    def real_parse_source(self, source, language, old_tree=None, timeout=None):
+        logger.debug(f"Using real tree-sitter parser for {language} source")
+        return self.manager.parse_code(source.data, language, old_tree, timeout)
+    CodeParser.parse_source = real_parse_source
+    
     # Replace the query method
-    def real_query(self, tree, query_string, language):
+    def real_query(self, tree, query_string, language, budget=None):
         logger.debug(f"Using real tree-sitter query for {language}")
-        return wrapper.query(tree, query_string, language)
+        return wrapper.query(tree, query_string, language, budget)
     CodeParser.query = real_query
     
     # Replace the get_node_text method
@@ -162,50 +171,45 @@ def replace_mock_implementation() -> callable:
     CodeParser.get_node_text = real_get_node_text
     
     # Replace pattern.match methods to handle both real and mock trees
-    for pattern_name, pattern in registry.patterns.items():
-        if hasattr(pattern, 'match'):
-            original_methods[f'pattern_match_{pattern_name}'] = pattern.match
-            
-            # Define a wrapper that can handle both real and mock trees
-            def make_real_match(pattern, original_match):
-                def real_match(self, tree, code, language, file_path=None, parser=None):
-                    # Check if we got a mock tree
-                    if isinstance(tree, MockTreeSitterTree):
-                        logger.debug(f"Converting mock tree to real tree for {pattern.name}")
-                        # Parse the code with the real parser
-                        if parser is None:
-                            from .parser import CodeParser
-                            parser = CodeParser()
-                        tree = parser.parse_code(code, language)
+    def make_real_match(pattern, original_match):
+        def real_match(tree, code, language, file_path=None, parser=None, context=None):
+            # Check if we got a mock tree
+            if isinstance(tree, MockTreeSitterTree):
+                logger.debug(f"Converting mock tree to real tree for {pattern.name}")
+                # Parse the code with the real parser
+                tree = wrapper.parse_code(code, language)
                     
-                    # Call the original match method with the real tree
-                    return original_match(self, tree, code, language, file_path, parser)
+            # Call the original match method with the real tree
+            return original_match(tree, code, language, file_path, context=context)
                 
-                return real_match
+        return real_match
             
-            # Patch the method
-            original = pattern.match
-            pattern.match = make_real_match(pattern, original)
+    def patch_pattern(pattern_name, pattern):
+        if hasattr(pattern, 'match'):
+            original_methods[f'pattern_match_{pattern_name}'] = pattern.match
+            pattern.match = make_real_match(pattern, pattern.match)
+    
+    # Patterns that are loaded later are patched as they load
+    for pattern_name, pattern in registry.patterns.loaded().items():
+        patch_pattern(pattern_name, pattern)
+    registry.add_load_hook(patch_pattern)
     
     # Return a function to restore the original methods
     def restore():
         logger.info("Restoring original implementation")
+        registry.remove_load_hook(patch_pattern)
         
         # Restore CodeParser methods
         CodeParser.parse_file = original_methods['CodeParser_parse_file']
         CodeParser.parse_code = original_methods['CodeParser_parse_code']
+        CodeParser.parse_source = original_methods['CodeParser_parse_source']
         CodeParser.query = original_methods['CodeParser_query']
         CodeParser.get_node_text = original_methods['CodeParser_get_node_text']
         
         # Restore pattern.match methods
-        for pattern_name, pattern in registry.patterns.items():
-            if hasattr(pattern, 'match'):
-                key = f'pattern_match_{pattern_name}'
-                if key in original_methods:
-                    pattern.match = original_methods[key]
+        for pattern_name, pattern in registry.patterns.loaded().items():
+            key = f'pattern_match_{pattern_name}'
+            if key in original_methods:
+                pattern.match = original_methods[key]
         
-        # Restore mock implementation if it was patched
-        if restore_mock:
-            restore_mock()
-    
     return restore
\ No newline at end of file
@@ -1,5 +1,11 @@
 """
 Tree-sitter language manager for fetching, building, and loading language grammars.
+
+Grammars are loaded from the prebuilt cache written by `code-pattern
+grammars build` when possible. A grammar missing from the cache is
+fetched and compiled on first use, under a file lock shared by all
+processes, unless building is disabled for the manager or by setting
+CODE_PATTERN_ANALYZER_OFFLINE.
 """
 
 import os
@@ -8,14 +14,103 @@ import subprocess
 import importlib.util
 import sys
 import logging
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Optional, Set, Union
+from typing import Dict, Iterator, List, Optional, Set, Tuple, Union
 
 import tree_sitter
 from tree_sitter import Language, Parser
 
+from .grammar_cache import GRAMMAR_DIR_ENV, GrammarCache, is_offline
+
 logger = logging.getLogger(__name__)
 
+class ParserPool:
+    """A checkout/checkin pool of parsers for one language.
+    
+    A tree-sitter Parser keeps parsing state and must not be used by two
+    threads at once. The pool hands each caller a parser of its own,
+    creating parsers on demand up to max_size and making callers wait for
+    a free one beyond that.
+    """
+    
+    def __init__(self, language: Language, max_size: Optional[int] = None):
+        """Initialize an empty pool.
+        
+        Args:
+            language: The language the parsers are set to
+            max_size: Maximum number of parsers. If None, one is created for
+                every concurrent caller.
+        """
+        if max_size is not None and max_size < 1:
+            raise ValueError(f"Parser pool size must be at least 1, got {max_size}")
+        
+        self.language = language
+        self.max_size = max_size
+        self._idle: List[Parser] = []
+        self._created = 0
+        self._waits = 0
+        self._condition = threading.Condition()
+    
+    def acquire(self) -> Parser:
+        """Check a parser out of the pool, waiting if all are in use.
+        
+        Returns:
+            A parser for the exclusive use of the caller until it is released
+        """
+        with self._condition:
+            while not self._idle and self.max_size is not None and self._created >= self.max_size:
+                self._waits += 1
+                self._condition.wait()
+            
+            if self._idle:
+                return self._idle.pop()
+            
+            self._created += 1
+        
+        parser = Parser()
+        parser.set_language(self.language)
+        return parser
+    
+    def release(self, parser: Parser) -> None:
+        """Return a parser to the pool.
+        
+        Args:
+            parser: A parser previously returned by acquire()
+        """
+        with self._condition:
+            self._idle.append(parser)
+            self._condition.notify()
+    
+    @contextmanager
+    def parser(self) -> Iterator[Parser]:
+        """Check out a parser for the duration of a with block.
+        
+        Yields:
+            A parser for the exclusive use of the caller
+        """
+        parser = self.acquire()
+        try:
+            yield parser
+        finally:
+            self.release(parser)
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Get the usage counters of the pool.
+        
+        Returns:
+            A dictionary with the number of parsers created, idle and in use,
+            and how often a caller had to wait for a parser
+        """
+        with self._condition:
+            return {
+                'created': self._created,
+                'idle': len(self._idle),
+                'in_use': self._created - len(self._idle),
+                'waits': self._waits,
+            }
+
 class TreeSitterManager:
     """Manages tree-sitter language grammars and parsers."""
     
@@ -32,12 +127,34 @@ class TreeSitterManager:
         'rust': 'https://github.com/tree-sitter/tree-sitter-rust',
     }
     
-    def __init__(self, languages_dir: Optional[str] = None):
+    # Compiled queries, shared by all managers in the process. Compiling a
+    # query is far more expensive than running it, and the same handful of
+    # pattern queries is run against every file.
+    _query_cache: Dict[Tuple[str, int, str], tree_sitter.Query] = {}
+    _query_cache_lock = threading.Lock()
+    _query_cache_hits = 0
+    _query_cache_misses = 0
+    # Compile errors of invalid queries, so they fail fast after the first attempt
+    _query_errors: Dict[Tuple[str, int, str], Exception] = {}
+    
+    def __init__(self,
+                 languages_dir: Optional[str] = None,
+                 parser_pool_size: Optional[int] = None,
+                 grammar_cache: Optional[GrammarCache] = None,
+                 allow_build: Optional[bool] = None):
         """Initialize the tree-sitter manager.
         
         Args:
             languages_dir: Directory to store language definitions. If None,
                 uses the 'tree_sitter_languages' directory in the src directory.
+            parser_pool_size: Maximum number of parsers per language used at
+                once. If None, every concurrently parsing thread gets its own.
+            grammar_cache: Cache of prebuilt grammars. If None, uses the
+                directory named by CODE_PATTERN_ANALYZER_GRAMMAR_DIR or the
+                'prebuilt' directory in the languages directory.
+            allow_build: Whether grammars missing from the cache may be fetched
+                and compiled on first use. If None, allowed unless
+                CODE_PATTERN_ANALYZER_OFFLINE is set.
         """
         # Set up directories
         if languages_dir is None:
@@ -56,7 +173,16 @@ class TreeSitterManager:
         
         # Initialize language cache
         self.language_cache: Dict[str, Language] = {}
-        self.parser_cache: Dict[str, Parser] = {}
+        
+        self._grammar_cache = grammar_cache
+        self.allow_build = not is_offline() if allow_build is None else allow_build
+        
+        # Parsers are not thread-safe: parse_code checks one out of the
+        # language's pool, and get_parser keeps one per thread
+        self.parser_pool_size = parser_pool_size
+        self.parser_pools: Dict[str, ParserPool] = {}
+        self._parser_pools_lock = threading.Lock()
+        self._thread_parsers = threading.local()
         
         # File extension to language mapping
         self.extension_map = {
@@ -89,9 +215,21 @@ class TreeSitterManager:
         ext = os.path.splitext(str(file_path))[1].lower()
         return self.extension_map.get(ext)
     
+    @property
+    def grammar_cache(self) -> GrammarCache:
+        """The cache of prebuilt grammars, opened on first use."""
+        if self._grammar_cache is None:
+            self._grammar_cache = GrammarCache(
+                os.environ.get(GRAMMAR_DIR_ENV) or os.path.join(self.languages_dir, 'prebuilt')
+            )
+        return self._grammar_cache
+    
     def ensure_language_installed(self, language_name: str) -> bool:
         """Ensure a language grammar is installed.
         
+        Prebuilt grammars are only loaded; a grammar that has not been
+        built is fetched and compiled unless building is disabled.
+        
         Args:
             language_name: Name of the language (e.g., 'python')
             
@@ -101,21 +239,29 @@ class TreeSitterManager:
         if language_name in self.language_cache:
             return True
             
-        # Check if the language is already built
+        # Grammars from the prebuilt cache
+        library_path = self.grammar_cache.library_path(language_name)
+        if library_path and self.load_language(language_name, library_path):
+            return True
+            
+        # Grammars built into the build directory by earlier versions
         library_path = os.path.join(self.build_dir, f"{language_name}.so")
-        if os.path.exists(library_path):
-            try:
-                self.load_language(language_name, library_path)
-                return True
-            except Exception as e:
-                logger.warning(f"Failed to load existing language {language_name}: {e}")
-                # Continue to rebuild
+        if os.path.exists(library_path) and self.load_language(language_name, library_path):
+            return True
+        
+        if not self.allow_build:
+            logger.error(f"No prebuilt grammar for {language_name}; "
+                         f"run 'code-pattern grammars build' first")
+            return False
                 
         # Try to build the language
         return self.build_language(language_name)
     
     def build_language(self, language_name: str) -> bool:
-        """Build a language grammar.
+        """Build a language grammar into the prebuilt cache and load it.
+        
+        The build holds the cache's file lock, so concurrent processes
+        needing the same grammar wait for one build and then load its result.
         
         Args:
             language_name: Name of the language (e.g., 'python')
@@ -127,59 +273,82 @@ class TreeSitterManager:
             logger.error(f"Unknown language: {language_name}")
             return False
             
+        outcome = self.grammar_cache.build(self, [language_name], fetch=True)[language_name]
+        if outcome not in ("built", "up-to-date"):
+            return False
+        
+        library_path = self.grammar_cache.library_path(language_name)
+        return library_path is not None and self.load_language(language_name, library_path)
+    
+    def grammar_sources(self, language_name: str, source_root: Optional[str] = None) -> Dict[str, str]:
+        """Find the local sources of a language's grammars.
+        
+        Args:
+            language_name: Name of the language (e.g., 'python')
+            source_root: Directory holding one checkout per language. If None,
+                uses the languages directory.
+            
+        Returns:
+            A dictionary mapping each grammar name to its directory, which
+            holds a src/ directory; empty if the sources are missing or invalid
+        """
+        repo_dir = os.path.join(source_root or self.languages_dir, language_name)
+        
+        # TypeScript has separate grammars for .ts and .tsx in subdirectories
+        if language_name == 'typescript':
+            grammar_dirs = {
+                'typescript': os.path.join(repo_dir, 'typescript'),
+                'tsx': os.path.join(repo_dir, 'tsx'),
+            }
+        else:
+            grammar_dirs = {language_name: repo_dir}
+        
+        for grammar_dir in grammar_dirs.values():
+            if not self._validate_grammar_source(os.path.join(grammar_dir, 'src')):
+                return {}
+        return grammar_dirs
+    
+    def fetch_grammar(self, language_name: str, source_root: Optional[str] = None) -> bool:
+        """Clone or download the sources of a language grammar.
+        
+        Args:
+            language_name: Name of the language (e.g., 'python')
+            source_root: Directory holding one checkout per language. If None,
+                uses the languages directory.
+            
+        Returns:
+            True if the sources are present afterwards, False otherwise
+        """
+        if language_name not in self.DEFAULT_LANGUAGES:
+            logger.error(f"Unknown language: {language_name}")
+            return False
+        
         repo_url = self.DEFAULT_LANGUAGES[language_name]
-        repo_dir = os.path.join(self.languages_dir, language_name)
+        repo_dir = os.path.join(source_root or self.languages_dir, language_name)
+        if os.path.exists(repo_dir):
+            return True
+        
+        if not self.allow_build:
+            logger.error(f"Not fetching {repo_url}: grammar builds are disabled")
+            return False
         
-        # Clone the repository if it doesn't exist
-        if not os.path.exists(repo_dir):
-            try:
-                logger.info(f"Cloning {repo_url} to {repo_dir}")
-                subprocess.run(
-                    ['git', 'clone', repo_url, repo_dir],
-                    check=True, capture_output=True
-                )
-            except subprocess.CalledProcessError as e:
-                logger.error(f"Failed to clone {repo_url}: {e}")
-                
-                # Attempt to download without git if git fails
-                try:
-                    self._download_without_git(language_name, repo_url, repo_dir)
-                except Exception as dl_e:
-                    logger.error(f"Failed to download {repo_url} without git: {dl_e}")
-                    return False
-        
-        # Build the grammar
         try:
-            # Special case for TypeScript which has multiple grammars
-            if language_name == 'typescript':
-                return self._build_typescript()
+            logger.info(f"Cloning {repo_url} to {repo_dir}")
+            subprocess.run(
+                ['git', 'clone', '--depth', '1', repo_url, repo_dir],
+                check=True, capture_output=True
+            )
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.error(f"Failed to clone {repo_url}: {e}")
                 
-            # For other languages, build normally
-            logger.info(f"Building {language_name} grammar")
-            
-            # Determine the source path based on language specifics
-            src_path = self._get_src_path(language_name, repo_dir)
-            
-            # Check if the src directory has the necessary files
-            if not self._validate_grammar_source(src_path):
-                logger.error(f"Invalid grammar source directory: {src_path}")
+            # Attempt to download without git if git fails
+            try:
+                self._download_without_git(language_name, repo_url, repo_dir)
+            except Exception as dl_e:
+                logger.error(f"Failed to download {repo_url} without git: {dl_e}")
                 return False
-            
-            # Build the language
-            output_path = os.path.join(self.build_dir, f"{language_name}.so")
-            Language.build_library(
-                output_path,
-                [src_path]
-            )
-            
-            logger.info(f"Successfully built grammar for {language_name} at {output_path}")
-            
-            # Load the language
-            return self.load_language(language_name)
-            
-        except Exception as e:
-            logger.error(f"Failed to build {language_name}: {e}")
-            return False
+        
+        return True
             
     def _validate_grammar_source(self, src_path: str) -> bool:
         """Validate that a grammar source directory contains necessary files.
@@ -257,59 +426,6 @@ class TreeSitterManager:
             
         logger.info(f"Successfully downloaded {language_name} grammar to {target_dir}")
     
-    def _get_src_path(self, language_name: str, repo_dir: str) -> str:
-        """Get the source path for a language grammar.
-        
-        Args:
-            language_name: Name of the language
-            repo_dir: Directory of the language repository
-            
-        Returns:
-            The path to the grammar source directory
-        """
-        # Check for a 'src' directory
-        src_dir = os.path.join(repo_dir, 'src')
-        if os.path.exists(src_dir):
-            return src_dir
-            
-        # Otherwise, use the repo directory
-        return repo_dir
-    
-    def _build_typescript(self) -> bool:
-        """Special case for building TypeScript which has multiple grammars.
-        
-        Returns:
-            True if the build was successful, False otherwise
-        """
-        repo_dir = os.path.join(self.languages_dir, 'typescript')
-        
-        try:
-            # TypeScript has multiple parsers in different subdirectories
-            ts_src_path = os.path.join(repo_dir, 'typescript', 'src')
-            tsx_src_path = os.path.join(repo_dir, 'tsx', 'src')
-            
-            # Build TypeScript grammar
-            Language.build_library(
-                os.path.join(self.build_dir, "typescript.so"),
-                [ts_src_path]
-            )
-            
-            # Build TSX grammar
-            Language.build_library(
-                os.path.join(self.build_dir, "tsx.so"),
-                [tsx_src_path]
-            )
-            
-            # Load the languages
-            self.load_language('typescript')
-            self.load_language('tsx', os.path.join(self.build_dir, "tsx.so"))
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"Failed to build TypeScript: {e}")
-            return False
-    
     def load_language(self, language_name: str, library_path: Optional[str] = None) -> bool:
         """Load a language from a compiled grammar.
         
@@ -335,8 +451,36 @@ class TreeSitterManager:
             logger.error(f"Failed to load {language_name}: {e}")
             return False
     
+    def get_parser_pool(self, language_name: str) -> Optional[ParserPool]:
+        """Get the pool of parsers for a language.
+        
+        Args:
+            language_name: Name of the language (e.g., 'python')
+            
+        Returns:
+            The language's ParserPool or None if the language is not available
+        """
+        pool = self.parser_pools.get(language_name)
+        if pool is not None:
+            return pool
+        
+        # Ensure the language is available
+        if not self.ensure_language_installed(language_name):
+            return None
+        
+        with self._parser_pools_lock:
+            if language_name not in self.parser_pools:
+                self.parser_pools[language_name] = ParserPool(
+                    self.language_cache[language_name], self.parser_pool_size
+                )
+            return self.parser_pools[language_name]
+    
     def get_parser(self, language_name: str) -> Optional[Parser]:
-        """Get a parser for a language.
+        """Get a parser for a language, owned by the calling thread.
+        
+        The parser is cached per thread, so it must not be handed to
+        other threads. parse_code checks parsers out of the shared pool
+        instead.
         
         Args:
             language_name: Name of the language (e.g., 'python')
@@ -344,9 +488,13 @@ class TreeSitterManager:
         Returns:
             A tree-sitter Parser or None if the language is not available
         """
+        parsers = getattr(self._thread_parsers, 'parsers', None)
+        if parsers is None:
+            parsers = self._thread_parsers.parsers = {}
+        
         # Check if parser is already cached
-        if language_name in self.parser_cache:
-            return self.parser_cache[language_name]
+        if language_name in parsers:
+            return parsers[language_name]
             
         # Ensure the language is available
         if not self.ensure_language_installed(language_name):
@@ -357,24 +505,57 @@ class TreeSitterManager:
         parser.set_language(self.language_cache[language_name])
         
         # Cache the parser
-        self.parser_cache[language_name] = parser
+        parsers[language_name] = parser
         return parser
     
-    def parse_code(self, code: str, language_name: str) -> Optional[tree_sitter.Tree]:
+    def parse_code(self,
+                   code: Union[str, bytes],
+                   language_name: str,
+                   old_tree: Optional[tree_sitter.Tree] = None,
+                   timeout: Optional[float] = None) -> Optional[tree_sitter.Tree]:
         """Parse code with a specific language.
         
+        Safe to call from many threads at once; each parse uses a parser
+        checked out of the language's pool.
+        
         Args:
-            code: Code to parse
+            code: Code to parse, as a string or as already-encoded bytes
             language_name: Name of the language (e.g., 'python')
+            old_tree: Optional previous tree of the same file, already
+                adjusted with Tree.edit(), whose unchanged subtrees are reused
+            timeout: Optional number of seconds after which parsing stops
             
         Returns:
             A tree-sitter Tree or None if parsing failed
+        
+        Raises:
+            TimeoutError: If parsing took longer than the timeout
         """
-        parser = self.get_parser(language_name)
-        if parser is None:
+        pool = self.get_parser_pool(language_name)
+        if pool is None:
             return None
             
-        return parser.parse(bytes(code, 'utf-8'))
+        if isinstance(code, str):
+            code = code.encode('utf-8')
+            
+        with pool.parser() as parser:
+            if timeout is None:
+                if old_tree is not None:
+                    return parser.parse(code, old_tree)
+                return parser.parse(code)
+            
+            parser.set_timeout_micros(max(1, int(timeout * 1e6)))
+            try:
+                if old_tree is not None:
+                    return parser.parse(code, old_tree)
+                return parser.parse(code)
+            except ValueError:
+                # A parse stopped by the timeout would resume on the next
+                # call; the pooled parser has to start afresh instead
+                parser.reset()
+                raise TimeoutError(f"Parsing took longer than {timeout:.3g}s")
+            finally:
+                parser.set_timeout_micros(0)
     
     def parse_file(self, file_path: Union[str, Path]) -> Optional[tree_sitter.Tree]:
         """Parse a file.
@@ -393,15 +574,74 @@ class TreeSitterManager:
         if language_name is None:
             raise ValueError(f"Unsupported file type: {file_path}")
             
-        # Read the file
-        with open(file_path, 'r', encoding='utf-8') as f:
+        # Read the file as bytes; tree-sitter parses bytes directly
+        with open(file_path, 'rb') as f:
             code = f.read()
             
         return self.parse_code(code, language_name)
     
+    def get_language(self, language_name: str) -> Language:
+        """Get the loaded Language object for a language.
+        
+        Args:
+            language_name: Name of the language (e.g., 'python')
+            
+        Returns:
+            The tree-sitter Language
+            
+        Raises:
+            ValueError: If the language is not available
+        """
+        if language_name not in self.language_cache:
+            if not self.ensure_language_installed(language_name):
+                raise ValueError(f"Language {language_name} is not available")
+                
+        return self.language_cache[language_name]
+    
+    def get_query(self, language_name: str, query_string: str) -> tree_sitter.Query:
+        """Get a compiled Query, compiling it only on first use.
+        
+        Args:
+            language_name: Name of the language (e.g., 'python')
+            query_string: The query string in tree-sitter query language
+            
+        Returns:
+            A compiled tree-sitter Query
+            
+        Raises:
+            Exception: The compile error of an invalid query, on every call
+        """
+        language = self.get_language(language_name)
+        key = (language_name, language.language_id, query_string)
+        
+        cls = TreeSitterManager
+        with cls._query_cache_lock:
+            query = cls._query_cache.get(key)
+            if query is not None:
+                cls._query_cache_hits += 1
+                return query
+                
+            error = cls._query_errors.get(key)
+            if error is not None:
+                cls._query_cache_hits += 1
+                raise type(error)(*error.args)
+                
+            cls._query_cache_misses += 1
+            try:
+                query = language.query(query_string)
+            except Exception as e:
+                cls._query_errors[key] = e
+                raise
+            cls._query_cache[key] = query
+            
+        return query
+    
     def query(self, tree: tree_sitter.Tree, query_string: str, language_name: str) -> tree_sitter.Query:
         """Create a Query for a specific language.
         
+        The compiled query is cached, so repeated calls with the same
+        language and query string return the same Query object.
+        
         Args:
             tree: The tree-sitter Tree to query
             query_string: The query string in tree-sitter query language
@@ -410,40 +650,57 @@ class TreeSitterManager:
         Returns:
             A tree-sitter Query
         """
-        if language_name not in self.language_cache:
-            if not self.ensure_language_installed(language_name):
-                raise ValueError(f"Language {language_name} is not available")
+        return self.get_query(language_name, query_string)
                 
-        language = self.language_cache[language_name]
-        query = language.query(query_string)
+    @classmethod
+    def get_query_cache_stats(cls) -> Dict[str, int]:
+        """Get hit/miss counters for the compiled query cache.
         
-        return query
+        Returns:
+            A dictionary with 'hits', 'misses' and 'size' entries
+        """
+        with cls._query_cache_lock:
+            return {
+                'hits': cls._query_cache_hits,
+                'misses': cls._query_cache_misses,
+                'size': len(cls._query_cache),
+            }
+    
+    @classmethod
+    def clear_query_cache(cls) -> None:
+        """Drop all compiled queries and reset the cache counters."""
+        with cls._query_cache_lock:
+            cls._query_cache.clear()
+            cls._query_errors.clear()
+            cls._query_cache_hits = 0
+            cls._query_cache_misses = 0
     
     def get_node_text(self, node: tree_sitter.Node, code: Union[str, bytes]) -> str:
         """Get the text of a node from the original source code.
         
         Args:
             node: A tree-sitter node
-            code: The original source code
+            code: The original source code (string, bytes or SourceBuffer)
             
         Returns:
             The text corresponding to the node
         """
-        # Convert code to bytes if it's a string
-        if isinstance(code, str):
-            code_bytes = bytes(code, 'utf-8')
-        else:
-            code_bytes = code
-        
         try:
-            # Try using node.text directly if available
-            if hasattr(node, 'text'):
-                if isinstance(node.text, bytes):
-                    return node.text.decode('utf-8')
-                if isinstance(node.text, str):
-                    return node.text
+            # Nodes of trees parsed from bytes carry their own text
+            text = getattr(node, 'text', None)
+            if isinstance(text, bytes):
+                return text.decode('utf-8', errors='replace')
+            if isinstance(text, str):
+                return text
             
             # Extract from the original code using byte offsets
+            if hasattr(code, 'span'):
+                code_bytes = code.data
+            elif isinstance(code, str):
+                code_bytes = code.encode('utf-8')
+            else:
+                code_bytes = code
+        
             start_byte = node.start_byte
             end_byte = node.end_byte
             
@@ -463,4 +720,20 @@ class TreeSitterManager:
         Returns:
             A set of language names
         """
-        return set(self.DEFAULT_LANGUAGES.keys())
\ No newline at end of file
+        return set(self.DEFAULT_LANGUAGES.keys())
+
+
+_default_manager: Optional[TreeSitterManager] = None
+_default_manager_lock = threading.Lock()
+
+def get_default_manager() -> TreeSitterManager:
+    """Get the process-wide TreeSitterManager for the default languages directory.
+    
+    Returns:
+        A shared TreeSitterManager instance
+    """
+    global _default_manager
+    with _default_manager_lock:
+        if _default_manager is None:
+            _default_manager = TreeSitterManager()
+        return _default_manager
@@ -5,14 +5,15 @@ Utility functions for the Code Pattern Analyzer.
 import os
 import json
 import logging
-from typing import Dict, List, Optional, Union, Set, Tuple
+from typing import Dict, Iterable, List, Optional, Union, Set, Tuple
 from pathlib import Path
 import difflib
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import datetime
 
 from .analyzer import CodeAnalyzer
+from .execution import validate_execution_mode
+from .match import to_json_default
 
 logger = logging.getLogger(__name__)
 
@@ -56,7 +57,7 @@ class AnalysisComparer:
                 "files": [r.get("file") for r in results],
                 "results": results,
                 "summary": self._generate_comparison_summary(results)
-            }, indent=2)
+            }, indent=2, default=to_json_default)
         
         elif output_format == "text":
             report = ["# File Comparison Report"]
@@ -157,15 +158,19 @@ class BatchAnalyzer:
     
     def __init__(self, 
                  analyzer: Optional[CodeAnalyzer] = None, 
-                 max_workers: int = 4):
+                 max_workers: Optional[int] = None,
+                 execution: str = "thread"):
         """Initialize the batch analyzer.
         
         Args:
             analyzer: Optional analyzer to use. If None, creates a new one.
-            max_workers: Maximum number of parallel workers
+            max_workers: Number of parallel workers. If None, adapts to the
+                available CPUs and measured throughput.
+            execution: Execution mode, "thread" or "process"
         """
         self.analyzer = analyzer or CodeAnalyzer()
         self.max_workers = max_workers
+        self.execution = validate_execution_mode(execution)
     
     def analyze_files(self, 
                      file_paths: List[Union[str, Path]],
@@ -181,15 +186,9 @@ class BatchAnalyzer:
         Returns:
             List of analysis results
         """
-        results = []
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_path = {
-                executor.submit(self.analyzer.analyze_file, path, pattern_name, category): path
-                for path in file_paths
-            }
-            
-            for future in as_completed(future_to_path):
-                results.append(future.result())
+        results = self.analyzer.analyze_files(
+            file_paths, pattern_name, category, self.max_workers, self.execution
+        )
                 
         # Sort results by filename
         results.sort(key=lambda r: str(r.get('file', '')))
@@ -224,7 +223,8 @@ class BatchAnalyzer:
                 category=category,
                 exclude_dirs=exclude_dirs,
                 file_extensions=file_extensions,
-                max_workers=self.max_workers
+                max_workers=self.max_workers,
+                execution=self.execution
             )
             
             all_results.extend(results)
@@ -248,29 +248,24 @@ class ReportGenerator:
         self.output_dir = output_dir or os.getcwd()
     
     def generate_report(self, 
-                       results: List[Dict],
+                       results: Iterable[Dict],
                        output_format: str = "html",
                        title: str = "Code Pattern Analysis Report",
                        filename: Optional[str] = None) -> str:
         """Generate a report from analysis results.
         
+        JSON, NDJSON and text reports are written as the results arrive, so
+        results can be streamed from CodeAnalyzer.iter_analyze_directory.
+        
         Args:
-            results: List of analysis results
-            output_format: Output format (json, text, html)
+            results: Analysis results
+            output_format: Output format (json, ndjson, text, html)
             title: Title for the report
             filename: Optional filename to save the report. If None, generates one.
             
         Returns:
             Path to the saved report file
         """
-        # Generate the report content
-        if output_format == "html":
-            from .visualization import HTMLReport
-            report_generator = HTMLReport(title=title, include_charts=True)
-            content = report_generator.generate(results)
-        else:
-            content = self.analyzer.generate_report(results, output_format)
-        
         # Generate filename if not provided
         if not filename:
             timestamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
@@ -282,6 +277,11 @@ class ReportGenerator:
         # Save the report
         output_path = os.path.join(self.output_dir, filename)
         with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+            if output_format == "html":
+                from .visualization import HTMLReport
+                report_generator = HTMLReport(title=title, include_charts=True)
+                f.write(report_generator.generate(list(results)))
+            else:
+                self.analyzer.write_report(results, f, output_format)
         
-        return output_path
\ No newline at end of file
+        return output_path
@@ -9,8 +9,13 @@ from .architecture_visualizer import (
     ArchitectureVisualizer,
     LayeredArchitectureVisualizer
 )
+from .html_report import HTMLReport, new_summary, fold_summary, summarize_results
 
 __all__ = [
     'ArchitectureVisualizer', 
-    'LayeredArchitectureVisualizer'
+    'LayeredArchitectureVisualizer',
+    'HTMLReport',
+    'new_summary',
+    'fold_summary',
+    'summarize_results'
 ]
\ No newline at end of file
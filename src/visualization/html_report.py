@@ -4,7 +4,81 @@ Visualization components for the code pattern analyzer.
 
 import os
 import json
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterable, List, Optional, Union
+from collections.abc import Mapping
+
+from ..match import to_json_default
+from ..result_store import ResultStore
+
+def new_summary() -> Dict:
+    """Create empty summary aggregates for a set of analysis results.
+    
+    Returns:
+        A dictionary of counters to update with fold_summary
+    """
+    return {
+        "files_count": 0,
+        "error_count": 0,
+        "total_patterns": 0,
+        "pattern_counts": {},
+        "type_counts": {},
+        "language_counts": {},
+    }
+
+def fold_summary(summary: Dict, result: Dict) -> Dict:
+    """Add the analysis result of one file to summary aggregates.
+    
+    Args:
+        summary: Aggregates from new_summary, updated in place
+        result: The analysis result of a file
+        
+    Returns:
+        The updated aggregates
+    """
+    if "error" in result:
+        summary["error_count"] += 1
+        return summary
+    
+    summary["files_count"] += 1
+    
+    if "language" in result:
+        language_counts = summary["language_counts"]
+        language = result["language"]
+        language_counts[language] = language_counts.get(language, 0) + 1
+    
+    if "summary" in result:
+        file_summary = result["summary"]
+        summary["total_patterns"] += file_summary.get("total_patterns", 0)
+        
+        # Update pattern counts
+        pattern_counts = summary["pattern_counts"]
+        for pattern, count in file_summary.get("pattern_counts", {}).items():
+            pattern_counts[pattern] = pattern_counts.get(pattern, 0) + count
+        
+        # Update type counts
+        type_counts = summary["type_counts"]
+        for type_name, count in file_summary.get("type_counts", {}).items():
+            type_counts[type_name] = type_counts.get(type_name, 0) + count
+    
+    return summary
+
+def summarize_results(results: Union[Iterable[Dict], ResultStore]) -> Dict:
+    """Compute the summary aggregates of a set of analysis results.
+    
+    Args:
+        results: Analysis results, consumed one at a time, or a ResultStore,
+            whose columns are counted at once
+        
+    Returns:
+        The summary aggregates
+    """
+    if isinstance(results, ResultStore):
+        return results.summary()
+    
+    summary = new_summary()
+    for result in results:
+        fold_summary(summary, result)
+    return summary
 
 class HTMLReport:
     """Generate HTML reports with interactive visualizations."""
@@ -21,11 +95,11 @@ class HTMLReport:
         self.title = title
         self.include_charts = include_charts
         
-    def generate(self, results: List[Dict]) -> str:
+    def generate(self, results: Union[List[Dict], ResultStore]) -> str:
         """Generate an HTML report from analysis results.
         
         Args:
-            results: List of analysis results
+            results: List of analysis results, or a ResultStore
             
         Returns:
             HTML report as a string
@@ -70,45 +144,32 @@ class HTMLReport:
         
         return '\n'.join(html)
     
-    def _generate_summary_section(self, results: List[Dict]) -> str:
+    def _generate_summary_section(self, results: Union[List[Dict], ResultStore]) -> str:
         """Generate a summary section for multiple files.
         
         Args:
-            results: List of analysis results
+            results: List of analysis results, or a ResultStore
             
         Returns:
             HTML for the summary section
         """
-        # Count patterns across all files
-        total_patterns = 0
-        pattern_counts = {}
-        type_counts = {}
-        language_counts = {}
-        files_count = 0
-        error_count = 0
+        return self.render_summary_section(summarize_results(results))
+    
+    def render_summary_section(self, summary: Dict) -> str:
+        """Render a summary section from precomputed aggregates.
         
-        for result in results:
-            if "error" in result:
-                error_count += 1
-                continue
-                
-            files_count += 1
-            
-            if "language" in result:
-                language = result["language"]
-                language_counts[language] = language_counts.get(language, 0) + 1
+        Args:
+            summary: Aggregates from summarize_results or load_ndjson_summary
             
-            if "summary" in result:
-                summary = result["summary"]
-                total_patterns += summary.get("total_patterns", 0)
-                
-                # Update pattern counts
-                for pattern, count in summary.get("pattern_counts", {}).items():
-                    pattern_counts[pattern] = pattern_counts.get(pattern, 0) + count
-                
-                # Update type counts
-                for type_name, count in summary.get("type_counts", {}).items():
-                    type_counts[type_name] = type_counts.get(type_name, 0) + count
+        Returns:
+            HTML for the summary section
+        """
+        files_count = summary["files_count"]
+        error_count = summary["error_count"]
+        total_patterns = summary["total_patterns"]
+        pattern_counts = summary["pattern_counts"]
+        type_counts = summary["type_counts"]
+        language_counts = summary["language_counts"]
         
         # Generate the summary HTML
         html = [
@@ -281,8 +342,8 @@ class HTMLReport:
                         if key in ("name", "type", "line", "column", "file"):
                             continue
                             
-                        if isinstance(value, dict):
-                            html.append(f'<div class="match-detail"><span class="detail-key">{key}</span>: <pre>{json.dumps(value, indent=2)}</pre></div>')
+                        if isinstance(value, Mapping):
+                            html.append(f'<div class="match-detail"><span class="detail-key">{key}</span>: <pre>{json.dumps(value, indent=2, default=to_json_default)}</pre></div>')
                         else:
                             html.append(f'<div class="match-detail"><span class="detail-key">{key}</span>: {value}</div>')
                     
@@ -29,6 +29,8 @@ except ImportError:
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from src.analyzer import CodeAnalyzer
+from src.match import to_json_default
+from src.result_store import ResultStore
 from src.flow.control_flow import ControlFlowAnalyzer
 from src.flow.data_flow import DataFlowAnalyzer
 from src.metrics.complexity.complexity_analyzer import ComplexityAnalyzer
@@ -250,7 +252,7 @@ def create_dashboard_app():
                 return html.Div([
                     html.P(f"Loaded file: {filename}", className="text-success"),
                     html.P(f"Analysis target: {results.get('target', 'Unknown')}")
-                ]), json.dumps(results)
+                ]), json.dumps(results, default=to_json_default)
             else:
                 return html.P(f"Invalid file type. Please upload a JSON file.", className="text-danger"), ""
         
@@ -287,6 +289,7 @@ def create_dashboard_app():
             if 'patterns' in analysis_types:
                 code_analyzer = CodeAnalyzer(use_mock=False)
                 results["patterns"] = code_analyzer.analyze_directory(project_path)
+                results["pattern_summary"] = ResultStore.from_results(results["patterns"]).summary()
             
             if 'flow' in analysis_types:
                 # Control flow analysis
@@ -313,7 +316,7 @@ def create_dashboard_app():
             return html.Div([
                 html.P(f"Analysis completed for: {project_path}", className="text-success"),
                 html.P(f"Included analyses: {include}")
-            ]), json.dumps(results)
+            ]), json.dumps(results, default=to_json_default)
         
         except Exception as e:
             import traceback
@@ -376,6 +379,20 @@ def create_dashboard_app():
     return app
 
 
+def count_patterns(results: Dict[str, Any]) -> int:
+    """Get the number of pattern matches in the analysis results.
+    
+    Args:
+        results: Analysis results
+        
+    Returns:
+        The total number of matches, from the pattern summary if there is one
+    """
+    if "pattern_summary" in results:
+        return results["pattern_summary"]["total_patterns"]
+    return ResultStore.from_results(results["patterns"]).match_count
+
+
 def create_overview_card(results: Dict[str, Any]) -> html.Div:
     """Create an overview card for the dashboard.
     
@@ -393,7 +410,7 @@ def create_overview_card(results: Dict[str, Any]) -> html.Div:
     
     # Patterns count
     if "patterns" in results:
-        issues_count["Patterns"] = len(results["patterns"])
+        issues_count["Patterns"] = count_patterns(results)
     
     # Control flow issues
     if "control_flow" in results:
@@ -504,7 +521,7 @@ def create_summary_content(results: Dict[str, Any]) -> html.Div:
     
     # Patterns count
     if "patterns" in results:
-        patterns_count = len(results["patterns"])
+        patterns_count = count_patterns(results)
         metrics.append(create_metric_card("Patterns Detected", patterns_count, "primary"))
     
     # Control & data flow issues
@@ -593,7 +610,7 @@ def create_summary_chart(results: Dict[str, Any]) -> go.Figure:
     # Patterns count
     if "patterns" in results:
         categories.append("Patterns")
-        values.append(len(results["patterns"]))
+        values.append(count_patterns(results))
     
     # Control flow issues
     if "control_flow" in results:
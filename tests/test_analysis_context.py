@@ -0,0 +1,72 @@
+import unittest
+from unittest import mock
+
+from src.analyzer import CodeAnalyzer
+from src.analysis_context import AnalysisContext
+from src.parser import CodeParser
+from src.pattern_base import QueryBasedPattern
+from src.patterns.code_smells import LongMethodPattern
+from src.source_buffer import SourceBuffer
+
+SAMPLE = b'''
+class Service:
+    def handle(self, request):
+        return request
+
+def helper(value):
+    return value
+'''
+
+class TestAnalysisContext(unittest.TestCase):
+    
+    def setUp(self):
+        self.analyzer = CodeAnalyzer()
+        if not self.analyzer.parser.manager.ensure_language_installed('python'):
+            self.skipTest("Python grammar not available")
+        self.source = SourceBuffer(SAMPLE)
+        self.tree = self.analyzer.parser.parse_source(self.source, 'python')
+    
+    def test_matching_constructs_no_parsers(self):
+        with mock.patch.object(CodeParser, '__init__', side_effect=AssertionError("new parser")):
+            results = self.analyzer.pattern_recognizer.recognize(
+                self.tree, self.source, 'python', file_path='sample.py'
+            )
+        self.assertIn('function_definition', results)
+    
+    def test_query_results_are_shared_within_a_file(self):
+        context = AnalysisContext(self.tree, self.source, 'python', 'sample.py', self.analyzer.parser)
+        pattern = LongMethodPattern(max_lines=0)
+        
+        with mock.patch.object(self.analyzer.parser, 'query', wraps=self.analyzer.parser.query) as query:
+            first = pattern.match(self.tree, self.source.data, 'python', 'sample.py', context=context)
+            second = pattern.match(self.tree, self.source.data, 'python', 'sample.py', context=context)
+        
+        self.assertEqual(first, second)
+        self.assertEqual({m['name'] for m in first}, {'handle', 'helper'})
+        self.assertEqual(query.call_count, 2)
+
+    def test_composites_reuse_sub_pattern_matches(self):
+        recognizer = self.analyzer.pattern_recognizer
+        patterns = [recognizer.registry.get_pattern(name) for name in ('function_definition', 'all_functions')]
+        processed = []
+        original = QueryBasedPattern._process_query_results
+        
+        def record(pattern, *args, **kwargs):
+            processed.append(pattern.name)
+            return original(pattern, *args, **kwargs)
+        
+        with mock.patch.object(QueryBasedPattern, '_process_query_results', autospec=True, side_effect=record):
+            results = recognizer.match_patterns(self.tree, self.source, 'python', patterns, 'sample.py')
+        
+        # Every sub-pattern is matched once, whether standalone or in the composite
+        self.assertEqual(len(processed), len(set(processed)))
+        relabelled = [m for m in results['all_functions'] if m['sub_pattern'] == 'function_definition']
+        self.assertEqual(
+            relabelled,
+            [dict(m, composite_type='all_functions', sub_pattern='function_definition')
+             for m in results['function_definition']]
+        )
+        self.assertNotIn('composite_type', results['function_definition'][0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,11 @@
 import unittest
 from pathlib import Path
 import tempfile
+import time
 import os
 
 from src.analyzer import CodeAnalyzer
+from src.source_buffer import SourceBuffer
 
 class TestCodeAnalyzer(unittest.TestCase):
     
@@ -27,5 +29,88 @@ class TestCodeAnalyzer(unittest.TestCase):
         report = self.analyzer.generate_report(results, 'json')
         self.assertIn('test.py', report)
 
+    def test_source_buffer_decodes_lazily(self):
+        # Spans are decoded on their own without materializing the full text
+        source = SourceBuffer('x = "caf\u00e9"\ndef f(): pass\n'.encode('utf-8'))
+        start = source.data.index(b'def')
+        self.assertEqual(source.span(start, start + 3), 'def')
+        self.assertFalse(source.is_decoded)
+        self.assertIn('caf\u00e9', source.text)
+        self.assertTrue(source.is_decoded)
+        self.assertIs(SourceBuffer.wrap(source), source)
+        
+    def test_analyze_file_query_patterns_skip_full_decode(self):
+        # Query-based patterns get the raw bytes, so the file is never decoded whole
+        if not self.analyzer.parser.manager.ensure_language_installed('python'):
+            self.skipTest("Python grammar not available")
+            
+        source = SourceBuffer(b"def f(a, b):\n    return a\n")
+        tree = self.analyzer.parser.parse_source(source, 'python')
+        patterns = self.analyzer.pattern_recognizer.recognize(
+            tree, source, 'python', pattern_name='function_definition'
+        )
+        self.assertEqual([m['name'] for m in patterns['function_definition']], ['f'])
+        self.assertFalse(source.is_decoded)
+
+    def test_process_execution_matches_thread_execution(self):
+        # Both executors return the same results in the same order
+        if not self.analyzer.parser.manager.ensure_language_installed('python'):
+            self.skipTest("Python grammar not available")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            for i in range(6):
+                Path(tmp, f"module_{i}.py").write_text(f"def func_{i}(x):\n    return x\n")
+
+            threaded = self.analyzer.analyze_directory(tmp, pattern_name='function_definition')
+            processed = self.analyzer.analyze_directory(
+                tmp, pattern_name='function_definition', max_workers=2, execution='process'
+            )
+
+        self.assertEqual(processed, threaded)
+        self.assertEqual(len(processed), 6)
+
+        with self.assertRaises(ValueError):
+            self.analyzer.analyze_files([], execution='fiber')
+
+    def test_iter_bounded_limits_work_in_flight(self):
+        # Results come back in input order and the window is never exceeded
+        from concurrent.futures import ThreadPoolExecutor
+        from src.execution import iter_bounded
+
+        in_flight = []
+        peak = []
+
+        def task(i):
+            time.sleep(0.001 * (i % 3))
+            return i
+
+        def submit(i):
+            in_flight.append(i)
+            peak.append(len(in_flight) - len(seen))
+            return executor.submit(task, i)
+
+        seen = []
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for result in iter_bounded(submit, range(50), max_in_flight=5, ordered=True):
+                seen.append(result)
+
+        self.assertEqual(seen, list(range(50)))
+        self.assertLessEqual(max(peak), 5)
+
+    def test_iter_analyze_directory_streams_results(self):
+        # The ordered stream matches analyze_directory
+        with tempfile.TemporaryDirectory() as tmp:
+            for i in range(5):
+                Path(tmp, f"module_{i}.py").write_text(f"def func_{i}(x):\n    return x\n")
+
+            expected = self.analyzer.analyze_directory(tmp, pattern_name='function_definition')
+            stream = self.analyzer.iter_analyze_directory(
+                tmp, pattern_name='function_definition', ordered=True, max_in_flight=2
+            )
+            self.assertEqual(list(stream), expected)
+
+            report = "".join(self.analyzer.iter_report(iter(expected), 'json'))
+            self.assertEqual(report, self.analyzer.generate_report(expected, 'json'))
+
 if __name__ == '__main__':
     unittest.main()
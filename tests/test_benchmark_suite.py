@@ -0,0 +1,67 @@
+import unittest
+import copy
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from src.benchmark_suite import compare_results, run_benchmarks
+from src.synthetic_corpus import MANIFEST_NAME, SYNTAX, generate_corpus
+
+def read_tree(root):
+    return {
+        str(path.relative_to(root)): path.read_bytes()
+        for path in sorted(Path(root).rglob("*")) if path.is_file() and path.name != MANIFEST_NAME
+    }
+
+class TestBenchmarkSuite(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def test_corpus_is_deterministic(self):
+        first = generate_corpus(self.root / "first", files=60, seed=7)
+        second = generate_corpus(self.root / "second", files=60, seed=7)
+        other = generate_corpus(self.root / "other", files=60, seed=8)
+        
+        self.assertEqual(read_tree(first.path), read_tree(second.path))
+        self.assertNotEqual(read_tree(first.path), read_tree(other.path))
+        self.assertEqual(sum(first.language_counts.values()), 60)
+        self.assertTrue(set(first.language_counts) <= set(SYNTAX))
+        
+        # Asking for the same corpus again reuses the files
+        marker = next(path for path in first.path.rglob("*.py"))
+        mtime = os.stat(marker).st_mtime_ns
+        self.assertEqual(generate_corpus(first.path, files=60, seed=7), first)
+        self.assertEqual(os.stat(marker).st_mtime_ns, mtime)
+    
+    def test_run_and_compare_against_baseline(self):
+        corpus = generate_corpus(self.root / "corpus", files=20, seed=0, languages=["python", "javascript"])
+        results = run_benchmarks(corpus, ["discovery", "match", "report"], pattern_sample=5)
+        
+        self.assertEqual(list(results["stages"]), ["discovery", "match", "report"])
+        self.assertEqual(results["stages"]["discovery"]["items"], 20)
+        self.assertEqual(results["stages"]["match"]["items"], 20)
+        self.assertGreater(results["stages"]["match"]["matches"], 0)
+        self.assertIn("function_definition", results["patterns"])
+        json.dumps(results)
+        
+        baseline = copy.deepcopy(results)
+        self.assertFalse(any(c.regressed for c in compare_results(results, baseline)))
+        
+        # A stage twice as slow as its baseline is a regression, unless it is too fast to measure
+        baseline["stages"]["match"]["seconds"] = results["stages"]["match"]["seconds"] / 2
+        regressed = [c.stage for c in compare_results(results, baseline, 0.25, min_seconds=0) if c.regressed]
+        self.assertEqual(regressed, ["match"])
+        self.assertEqual([c for c in compare_results(results, baseline, 0.25, min_seconds=3600) if c.regressed], [])
+        
+        baseline["corpus"]["seed"] = 1
+        with self.assertRaises(ValueError):
+            compare_results(results, baseline)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+import unittest
+import os
+import tempfile
+import time
+from unittest import mock
+
+from src.analyzer import CodeAnalyzer
+from src.budget import BUDGET_EXCEEDED, query_ranges, QUARANTINE_NAME, QUARANTINED, AnalysisLimits, BudgetExceeded, Quarantine
+from src.cli.main import main
+from src.parser import CodeParser
+
+PYTHON_CODE = """
+def outer(items):
+    for item in items:
+        if item:
+            while item:
+                item -= 1
+    return items
+"""
+
+class TestBudget(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "nested.py")
+        with open(self.path, "w") as f:
+            f.write(PYTHON_CODE)
+        self.quarantine_path = os.path.join(self.tmp.name, "quarantine.json")
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def test_exceeded_budget_is_skipped_and_quarantined(self):
+        analyzer = CodeAnalyzer(
+            limits=AnalysisLimits(max_captures=1), quarantine=Quarantine(self.quarantine_path)
+        )
+        result = analyzer.analyze_file(self.path)
+        self.assertEqual(result["skipped"], BUDGET_EXCEEDED)
+        self.assertTrue(result["error"].startswith("Skipped: "))
+        self.assertNotIn("patterns", result)
+        
+        # The quarantine is persisted, and a later run skips the file
+        entries = Quarantine(self.quarantine_path).entries()
+        self.assertEqual(list(entries), [self.path])
+        analyzer = CodeAnalyzer(quarantine=Quarantine(self.quarantine_path))
+        self.assertEqual(analyzer.analyze_file(self.path)["skipped"], QUARANTINED)
+        
+        # ...until the file changes
+        with open(self.path, "a") as f:
+            f.write("\nprint('changed')\n")
+        self.assertIn("patterns", analyzer.analyze_file(self.path))
+    
+    def test_read_only_quarantine_records_nothing(self):
+        quarantine = Quarantine(self.quarantine_path, read_only=True)
+        analyzer = CodeAnalyzer(limits=AnalysisLimits(max_captures=1), quarantine=quarantine)
+        self.assertEqual(analyzer.analyze_file(self.path)["skipped"], BUDGET_EXCEEDED)
+        self.assertEqual(quarantine.entries(), {})
+    
+    def test_codebase_commands_apply_budget(self):
+        cache_dir = os.path.join(self.tmp.name, "cache")
+        output = os.path.join(self.tmp.name, "anti-patterns.json")
+        self.assertEqual(main(["anti-patterns", self.tmp.name, "--max-captures", "1", "--cache-dir", cache_dir,
+                               "-f", "json", "-o", output]), 0)
+        self.assertEqual(list(Quarantine(os.path.join(cache_dir, QUARANTINE_NAME)).entries()), [self.path])
+    
+    def test_time_budget(self):
+        budget = AnalysisLimits(file_seconds=0.01).start()
+        budget.check("starting")
+        time.sleep(0.02)
+        with self.assertRaises(BudgetExceeded):
+            budget.check("matching")
+        
+        # An exceeded budget stays exceeded
+        with self.assertRaises(BudgetExceeded):
+            budget.check_captures(0)
+        
+        # Without limits the results are unchanged
+        self.assertEqual(
+            CodeAnalyzer(limits=None).analyze_file(self.path),
+            CodeAnalyzer().analyze_file(self.path)
+        )
+    
+    def test_query_runs_in_ranges(self):
+        parser = CodeParser()
+        code = "\n".join(f"def f{i}(x):\n    return g(x, {i})\n" for i in range(20))
+        tree = parser.parse_code(code, "python")
+        query = parser.manager.get_query("python", "(call function: (identifier) @name) (function_definition) @function")
+        
+        ranges = query_ranges(tree.root_node, 1)
+        self.assertEqual(len(ranges), 20)
+        self.assertEqual(ranges[0][0], 0)
+        self.assertEqual(ranges[-1][1], tree.root_node.end_byte)
+        
+        # Split into ranges, the query returns what a single run returns
+        expected = sorted((node.id, name) for node, name in query.captures(tree.root_node))
+        with mock.patch("src.budget.QUERY_RANGE_BYTES", 1):
+            captures = AnalysisLimits().start().captures(query, tree.root_node)
+        self.assertEqual(sorted((node.id, name) for node, name in captures), expected)
+        
+        with self.assertRaises(BudgetExceeded):
+            AnalysisLimits(max_captures=10).start().captures(query, tree.root_node)
+    
+    def test_process_mode_stops_a_stuck_worker(self):
+        # A query that runs for minutes inside tree-sitter, where the worker
+        # cannot check its budget
+        params = ", ".join(f"p{i}" for i in range(18))
+        assignments = "".join(f"        self.a{i} = p{i}\n" for i in range(18))
+        slow_path = os.path.join(self.tmp.name, "slow.py")
+        with open(slow_path, "w") as f:
+            f.write(f"class Slow:\n    def __init__(self, {params}):\n{assignments}")
+        
+        analyzer = CodeAnalyzer(
+            limits=AnalysisLimits(file_seconds=0.5), quarantine=Quarantine(self.quarantine_path)
+        )
+        started = time.perf_counter()
+        results = analyzer.analyze_directory(self.tmp.name, pattern_name="design_patterns",
+                                             max_workers=1, execution="process")
+        self.assertLess(time.perf_counter() - started, 30)
+        
+        by_file = {result["file"]: result for result in results}
+        self.assertEqual(by_file[slow_path]["skipped"], BUDGET_EXCEEDED)
+        self.assertIn("patterns", by_file[self.path])
+        self.assertEqual(list(Quarantine(self.quarantine_path).entries()), [slow_path])
+    
+    def test_parse_timeout(self):
+        parser = CodeParser()
+        code = "x = [" + ", ".join(str(i) for i in range(200000)) + "]\n"
+        with self.assertRaises(TimeoutError):
+            parser.parse_code(code, "python", timeout=1e-6)
+        
+        # The pooled parser starts afresh after a timeout
+        tree = parser.parse_code(PYTHON_CODE, "python", timeout=10)
+        self.assertFalse(tree.root_node.has_error)
+
+if __name__ == '__main__':
+    unittest.main()
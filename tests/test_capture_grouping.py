@@ -0,0 +1,55 @@
+import unittest
+from unittest import mock
+import random
+
+from src import pattern_base
+from src.pattern_base import QueryBasedPattern
+
+class FakeNode:
+
+    def __init__(self, row, column):
+        self.text = f"node_{row}_{column}".encode('utf-8')
+        self.start_point = (row, column)
+        self.end_point = (row, column + 5)
+
+class LinearGroupIndex:
+    """Reference grouping scanning every group, as before the index."""
+    
+    def __init__(self):
+        self.groups = []
+    
+    def add(self, line, key):
+        self.groups.append((line, key))
+    
+    def closest(self, line):
+        closest_key = None
+        closest_distance = float('inf')
+        for group_line, key in self.groups:
+            distance = abs(group_line - line)
+            if distance < closest_distance:
+                closest_distance = distance
+                closest_key = key
+        return closest_key, closest_distance
+
+class TestCaptureGrouping(unittest.TestCase):
+
+    def test_grouping_matches_linear_scan(self):
+        pattern = QueryBasedPattern("grouping_test", "Test", ["python"], {"python": "(identifier) @name"})
+        rng = random.Random(42)
+        
+        for _ in range(20):
+            # Few distinct lines and out-of-order captures produce many ties
+            results = []
+            for _ in range(300):
+                capture = rng.choice(['name', 'class_name', 'params', 'body', 'value'])
+                node = FakeNode(rng.randrange(0, 120), rng.randrange(0, 3))
+                results.append({'capture': capture, 'node': node})
+            
+            expected_results = [dict(result) for result in results]
+            with mock.patch.object(pattern_base, '_CaptureGroupIndex', LinearGroupIndex):
+                expected = pattern._process_query_results(expected_results, "", "python", "x.py")
+            
+            self.assertEqual(pattern._process_query_results(results, "", "python", "x.py"), expected)
+
+if __name__ == '__main__':
+    unittest.main()
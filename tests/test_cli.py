@@ -0,0 +1,25 @@
+import unittest
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from src.cli.main import main
+
+EXAMPLES = Path(__file__).parent.parent / "examples"
+
+class TestCLI(unittest.TestCase):
+
+    def test_anti_patterns_on_examples(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            output = os.path.join(tmp, "anti_patterns.json")
+            self.assertEqual(main(["anti-patterns", str(EXAMPLES), "--format", "json",
+                                   "--no-cache", "--output", output]), 0)
+            with open(output) as f:
+                report = json.load(f)
+        
+        self.assertIn("anti_patterns", report)
+        self.assertIn("overall_severity", report)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -20,7 +20,7 @@ class TestEnhancedPatternDetection(unittest.TestCase):
     def setUp(self):
         """Set up the test environment."""
         # Register the enhanced patterns for testing
-        self.original_registry = registry.patterns.copy()
+        self.original_registry = registry.snapshot()
         registry.register(StrategyPatternPythonEnhanced(), ["design_patterns"])
         registry.register(StrategyPatternEnhanced(), ["design_patterns"])
         
@@ -39,7 +39,7 @@ class TestEnhancedPatternDetection(unittest.TestCase):
     def tearDown(self):
         """Clean up after tests."""
         # Restore the original registry
-        registry.patterns = self.original_registry
+        registry.restore(self.original_registry)
 
     def test_repository_based_strategy_detection(self):
         """Test detection of repository-based Strategy pattern."""
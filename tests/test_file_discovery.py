@@ -0,0 +1,80 @@
+import unittest
+from pathlib import Path
+import tempfile
+
+from src.file_discovery import FileDiscovery, parse_ignore_rule, is_ignored, IgnoreFile
+
+class TestFileDiscovery(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def write(self, rel_path, contents):
+        path = self.root / rel_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if isinstance(contents, bytes):
+            path.write_bytes(contents)
+        else:
+            path.write_text(contents)
+        return path
+    
+    def test_ignore_rules(self):
+        rules = [parse_ignore_rule(line) for line in (
+            "# comment", "*.log", "!keep.log", "build/", "/dist", "docs/**/*.tmp"
+        )]
+        ignore_file = IgnoreFile("", [rule for rule in rules if rule])
+        
+        def ignored(path, is_dir=False):
+            return is_ignored([ignore_file], path, is_dir)
+        
+        self.assertTrue(ignored("a/b/debug.log"))
+        self.assertFalse(ignored("a/keep.log"))
+        self.assertTrue(ignored("src/build", is_dir=True))
+        self.assertFalse(ignored("src/build"))
+        self.assertTrue(ignored("dist"))
+        self.assertFalse(ignored("src/dist"))
+        self.assertTrue(ignored("docs/x.tmp"))
+        self.assertTrue(ignored("docs/a/b/x.tmp"))
+        
+        # Rules of a nested ignore file override their parents
+        nested = IgnoreFile("pkg", [parse_ignore_rule("!*.log")])
+        self.assertFalse(is_ignored([ignore_file, nested], "pkg/debug.log", False))
+        self.assertTrue(is_ignored([ignore_file, nested], "other/debug.log", False))
+    
+    def test_discover_skips_ignored_and_unanalyzable_files(self):
+        self.write(".gitignore", "generated_dir/\n*.skip.py\n")
+        self.write("pkg/.ignore", "local.py\n")
+        kept = self.write("pkg/module.py", "def f():\n    return 1\n")
+        self.write("pkg/local.py", "x = 1\n")
+        self.write("pkg/other.skip.py", "x = 1\n")
+        self.write("generated_dir/a.py", "x = 1\n")
+        self.write("node_modules/lib/index.js", "module.exports = 1;\n")
+        self.write("blob.py", b"\x00\x01\x02")
+        self.write("proto_pb2.py", "x = 1\n")
+        self.write("gen.py", "# @generated by a tool\nx = 1\n")
+        self.write("app.min.js", "var a=1;")
+        self.write("bundle.js", "var a=1;" * 2000)
+        self.write("big.py", "x = 1\n" * 20000)
+        
+        discovery = FileDiscovery(extensions=['.py', '.js'], max_file_size=64 * 1024, max_workers=4)
+        files = discovery.discover(self.root)
+        
+        self.assertEqual(files, [(kept, kept.stat().st_size)])
+        self.assertEqual(discovery.skipped["ignored"], 3)
+        self.assertEqual(discovery.skipped["excluded"], 1)
+        self.assertEqual(discovery.skipped["binary"], 1)
+        self.assertEqual(discovery.skipped["generated"], 3)
+        self.assertEqual(discovery.skipped["minified"], 1)
+        self.assertEqual(discovery.skipped["too_large"], 1)
+        
+        # Ignore files and the size limit can be turned off
+        discovery = FileDiscovery(extensions=['.py'], max_file_size=None, use_ignore_files=False)
+        names = {f.path.name for f in discovery.discover(self.root)}
+        self.assertEqual(names, {"module.py", "local.py", "other.skip.py", "a.py", "big.py"})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+import os
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from src.analyzer import CodeAnalyzer
+from src.git_source import GitError, GitRepository
+from src.result_cache import ResultCache
+
+@unittest.skipIf(shutil.which("git") is None, "git not available")
+class TestGitSource(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.repo = Path(self.tmp.name) / "repo"
+        self.repo.mkdir()
+        self.git("init", "-q")
+        
+        (self.repo / "models.py").write_text("class User:\n    def __init__(self, name):\n        self.name = name\n")
+        (self.repo / "util.py").write_text("def helper(value):\n    return value * 2\n")
+        (self.repo / "bundle.min.js").write_text("var a=1;\n")
+        self.commit("first")
+        
+        # The second revision changes one file and copies another
+        (self.repo / "util.py").write_text("def helper(value):\n    return value * 3\n")
+        shutil.copy(self.repo / "models.py", self.repo / "copy.py")
+        self.commit("second")
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def git(self, *args):
+        env = dict(os.environ, GIT_AUTHOR_NAME="a", GIT_AUTHOR_EMAIL="a@example.com",
+                   GIT_COMMITTER_NAME="a", GIT_COMMITTER_EMAIL="a@example.com")
+        return subprocess.run(["git", "-C", str(self.repo), *args], check=True,
+                              stdout=subprocess.PIPE, env=env).stdout
+    
+    def commit(self, message):
+        self.git("add", "-A")
+        self.git("commit", "-q", "-m", message)
+    
+    def test_read_revision(self):
+        with GitRepository(self.repo) as repo:
+            first = repo.list_blobs("HEAD~1")
+            self.assertEqual([blob.path for blob in first], ["models.py", "util.py"])
+            self.assertEqual(repo.read_blob(first[1].oid), b"def helper(value):\n    return value * 2\n")
+            self.assertEqual([blob.path for blob in repo.list_blobs("HEAD", [".py"])],
+                             ["copy.py", "models.py", "util.py"])
+            
+            with self.assertRaises(GitError):
+                repo.list_blobs("no-such-branch")
+            with self.assertRaises(GitError):
+                repo.read_blob("0" * len(first[0].oid))
+            
+            # The cat-file process keeps working after an error
+            self.assertEqual(repo.read_blob(first[1].oid)[:3], b"def")
+        
+        with self.assertRaises(GitError):
+            GitRepository(self.tmp.name)
+    
+    def test_unchanged_blobs_are_parsed_once(self):
+        analyzer = CodeAnalyzer()
+        if not analyzer.parser.manager.ensure_language_installed('python'):
+            self.skipTest("Python grammar not available")
+        
+        parse_source = analyzer.parser.parse_source
+        with mock.patch.object(analyzer.parser, 'parse_source', side_effect=parse_source) as parsed:
+            results = list(analyzer.iter_analyze_revisions(self.repo, ["HEAD~1", "HEAD"], 'function_definition'))
+        
+        # models.py, util.py and the changed util.py
+        self.assertEqual(parsed.call_count, 3)
+        self.assertEqual([result["file"] for result in results],
+                         ["HEAD~1:models.py", "HEAD~1:util.py", "HEAD:copy.py", "HEAD:models.py", "HEAD:util.py"])
+        
+        # Results match those of the checked out files
+        for result in results[2:]:
+            path = result["file"].split(":", 1)[1]
+            expected = analyzer.analyze_file(self.repo / path, 'function_definition')
+            self.assertEqual(result["summary"], expected["summary"])
+            matches = result["patterns"]["function_definition"]
+            self.assertEqual([m["line"] for m in matches],
+                             [m["line"] for m in expected["patterns"]["function_definition"]])
+            self.assertTrue(all(m["file"] == result["file"] for m in matches))
+    
+    def test_cached_blobs_are_not_read(self):
+        cache = ResultCache(Path(self.tmp.name) / "cache")
+        try:
+            analyzer = CodeAnalyzer(cache=cache)
+            if not analyzer.parser.manager.ensure_language_installed('python'):
+                self.skipTest("Python grammar not available")
+            expected = list(analyzer.iter_analyze_revisions(self.repo, ["HEAD~1"]))
+            
+            with GitRepository(self.repo) as repo:
+                with mock.patch.object(repo, 'read_blob') as read_blob:
+                    results = list(analyzer.iter_analyze_revisions(repo, ["HEAD~1", "HEAD"]))
+                
+                # Only the changed util.py is new
+                self.assertEqual(read_blob.call_count, 1)
+            self.assertEqual(len(results), 5)
+            self.assertEqual(results[0]["summary"], expected[0]["summary"])
+        finally:
+            cache.close()
+
+if __name__ == '__main__':
+    unittest.main()
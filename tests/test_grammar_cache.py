@@ -0,0 +1,113 @@
+import unittest
+from unittest import mock
+from pathlib import Path
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from tree_sitter import Language
+
+from src.cli.main import main
+from src.grammar_cache import FileLock, GrammarCache
+from src.tree_sitter_manager import TreeSitterManager
+
+ROOT = Path(__file__).resolve().parent.parent
+PYTHON_LIBRARY = ROOT / "src" / "tree_sitter_languages" / "build" / "python.so"
+
+class TestGrammarCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def test_file_lock_excludes_other_processes(self):
+        lock_path = self.root / "build.lock"
+        script = (
+            "import sys\n"
+            "from src.grammar_cache import FileLock, LockTimeout\n"
+            "try:\n"
+            f"    with FileLock({str(lock_path)!r}, timeout=0.2, poll_interval=0.05):\n"
+            "        sys.exit(0)\n"
+            "except LockTimeout:\n"
+            "    sys.exit(3)\n"
+        )
+        
+        def try_lock_in_subprocess():
+            return subprocess.run([sys.executable, "-c", script], cwd=ROOT).returncode
+        
+        with FileLock(lock_path):
+            self.assertEqual(try_lock_in_subprocess(), 3)
+        self.assertEqual(try_lock_in_subprocess(), 0)
+    
+    def test_build_and_load_prebuilt_grammar(self):
+        if not PYTHON_LIBRARY.exists():
+            self.skipTest("The Python grammar library is not available")
+        
+        source_dir = self.root / "sources" / "python" / "src"
+        source_dir.mkdir(parents=True)
+        (source_dir / "parser.c").write_text("/* parser */\n")
+        (source_dir / "grammar.json").write_text("{}\n")
+        
+        # Stand in for the compiler with the library already built for this platform
+        builds = []
+        def fake_build_library(output_path, repo_paths):
+            builds.append(repo_paths)
+            shutil.copyfile(PYTHON_LIBRARY, output_path)
+            return True
+        
+        cache = GrammarCache(self.root / "prebuilt")
+        manager = TreeSitterManager(str(self.root / "languages"), grammar_cache=cache, allow_build=False)
+        sources = str(self.root / "sources")
+        
+        with mock.patch.object(Language, "build_library", side_effect=fake_build_library):
+            self.assertEqual(cache.build(manager, ["python", "go"], source_root=sources),
+                             {"python": "built", "go": "missing-source"})
+            self.assertEqual(cache.build(manager, ["python"], source_root=sources), {"python": "up-to-date"})
+            self.assertEqual(len(builds), 1)
+            
+            (source_dir / "parser.c").write_text("/* parser, regenerated */\n")
+            self.assertEqual(cache.build(manager, ["python"], source_root=sources), {"python": "built"})
+            self.assertEqual(len(builds), 2)
+        
+        self.assertEqual(builds[0], [os.path.join(sources, "python")])
+        self.assertEqual(sorted(os.listdir(cache.directory)), [".build.lock", "manifest.json", "python.so"])
+        
+        # The manager loads the prebuilt grammar and does not build missing ones
+        self.assertTrue(manager.ensure_language_installed("python"))
+        self.assertEqual(manager.parse_code("x = 1\n", "python").root_node.type, "module")
+        self.assertFalse(manager.ensure_language_installed("go"))
+    
+    def test_fetch_into_source_dir(self):
+        if not PYTHON_LIBRARY.exists():
+            self.skipTest("The Python grammar library is not available")
+        
+        # Stand in for git with a clone that holds the generated sources
+        clones = []
+        def fake_clone(command, **kwargs):
+            repo_dir = Path(command[-1])
+            clones.append(repo_dir)
+            (repo_dir / "src").mkdir(parents=True)
+            (repo_dir / "src" / "parser.c").write_text("/* parser */\n")
+            (repo_dir / "src" / "grammar.json").write_text("{}\n")
+            return subprocess.CompletedProcess(command, 0)
+        
+        def fake_build_library(output_path, repo_paths):
+            shutil.copyfile(PYTHON_LIBRARY, output_path)
+            return True
+        
+        sources = self.root / "sources"
+        with mock.patch("src.tree_sitter_manager.subprocess.run", side_effect=fake_clone), \
+                mock.patch.object(Language, "build_library", side_effect=fake_build_library):
+            self.assertEqual(main(["grammars", "build", "python", "--source-dir", str(sources),
+                                   "--fetch", "--grammar-dir", str(self.root / "prebuilt")]), 0)
+        
+        self.assertEqual(clones, [sources / "python"])
+        self.assertIsNotNone(GrammarCache(self.root / "prebuilt").library_path("python"))
+
+if __name__ == '__main__':
+    unittest.main()
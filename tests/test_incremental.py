@@ -0,0 +1,68 @@
+import unittest
+from pathlib import Path
+import tempfile
+
+from src.analyzer import CodeAnalyzer
+from src.incremental import compute_edit
+
+class TestIncrementalAnalyzer(unittest.TestCase):
+    
+    def setUp(self):
+        self.analyzer = CodeAnalyzer()
+        if not self.analyzer.parser.manager.ensure_language_installed('python'):
+            self.skipTest("Python grammar not available")
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp.name) / "module.py"
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def test_compute_edit(self):
+        edit = compute_edit(b"def f():\n    pass\n", b"def f():\n    return 1\n")
+        self.assertEqual(edit.start_byte, 13)
+        self.assertEqual(edit.start_point, (1, 4))
+        self.assertIsNone(compute_edit(b"same", b"same"))
+    
+    def test_update_matches_full_analysis(self):
+        lines = [f"def func_{i}(x):\n    return x + {i}\n\n" for i in range(30)]
+        self.path.write_text("".join(lines))
+        
+        incremental = self.analyzer.create_incremental_analyzer('function_definition')
+        incremental.update(self.path)
+        self.assertEqual(incremental.last_stats['mode'], 'full')
+        
+        # Rename one function and insert a new one in the middle of the file
+        lines[10] = "def renamed(x):\n    return x\n\n"
+        lines.insert(20, "def added(y):\n    return y\n\n")
+        self.path.write_text("".join(lines))
+        
+        result = incremental.update(self.path)
+        self.assertEqual(incremental.last_stats['mode'], 'incremental')
+        
+        expected = self.analyzer.analyze_file(self.path, 'function_definition')
+        self.assertEqual(result['patterns'], expected['patterns'])
+        self.assertEqual(result['summary'], expected['summary'])
+        
+        incremental.update(self.path)
+        self.assertEqual(incremental.last_stats['mode'], 'unchanged')
+    
+    def test_edit_inside_long_function(self):
+        # The function is longer than the region around the edit, so its
+        # match starts before the region and must still end where it now ends
+        lines = ["def long_function(x):\n"] + [f"    x = x + {i}\n" for i in range(60)] + ["    return x\n"]
+        self.path.write_text("".join(lines))
+        
+        incremental = self.analyzer.create_incremental_analyzer('function_definition')
+        incremental.update(self.path)
+        
+        lines[40:40] = ["    y = x\n", "    x = y\n"]
+        self.path.write_text("".join(lines))
+        
+        result = incremental.update(self.path)
+        self.assertEqual(incremental.last_stats['mode'], 'incremental')
+        
+        expected = self.analyzer.analyze_file(self.path, 'function_definition')
+        self.assertEqual(result['patterns'], expected['patterns'])
+
+if __name__ == '__main__':
+    unittest.main()
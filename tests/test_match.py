@@ -0,0 +1,100 @@
+import unittest
+import json
+import pickle
+import sys
+
+from src.analyzer import CodeAnalyzer
+from src.match import CaptureSpan, Match, to_json_default
+from src.visualization import HTMLReport
+
+def make_match(file_path='/repo/src/app.py'):
+    match = Match('function_definition', 'handler', 3, 0, 5, 12, file_path)
+    match['function'] = CaptureSpan('def handler():\n    pass', 3, 0, 5, 12)
+    return match
+
+class TestMatch(unittest.TestCase):
+
+    def setUp(self):
+        self.expected = {
+            'type': 'function_definition',
+            'name': 'handler',
+            'line': 3,
+            'column': 0,
+            'end_line': 5,
+            'end_column': 12,
+            'file': '/repo/src/app.py',
+            'function': {
+                'text': 'def handler():\n    pass',
+                'line': 3,
+                'column': 0,
+                'end_line': 5,
+                'end_column': 12,
+            },
+        }
+    
+    def test_behaves_like_the_dictionary_it_replaces(self):
+        match = make_match()
+        
+        self.assertEqual(match, self.expected)
+        self.assertEqual(list(match), list(self.expected))
+        self.assertEqual(match['function']['text'], 'def handler():\n    pass')
+        self.assertEqual(match.get('missing', 'default'), 'default')
+        
+        without_file = Match('function_definition', 'handler', 3, 0, 5, 12)
+        self.assertNotIn('file', without_file)
+        self.assertIsNone(without_file.get('file'))
+        with self.assertRaises(KeyError):
+            without_file['file']
+        
+        # Patterns add and remove details like on a dictionary
+        match['parameters'] = []
+        del match['end_column']
+        self.assertEqual(list(match)[-2:], ['function', 'parameters'])
+        self.assertNotIn('end_column', match)
+    
+    def test_serializes_like_the_dictionary(self):
+        match = make_match()
+        
+        self.assertEqual(match.to_dict(), self.expected)
+        self.assertEqual(json.dumps(match, default=to_json_default), json.dumps(self.expected))
+        self.assertEqual(Match.from_dict(self.expected), match)
+        self.assertIsInstance(Match.from_dict(self.expected)['function'], CaptureSpan)
+        with self.assertRaises(TypeError):
+            json.dumps(object(), default=to_json_default)
+    
+    def test_interns_repeated_strings(self):
+        first = make_match(''.join(['/repo/src/', 'app.py']))
+        second = make_match(''.join(['/repo/src/', 'app.py']))
+        self.assertIs(first['file'], second['file'])
+        self.assertIs(first['type'], second['type'])
+        
+        restored = pickle.loads(pickle.dumps(first))
+        self.assertEqual(restored, first)
+        self.assertIs(restored['file'], sys.intern('/repo/src/app.py'))
+        self.assertIsInstance(restored['function'], CaptureSpan)
+    
+    def test_reports_accept_matches(self):
+        result = {
+            'file': '/repo/src/app.py',
+            'language': 'python',
+            'patterns': {'function_definition': [make_match()]},
+            'summary': {
+                'total_patterns': 1,
+                'pattern_counts': {'function_definition': 1},
+                'type_counts': {'function_definition': 1},
+            },
+        }
+        as_dicts = dict(result, patterns={'function_definition': [self.expected]})
+        analyzer = CodeAnalyzer()
+        
+        for output_format in ('json', 'ndjson', 'text'):
+            with self.subTest(output_format=output_format):
+                self.assertEqual(analyzer.generate_report([result], output_format),
+                                 analyzer.generate_report([as_dicts], output_format))
+        
+        html = HTMLReport(include_charts=False).generate([result])
+        self.assertIn('handler', html)
+        self.assertEqual(html, HTMLReport(include_charts=False).generate([as_dicts]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+import unittest
+import io
+
+from src.analyzer import CodeAnalyzer
+from src.ndjson_report import iter_ndjson, load_ndjson_summary
+from src.visualization import summarize_results
+
+class TestNDJSONReport(unittest.TestCase):
+
+    def setUp(self):
+        self.analyzer = CodeAnalyzer()
+        self.results = [
+            {
+                'file': 'a.py',
+                'language': 'python',
+                'patterns': {'function_definition': [{'name': 'f', 'type': 'function', 'line': 1}]},
+                'summary': {
+                    'total_patterns': 1,
+                    'pattern_counts': {'function_definition': 1},
+                    'type_counts': {'function': 1}
+                }
+            },
+            {'file': 'b.py', 'error': 'Could not parse'},
+        ]
+    
+    def test_one_compact_line_per_file(self):
+        output = io.StringIO()
+        self.analyzer.write_report(iter(self.results), output, 'ndjson')
+        
+        lines = output.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertNotIn('\n', lines[0])
+        self.assertEqual(list(iter_ndjson(io.StringIO(output.getvalue()))), self.results)
+    
+    def test_summary_matches_in_memory_aggregates(self):
+        report = self.analyzer.generate_report(self.results, 'ndjson')
+        
+        summary = load_ndjson_summary(io.StringIO(report))
+        self.assertEqual(summary, summarize_results(self.results))
+        self.assertEqual(summary['files_count'], 1)
+        self.assertEqual(summary['error_count'], 1)
+        self.assertEqual(summary['pattern_counts'], {'function_definition': 1})
+
+if __name__ == '__main__':
+    unittest.main()
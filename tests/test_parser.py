@@ -1,6 +1,7 @@
 import unittest
 from pathlib import Path
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 
 from src.parser import CodeParser
 
@@ -40,5 +41,44 @@ class TestCodeParser(unittest.TestCase):
         result = self.parser.parse_code('print("hello")', 'unsupported')
         self.assertIsNone(result)
 
+    def test_query_cache_reuses_compiled_query(self):
+        # Compiled queries are shared, so the second lookup is a cache hit
+        if not self.parser.manager.ensure_language_installed('python'):
+            self.skipTest("Python grammar not available")
+            
+        query_string = "(function_definition name: (identifier) @name)"
+        stats_before = self.parser.manager.get_query_cache_stats()
+        
+        first = self.parser.manager.get_query('python', query_string)
+        second = CodeParser().manager.get_query('python', query_string)
+        
+        stats_after = self.parser.manager.get_query_cache_stats()
+        self.assertIs(first, second)
+        self.assertEqual(stats_after['hits'] - stats_before['hits'], 1)
+        self.assertLessEqual(stats_after['misses'] - stats_before['misses'], 1)
+        
+        # Queries through the parser go through the same cache
+        tree = self.parser.parse_code("def f():\n    pass\n", 'python')
+        results = self.parser.query(tree, query_string, 'python')
+        self.assertEqual([r['capture'] for r in results], ['name'])
+        self.assertEqual(self.parser.manager.get_query_cache_stats()['hits'], stats_after['hits'] + 1)
+
+    def test_parser_pool_concurrent_parsing(self):
+        # Concurrent parses each get their own parser, capped by the pool size
+        parser = CodeParser(parser_pool_size=2)
+        if not parser.manager.ensure_language_installed('python'):
+            self.skipTest("Python grammar not available")
+        
+        sources = [f"def func_{i}(x):\n    return x + {i}\n" * (i + 1) for i in range(16)]
+        expected = [parser.parse_code(code, 'python').root_node.sexp() for code in sources]
+        
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            trees = list(executor.map(lambda code: parser.parse_code(code, 'python'), sources * 4))
+        
+        self.assertEqual([tree.root_node.sexp() for tree in trees], expected * 4)
+        stats = parser.manager.get_parser_pool('python').get_stats()
+        self.assertLessEqual(stats['created'], 2)
+        self.assertEqual(stats['in_use'], 0)
+
 if __name__ == '__main__':
     unittest.main()
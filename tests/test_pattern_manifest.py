@@ -0,0 +1,77 @@
+import unittest
+import importlib
+import subprocess
+import sys
+import json
+from pathlib import Path
+
+from src.pattern_manifest import PATTERN_MANIFEST
+from src.pattern_registry import PatternRegistry
+
+ROOT = Path(__file__).resolve().parent.parent
+
+class TestPatternManifest(unittest.TestCase):
+
+    def test_entries_match_pattern_classes(self):
+        names = [spec.name for spec in PATTERN_MANIFEST]
+        self.assertEqual(len(names), len(set(names)))
+        
+        for spec in PATTERN_MANIFEST:
+            with self.subTest(pattern=spec.name):
+                cls = getattr(importlib.import_module(spec.module), spec.class_name)
+                pattern = cls()
+                self.assertEqual(pattern.name, spec.name)
+                
+                # The declared languages are the ones registering the instance would record
+                eager = PatternRegistry()
+                eager.register(pattern, list(spec.categories))
+                lazy = PatternRegistry()
+                lazy.declare(spec)
+                self.assertEqual(lazy.languages, eager.languages)
+                self.assertEqual(lazy.categories, eager.categories)
+                
+                self.assertFalse(lazy.patterns.is_loaded(spec.name))
+                self.assertIsInstance(lazy.get_pattern(spec.name), cls)
+                self.assertTrue(lazy.patterns.is_loaded(spec.name))
+    
+    def test_snapshot_and_restore(self):
+        registry = PatternRegistry()
+        for spec in PATTERN_MANIFEST:
+            registry.declare(spec)
+        snapshot = registry.snapshot()
+        names = list(registry.patterns)
+        categories = {category: set(members) for category, members in registry.categories.items()}
+        
+        extra = registry.get_pattern(names[0])
+        registry.register(type(extra)(), ["extra"])
+        registry.restore(snapshot)
+        
+        # Declared patterns stay lazy, and changes after the snapshot are undone
+        self.assertEqual(list(registry.patterns), names)
+        self.assertEqual(registry.categories, categories)
+        self.assertFalse(registry.patterns.is_loaded(names[1]))
+        self.assertIsNotNone(registry.get_pattern(names[1]))
+        self.assertTrue(registry.patterns.is_loaded(names[1]))
+        self.assertFalse(snapshot.patterns.is_loaded(names[1]))
+    
+    def test_listing_does_not_import_patterns(self):
+        script = (
+            "import sys, json\n"
+            "from src.pattern_registry import registry\n"
+            "from src.pattern_recognizer import PatternRecognizer\n"
+            "recognizer = PatternRecognizer()\n"
+            "names = recognizer.get_available_patterns()\n"
+            "recognizer.get_patterns_by_category('design_patterns')\n"
+            "recognizer.get_patterns_by_language('python')\n"
+            "registry.fingerprint()\n"
+            "print(json.dumps([len(names), sorted(m for m in sys.modules if m.startswith('src.patterns.'))]))\n"
+        )
+        completed = subprocess.run([sys.executable, "-c", script], cwd=ROOT,
+                                   capture_output=True, text=True, check=True)
+        count, modules = json.loads(completed.stdout.strip().splitlines()[-1])
+        
+        self.assertEqual(count, len(PATTERN_MANIFEST))
+        self.assertEqual(modules, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import unittest
+import os
+import tempfile
+
+from src.analyzer import CodeAnalyzer
+from src.pattern_base import QueryBasedPattern
+from src.pattern_recognizer import PatternRecognizer
+from src.pattern_registry import PatternRegistry
+from src.patterns.function_patterns import FunctionDefinitionPattern
+from src.prefilter import query_keywords, regex_keywords
+from src.profiling import Profiler
+
+ADAPTER_QUERY = """
+(class_definition
+  name: (identifier) @name
+  (#match? @name "Adapter$|Wrapper$")) @class
+"""
+
+PLAIN_CODE = """
+class Greeter:
+    def greet(self, name):
+        return f"Hello, {name}"
+"""
+
+ADAPTER_CODE = """
+class PrinterAdapter:
+    def __init__(self, printer):
+        self.printer = printer
+"""
+
+class TestPrefilter(unittest.TestCase):
+
+    def test_keywords_from_predicates(self):
+        self.assertEqual(regex_keywords("Facade$|Service$"), {"Facade", "Service"})
+        self.assertEqual(regex_keywords("^[A-Za-z]*(Strategy|Handler)$"), {"Strategy", "Handler"})
+        self.assertEqual(regex_keywords("^_?instance$"), {"instance"})
+        self.assertIsNone(regex_keywords("(?i)adapter"))
+        self.assertIsNone(regex_keywords("^[A-Z]"))
+        
+        self.assertEqual(query_keywords(ADAPTER_QUERY), {b"Adapter", b"Wrapper"})
+        self.assertEqual(
+            query_keywords('(function_definition name: (identifier) @n (#eq? @n "__init__")) @f'),
+            {b"__init__"}
+        )
+        
+        # Predicates on captures that a match may lack require nothing
+        self.assertIsNone(query_keywords(
+            '(class_definition body: (block (function_definition name: (identifier) @m '
+            '(#eq? @m "__init__"))?)) @c'
+        ))
+        self.assertIsNone(query_keywords(
+            '[(class_definition name: (identifier) @n (#match? @n "Adapter$")) '
+            '(function_definition name: (identifier) @f)] @c'
+        ))
+        
+        # Every top-level pattern has to require a keyword
+        self.assertIsNone(query_keywords(ADAPTER_QUERY + "\n(function_definition) @f"))
+    
+    def test_skipped_queries_match_nothing(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = []
+            for name, code in (("plain.py", PLAIN_CODE), ("adapter.py", ADAPTER_CODE)):
+                path = os.path.join(tmp, name)
+                with open(path, "w") as f:
+                    f.write(code)
+                paths.append(path)
+            
+            profiler = Profiler()
+            analyzer = CodeAnalyzer(profiler=profiler)
+            registry = PatternRegistry()
+            registry.register(
+                QueryBasedPattern("adapter_class", "Adapter classes", ["python"], {"python": ADAPTER_QUERY}),
+                ["test"]
+            )
+            registry.register(FunctionDefinitionPattern(), ["test"])
+            analyzer.pattern_recognizer = PatternRecognizer(registry, analyzer.parser)
+            
+            # On its own and as part of a fused query
+            alone = [analyzer.analyze_file(path, "adapter_class") for path in paths]
+            fused = [analyzer.analyze_file(path) for path in paths]
+        
+        self.assertEqual(alone[0]["patterns"], {})
+        self.assertEqual(len(alone[1]["patterns"]["adapter_class"]), 1)
+        self.assertEqual([r["patterns"].get("adapter_class") for r in fused],
+                         [r["patterns"].get("adapter_class") for r in alone])
+        self.assertEqual(len(fused[0]["patterns"]["function_definition"]), 1)
+        
+        self.assertEqual(
+            profiler.prefilter_totals()["adapter_class"],
+            {"checked": 4, "skipped": 2, "hit_rate": 0.5}
+        )
+        self.assertIn("Keyword prefilter: skipped 2 of 4 queries", profiler.format_report())
+    
+    def test_declared_keywords(self):
+        pattern = QueryBasedPattern(
+            "adapter_class", "Adapter classes", ["python"], {"python": ADAPTER_QUERY},
+            keywords={"python": ["class"]}
+        )
+        self.assertEqual(pattern.get_keywords("python"), {b"class"})
+        self.assertEqual(pattern.get_keywords("python", "(identifier) @i"), None)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+import json
+import os
+import tempfile
+
+from src.analyzer import CodeAnalyzer
+from src.profiling import FUSED_QUERY, Profiler
+
+PYTHON_CODE = """
+class Greeter:
+    def greet(self, name):
+        return f"Hello, {name}"
+
+def main():
+    Greeter().greet("world")
+"""
+
+JS_CODE = """
+function add(a, b) {
+    return a + b;
+}
+"""
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.files = []
+        for name, code in (("greeter.py", PYTHON_CODE), ("add.js", JS_CODE)):
+            path = os.path.join(self.tmp.name, name)
+            with open(path, "w") as f:
+                f.write(code)
+            self.files.append(path)
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def test_profile_records_stages_patterns_and_files(self):
+        profiler = Profiler(top_files=1)
+        analyzer = CodeAnalyzer(profiler=profiler)
+        results = [analyzer.analyze_file(path) for path in self.files]
+        
+        # Profiling does not change the results
+        self.assertEqual(results, [CodeAnalyzer().analyze_file(path) for path in self.files])
+        
+        data = profiler.to_dict()
+        self.assertEqual(data["files"], 2)
+        stages = {(row["stage"], row["language"]) for row in data["stages"]}
+        self.assertTrue({("read", "python"), ("parse", "python"), ("match", "javascript"), ("total", "javascript")} <= stages)
+        
+        patterns = {(row["pattern"], row["language"]): row for row in data["patterns"]}
+        self.assertIn((FUSED_QUERY, "python"), patterns)
+        self.assertEqual(
+            patterns[("function_definition", "python")]["matches"],
+            len(results[0]["patterns"]["function_definition"])
+        )
+        self.assertTrue(all(row["wall"] >= 0 and row["cpu"] >= 0 for row in data["patterns"]))
+        
+        # Only the slowest file is kept, with its per-pattern breakdown
+        self.assertEqual(len(data["slowest_files"]), 1)
+        self.assertIn("function_definition", data["slowest_files"][0]["patterns"])
+        
+        report = profiler.format_report()
+        self.assertIn("Slowest patterns", report)
+        self.assertIn("Top 1 slowest files", report)
+    
+    def test_merge_round_trip(self):
+        profiler = Profiler()
+        CodeAnalyzer(profiler=profiler).analyze_file(self.files[0])
+        data = json.loads(json.dumps(profiler.to_dict()))
+        
+        merged = Profiler.from_dict(data)
+        merged.merge(data)
+        
+        self.assertEqual(merged.files, 2)
+        self.assertEqual(len(merged.slowest_files()), 2)
+        totals = merged.pattern_totals()
+        self.assertEqual(totals["function_definition"]["calls"], 2)
+        self.assertEqual(
+            totals["function_definition"]["matches"],
+            2 * profiler.pattern_totals()["function_definition"]["matches"]
+        )
+        
+        with self.assertRaises(ValueError):
+            Profiler.from_dict({"version": 0})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+
+from src.analyzer import CodeAnalyzer
+from src.pattern_recognizer import PatternRecognizer
+from src.pattern_registry import PatternRegistry
+from src.patterns.class_patterns import ClassDefinitionPattern
+from src.patterns.function_patterns import FunctionDefinitionPattern, MethodDefinitionPattern
+from src.query_plan import FusedQuery, namespace_query
+from src.source_buffer import SourceBuffer
+
+SAMPLE = b'''
+class Shape:
+    def __init__(self, size):
+        self.size = size
+    
+    def area(self):
+        if self.size > 0 and self.size < 10 or self.size == 42:
+            return self.size * self.size
+        return 0
+
+def create_shape(kind):
+    return Shape(kind)
+'''
+
+class TestQueryPlan(unittest.TestCase):
+
+    def setUp(self):
+        self.analyzer = CodeAnalyzer()
+        if not self.analyzer.parser.manager.ensure_language_installed('python'):
+            self.skipTest("Python grammar not available")
+    
+    def test_namespace_query_renames_captures_only(self):
+        query = '(decorator (identifier) @name (#eq? @name "@property")) @decorator ; uses @name'
+        self.assertEqual(
+            namespace_query(query, 'p'),
+            '(decorator (identifier) @p.name (#eq? @p.name "@property")) @p.decorator ; uses @name'
+        )
+    
+    def test_fused_matches_equal_separate_matches(self):
+        recognizer = self.analyzer.pattern_recognizer
+        source = SourceBuffer(SAMPLE)
+        tree = self.analyzer.parser.parse_source(source, 'python')
+        patterns = recognizer.select_patterns('python')
+        
+        fused = FusedQuery('python', patterns, self.analyzer.parser.manager)
+        self.assertGreater(len(fused.patterns), 1)
+        
+        expected = {}
+        for pattern in fused.patterns:
+            matches = pattern.match(tree, source.data, 'python')
+            if matches:
+                expected[pattern.name] = matches
+        
+        results = recognizer.match_patterns(tree, source, 'python', fused.patterns)
+        self.assertEqual(results, expected)
+
+    def test_plans_are_cached_until_the_registry_changes(self):
+        registry = PatternRegistry()
+        registry.register(FunctionDefinitionPattern(), ["functions"])
+        registry.register(ClassDefinitionPattern(), ["classes"])
+        recognizer = PatternRecognizer(registry, self.analyzer.parser)
+        
+        plan = recognizer.get_plan('python')
+        self.assertIs(recognizer.get_plan('python'), plan)
+        self.assertEqual([p.name for p in plan.patterns], ['function_definition', 'class_definition'])
+        self.assertEqual([p.name for p in recognizer.get_plan('python', category='classes').patterns],
+                         ['class_definition'])
+        self.assertEqual(recognizer.get_plan('brainfuck').patterns, ())
+        
+        fused = recognizer.get_fused_query(plan, self.analyzer.parser.manager)
+        self.assertIs(recognizer.get_fused_query(plan, self.analyzer.parser.manager), fused)
+        self.assertEqual([step['kind'] for step in plan.describe(fused)], ['fused', 'fused'])
+        
+        registry.register(MethodDefinitionPattern(), ["functions"])
+        new_plan = recognizer.get_plan('python')
+        self.assertIsNot(new_plan, plan)
+        self.assertIn('method_definition', [p.name for p in new_plan.patterns])
+
+if __name__ == '__main__':
+    unittest.main()
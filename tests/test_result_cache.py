@@ -0,0 +1,97 @@
+import unittest
+from pathlib import Path
+from unittest import mock
+import tempfile
+
+from src.analyzer import CodeAnalyzer
+from src.pattern_base import Pattern
+from src.pattern_registry import registry
+from src.result_cache import ResultCache
+
+class PathPattern(Pattern):
+    """Names a component after the file, like the architectural intents."""
+    
+    path_dependent = True
+    
+    def __init__(self):
+        super().__init__("path_component", "Component named after its file", ["python"])
+        self.queries = {"python": "(module) @module"}
+    
+    def match(self, tree, code, language, file_path=None, context=None):
+        return [{"type": "component", "name": file_path, "layer": Path(file_path).parent.name}]
+
+class TestResultCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(Path(self.tmp.name) / "cache")
+    
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+    
+    def test_cache_hit_skips_parsing(self):
+        analyzer = CodeAnalyzer(cache=self.cache)
+        if not analyzer.parser.manager.ensure_language_installed('python'):
+            self.skipTest("Python grammar not available")
+        
+        first = Path(self.tmp.name) / "first.py"
+        second = Path(self.tmp.name) / "second.py"
+        first.write_text("def f(a):\n    return a\n")
+        second.write_text(first.read_text())
+        
+        expected = analyzer.analyze_file(first, 'function_definition')
+        
+        # Same contents under another name are served from the cache
+        with mock.patch.object(analyzer.parser, 'parse_source') as parse_source:
+            result = analyzer.analyze_file(second, 'function_definition')
+            parse_source.assert_not_called()
+        
+        self.assertEqual(result['file'], str(second))
+        self.assertEqual(result['patterns']['function_definition'][0]['file'], str(second))
+        self.assertEqual(result['summary'], expected['summary'])
+        
+        # A different pattern selection is a different entry
+        analyzer.analyze_file(second, 'class_definition')
+        self.assertEqual(self.cache.get_stats()['entries'], 2)
+    
+    def test_path_dependent_patterns_are_cached_per_path(self):
+        analyzer = CodeAnalyzer(cache=self.cache)
+        if not analyzer.parser.manager.ensure_language_installed('python'):
+            self.skipTest("Python grammar not available")
+        
+        snapshot = registry.snapshot()
+        self.addCleanup(registry.restore, snapshot)
+        registry.register(PathPattern())
+        
+        first = Path(self.tmp.name) / "domain" / "same.py"
+        second = Path(self.tmp.name) / "web" / "same.py"
+        for path in (first, second):
+            path.parent.mkdir()
+            path.write_text("def f(a):\n    return a\n")
+        
+        analyzer.analyze_file(first, 'path_component')
+        result = analyzer.analyze_file(second, 'path_component')
+        self.assertEqual(result['patterns']['path_component'], [
+            {"type": "component", "name": str(second), "layer": "web"}
+        ])
+        self.assertEqual(self.cache.get_stats()['entries'], 2)
+        
+        # The same path is still served from the cache
+        with mock.patch.object(analyzer.parser, 'parse_source') as parse_source:
+            self.assertEqual(analyzer.analyze_file(second, 'path_component'), result)
+            parse_source.assert_not_called()
+    
+    def test_eviction_keeps_cache_under_max_size(self):
+        cache = ResultCache(Path(self.tmp.name) / "small", max_size=2000)
+        for i in range(20):
+            cache.put(f"key-{i}", {"file": "x.py", "payload": "x" * 200})
+        
+        stats = cache.get_stats()
+        self.assertLessEqual(stats['size'], 2000)
+        self.assertIsNone(cache.get("key-0"))
+        self.assertIsNotNone(cache.get("key-19"))
+        cache.close()
+
+if __name__ == '__main__':
+    unittest.main()
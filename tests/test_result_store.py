@@ -0,0 +1,85 @@
+import unittest
+from unittest import mock
+import os
+import tempfile
+
+from src import result_store
+from src.result_store import ResultStore
+from src.visualization import HTMLReport, summarize_results
+
+def make_match(name, match_type, line, file_path):
+    match = {'name': name, 'line': line, 'column': 0, 'end_line': line + 1, 'end_column': 8, 'file': file_path}
+    if match_type is not None:
+        match['type'] = match_type
+    return match
+
+class TestResultStore(unittest.TestCase):
+
+    def setUp(self):
+        self.results = [
+            {
+                'file': 'a.py',
+                'language': 'python',
+                'patterns': {
+                    'function_definition': [make_match('f', 'function', 1, 'a.py'), make_match('g', 'function', 4, 'a.py')],
+                    'class_definition': [make_match('C', 'class', 8, 'a.py')],
+                },
+                'summary': {
+                    'total_patterns': 3,
+                    'pattern_counts': {'function_definition': 2, 'class_definition': 1},
+                    'type_counts': {'function': 2, 'class': 1},
+                },
+            },
+            {'file': 'b.js', 'error': 'Could not parse'},
+            {
+                'file': 'c.js',
+                'language': 'javascript',
+                'patterns': {
+                    'class_definition': [make_match('D', 'class', 2, 'c.js')],
+                    'singleton': [make_match('D', None, 2, 'c.js')],
+                },
+                'summary': {
+                    'total_patterns': 2,
+                    'pattern_counts': {'class_definition': 1, 'singleton': 1},
+                    'type_counts': {'class': 1},
+                },
+            },
+        ]
+    
+    def test_summary_matches_summarize_results(self):
+        expected = summarize_results(self.results)
+        store = ResultStore.from_results(self.results)
+        
+        self.assertEqual((len(store), store.match_count), (3, 5))
+        self.assertEqual(list(store.summary().items()), list(expected.items()))
+        self.assertEqual(summarize_results(store), expected)
+        
+        # Counting without numpy gives the same aggregates
+        with mock.patch.object(result_store, 'numpy_module', return_value=None):
+            self.assertEqual(store.summary(), expected)
+    
+    def test_save_load_round_trip(self):
+        store = ResultStore.from_results(self.results)
+        
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'results.cpas')
+            store.save(path)
+            loaded = ResultStore.load(path)
+            
+            with open(path, 'wb') as f:
+                f.write(b'not a store')
+            with self.assertRaises(ValueError):
+                ResultStore.load(path)
+        
+        self.assertEqual(loaded.summary(), store.summary())
+        self.assertEqual(list(loaded), self.results)
+        self.assertEqual(loaded.file_match_counts(), [3, 0, 2])
+    
+    def test_html_report_accepts_store(self):
+        store = ResultStore.from_results(self.results)
+        report = HTMLReport(include_charts=True)
+        
+        self.assertEqual(report.generate(store), report.generate(self.results))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from src import scheduling
+from src.file_discovery import DiscoveredFile
+from src.scheduling import AdaptiveConcurrency, iter_scheduled, plan_batches, plan_windows
+
+def make_files(sizes):
+    return [DiscoveredFile(Path(f"file_{i}.py"), size) for i, size in enumerate(sizes)]
+
+class TestScheduling(unittest.TestCase):
+
+    def test_large_files_first_and_small_files_batched(self):
+        files = make_files([100, 5000, 200, 90000, 300, 150, 40000] + [50] * 100)
+        batches = plan_batches(files, workers=2, target_bytes=10000)
+        
+        # The largest files run first, alone; small files share batches
+        self.assertEqual([b.paths for b in batches[:2]], [("file_3.py",), ("file_6.py",)])
+        self.assertEqual([b.size for b in batches], sorted((b.size for b in batches), reverse=True))
+        self.assertTrue(all(len(b.paths) <= scheduling.MAX_BATCH_FILES for b in batches))
+        self.assertLess(len(batches), 10)
+        
+        # Every file is scheduled exactly once
+        indices = sorted(i for b in batches for i in b.indices)
+        self.assertEqual(indices, list(range(len(files))))
+    
+    def test_ordered_results_across_windows(self):
+        files = make_files([(i * 7919) % 1000 for i in range(50)])
+        
+        with mock.patch.object(scheduling, "ORDERED_WINDOW", 8):
+            windows = plan_windows(files, workers=3, ordered=True)
+            self.assertEqual(len(windows), 7)
+            
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                def submit(batch):
+                    return executor.submit(lambda paths: list(paths), batch.paths)
+                
+                results = list(iter_scheduled(submit, windows, AdaptiveConcurrency(3, 3), ordered=True))
+        
+        self.assertEqual(results, [str(f.path) for f in files])
+    
+    def test_concurrency_follows_throughput(self):
+        now = [0.0]
+        
+        def run(concurrency, seconds_per_task):
+            for _ in range(2 * concurrency.limit):
+                now[0] += seconds_per_task
+                concurrency.record(1000)
+        
+        with mock.patch.object(scheduling.time, "perf_counter", lambda: now[0]):
+            concurrency = AdaptiveConcurrency(initial=2, maximum=4)
+            run(concurrency, 0.1)
+            self.assertEqual(concurrency.limit, 3)
+            
+            # Faster with more workers: keep growing
+            run(concurrency, 0.05)
+            self.assertEqual(concurrency.limit, 4)
+            
+            # Slower: turn around
+            run(concurrency, 0.2)
+            self.assertEqual(concurrency.limit, 3)
+            
+            # A fixed number of workers never changes
+            fixed = AdaptiveConcurrency.for_workers(5, "thread")
+            run(fixed, 0.01)
+            self.assertEqual((fixed.limit, fixed.adaptive), (5, False))
+
+if __name__ == '__main__':
+    unittest.main()
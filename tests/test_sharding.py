@@ -0,0 +1,122 @@
+import unittest
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from src.cli.main import main
+from src.parser import CodeParser
+from src.file_discovery import DiscoveredFile
+from src.sharding import FILE_WEIGHT_BYTES, Shard, assign_shards, check_partials, select_shard
+
+SOURCES = {
+    "models/user.py": "class User:\n    def __init__(self, name):\n        self.name = name\n",
+    "models/order.py": "class Order:\n    def total(self):\n        return 0\n",
+    "services/user_service.py": "class UserService:\n    def find(self, name):\n        return None\n",
+    "controllers/user_controller.py": "class UserController:\n    def get(self, request):\n        return request\n",
+    "util.py": "def helper(value):\n    return value * 2\n",
+}
+
+class TestSharding(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, "project")
+        for name, code in SOURCES.items():
+            path = os.path.join(self.root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write(code)
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def output(self, name):
+        return os.path.join(self.tmp.name, name)
+    
+    def run_sharded(self, command, count, *options, roots=None):
+        partials = []
+        for index in range(1, count + 1):
+            partial = self.output(f"{command}-{index}.ndjson")
+            root = roots[(index - 1) % len(roots)] if roots else self.root
+            self.assertEqual(main([command, root, "--shard", f"{index}/{count}", "--no-cache",
+                                   "-o", partial, *options]), 0)
+            partials.append(partial)
+        return partials
+    
+    def run_inside(self, *args):
+        # A single-node run inside the directory labels files relative to it
+        cwd = os.getcwd()
+        os.chdir(self.root)
+        try:
+            return main([args[0], ".", *args[1:]])
+        finally:
+            os.chdir(cwd)
+    
+    def read(self, name):
+        with open(self.output(name)) as f:
+            return f.read()
+    
+    def test_assignment(self):
+        sizes = [9000, 10, 4000, 4000, 300, 5000, 20, 7000]
+        files = [DiscoveredFile(Path(f"/repo/f{i}.py"), size) for i, size in enumerate(sizes)]
+        assignment = assign_shards(files, 3, "/repo")
+        
+        # Deterministic wherever the repository is checked out
+        moved = [DiscoveredFile(Path("/elsewhere") / f.path.name, f.size) for f in files]
+        self.assertEqual(assign_shards(moved, 3, "/elsewhere"), assignment)
+        
+        # Balanced within the largest file
+        loads = [sum(f.size + FILE_WEIGHT_BYTES for f, s in zip(files, assignment) if s == shard)
+                 for shard in (1, 2, 3)]
+        self.assertLessEqual(max(loads) - min(loads), max(sizes) + FILE_WEIGHT_BYTES)
+        
+        # Complete, in the order of the files
+        selected = [select_shard(files, Shard(index, 3), "/repo")[0] for index in (1, 2, 3)]
+        self.assertEqual(sorted(i for indices in selected for i in indices), list(range(len(files))))
+        self.assertTrue(all(indices == sorted(indices) for indices in selected))
+        
+        self.assertEqual(Shard.parse("2/4"), Shard(2, 4))
+        for spec in ("0/4", "5/4", "2", "a/b"):
+            with self.assertRaises(ValueError):
+                Shard.parse(spec)
+    
+    def test_merge_matches_single_node(self):
+        self.assertEqual(self.run_inside("pattern", "-f", "json", "--no-cache",
+                                         "-o", self.output("single.json")), 0)
+        
+        # Shards may run in different checkouts of the repository
+        checkout = os.path.join(self.tmp.name, "checkout")
+        shutil.copytree(self.root, checkout)
+        partials = self.run_sharded("pattern", 3, roots=[self.root, checkout])
+        parse_source = CodeParser.parse_source
+        self.assertEqual(main(["merge", *reversed(partials), "-f", "json",
+                               "-o", self.output("merged.json")]), 0)
+        self.assertEqual(self.read("merged.json"), self.read("single.json"))
+        
+        # Merging only formats results and leaves the implementation alone
+        self.assertIs(CodeParser.parse_source, parse_source)
+        
+        # The codebase-level analysis sees the results of every file
+        self.assertEqual(self.run_inside("architecture", "-f", "json", "--no-cache",
+                                         "-o", self.output("single-architecture.json")), 0)
+        partials = self.run_sharded("architecture", 2, roots=[self.root, checkout])
+        self.assertEqual(main(["merge", *partials, "-f", "json",
+                               "-o", self.output("merged-architecture.json")]), 0)
+        self.assertEqual(self.read("merged-architecture.json"), self.read("single-architecture.json"))
+    
+    def test_merge_rejects_incomplete_runs(self):
+        partials = self.run_sharded("pattern", 3)
+        with self.assertRaises(ValueError):
+            check_partials(partials[:2])
+        with self.assertRaises(ValueError):
+            check_partials(partials + partials[:1])
+        
+        # Shards of different runs do not merge
+        other = self.run_sharded("anti-patterns", 3)
+        with self.assertRaises(ValueError):
+            check_partials(partials[:2] + other[2:])
+        self.assertEqual(main(["merge", *partials[:2]]), 1)
+
+if __name__ == '__main__':
+    unittest.main()